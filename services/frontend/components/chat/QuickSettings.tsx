@@ -71,7 +71,7 @@ export function QuickSettings() {
               </SelectTrigger>
               <SelectContent>
                 <SelectItem value="streaming">Streaming (Real-time, no tool calling)</SelectItem>
-                <SelectItem value="non-streaming">Non-streaming (Tool calling enabled)</SelectItem>
+                <SelectItem value="non-streaming">Non-streaming (Real-time, tool calling enabled)</SelectItem>
                 <SelectItem value="experimental">Experimental (Auto-detect)</SelectItem>
               </SelectContent>
             </Select>
@@ -1,9 +1,9 @@
 """Chat endpoint routes."""
 # Standard library
-import asyncio
 import json
 import logging
 import time
+from typing import List, Optional, Tuple
 
 # Third-party
 from fastapi import APIRouter, HTTPException, Request
@@ -12,6 +12,8 @@ from fastapi.responses import StreamingResponse
 # Local
 from ..schemas import ChatRequest, ChatResponse, MessageMetadata
 from ...config.settings import settings
+from ...services.llm.scheduler import Priority
+from ...services.metrics import get_metrics
 from ...services.service_manager import service_manager
 from ...utils.request_logger import get_request_log_store
 
@@ -214,10 +216,16 @@ async def chat(request: ChatRequest, stream: bool = True):
             logger.debug(f"Creating metadata with sampler_params keys: {list(sampler_params.keys())}")
             logger.debug(f"Creating metadata with result keys: {list(result.keys())}")
             
+            prompt_cache = result.get("prompt_cache") or {}
+            prompt_budget = result.get("prompt_budget")
             metadata = MessageMetadata(
                 model_name=service_manager.llm_manager.current_model_name if service_manager.llm_manager else None,
                 generation_time_ms=round(generation_time_ms, 2),
                 context_length=settings.llm_context_size if service_manager.llm_manager else None,
+                prompt_tokens=prompt_cache.get("prompt_tokens") or (prompt_budget.prompt_tokens if prompt_budget else None),
+                cached_prompt_tokens=prompt_cache.get("cached_tokens"),
+                prompt_token_budget=prompt_budget.budget if prompt_budget else None,
+                history_messages_dropped=prompt_budget.history_dropped if prompt_budget else None,
                 temperature=sampler_params.get("temperature") if sampler_params else None,
                 top_p=sampler_params.get("top_p") if sampler_params else None,
                 top_k=sampler_params.get("top_k") if sampler_params else None,
@@ -256,10 +264,15 @@ async def chat(request: ChatRequest, stream: bool = True):
 async def chat_stream(request: ChatRequest):
     """Handle streaming chat request with configurable modes.
     
+    Tokens are forwarded as the LLM server generates them in every mode.
+    
     Modes:
     - "streaming": Real-time streaming, no tool calling
-    - "non-streaming": Full response with tool calling (simulated streaming)
-    - "experimental": Pre-check for tool calls, then choose mode
+    - "non-streaming": Real-time streaming with tool calling (tool calls are
+      assembled from the stream, executed, and the follow-up answer is streamed)
+    - "experimental": Route the message to the relevant tools by embedding
+      similarity (or an LLM YES/NO pre-check when the router is disabled) and
+      offer only those
     """
     if not service_manager.chat_manager:
         raise HTTPException(
@@ -294,51 +307,37 @@ async def chat_stream(request: ChatRequest):
                 "max_tokens": request.max_tokens if request.max_tokens is not None else saved_settings.get("max_tokens", 512),
             }
             
-            conversation_id = request.conversation_id
-            if not conversation_id:
-                from ...services.chat.manager import generate_conversation_id
-                conversation_id = generate_conversation_id()
+            allow_tools = streaming_mode != "streaming"
+            tool_names = None
             
             # EXPERIMENTAL MODE: Pre-check if tool call is needed
             if streaming_mode == "experimental":
-                logger.info("[CHAT STREAM] Experimental mode: Pre-checking for tool call necessity")
-                needs_tool_call = await _check_if_tool_call_needed(request.message)
-                if needs_tool_call:
-                    logger.info("[CHAT STREAM] Experimental mode: Tool call detected, using non-streaming with tool calling")
-                    streaming_mode = "non-streaming"
+                if settings.tool_router_enabled:
+                    allow_tools, tool_names = await _route_tools(request.message)
                 else:
-                    logger.info("[CHAT STREAM] Experimental mode: No tool call needed, using real streaming")
-                    streaming_mode = "streaming"
-            
-            # STREAMING MODE: Real-time streaming, no tool calling
-            if streaming_mode == "streaming":
-                logger.info("[CHAT STREAM] Using real streaming mode (no tool calling)")
-                async for chunk in _stream_real_time(request.message, conversation_id, sampler_params):
-                    yield chunk
+                    logger.info("[CHAT STREAM] Experimental mode: Pre-checking for tool call necessity")
+                    allow_tools = await _check_if_tool_call_needed(request.message, request.conversation_id)
+                logger.info(f"[CHAT STREAM] Experimental mode: tools {'enabled' if allow_tools else 'disabled'} for this request")
             
-            # NON-STREAMING MODE: Full response with tool calling (simulated streaming)
-            else:
-                logger.info("[CHAT STREAM] Using non-streaming mode with tool calling (simulated streaming)")
-                result = await service_manager.chat_manager.send_message(
-                    message=request.message,
-                    conversation_id=conversation_id,
-                    sampler_params=sampler_params
-                )
-                
-                final_response = result.get("response", "")
-                tool_calls = result.get("tool_calls", [])
-                conversation_id = result.get("conversation_id", "")
-                
-                logger.info(f"[CHAT STREAM] Got response (length: {len(final_response)}, tool_calls: {len(tool_calls)})")
-                
-                # Stream the final response in chunks (simulated streaming)
-                chunk_size = 10
-                for i in range(0, len(final_response), chunk_size):
-                    chunk = final_response[i:i + chunk_size]
-                    yield f"data: {json.dumps({'content': chunk, 'done': False})}\n\n"
-                    await asyncio.sleep(0.01)
-                
-                yield f"data: {json.dumps({'content': '', 'done': True, 'conversation_id': conversation_id, 'tool_calls': tool_calls if tool_calls else None})}\n\n"
+            logger.info(f"[CHAT STREAM] Streaming response (mode={streaming_mode}, tools={'on' if allow_tools else 'off'})")
+            async for event in service_manager.chat_manager.send_message_stream(
+                message=request.message,
+                conversation_id=request.conversation_id,
+                sampler_params=sampler_params,
+                allow_tools=allow_tools,
+                tool_names=tool_names
+            ):
+                if event["type"] == "content":
+                    yield f"data: {json.dumps({'content': event['content'], 'done': False})}\n\n"
+                elif event["type"] == "tool_calls":
+                    yield f"data: {json.dumps({'content': '', 'done': False, 'tool_calls': event['tool_calls']})}\n\n"
+                elif event["type"] == "done":
+                    tool_calls = event.get("tool_calls")
+                    logger.info(f"[CHAT STREAM] Stream complete (length: {len(event.get('response', ''))}, tool_calls: {len(tool_calls) if tool_calls else 0})")
+                    prompt_cache = event.get("prompt_cache")
+                    prompt_budget = event.get("prompt_budget")
+                    prompt_budget = prompt_budget.to_dict() if prompt_budget else None
+                    yield f"data: {json.dumps({'content': '', 'done': True, 'conversation_id': event['conversation_id'], 'tool_calls': tool_calls if tool_calls else None, 'prompt_cache': prompt_cache, 'prompt_budget': prompt_budget})}\n\n"
             
         except Exception as e:
             logger.error(f"Error in streaming chat: {e}", exc_info=True)
@@ -355,7 +354,25 @@ async def chat_stream(request: ChatRequest):
     )
 
 
-async def _check_if_tool_call_needed(message: str) -> bool:
+async def _route_tools(message: str) -> Tuple[bool, Optional[List[str]]]:
+    """Pick the tools a message needs with the embedding router (no LLM call).
+    
+    Returns:
+        Whether to offer tools, and the tools to offer (most relevant first)
+    """
+    if not service_manager.llm_manager or not service_manager.llm_manager.supports_tool_calling:
+        return False, None
+    
+    if not service_manager.tool_manager:
+        return False, None
+    
+    with get_metrics().span("tool_routing"):
+        route = await service_manager.tool_manager.route_message(message)
+    logger.info(f"[CHAT STREAM] Tool router: {route.tools or 'no tools'} in {route.elapsed_ms:.1f}ms (scores: {route.scores})")
+    return route.needs_tools, route.tools
+
+
+async def _check_if_tool_call_needed(message: str, conversation_id: Optional[str] = None) -> bool:
     """Pre-check if a tool call is likely needed based on the message.
     
     Uses a quick LLM call to determine if tools are needed.
@@ -382,137 +399,31 @@ User message: "{message}"
 
 Respond with ONLY "YES" if a tool is needed, or "NO" if no tool is needed. Do not explain."""
         
-        # Make a quick, low-token call to check
-        server_url = service_manager.llm_manager.server_manager.get_server_url()
-        import httpx
-        async with httpx.AsyncClient(timeout=5.0) as client:
+        # Make a quick, low-token call to check (part of the user's turn, so interactive priority)
+        server_manager = service_manager.llm_manager.server_manager
+        server_url = server_manager.get_server_url()
+        client = server_manager.get_client()
+        async with server_manager.scheduler.slot(Priority.INTERACTIVE, client_id=conversation_id):
             response = await client.post(
                 f"{server_url}/v1/chat/completions",
                 json={
-                    "model": service_manager.llm_manager.current_model_name or "default",
+                    "model": server_manager.get_model_id() or service_manager.llm_manager.current_model_name or "default",
                     "messages": [
                         {"role": "system", "content": "You are a tool detection assistant. Answer only YES or NO."},
                         {"role": "user", "content": check_prompt}
                     ],
                     "max_tokens": 10,
                     "temperature": 0.0
-                }
+                },
+                timeout=5.0
             )
-            response.raise_for_status()
-            result = response.json()
-            answer = result.get("choices", [{}])[0].get("message", {}).get("content", "").strip().upper()
-            return answer.startswith("YES")
+        response.raise_for_status()
+        result = response.json()
+        answer = result.get("choices", [{}])[0].get("message", {}).get("content", "").strip().upper()
+        return answer.startswith("YES")
     except Exception as e:
-        logger.warning(f"Error in tool call pre-check: {e}, defaulting to non-streaming")
-        return True  # Default to non-streaming if check fails
-
-
-async def _stream_real_time(message: str, conversation_id: str, sampler_params: dict):
-    """Stream response in real-time from LLM server (no tool calling)."""
-    # Get conversation history
-    await service_manager.chat_manager._initialize()
-    if conversation_id in service_manager.chat_manager.conversations:
-        history = service_manager.chat_manager.conversations[conversation_id]
-    else:
-        history = []
-        service_manager.chat_manager.conversations[conversation_id] = []
-            
-    # Store user message
-    user_msg = {
-        "role": "user",
-        "content": message,
-        "timestamp": time.time()
-    }
-    history.append(user_msg)
-    
-    # Build OpenAI-compatible messages (filter assistant messages without tool_calls)
-    openai_messages = []
-    system_prompt = service_manager.llm_manager._build_system_prompt()
-    if system_prompt:
-        openai_messages.append({"role": "system", "content": system_prompt})
-    
-    for msg in history[:-1]:
-        if not isinstance(msg, dict) or "role" not in msg:
-            continue
-        role = msg.get("role")
-        if role == "assistant":
-            tool_calls = msg.get("tool_calls")
-            if not tool_calls or (isinstance(tool_calls, list) and len(tool_calls) == 0):
-                continue
-            openai_messages.append({
-                "role": "assistant",
-                "content": msg.get("content"),
-                "tool_calls": tool_calls
-            })
-        elif role == "tool":
-            openai_messages.append({
-                "role": "tool",
-                "content": msg.get("content", ""),
-                "tool_call_id": msg.get("tool_call_id")
-            })
-        elif role in ("system", "user"):
-            openai_messages.append({
-                "role": role,
-                "content": msg.get("content", "")
-            })
-            
-    openai_messages.append({"role": "user", "content": message})
-    
-    # Stream from LLM server (NO tools)
-    server_url = service_manager.llm_manager.server_manager.get_server_url()
-    payload = {
-        "model": service_manager.llm_manager.current_model_name or "default",
-        "messages": openai_messages,
-        "temperature": sampler_params["temperature"],
-        "top_p": sampler_params["top_p"],
-        "max_tokens": sampler_params["max_tokens"],
-        "stream": True
-    }
-    
-    import httpx
-    accumulated_content = []
-    async with httpx.AsyncClient(timeout=300.0) as client:
-        async with client.stream(
-            "POST",
-            f"{server_url}/v1/chat/completions",
-            json=payload
-        ) as response:
-            response.raise_for_status()
-            async for line in response.aiter_lines():
-                if line.startswith("data: "):
-                    data_str = line[6:]
-                    if data_str == "[DONE]":
-                        break
-                    try:
-                        chunk_data = json.loads(data_str)
-                        if "choices" in chunk_data and len(chunk_data["choices"]) > 0:
-                            delta = chunk_data["choices"][0].get("delta", {})
-                            content = delta.get("content", "")
-                            if content:
-                                accumulated_content.append(content)
-                                yield f"data: {json.dumps({'content': content, 'done': False})}\n\n"
-                    except json.JSONDecodeError:
-                        continue
-    
-    # Store assistant message
-    full_content = ''.join(accumulated_content)
-    assistant_msg = {
-        "role": "assistant",
-        "content": full_content,
-        "timestamp": time.time()
-    }
-    service_manager.chat_manager.conversations[conversation_id].append(assistant_msg)
-    
-    # Save to memory store
-    if service_manager.chat_manager.memory_store:
-        conv_name = service_manager.chat_manager._conversation_names.get(conversation_id)
-        await service_manager.chat_manager.memory_store.store_conversation(
-            conversation_id=conversation_id,
-                    messages=[user_msg, assistant_msg],
-                    name=conv_name
-                )
-            
-    yield f"data: {json.dumps({'content': '', 'done': True, 'conversation_id': conversation_id, 'tool_calls': None})}\n\n"
+        logger.warning(f"Error in tool call pre-check: {e}, defaulting to tools enabled")
+        return True  # Offer tools if the check fails
 
 
 @router.post("/api/chat/regenerate")
@@ -553,9 +464,6 @@ async def regenerate_last_response(request: Request):
         raise HTTPException(status_code=400, detail="conversation_id is required")
     
     try:
-        # Initialize chat manager to ensure conversations are loaded
-        await service_manager.chat_manager._initialize()
-        
         # Get conversation from chat manager (includes cache)
         conversation = await service_manager.chat_manager.get_conversation(conversation_id)
         if not conversation:
@@ -580,6 +488,8 @@ async def regenerate_last_response(request: Request):
         if service_manager.memory_store and service_manager.memory_store.vector_store:
             # Get current user profile ID for vector store
             user_profile_id = await service_manager.memory_store._get_current_user_profile_id()
+            # Let queued writes for this conversation land first so they are deleted too
+            await service_manager.memory_store.ingestion_queue.flush(timeout=30.0)
             await service_manager.memory_store.vector_store.delete_messages_after_index(
                 conversation_id=conversation_id,
                 message_index=last_user_index,
@@ -595,7 +505,8 @@ async def regenerate_last_response(request: Request):
         await service_manager.memory_store.store_conversation(
             conversation_id=conversation_id,
             messages=truncated_conversation,
-            name=conv_name
+            name=conv_name,
+            replace=True
         )
         
         # Get the user message to regenerate from (from the original conversation before truncation)
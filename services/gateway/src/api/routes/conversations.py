@@ -1,10 +1,10 @@
 """Conversation management routes."""
 # Standard library
 import logging
-from typing import List, Optional
+from typing import List, Optional, Tuple
 
 # Third-party
-from fastapi import APIRouter, HTTPException, Request
+from fastapi import APIRouter, HTTPException, Request, Response
 
 # Local
 from ..schemas import ConversationHistory
@@ -54,9 +54,76 @@ async def create_conversation():
         raise HTTPException(status_code=500, detail=f"Failed to create conversation: {str(e)}") from e
 
 
+async def list_conversation_page(
+    limit: Optional[int] = None,
+    offset: int = 0,
+    include_names: bool = True,
+    cursor: Optional[str] = None,
+    q: Optional[str] = None
+) -> Tuple[List[ConversationHistory], Optional[str]]:
+    """Load one page of conversation summaries, pinned first then most recently updated.
+    
+    Args:
+        limit: Page size (None = all)
+        offset: Offset for pagination (ignored when a cursor is given)
+        include_names: Generate names for unnamed conversations
+        cursor: Cursor returned with the previous page
+        q: Only include conversations whose name starts with this (case-insensitive)
+    
+    Returns:
+        Tuple of (conversations, cursor for the next page or None)
+    """
+    next_cursor = None
+    if limit and (cursor or offset == 0):
+        stored_conversations, next_cursor = await service_manager.memory_store.list_conversations_page(
+            limit, cursor=cursor, name_prefix=q
+        )
+    else:
+        stored_conversations = await service_manager.memory_store.list_conversations(
+            limit=limit, offset=offset, name_prefix=q
+        )
+    
+    logger.debug(f"Found {len(stored_conversations)} conversations in catalogue")
+    
+    conversations = []
+    
+    for conv_data in stored_conversations:
+        conv_id = conv_data["conversation_id"]
+        try:
+            name = conv_data.get("name")
+            
+            if not name and include_names and service_manager.chat_manager:
+                name = await service_manager.chat_manager.get_conversation_name(conv_id)
+            
+            conversations.append(ConversationHistory(
+                conversation_id=conv_id,
+                messages=[],
+                name=name,
+                created_at=conv_data.get("created_at"),
+                updated_at=conv_data.get("updated_at"),
+                total_messages=conv_data.get("message_count", 0),
+                pinned=conv_data.get("pinned", False)
+            ))
+        except Exception as e:
+            logger.error(f"Error processing conversation {conv_id}: {e}", exc_info=True)
+            continue
+    
+    return conversations, next_cursor
+
+
 @router.get("/api/conversations", response_model=List[ConversationHistory])
-async def list_conversations(limit: Optional[int] = None, offset: int = 0, include_names: bool = True):
-    """List all conversations with optional pagination."""
+async def list_conversations(
+    response: Response,
+    limit: Optional[int] = None,
+    offset: int = 0,
+    include_names: bool = True,
+    cursor: Optional[str] = None,
+    q: Optional[str] = None
+):
+    """List conversations with optional pagination and name-prefix search.
+    
+    With a limit, the cursor for the next page is returned in the X-Next-Cursor header.
+    """
     if not service_manager.chat_manager:
         logger.error("Chat manager not initialized")
         raise HTTPException(
@@ -65,43 +132,15 @@ async def list_conversations(limit: Optional[int] = None, offset: int = 0, inclu
         )
     
     try:
-        stored_conversations = await service_manager.memory_store.list_conversations(limit=limit, offset=offset)
-        
-        logger.debug(f"Found {len(stored_conversations)} conversations in database")
-        
-        conversations = []
-        
-        for conv_data in stored_conversations:
-            conv_id = conv_data["conversation_id"]
-            try:
-                name = conv_data.get("name")
-                
-                if not name and include_names and service_manager.chat_manager:
-                    name = await service_manager.chat_manager.get_conversation_name(conv_id)
-                
-                conversations.append(ConversationHistory(
-                    conversation_id=conv_id,
-                    messages=[],
-                    name=name,
-                    created_at=conv_data.get("created_at"),
-                    updated_at=conv_data.get("updated_at"),
-                    total_messages=conv_data.get("message_count", 0),
-                    pinned=conv_data.get("pinned", False)
-                ))
-            except Exception as e:
-                logger.error(f"Error processing conversation {conv_id}: {e}", exc_info=True)
-                continue
-        
-        # Sort by pinned first, then by updated_at descending
-        conversations.sort(
-            key=lambda x: (
-                not x.pinned,
-                -(x.updated_at.timestamp() if x.updated_at else 0)
-            ),
-            reverse=False
+        conversations, next_cursor = await list_conversation_page(
+            limit=limit, offset=offset, include_names=include_names, cursor=cursor, q=q
         )
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
         logger.info(f"Returning {len(conversations)} conversations")
         return conversations
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
     except Exception as e:
         logger.error(f"Error listing conversations: {e}", exc_info=True)
         raise HTTPException(
@@ -130,8 +169,7 @@ async def get_conversation(conversation_id: str):
                 detail=f"Conversation {conversation_id} not found"
             )
         
-        stored_conversations = await service_manager.memory_store.list_conversations()
-        conv_metadata = next((c for c in stored_conversations if c["conversation_id"] == conversation_id), None)
+        conv_metadata = service_manager.memory_store.get_conversation_meta(conversation_id)
         
         chat_messages = [
             {
@@ -195,6 +233,10 @@ async def update_message(
         if not success:
             raise HTTPException(status_code=404, detail="Message not found")
         
+        # Drop the chat manager's cached copy so the next turn sees the edit
+        if service_manager.chat_manager:
+            service_manager.chat_manager.conversations.invalidate(conversation_id)
+        
         return {"status": "success"}
     except HTTPException:
         raise
@@ -356,6 +398,8 @@ async def delete_all_conversations():
                 
                 # Delete from vector store
                 try:
+                    service_manager.memory_store.ingestion_queue.discard_conversation(conv_id)
+                    await service_manager.memory_store.ingestion_queue.flush(timeout=30.0)
                     await service_manager.memory_store.vector_store.delete_conversation(conv_id)
                     logger.debug(f"Successfully deleted conversation {conv_id} from vector store")
                 except Exception as e:
@@ -378,20 +422,16 @@ async def delete_all_conversations():
             except Exception as e:
                 logger.error(f"Error deleting conversation {conv_id}: {e}", exc_info=True)
         
-        # Clear file store index cache to force fresh reload
-        file_store.clear_index_cache()
-        
         # Verify deletion by checking files directly
         conversations_dir = file_store.conversations_dir
         remaining_files = []
         if conversations_dir.exists():
             for conv_file in conversations_dir.glob("*.json"):
-                if conv_file.name != "index.json":
-                    conv_id_from_file = conv_file.stem
-                    # Only count as remaining if it's not in our deleted list (shouldn't happen)
-                    # or if it's pinned (which we didn't delete)
-                    if conv_id_from_file not in conversation_ids:
-                        remaining_files.append(conv_id_from_file)
+                conv_id_from_file = conv_file.stem
+                # Only count as remaining if it's not in our deleted list (shouldn't happen)
+                # or if it's pinned (which we didn't delete)
+                if conv_id_from_file not in conversation_ids:
+                    remaining_files.append(conv_id_from_file)
         
         logger.info(f"Deleted {deleted_count} conversations. Remaining files: {len(remaining_files)}")
         
@@ -462,7 +502,7 @@ async def delete_conversation(conversation_id: str):
 
 @router.post("/api/conversations/cleanup")
 async def cleanup_conversations():
-    """Clean up stale conversation entries."""
+    """Clean up stale conversation entries and index orphaned conversation files."""
     if not service_manager.memory_store:
         raise HTTPException(
             status_code=503,
@@ -470,12 +510,14 @@ async def cleanup_conversations():
         )
     
     try:
-        conversations = await service_manager.memory_store.list_conversations()
+        result = await service_manager.memory_store.reconcile_conversations()
         
         return {
             "status": "success",
             "message": "Conversations cleaned up",
-            "valid_conversations": len(conversations)
+            "valid_conversations": await service_manager.memory_store.get_conversation_count(),
+            "stale_removed": result["stale_removed"],
+            "orphans_added": result["orphans_added"]
         }
     except Exception as e:
         logger.error(f"Error cleaning up conversations: {e}", exc_info=True)
@@ -469,6 +469,7 @@ async def link_and_organize_model(
             repo_id=repo_id,
             target_filename=filename
         )
+        service_manager.llm_manager.model_catalog.invalidate()
         
         return {
             "status": "success",
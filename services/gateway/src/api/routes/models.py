@@ -6,9 +6,9 @@ from typing import Any, Dict, List, Optional
 from pathlib import Path
 from fastapi import APIRouter, HTTPException, Query, Request
 
-from ..schemas import ModelInfo, ModelLoadOptions, ModelMetadata, MemoryEstimate
+from ..schemas import ModelInfo, ModelLoadOptions, ModelMetadata, MemoryEstimate, SpeculativeBenchmarkRequest
+from ...services.llm.scheduler import Priority
 from ...services.service_manager import service_manager
-from ...services.llm.tool_calling_detector import detect_tool_calling_from_metadata
 from ...utils.request_logger import get_request_log_store
 
 logger = logging.getLogger(__name__)
@@ -17,83 +17,59 @@ router = APIRouter(tags=["models"])
 
 @router.get("/api/models", response_model=List[ModelInfo])
 async def list_models():
-    """List available/downloaded models with metadata from model_info.json files."""
+    """List downloaded models with metadata from model_info.json files.
+    
+    Served from the model catalogue, which is kept in line with the models
+    directory in the background, so listing never reads model files or
+    waits on HuggingFace.
+    """
     if not service_manager.llm_manager:
         raise HTTPException(
             status_code=503,
             detail="LLM service not initialized"
         )
     
-    downloaded_models = service_manager.llm_manager.downloader.list_downloaded_models()
+    catalog = service_manager.llm_manager.model_catalog
+    await catalog.wait_ready()
     model_infos = []
-    
-    for model_path in downloaded_models:
-        try:
-            info = service_manager.llm_manager.downloader.get_model_info(model_path)
-            
-            if info.get("has_metadata") and info.get("repo_name"):
-                display_name = info["repo_name"]
-            else:
-                display_name = info["name"]
-            
-            model_folder = service_manager.llm_manager.downloader.get_model_folder(model_path)
-            if model_folder:
-                relative_path = model_path.relative_to(service_manager.llm_manager.downloader.models_dir)
-                model_id = str(relative_path)
-            else:
-                model_id = model_path.name
-            
-            moe_info = info.get("moe")
-            metadata = info.get("metadata", {})
-            tags = metadata.get("tags") or info.get("tags") or []
-            architecture = metadata.get("architecture") or info.get("architecture")
-            repo_id = metadata.get("repo_id") or info.get("repo_id")
-            
-            # Check for cached tool calling info first (from model_info.json or extracted)
-            tool_calling_info = info.get("tool_calling") or metadata.get("tool_calling")
-            if tool_calling_info and isinstance(tool_calling_info, dict):
-                supports_tool_calling = tool_calling_info.get("supports_tool_calling", False)
-                logger.debug(f"Using cached tool calling info for {model_id}: {supports_tool_calling}")
-            else:
-                # Allow manual override from saved model config
-                config_override = service_manager.llm_manager.get_model_config(model_id).get("supports_tool_calling_override")
-                if isinstance(config_override, bool):
-                    supports_tool_calling = config_override
-                else:
-                    # Extract chat template from model info if available
-                    chat_template = info.get("chat_template")
-                    supports_tool_calling, _ = detect_tool_calling_from_metadata(
-                        model_id=model_id,
-                        model_name=display_name,
-                        architecture=architecture,
-                        tags=tags,
-                        repo_id=repo_id,
-                        remote_fetch=True if repo_id else False,
-                        chat_template=chat_template
-                    )
-            
-            model_infos.append(ModelInfo(
-                model_id=model_id,
-                name=display_name,
-                size=f"{info['size_gb']} GB" if info['size_gb'] >= 1 else f"{info['size_mb']} MB",
-                format="gguf",
-                downloaded=True,
-                repo_id=info.get("repo_id"),
-                author=info.get("author"),
-                description=info.get("description"),
-                huggingface_url=info.get("huggingface_url"),
-                downloaded_at=info.get("downloaded_at"),
-                has_metadata=info.get("has_metadata", False),
-                moe=moe_info,
-                supports_tool_calling=supports_tool_calling
-            ))
-        except Exception as e:
-            logger.warning(f"Error getting model info for {model_path.name}: {e}")
-            continue
+    model_pool = service_manager.llm_manager.model_pool
+    active_server = service_manager.llm_manager.server_manager
+    model_configs = service_manager.llm_manager.get_model_configs()
+    
+    for row in catalog.list_rows():
+        model = row["model"]
+        supports_tool_calling = row["supports_tool_calling"]
+        if row["tool_calling_source"] != "metadata":
+            # Allow manual override from saved model config
+            config_override = model_configs.get(model["model_id"], {}).get("supports_tool_calling_override")
+            if isinstance(config_override, bool):
+                supports_tool_calling = config_override
+        
+        pooled = model_pool.get(row["path"])
+        model_infos.append(ModelInfo(
+            **model,
+            supports_tool_calling=supports_tool_calling,
+            loaded=pooled is not None and pooled.server.is_running(),
+            active=pooled is not None and pooled.server is active_server and active_server.is_running()
+        ))
     
     return model_infos
 
 
+@router.get("/api/models/loaded")
+async def list_loaded_models():
+    """List models resident in the model pool (most recently used first) with pool budgets."""
+    if not service_manager.llm_manager:
+        raise HTTPException(
+            status_code=503,
+            detail="LLM service not initialized"
+        )
+    
+    pool_stats = service_manager.llm_manager.model_pool.get_stats()
+    pool_stats["models"] = service_manager.llm_manager.get_loaded_models()
+    return pool_stats
+
+
 @router.post("/api/models/{model_id:path}/load")
 async def load_model_by_id(
     model_id: str,
@@ -235,9 +211,7 @@ async def load_model_by_id(
                 )
     
     try:
-        if service_manager.llm_manager.is_model_loaded():
-            await service_manager.llm_manager.unload_model()
-        
+        # No unload here: load_model switches to a resident model or evicts from the pool as needed
         load_options: Dict[str, Any] = {}
         # Detect GPU layers (loader was removed, use detection logic)
         try:
@@ -306,12 +280,25 @@ async def load_model_by_id(
             if options.cache_type_v is not None:
                 load_options['cache_type_v'] = options.cache_type_v
                 
+            if options.speculative_mode is not None:
+                load_options['speculative_mode'] = options.speculative_mode
+            if options.draft_model_path is not None:
+                load_options['draft_model_path'] = options.draft_model_path
+            if options.draft_num_pred_tokens is not None:
+                load_options['draft_num_pred_tokens'] = options.draft_num_pred_tokens
+                
             if options.offload_kqv is not None:
                 logger.warning("offload_kqv is not supported by llama-cpp-python, ignoring")
         else:
             load_options['n_gpu_layers'] = auto_gpu_layers
             logger.info("No load options provided, using auto-detected GPU layers: %d", auto_gpu_layers)
         
+        # Speculative decoding saved for this model applies unless the request overrides it
+        saved_config = service_manager.llm_manager.get_model_config(unquote(model_id))
+        for key in ('speculative_mode', 'draft_model_path', 'draft_num_pred_tokens'):
+            if key not in load_options and saved_config.get(key) is not None:
+                load_options[key] = saved_config[key]
+        
         logger.info("[API] ========== STARTING MODEL LOAD ==========")
         logger.info(f"[API] Model: {model_id}")
         logger.info(f"[API] Path: {model_path}")
@@ -357,7 +344,7 @@ async def load_model_by_id(
                 error_msg = f"Failed to load model {model_id} (took {load_duration:.2f}s)"
                 logger.error(f"[API] ❌ {error_msg}")
                 # Get last error from server manager if available
-                last_error = getattr(service_manager.llm_manager.server_manager, '_last_error', None)
+                last_error = service_manager.llm_manager.get_last_load_error()
                 if last_error:
                     logger.error(f"[API] Server error: {last_error}")
                     error_msg += f"\n{last_error}"
@@ -394,7 +381,8 @@ async def load_model_direct(request: Dict[str, Any]):
         'use_mmap', 'use_mlock', 'flash_attn',
         'rope_freq_base', 'rope_freq_scale', 'rope_scaling_type',
         'yarn_ext_factor', 'yarn_attn_factor', 'yarn_beta_fast', 'yarn_beta_slow', 'yarn_orig_ctx',
-        'cache_type_k', 'cache_type_v'
+        'cache_type_k', 'cache_type_v',
+        'speculative_mode', 'draft_model_path', 'draft_num_pred_tokens'
     ]
     
     for param in valid_params:
@@ -507,25 +495,27 @@ async def test_model_generation(model_id: str):
         
         # Test generation via OpenAI-compatible server
         # Build OpenAI-compatible request
-        import httpx
-        server_url = service_manager.llm_manager.server_manager.get_server_url()
-        async with httpx.AsyncClient(timeout=60.0) as client:
+        server_manager = service_manager.llm_manager.server_manager
+        server_url = server_manager.get_server_url()
+        client = server_manager.get_client()
+        async with server_manager.scheduler.slot(Priority.BACKGROUND, client_id="model_test"):
             response = await client.post(
                 f"{server_url}/v1/chat/completions",
                 json={
-                    "model": service_manager.llm_manager.current_model_name or "default",
+                    "model": server_manager.get_model_id() or service_manager.llm_manager.current_model_name or "default",
                     "messages": [{"role": "user", "content": test_prompt}],
                     "temperature": test_sampler.temperature,
                     "top_p": test_sampler.top_p,
                     "max_tokens": test_sampler.max_tokens,
-                }
+                },
+                timeout=60.0
             )
-            response.raise_for_status()
-            resp_data = response.json()
-            if "choices" in resp_data and len(resp_data["choices"]) > 0:
-                response_text = resp_data["choices"][0].get("message", {}).get("content", "")
-            else:
-                response_text = "No response generated"
+        response.raise_for_status()
+        resp_data = response.json()
+        if "choices" in resp_data and len(resp_data["choices"]) > 0:
+            response_text = resp_data["choices"][0].get("message", {}).get("content", "")
+        else:
+            response_text = "No response generated"
         
         return {
             "status": "success",
@@ -541,6 +531,50 @@ async def test_model_generation(model_id: str):
         ) from e
 
 
+@router.post("/api/models/{model_id:path}/benchmark/speculative")
+async def benchmark_speculative_decoding(model_id: str, request: SpeculativeBenchmarkRequest):
+    """Compare decode speed of a loaded model with and without speculative decoding.
+    
+    Restarts the model's server for each configuration, so it is unavailable
+    while the benchmark runs. The model keeps its original options afterwards.
+    """
+    if not service_manager.llm_manager:
+        raise HTTPException(status_code=503, detail="LLM service not initialized")
+    
+    import urllib.parse
+    decoded_model_id = urllib.parse.unquote(model_id)
+    llm_manager = service_manager.llm_manager
+    if llm_manager.model_pool.find(decoded_model_id) is None:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Model {decoded_model_id} is not loaded. Please load it first."
+        )
+    
+    # Mode to test: request, then the model's saved config, then the manager's default
+    speculative_options = {
+        key: value for key, value in llm_manager.get_model_config(decoded_model_id).items()
+        if key in ('speculative_mode', 'draft_model_path', 'draft_num_pred_tokens') and value not in (None, 'off')
+    }
+    speculative_options.update(request.model_dump(
+        include={'speculative_mode', 'draft_model_path', 'draft_num_pred_tokens'},
+        exclude_none=True
+    ))
+    
+    try:
+        return await llm_manager.benchmark_speculative(
+            decoded_model_id,
+            prompt=request.prompt,
+            max_tokens=request.max_tokens,
+            runs=request.runs,
+            speculative_options=speculative_options
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+    except Exception as e:
+        logger.error(f"Speculative decoding benchmark failed: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Benchmark failed: {str(e)}") from e
+
+
 @router.get("/api/models/{model_id:path}/info", response_model=ModelMetadata)
 async def get_model_info(model_id: str):
     """Get detailed model metadata including architecture, parameters, context length, MoE info."""
@@ -766,10 +800,8 @@ async def delete_model(model_id: str):
             detail="LLM service not initialized"
         )
     
-    current_model_path = service_manager.llm_manager.get_current_model_path()
-    if current_model_path:
-        current_model_name = Path(current_model_path).name
-        if current_model_name == model_id or str(current_model_path) == model_id:
+    for loaded_model in service_manager.llm_manager.get_loaded_models():
+        if loaded_model["model_name"] == model_id or loaded_model["model_path"] == model_id or loaded_model["model_path"].endswith(model_id):
             raise HTTPException(
                 status_code=400,
                 detail=f"Cannot delete model '{model_id}' - it is currently loaded. Please unload it first."
@@ -779,6 +811,7 @@ async def delete_model(model_id: str):
         success = service_manager.llm_manager.downloader.delete_model(model_id)
         
         if success:
+            service_manager.llm_manager.model_catalog.invalidate()
             return {
                 "status": "success",
                 "message": f"Model {model_id} deleted successfully"
@@ -5,6 +5,7 @@ from typing import Any, Dict, List, Optional
 from fastapi import APIRouter, HTTPException, Request, Header, Response, BackgroundTasks
 import httpx
 
+from ....services.llm.scheduler import ClientDisconnectedError, Priority
 from ....services.service_manager import service_manager
 from .streaming import create_streaming_response, save_messages_to_vector_store
 
@@ -12,24 +13,45 @@ logger = logging.getLogger(__name__)
 router = APIRouter(tags=["proxy", "llm"])
 
 
-async def _handle_direct_llm_call(body: Dict[str, Any], messages: List[Dict[str, Any]], stream: bool, conversation_id: Optional[str], background_tasks):
+def _scheduler_client_id(request: Request, conversation_id: Optional[str] = None) -> Optional[str]:
+    """Client the scheduler's per-client limit applies to: the conversation, else the caller's address."""
+    if conversation_id:
+        return conversation_id
+    return request.client.host if request.client else None
+
+
+async def _handle_direct_llm_call(request: Request, body: Dict[str, Any], messages: List[Dict[str, Any]], stream: bool, conversation_id: Optional[str], background_tasks):
     """Handle LLM call using HTTP requests to the OpenAI-compatible server."""
     try:
         # Get LLM manager
         llm_manager = service_manager.llm_manager
 
+        # Route to a resident model when the request names one, otherwise to the active model
+        pooled = llm_manager.model_pool.find(body["model"]) if body.get("model") else None
+        if pooled is not None and pooled.server.is_running():
+            server_manager = pooled.server
+            chat_format = pooled.chat_format
+            supports_tool_calling = pooled.supports_tool_calling
+            loaded_model_name = pooled.model_name
+            llm_manager.model_pool.touch(pooled)
+        else:
+            server_manager = llm_manager.server_manager
+            chat_format = llm_manager.current_chat_format
+            supports_tool_calling = llm_manager.supports_tool_calling
+            loaded_model_name = llm_manager.current_model_name
+
         # Prepare tools if present
         tools = body.get("tools")
-        if tools and not llm_manager.supports_tool_calling:
+        if tools and not supports_tool_calling:
             # Remove tools if model doesn't support tool calling
             tools = None
 
         # Get server URL
-        server_url = llm_manager.server_manager.get_server_url()
+        server_url = server_manager.get_server_url()
         
         # Build request payload
         # For chatml-function-calling, use simple model name like "test" (as per working manual test)
-        model_name = "test" if (hasattr(llm_manager, 'current_chat_format') and llm_manager.current_chat_format == "chatml-function-calling") else (llm_manager.current_model_name or "default")
+        model_name = "test" if chat_format == "chatml-function-calling" else (server_manager.get_model_id() or loaded_model_name or "default")
         
         payload = {
             "model": model_name,
@@ -47,69 +69,88 @@ async def _handle_direct_llm_call(body: Dict[str, Any], messages: List[Dict[str,
             # NOTE: tool_choice is NOT supported with streaming in llama-cpp-python
             # Only add tool_choice for non-streaming requests
             if not stream:
-                if hasattr(llm_manager, 'current_chat_format') and llm_manager.current_chat_format == "chatml-function-calling":
+                if chat_format == "chatml-function-calling":
                     # Use "auto" to let model choose, or can specify specific tool
                     if "tool_choice" not in body:
                         payload["tool_choice"] = "auto"
                     else:
                         payload["tool_choice"] = body.get("tool_choice")
 
-        # Make HTTP request to OpenAI-compatible server
-        async with httpx.AsyncClient(timeout=30.0) as client:  # Reduced from 300s to 30s
-            if stream:
-                # Handle streaming response
-                async with client.stream(
+        # Make HTTP request to OpenAI-compatible server over the pooled client,
+        # after the scheduler grants a slot (proxy clients queue behind interactive chat)
+        client = server_manager.get_client()
+        client_id = _scheduler_client_id(request, conversation_id)
+        if stream:
+            # Handle streaming response (response and slot are released once the stream is drained)
+            lease = await server_manager.scheduler.acquire(Priority.NORMAL, client_id, request.is_disconnected)
+            try:
+                upstream_request = client.build_request(
                     "POST",
                     f"{server_url}/v1/chat/completions",
-                    json=payload
-                ) as response:
+                    json=payload,
+                    timeout=30.0
+                )
+                response = await client.send(upstream_request, stream=True)
+                try:
                     response.raise_for_status()
-                    return await create_streaming_response(
-                        response,
-                        conversation_id,
-                        messages,
-                        background_tasks
-                    )
-            else:
-                # Handle non-streaming response
-                response = await client.post(
-                    f"{server_url}/v1/chat/completions",
-                    json=payload
+                except Exception:
+                    await response.aclose()
+                    raise
+                return await create_streaming_response(
+                    response,
+                    conversation_id,
+                    messages,
+                    background_tasks,
+                    on_close=lease.release
                 )
-                response.raise_for_status()
-                resp_data = response.json()
+            except BaseException:
+                lease.release()
+                raise
+        
+        # Handle non-streaming response
+        async with server_manager.scheduler.slot(Priority.NORMAL, client_id, request.is_disconnected):
+            response = await client.post(
+                f"{server_url}/v1/chat/completions",
+                json=payload,
+                timeout=30.0
+            )
+        response.raise_for_status()
+        resp_data = response.json()
 
-            # Handle tool call parsing for models that don't support native tool calling
-            if "choices" in resp_data and len(resp_data["choices"]) > 0:
-                message_obj = resp_data["choices"][0].get("message", {})
-                content = message_obj.get("content", "")
+        # Handle tool call parsing for models that don't support native tool calling
+        if "choices" in resp_data and len(resp_data["choices"]) > 0:
+            message_obj = resp_data["choices"][0].get("message", {})
+            content = message_obj.get("content", "")
 
-                # Tool calls should come in OpenAI format from the LLM
-                # No fallback parsing - keep it simple
+            # Tool calls should come in OpenAI format from the LLM
+            # No fallback parsing - keep it simple
 
-            # Save to vector store
-            if conversation_id and service_manager.memory_store:
-                try:
-                    assistant_content = ""
-                    if "choices" in resp_data and len(resp_data["choices"]) > 0:
-                        assistant_content = resp_data["choices"][0].get("message", {}).get("content", "")
+        # Save to vector store
+        if conversation_id and service_manager.memory_store:
+            try:
+                assistant_content = ""
+                if "choices" in resp_data and len(resp_data["choices"]) > 0:
+                    assistant_content = resp_data["choices"][0].get("message", {}).get("content", "")
 
-                    if assistant_content:
-                        background_tasks.add_task(
-                            save_messages_to_vector_store,
-                            conversation_id,
-                            messages,
-                            assistant_content
-                        )
-                except Exception as e:
-                    logger.warning(f"Error parsing response for vector store: {e}")
+                if assistant_content:
+                    background_tasks.add_task(
+                        save_messages_to_vector_store,
+                        conversation_id,
+                        messages,
+                        assistant_content
+                    )
+            except Exception as e:
+                logger.warning(f"Error parsing response for vector store: {e}")
 
-            return Response(
-                content=json.dumps(resp_data).encode('utf-8'),
-                status_code=200,
-                media_type="application/json"
-            )
+        return Response(
+            content=json.dumps(resp_data).encode('utf-8'),
+            status_code=200,
+            media_type="application/json"
+        )
 
+    except ClientDisconnectedError as e:
+        logger.info(f"[PROXY] {e}")
+        raise HTTPException(status_code=499, detail="Client disconnected") from e
     except Exception as e:
         logger.error(f"Error in direct LLM call: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"LLM call error: {str(e)}") from e
@@ -213,7 +254,7 @@ async def proxy_chat_completions(
                 )
             
             # Use direct client call instead of HTTP proxy
-            return await _handle_direct_llm_call(body, messages, stream, conversation_id, background_tasks)
+            return await _handle_direct_llm_call(request, body, messages, stream, conversation_id, background_tasks)
         
         # Build full URL
         if llm_endpoint_mode == "remote":
@@ -298,6 +339,8 @@ async def proxy_chat_completions(
                         media_type=resp.headers.get("content-type", "application/json")
                     )
                 
+    except HTTPException:
+        raise
     except httpx.ConnectError:
         raise HTTPException(status_code=503, detail="LLM service not available")
     except Exception as e:
@@ -318,11 +361,13 @@ async def proxy_completions(request: Request):
         
         body = await request.json()
         llm_manager = service_manager.llm_manager
-        server_url = llm_manager.server_manager.get_server_url()
+        # Route to a resident model when the request names one, otherwise to the active model
+        server_manager = llm_manager.get_server_for_model(body.get("model"))
+        server_url = server_manager.get_server_url()
 
         # Build request payload for completions endpoint
         payload = {
-            "model": llm_manager.current_model_name or "default",
+            "model": server_manager.get_model_id() or llm_manager.current_model_name or "default",
             "prompt": body.get("prompt", ""),
             "temperature": body.get("temperature", 0.7),
             "top_p": body.get("top_p", 0.9),
@@ -331,14 +376,16 @@ async def proxy_completions(request: Request):
             "stream": body.get("stream", False)
         }
 
-        # Make HTTP request to OpenAI-compatible server
-        async with httpx.AsyncClient(timeout=30.0) as client:  # Reduced from 300s to 30s
+        # Make HTTP request to OpenAI-compatible server once the scheduler grants a slot
+        client = server_manager.get_client()
+        async with server_manager.scheduler.slot(Priority.NORMAL, _scheduler_client_id(request), request.is_disconnected):
             response = await client.post(
                 f"{server_url}/v1/completions",
-                json=payload
+                json=payload,
+                timeout=30.0
             )
-            response.raise_for_status()
-            resp_data = response.json()
+        response.raise_for_status()
+        resp_data = response.json()
 
         return Response(
             content=json.dumps(resp_data).encode("utf-8"),
@@ -347,6 +394,9 @@ async def proxy_completions(request: Request):
         )
     except HTTPException:
         raise
+    except ClientDisconnectedError as e:
+        logger.info(f"[PROXY] {e}")
+        raise HTTPException(status_code=499, detail="Client disconnected") from e
     except Exception as e:
         logger.error(f"Error proxying /v1/completions: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Proxy error: {str(e)}") from e
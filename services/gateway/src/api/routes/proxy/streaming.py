@@ -1,7 +1,8 @@
 """Streaming response handling for proxy."""
 import json
 import logging
-from typing import List, Dict, Any
+import weakref
+from typing import Callable, List, Dict, Any, Optional
 from fastapi.responses import StreamingResponse
 import httpx
 
@@ -54,7 +55,8 @@ async def create_streaming_response(
     response: httpx.Response,
     conversation_id: str,
     messages: List[Dict[str, Any]],
-    background_tasks
+    background_tasks,
+    on_close: Optional[Callable[[], None]] = None
 ) -> StreamingResponse:
     """Create a streaming response with vector store saving.
     
@@ -63,6 +65,8 @@ async def create_streaming_response(
         conversation_id: Conversation ID for saving
         messages: Original messages
         background_tasks: FastAPI background tasks
+        on_close: Idempotent callback run once the stream is finished or abandoned
+            (e.g. releasing a scheduler slot)
         
     Returns:
         StreamingResponse with save functionality
@@ -70,6 +74,16 @@ async def create_streaming_response(
     accumulated_content = []
     
     async def stream_with_save():
+        try:
+            async for chunk in _forward_chunks():
+                yield chunk
+        finally:
+            # Release the upstream connection back to the pool
+            await response.aclose()
+            if on_close is not None:
+                on_close()
+    
+    async def _forward_chunks():
         async for chunk in response.aiter_bytes():
             try:
                 chunk_text = chunk.decode('utf-8')
@@ -101,8 +115,13 @@ async def create_streaming_response(
                     full_content
                 )
     
+    body_iterator = stream_with_save()
+    if on_close is not None:
+        # A stream that is never iterated (client gone before the first chunk) skips the finally above
+        weakref.finalize(body_iterator, on_close)
+    
     return StreamingResponse(
-        stream_with_save(),
+        body_iterator,
         media_type=response.headers.get("content-type", "text/event-stream"),
         status_code=response.status_code
     )
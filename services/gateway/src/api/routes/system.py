@@ -2,6 +2,7 @@
 import os
 import logging
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import PlainTextResponse
 
 from ...services.service_manager import service_manager
 
@@ -170,6 +171,9 @@ async def _get_debug_info_internal():
             logger.error(f"Error getting TTS backend info: {e}", exc_info=True)
             debug_info["services"]["tts_service"]["backends_error"] = str(e)
     
+    from .websocket import get_connection_manager
+    debug_info["websocket"] = get_connection_manager().get_stats()
+    
     if service_manager.llm_manager:
         sampler_settings = service_manager.llm_manager.get_settings()
         debug_info["model"] = {
@@ -195,7 +199,9 @@ async def _get_debug_info_internal():
             conversation_ids = await service_manager.chat_manager.list_conversations()
             debug_info["conversations"] = {
                 "active_count": len(conversation_ids),
-                "conversation_ids": conversation_ids
+                "conversation_ids": conversation_ids,
+                "cache": service_manager.chat_manager.get_cache_stats(),
+                "summaries": service_manager.chat_manager.summarizer.get_stats()
             }
         except Exception as e:
             logger.error(f"Error getting conversation info: {e}", exc_info=True)
@@ -246,6 +252,51 @@ async def clear_llm_debug_logs():
     return {"message": "LLM debug logs cleared"}
 
 
+@router.get("/api/debug/metrics")
+async def get_debug_metrics(format: str = "prometheus"):
+    """Get chat pipeline latency and throughput histograms.
+    
+    Args:
+        format: "prometheus" for the text exposition format, "json" for summaries with percentiles
+    
+    Returns:
+        Prometheus text or a JSON snapshot of all metrics
+    """
+    from ...services.metrics import get_metrics
+    
+    metrics = get_metrics()
+    if format == "json":
+        return metrics.get_snapshot()
+    if format != "prometheus":
+        raise HTTPException(status_code=400, detail="format must be 'prometheus' or 'json'")
+    return PlainTextResponse(metrics.render_prometheus(), media_type="text/plain; version=0.0.4")
+
+
+@router.delete("/api/debug/metrics")
+async def reset_debug_metrics():
+    """Reset all recorded metrics."""
+    from ...services.metrics import get_metrics
+    
+    get_metrics().reset()
+    return {"message": "Metrics reset"}
+
+
+@router.get("/api/debug/scheduler")
+async def get_scheduler_stats():
+    """Get LLM request scheduler state (slots, queue depth per priority) for each resident model server."""
+    if not service_manager.llm_manager:
+        raise HTTPException(status_code=503, detail="LLM service not initialized")
+    
+    llm_manager = service_manager.llm_manager
+    servers = {entry.model_name: entry.server for entry in llm_manager.model_pool.entries()}
+    if llm_manager.current_model_name not in servers:
+        servers[llm_manager.current_model_name or "active"] = llm_manager.server_manager
+    return {
+        name: {"server_url": server.get_server_url(), **server.scheduler.get_stats()}
+        for name, server in servers.items()
+    }
+
+
 @router.post("/api/reset")
 async def reset_app_state(keep_models: bool = True):
     """Reset all app state (conversations, settings, vector store)."""
@@ -261,19 +312,26 @@ async def reset_app_state(keep_models: bool = True):
             "vector_store_cleared": False
         }
         
-        file_store = FileConversationStore(settings.memory_dir)
-        results["conversations_deleted"] = await file_store.clear_all()
+        # Clear through the live stores so their in-memory state (log positions,
+        # memory-mapped vector indexes) is reset along with the files
+        memory_store = service_manager.memory_store
+        if memory_store:
+            file_store = memory_store.file_store
+            settings_store = memory_store.settings_store
+        else:
+            file_store = FileConversationStore(settings.memory_dir)
+            settings_store = FileSettingsStore(settings.memory_dir)
         
-        settings_store = FileSettingsStore(settings.memory_dir)
+        results["conversations_deleted"] = await file_store.clear_all()
         results["settings_cleared"] = await settings_store.clear_all()
         
         try:
-            vector_store = VectorStore()
-            if vector_store.collection and vector_store.store_type == "chromadb":
-                all_results = vector_store.collection.get()
-                if all_results and "ids" in all_results and all_results["ids"]:
-                    vector_store.collection.delete(ids=all_results["ids"])
-                    logger.info(f"Deleted {len(all_results['ids'])} entries from vector store")
+            if memory_store:
+                await memory_store.ingestion_queue.flush(timeout=30.0)
+                vector_store = memory_store.vector_store
+            else:
+                vector_store = VectorStore()
+            vector_store.clear_all()
             results["vector_store_cleared"] = True
         except Exception as e:
             logger.warning(f"Could not clear vector store: {e}")
@@ -5,6 +5,7 @@ import httpx
 from fastapi import APIRouter, HTTPException, Request
 from typing import Dict, Any, Optional
 
+from ...services.llm.scheduler import Priority
 from ...services.service_manager import service_manager
 
 logger = logging.getLogger(__name__)
@@ -173,6 +174,51 @@ async def list_todos():
         raise HTTPException(status_code=500, detail=f"Failed to list todos: {str(e)}") from e
 
 
+@router.get("/api/tools/cache/stats")
+async def get_tool_cache_stats():
+    """Get tool result cache hit rates."""
+    if not service_manager.tool_manager:
+        raise HTTPException(
+            status_code=503,
+            detail="Tool service not initialized"
+        )
+    
+    return service_manager.tool_manager.executor.get_cache_stats()
+
+
+@router.delete("/api/tools/cache")
+async def clear_tool_cache():
+    """Drop all cached tool results."""
+    if not service_manager.tool_manager:
+        raise HTTPException(
+            status_code=503,
+            detail="Tool service not initialized"
+        )
+    
+    service_manager.tool_manager.executor.clear_cache()
+    return {"message": "Tool result cache cleared"}
+
+
+@router.post("/api/tools/route")
+async def route_tools(request: Dict[str, Any]):
+    """Show which tools the embedding router would offer for a message (for tuning thresholds)."""
+    if not service_manager.tool_manager:
+        raise HTTPException(
+            status_code=503,
+            detail="Tool service not initialized"
+        )
+    
+    message = request.get("message")
+    if not message or not isinstance(message, str):
+        raise HTTPException(status_code=400, detail="message is required")
+    
+    route = await service_manager.tool_manager.route_message(message)
+    return {
+        **route.to_dict(),
+        "router": service_manager.tool_manager.router.get_stats()
+    }
+
+
 @router.get("/api/tools/debug")
 async def get_tool_debug_info():
     """Get debug information about tool calling setup."""
@@ -275,55 +321,57 @@ async def run_benchmark_test(model_name: Optional[str] = None):
     server_url = service_manager.llm_manager.server_manager.get_server_url()
     
     try:
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            payload = {
-                "model": service_manager.llm_manager.current_model_name or "default",
-                "messages": [
-                    {"role": "user", "content": test_message}
-                ],
-                "tools": [benchmark_tool],
-                "temperature": 0.7,
-                "max_tokens": 512
-            }
-            
+        client = service_manager.llm_manager.server_manager.get_client()
+        payload = {
+            "model": service_manager.llm_manager.server_manager.get_model_id() or service_manager.llm_manager.current_model_name or "default",
+            "messages": [
+                {"role": "user", "content": test_message}
+            ],
+            "tools": [benchmark_tool],
+            "temperature": 0.7,
+            "max_tokens": 512
+        }
+        
+        async with service_manager.llm_manager.server_manager.scheduler.slot(Priority.BACKGROUND, client_id="tool_calling_test"):
             response = await client.post(
                 f"{server_url}/v1/chat/completions",
-                json=payload
+                json=payload,
+                timeout=30.0
             )
-            response.raise_for_status()
-            result = response.json()
-            
-            # Check for tool calls
-            choices = result.get("choices", [])
-            if not choices:
-                return {
-                    "success": False,
-                    "error": "No choices in response",
-                    "result": result
-                }
+        response.raise_for_status()
+        result = response.json()
+        
+        # Check for tool calls
+        choices = result.get("choices", [])
+        if not choices:
+            return {
+                "success": False,
+                "error": "No choices in response",
+                "result": result
+            }
+        
+        message = choices[0].get("message", {})
+        tool_calls = message.get("tool_calls", [])
+        
+        if tool_calls:
+            # Execute tool call
+            tool_results = await service_manager.tool_manager.execute_tools(tool_calls)
             
-            message = choices[0].get("message", {})
-            tool_calls = message.get("tool_calls", [])
+            return {
+                "success": True,
+                "tool_calls": len(tool_calls),
+                "tool_results": tool_results,
+                "message": "Benchmark test passed - model successfully made tool calls"
+            }
+        else:
+            content = message.get("content", "")
+            return {
+                "success": False,
+                "error": "No tool calls detected in response",
+                "response_content": content,
+                "result": result
+            }
             
-            if tool_calls:
-                # Execute tool call
-                tool_results = await service_manager.tool_manager.execute_tools(tool_calls)
-                
-                return {
-                    "success": True,
-                    "tool_calls": len(tool_calls),
-                    "tool_results": tool_results,
-                    "message": "Benchmark test passed - model successfully made tool calls"
-                }
-            else:
-                content = message.get("content", "")
-                return {
-                    "success": False,
-                    "error": "No tool calls detected in response",
-                    "response_content": content,
-                    "result": result
-                }
-                
     except Exception as e:
         logger.error(f"Error running benchmark test: {e}", exc_info=True)
         raise HTTPException(
@@ -1,9 +1,11 @@
 """WebSocket endpoint for real-time communication."""
+import asyncio
 import json
 import logging
 import uuid
+from collections import deque
 from datetime import datetime, date
-from typing import Dict, Set, Optional, Any
+from typing import Callable, Deque, Dict, List, Set, Optional, Any
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
 from fastapi.websockets import WebSocketState
 
@@ -29,15 +31,115 @@ def serialize_for_json(obj: Any) -> Any:
         return obj
 
 
+class ConnectionSender:
+    """Bounded outgoing message queue for one connection, drained by its own task.
+    
+    Messages are queued as already-serialised text. A message with a coalesce
+    key replaces a queued message with the same key that hasn't been sent yet,
+    so a client that falls behind only receives the latest progress update.
+    """
+    
+    def __init__(
+        self,
+        connection_id: str,
+        websocket: WebSocket,
+        on_failure: Callable[[str, str], None],
+        max_queue: int = 256,
+        send_timeout: float = 10.0
+    ):
+        """Initialize the sender and start its drain task.
+        
+        Args:
+            connection_id: Connection ID
+            websocket: Accepted WebSocket
+            on_failure: Called with (connection_id, reason) when a send fails or times out
+            max_queue: Maximum number of queued messages
+            send_timeout: Seconds a single send may take
+        """
+        self.connection_id = connection_id
+        self.websocket = websocket
+        self.max_queue = max(1, max_queue)
+        self.send_timeout = send_timeout
+        self.sent = 0
+        self.coalesced = 0
+        self._on_failure = on_failure
+        self._queue: Deque[List[Optional[str]]] = deque()  # [coalesce_key, text]
+        self._pending_keys: Dict[str, List[Optional[str]]] = {}
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._drain())
+    
+    def enqueue(self, text: str, coalesce_key: Optional[str] = None) -> bool:
+        """Queue a serialised message without waiting for it to be sent.
+        
+        Args:
+            text: JSON text to send
+            coalesce_key: Messages with the same key replace each other while queued
+        
+        Returns:
+            False if the queue is full (the client isn't keeping up), True otherwise
+        """
+        if coalesce_key is not None:
+            entry = self._pending_keys.get(coalesce_key)
+            if entry is not None:
+                entry[1] = text
+                self.coalesced += 1
+                return True
+        if len(self._queue) >= self.max_queue:
+            return False
+        entry = [coalesce_key, text]
+        self._queue.append(entry)
+        if coalesce_key is not None:
+            self._pending_keys[coalesce_key] = entry
+        self._wakeup.set()
+        return True
+    
+    @property
+    def queue_depth(self) -> int:
+        return len(self._queue)
+    
+    def close(self):
+        """Stop the drain task; queued messages are dropped."""
+        self._task.cancel()
+        self._queue.clear()
+        self._pending_keys.clear()
+    
+    async def _drain(self):
+        try:
+            while True:
+                while not self._queue:
+                    self._wakeup.clear()
+                    await self._wakeup.wait()
+                entry = self._queue.popleft()
+                if entry[0] is not None:
+                    self._pending_keys.pop(entry[0], None)
+                await asyncio.wait_for(self.websocket.send_text(entry[1]), timeout=self.send_timeout)
+                self.sent += 1
+        except asyncio.CancelledError:
+            raise
+        except asyncio.TimeoutError:
+            self._on_failure(self.connection_id, f"send stalled for more than {self.send_timeout:g}s")
+        except Exception as e:
+            self._on_failure(self.connection_id, f"send failed: {e}")
+
+
 class WebSocketConnectionManager:
-    """Manages WebSocket connections for real-time communication."""
+    """Manages WebSocket connections for real-time communication.
+    
+    Broadcasts serialise a message once and hand it to every connection's
+    ConnectionSender, so a slow client never delays the others. Clients whose
+    queue fills up or whose sends stall are evicted.
+    """
     
     def __init__(self):
         self.active_connections: Dict[str, WebSocket] = {}
         self.connection_metadata: Dict[str, Dict] = {}
+        self._senders: Dict[str, ConnectionSender] = {}
+        self.evictions = 0
     
     async def connect(self, websocket: WebSocket, connection_id: Optional[str] = None) -> str:
         """Accept a WebSocket connection and return its ID."""
+        from ...config.settings import settings
+        
         if connection_id is None:
             connection_id = str(uuid.uuid4())
         
@@ -47,6 +149,13 @@ class WebSocketConnectionManager:
             "connected_at": None,
             "last_activity": None,
         }
+        self._senders[connection_id] = ConnectionSender(
+            connection_id,
+            websocket,
+            on_failure=self._evict,
+            max_queue=settings.websocket_send_queue_size,
+            send_timeout=settings.websocket_send_timeout
+        )
         logger.info(f"WebSocket connection established: {connection_id}")
         return connection_id
     
@@ -56,42 +165,81 @@ class WebSocketConnectionManager:
             del self.active_connections[connection_id]
         if connection_id in self.connection_metadata:
             del self.connection_metadata[connection_id]
-        logger.info(f"WebSocket connection closed: {connection_id}")
+        sender = self._senders.pop(connection_id, None)
+        if sender is not None:
+            sender.close()
+            logger.info(f"WebSocket connection closed: {connection_id}")
+    
+    def _evict(self, connection_id: str, reason: str):
+        """Drop a client that can't keep up and close its socket."""
+        websocket = self.active_connections.get(connection_id)
+        if websocket is None:
+            return
+        logger.warning(f"Evicting slow WebSocket client {connection_id}: {reason}")
+        self.evictions += 1
+        self.disconnect(connection_id)
+        asyncio.create_task(self._close_quietly(websocket))
+    
+    @staticmethod
+    async def _close_quietly(websocket: WebSocket):
+        try:
+            # 1013 = try again later; the client reconnects and refetches state
+            await asyncio.wait_for(websocket.close(code=1013), timeout=5.0)
+        except Exception:
+            pass
+    
+    @staticmethod
+    def _serialize(message: dict) -> str:
+        # Same encoding as WebSocket.send_json
+        return json.dumps(message, separators=(",", ":"), ensure_ascii=False, default=str)
     
     async def send_personal_message(self, message: dict, connection_id: str):
-        """Send a message to a specific connection."""
-        if connection_id in self.active_connections:
-            websocket = self.active_connections[connection_id]
-            try:
-                if websocket.client_state == WebSocketState.CONNECTED:
-                    await websocket.send_json(message)
-                else:
-                    logger.warning(f"Connection {connection_id} is not in CONNECTED state")
-                    self.disconnect(connection_id)
-            except Exception as e:
-                logger.error(f"Error sending message to {connection_id}: {e}")
-                self.disconnect(connection_id)
+        """Queue a message for a specific connection."""
+        sender = self._senders.get(connection_id)
+        if sender is None:
+            return
+        if self.active_connections[connection_id].client_state != WebSocketState.CONNECTED:
+            logger.warning(f"Connection {connection_id} is not in CONNECTED state")
+            self.disconnect(connection_id)
+        elif not sender.enqueue(self._serialize(message)):
+            self._evict(connection_id, "send queue full")
     
-    async def broadcast(self, message: dict):
-        """Broadcast a message to all connected clients."""
-        disconnected = []
-        for connection_id, websocket in list(self.active_connections.items()):
-            try:
-                if websocket.client_state == WebSocketState.CONNECTED:
-                    await websocket.send_json(message)
-                else:
-                    disconnected.append(connection_id)
-            except Exception as e:
-                logger.error(f"Error broadcasting to {connection_id}: {e}")
-                disconnected.append(connection_id)
+    async def broadcast(self, message: dict, coalesce_key: Optional[str] = None):
+        """Broadcast a message to all connected clients without waiting for slow ones.
         
-        # Clean up disconnected clients
-        for connection_id in disconnected:
-            self.disconnect(connection_id)
+        Args:
+            message: Message to send
+            coalesce_key: If set, a queued message with the same key is replaced
+                instead of queueing another one (e.g. progress updates)
+        """
+        if not self._senders:
+            return
+        text = self._serialize(message)
+        for connection_id, sender in list(self._senders.items()):
+            websocket = self.active_connections.get(connection_id)
+            if websocket is None or websocket.client_state != WebSocketState.CONNECTED:
+                self.disconnect(connection_id)
+            elif not sender.enqueue(text, coalesce_key):
+                self._evict(connection_id, "send queue full")
     
     def get_connection_count(self) -> int:
         """Get the number of active connections."""
         return len(self.active_connections)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get per-connection queue depths and fan-out counters."""
+        return {
+            "connections": len(self._senders),
+            "evictions": self.evictions,
+            "queues": {
+                connection_id: {
+                    "depth": sender.queue_depth,
+                    "sent": sender.sent,
+                    "coalesced": sender.coalesced
+                }
+                for connection_id, sender in self._senders.items()
+            }
+        }
 
 
 # Global connection manager instance
@@ -320,11 +468,17 @@ async def handle_request(websocket: WebSocket, connection_id: str, action: str,
         elif action == "list_conversations":
             # List conversations
             if service_manager and hasattr(service_manager, 'chat_manager'):
-                from ...api.routes.conversations import list_conversations
+                from ...api.routes.conversations import list_conversation_page
                 limit = payload.get("limit")
                 offset = payload.get("offset", 0)
                 include_names = payload.get("include_names", True)
-                conversations_data = await list_conversations(limit=limit, offset=offset, include_names=include_names)
+                conversations_data, _ = await list_conversation_page(
+                    limit=limit,
+                    offset=offset,
+                    include_names=include_names,
+                    cursor=payload.get("cursor"),
+                    q=payload.get("q")
+                )
                 # Convert list of Pydantic models to dicts and serialize datetime objects
                 convs_list = []
                 for conv in conversations_data:
@@ -20,6 +20,10 @@ class MessageMetadata(BaseModel):
     generation_time_ms: Optional[float] = Field(None, description="Time taken to generate (ms)")
     tokens_generated: Optional[int] = Field(None, description="Number of tokens generated")
     context_length: Optional[int] = Field(None, description="Context length used")
+    prompt_tokens: Optional[int] = Field(None, description="Prompt tokens in the last LLM request")
+    cached_prompt_tokens: Optional[int] = Field(None, description="Prompt tokens reused from the server's KV cache")
+    prompt_token_budget: Optional[int] = Field(None, description="Prompt tokens the request was allowed")
+    history_messages_dropped: Optional[int] = Field(None, description="Oldest history messages left out to fit the budget")
     # Sampler settings used
     temperature: Optional[float] = None
     top_p: Optional[float] = None
@@ -202,6 +206,16 @@ class ModelLoadOptions(BaseModel):
     cache_type_k: Optional[str] = Field(None, pattern="^(f16|f32|q8_0|q4_0|q4_1|iq4_nl|q5_0|q5_1)$", description="KV cache type for K")
     cache_type_v: Optional[str] = Field(None, pattern="^(f16|f32|q8_0|q4_0|q4_1|iq4_nl|q5_0|q5_1)$", description="KV cache type for V")
     
+    # Speculative decoding
+    speculative_mode: Optional[str] = Field(
+        None,
+        pattern="^(off|prompt_lookup|draft_model)$",
+        description="Speculative decoding: off, prompt_lookup (n-gram drafts from the context) or draft_model "
+                    "(llama_cpp.server falls back to prompt_lookup)"
+    )
+    draft_model_path: Optional[str] = Field(None, description="Draft GGUF for speculative_mode=draft_model")
+    draft_num_pred_tokens: Optional[int] = Field(None, ge=1, le=64, description="Tokens drafted per decoding step (default: 10)")
+    
     # MoE (Mixture of Experts) settings
     # Note: n_cpu_moe is not a valid parameter for OpenAI-compatible server
     # It was incorrectly documented as "CPU threads for MoE experts"
@@ -322,7 +336,7 @@ class AISettings(BaseModel):
     llm_remote_model: Optional[str] = Field(None, description="Model name/ID to use with remote endpoint")
 
     # Streaming Mode Settings
-    streaming_mode: str = Field("non-streaming", description="Streaming mode: 'streaming' (real-time, no tool calling), 'non-streaming' (with tool calling), 'experimental' (auto-detect)")
+    streaming_mode: str = Field("non-streaming", description="Streaming mode: 'streaming' (real-time, no tool calling), 'non-streaming' (real-time with tool calling), 'experimental' (auto-detect whether to offer tools)")
 
 
 class AISettingsResponse(BaseModel):
@@ -353,6 +367,8 @@ class ModelInfo(BaseModel):
     has_metadata: bool = False
     moe: Optional[Dict[str, Any]] = None  # MoE configuration from model_info.json
     supports_tool_calling: Optional[bool] = None
+    loaded: bool = False  # Resident in the model pool
+    active: bool = False  # The model chat requests go to
 
 
 class ModelMetadata(BaseModel):
@@ -385,6 +401,21 @@ class MemoryEstimate(BaseModel):
     will_fit: Optional[bool] = None  # Based on available VRAM
 
 
+class SpeculativeBenchmarkRequest(BaseModel):
+    """Speculative decoding benchmark request schema."""
+    prompt: str = Field(
+        "Repeat the following text exactly, then list every noun in it: "
+        "The quick brown fox jumps over the lazy dog while the farmer watches from the old wooden fence "
+        "and the sheepdog naps in the shade of the barn.",
+        description="User message to complete (drafting pays off when the answer repeats the prompt)"
+    )
+    max_tokens: int = Field(256, ge=16, le=2048, description="Tokens generated per run")
+    runs: int = Field(3, ge=1, le=10, description="Timed runs per configuration")
+    speculative_mode: Optional[str] = Field(None, pattern="^(prompt_lookup|draft_model)$", description="Mode to test (default: saved config, else prompt_lookup)")
+    draft_model_path: Optional[str] = Field(None, description="Draft GGUF for speculative_mode=draft_model")
+    draft_num_pred_tokens: Optional[int] = Field(None, ge=1, le=64, description="Tokens drafted per decoding step")
+
+
 
 
 
@@ -28,12 +28,29 @@ class Settings(BaseSettings):
     memory_dir: Path = data_dir / "memory"
     vector_store_dir: Path = data_dir / "vector_store"
     db_path: Path = data_dir / "assistant.db"  # Shared database
+    gguf_metadata_cache_path: Path = data_dir / "gguf_metadata_cache.json"  # GGUF header summaries keyed by path, size and mtime
+    model_catalog_path: Path = data_dir / "model_catalog.json"  # Listing rows of downloaded models served by /api/models
     
     # LLM Settings
     default_llm_model: Optional[str] = None
     llm_context_size: int = 8192  # Increased from 4096 to ensure tools aren't truncated
     llm_n_threads: int = 4
     llm_n_gpu_layers: int = 0  # 0 = CPU only, set > 0 for GPU (auto-detected if available)
+    llm_prompt_layout: str = "cache_friendly"  # "cache_friendly" (clock/context after history for KV cache reuse) or "legacy"
+    llm_prompt_token_budget: int = 0  # Max prompt tokens per request; older history is left out beyond it (0 = context size minus max_tokens)
+    model_catalog_watch: bool = True  # Watch the models directory for changes (needs watchfiles; polls otherwise)
+    model_catalog_poll_interval: float = 30.0  # Seconds between re-scans of the models directory when not watching
+    model_download_connections: int = 8  # Parallel HTTP range connections per model download
+    model_download_segment_mb: int = 64  # Download segment size; an interrupted download resumes from its unfinished segments
+    llm_token_count_cache_size: int = 8192  # Token counts of message texts kept in memory per model
+    llm_server_log_buffer_lines: int = 2000  # Recent server log lines kept in memory
+    llm_server_log_forward_rate: float = 20.0  # Server log lines per second forwarded to request logs (errors/warnings always are)
+    llm_pool_max_models: int = 2  # Models kept resident in separate server processes (1 = unload on every switch)
+    llm_pool_ram_budget_gb: float = 0.0  # RAM resident CPU models may use (0 = 80% of system RAM)
+    llm_pool_vram_budget_gb: float = 0.0  # VRAM resident GPU models may use (0 = 80% of detected VRAM)
+    llm_pool_base_port: int = 8101  # First port for additional model servers (the first model uses llm_service_url's port)
+    llm_scheduler_slots: int = 1  # Concurrent generation requests per model server (llama_cpp.server decodes one at a time)
+    llm_scheduler_per_client_limit: int = 2  # Concurrent requests per client/conversation (0 = unlimited)
     
     # Request Logging Settings
     enable_request_logging: bool = True
@@ -56,9 +73,32 @@ class Settings(BaseSettings):
     
     # Memory Settings
     embedding_model: str = "all-MiniLM-L6-v2"
-    vector_store_type: str = "chromadb"  # "chromadb" or "faiss"
+    embedding_batch_window_ms: float = 5.0  # How long concurrent encode calls are collected into one batch
+    embedding_max_batch_size: int = 32
+    embedding_cache_size: int = 4096  # Embeddings kept in the in-memory LRU
+    embedding_disk_cache: bool = True  # Persist embeddings to a memory-mapped file so they survive restarts
+    embedding_cache_dir: Path = data_dir / "embedding_cache"
+    embedding_disk_cache_max_entries: int = 100000  # Vectors kept on disk before the least recently used are compacted away
+    vector_store_type: str = "chromadb"  # "chromadb" or "faiss" (in-process NumPy index, no FAISS dependency)
+    vector_index_ivf_lists: int = 0  # "faiss" store: IVF lists for large corpora (0 = exact search only)
+    vector_index_ivf_probes: int = 8  # "faiss" store: IVF lists scanned per query
+    vector_index_ivf_min_vectors: int = 50000  # "faiss" store: live vectors needed before IVF is used
     context_retrieval_top_k: int = 5
+    vector_ingest_batch_size: int = 32  # Messages embedded and written per background ingestion batch
     context_similarity_threshold: float = 0.7
+    conversation_log_compact_records: int = 100  # Appended records before a conversation log is folded into its snapshot
+    conversation_reconcile_interval: float = 300.0  # Seconds between background checks of the conversation catalogue against files (0 = startup only)
+    chat_cache_max_conversations: int = 64  # Conversations whose messages stay in memory (least recently used are evicted)
+    chat_cache_max_bytes: int = 64 * 1024 * 1024  # Approximate memory budget for cached conversation messages
+    chat_summary_enabled: bool = True  # Fold older turns of long conversations into a rolling summary in the background
+    chat_summary_trigger_tokens: int = 4096  # History tokens not covered by the summary that start a summarisation
+    chat_summary_keep_tokens: int = 1536  # Newest history tokens kept verbatim when summarising
+    chat_summary_max_tokens: int = 512  # Length limit of the summary
+    # With one scheduler slot a fold blocks user turns for its whole request and evicts the
+    # server's cached prompt prefix, so it waits until the conversation has been idle this long
+    # and no other request is running (with more slots folds start right away)
+    chat_summary_idle_seconds: float = 60.0
+    chat_summary_timeout: float = 60.0  # Seconds one fold request may hold a server slot
     
     # STT Settings
     stt_provider: str = "faster-whisper"  # "faster-whisper" or "vosk"
@@ -72,6 +112,16 @@ class Settings(BaseSettings):
     # Tool Settings
     enable_tools: bool = True
     max_tool_calls_per_turn: int = 5
+    tool_timeout: float = 30.0  # Seconds before a tool call is cancelled (tools can override)
+    tool_cache_enabled: bool = True  # Reuse results of idempotent tool calls (TTL set per tool)
+    tool_cache_max_entries: int = 256
+    tool_router_enabled: bool = True  # "experimental" streaming mode picks tools by embedding similarity instead of an LLM YES/NO call
+    tool_router_threshold: float = 0.35  # Cosine similarity a message needs to a tool's description/examples (calibrated per tool)
+    tool_router_max_tools: int = 3  # Most relevant tools offered per routed message (0 = all relevant)
+    
+    # WebSocket Settings
+    websocket_send_queue_size: int = 256  # Pending messages per client before it is evicted as a slow consumer
+    websocket_send_timeout: float = 10.0  # Seconds a single send may stall before the client is evicted
     
     # System Prompt
     default_system_prompt: str = """You are a helpful, friendly, and knowledgeable AI assistant. 
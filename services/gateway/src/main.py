@@ -435,18 +435,13 @@ def setup_signal_handlers():
         # Try to cleanup LLM server process synchronously
         try:
             if service_manager.llm_manager and hasattr(service_manager.llm_manager, 'server_manager'):
-                if service_manager.llm_manager.server_manager.process:
-                    logger.info("Killing LLM server process...")
-                    try:
-                        service_manager.llm_manager.server_manager.process.terminate()
-                        service_manager.llm_manager.server_manager.process.wait(timeout=2)
-                    except Exception:
-                        try:
-                            service_manager.llm_manager.server_manager.process.kill()
-                            service_manager.llm_manager.server_manager.process.wait(timeout=1)
-                        except Exception:
-                            pass
-                    logger.info("✓ LLM server process terminated")
+                logger.info("Killing LLM server processes...")
+                try:
+                    service_manager.llm_manager.model_pool.terminate_all_sync()
+                    service_manager.llm_manager.server_manager.terminate_sync(timeout=2)
+                except Exception:
+                    pass
+                logger.info("✓ LLM server processes terminated")
         except Exception as e:
             logger.error(f"Error in signal handler cleanup: {e}", exc_info=True)
         finally:
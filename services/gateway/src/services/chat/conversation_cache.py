@@ -0,0 +1,161 @@
+"""Memory-bounded LRU cache of conversation message lists."""
+from collections import OrderedDict
+from typing import Any, Dict, Iterator, List, Optional
+import json
+import logging
+import sys
+
+logger = logging.getLogger(__name__)
+
+# Rough per-message cost of the dict, its keys and the timestamp string
+_MESSAGE_OVERHEAD_BYTES = 400
+
+
+def estimate_message_size(message: Dict[str, Any]) -> int:
+    """Estimate the resident size of one message in bytes."""
+    size = _MESSAGE_OVERHEAD_BYTES
+    content = message.get("content")
+    if isinstance(content, str):
+        size += sys.getsizeof(content)
+    tool_calls = message.get("tool_calls")
+    if tool_calls:
+        size += len(json.dumps(tool_calls, default=str))
+    return size
+
+
+class ConversationCache:
+    """LRU cache of conversation histories with an entry limit and a memory budget.
+    
+    Supports the mapping operations ChatManager and the routes already use
+    (`in`, `[]`, `del`, `get`, `keys`), so it can stand in for the dict that
+    used to hold every conversation. Lookups through get() count as hits or
+    misses; the least recently used conversations are evicted once either
+    limit is exceeded. The most recently used entry is never evicted, so a
+    single conversation larger than the budget still stays cached while in use.
+    """
+    
+    def __init__(self, max_entries: int = 64, max_bytes: int = 64 * 1024 * 1024):
+        """Initialize the cache.
+        
+        Args:
+            max_entries: Maximum number of conversations kept
+            max_bytes: Approximate memory budget for cached messages
+        """
+        self.max_entries = max(1, max_entries)
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, List[Dict[str, Any]]]" = OrderedDict()
+        self._sizes: Dict[str, int] = {}
+        self._total_bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+    
+    def get(self, conversation_id: str, default: Any = None) -> Optional[List[Dict[str, Any]]]:
+        """Get a cached conversation and mark it as recently used.
+        
+        Args:
+            conversation_id: Conversation ID
+            default: Value returned on a miss
+        
+        Returns:
+            List of messages, or default if not cached
+        """
+        messages = self._entries.get(conversation_id)
+        if messages is None:
+            self._misses += 1
+            return default
+        self._hits += 1
+        self._entries.move_to_end(conversation_id)
+        return messages
+    
+    def put(self, conversation_id: str, messages: List[Dict[str, Any]]):
+        """Cache a conversation's messages, evicting older entries if over budget."""
+        self._discard(conversation_id)
+        size = sum(estimate_message_size(message) for message in messages)
+        self._entries[conversation_id] = messages
+        self._sizes[conversation_id] = size
+        self._total_bytes += size
+        self._evict()
+    
+    def append(self, conversation_id: str, message: Dict[str, Any]) -> bool:
+        """Append a message to a cached conversation.
+        
+        Returns:
+            True if the conversation was cached, False otherwise
+        """
+        messages = self._entries.get(conversation_id)
+        if messages is None:
+            return False
+        messages.append(message)
+        size = estimate_message_size(message)
+        self._sizes[conversation_id] += size
+        self._total_bytes += size
+        self._entries.move_to_end(conversation_id)
+        self._evict()
+        return True
+    
+    def invalidate(self, conversation_id: str):
+        """Drop a conversation so the next access reloads it from storage."""
+        self._discard(conversation_id)
+    
+    def clear(self):
+        """Drop every cached conversation."""
+        self._entries.clear()
+        self._sizes.clear()
+        self._total_bytes = 0
+    
+    def keys(self):
+        return self._entries.keys()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache statistics.
+        
+        Returns:
+            Dictionary with entry count, estimated size, limits and hit/miss counters
+        """
+        lookups = self._hits + self._misses
+        return {
+            "entries": len(self._entries),
+            "estimated_bytes": self._total_bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "hits": self._hits,
+            "misses": self._misses,
+            "hit_rate": round(self._hits / lookups, 3) if lookups else None,
+            "evictions": self._evictions
+        }
+    
+    def _discard(self, conversation_id: str):
+        if conversation_id in self._entries:
+            del self._entries[conversation_id]
+            self._total_bytes -= self._sizes.pop(conversation_id, 0)
+    
+    def _evict(self):
+        """Evict least recently used entries until both limits are met."""
+        while len(self._entries) > 1 and (
+            len(self._entries) > self.max_entries or self._total_bytes > self.max_bytes
+        ):
+            conversation_id, _ = self._entries.popitem(last=False)
+            self._total_bytes -= self._sizes.pop(conversation_id, 0)
+            self._evictions += 1
+            logger.debug(f"[CHAT MANAGER] Evicted conversation {conversation_id} from cache")
+    
+    def __contains__(self, conversation_id: object) -> bool:
+        return conversation_id in self._entries
+    
+    def __getitem__(self, conversation_id: str) -> List[Dict[str, Any]]:
+        return self._entries[conversation_id]
+    
+    def __setitem__(self, conversation_id: str, messages: List[Dict[str, Any]]):
+        self.put(conversation_id, messages)
+    
+    def __delitem__(self, conversation_id: str):
+        if conversation_id not in self._entries:
+            raise KeyError(conversation_id)
+        self._discard(conversation_id)
+    
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self._entries))
+    
+    def __len__(self) -> int:
+        return len(self._entries)
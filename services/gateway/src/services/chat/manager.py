@@ -1,5 +1,5 @@
 """Chat conversation manager."""
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, AsyncIterator
 from datetime import datetime
 import httpx
 import json
@@ -7,6 +7,9 @@ import logging
 from ..memory.store import MemoryStore
 from ..tools.manager import ToolManager
 from .message_builder import MessageBuilder
+from .conversation_cache import ConversationCache
+from .summarizer import ConversationSummarizer
+from ..metrics import get_metrics
 from ...utils.helpers import generate_conversation_id, get_timestamp
 from ...config.settings import settings
 
@@ -26,49 +29,47 @@ class ChatManager:
         self.service_manager = service_manager
         self.memory_store = memory_store
         self.tool_manager = tool_manager
-        self.conversations: Dict[str, List[Dict[str, Any]]] = {}
+        self.conversations = ConversationCache(
+            max_entries=settings.chat_cache_max_conversations,
+            max_bytes=settings.chat_cache_max_bytes
+        )
         self._conversation_names: Dict[str, str] = {}
-        self._initialized = False
-        logger.info("      ChatManager setup complete (conversations load on first use)")
+        self.summarizer = ConversationSummarizer(service_manager, memory_store)
+        logger.info("      ChatManager setup complete (conversations load on demand)")
     
-    async def _initialize(self):
-        """Initialize by loading conversations from persistent storage."""
-        if self._initialized:
-            return
-        
-        # Load conversations from memory store
-        stored_conversations = await self.memory_store.list_conversations()
-        for conv_data in stored_conversations:
-            conv_id = conv_data["conversation_id"]
-            # Load messages
-            messages = await self.memory_store.get_conversation(conv_id)
-            # None means conversation doesn't exist (404), skip it
-            if messages is None:
-                logger.warning(f"Conversation {conv_id} listed but not found, skipping")
-                continue
-            # Empty list means conversation exists but has no messages
-            if messages:
-                self.conversations[conv_id] = messages
-            else:
-                self.conversations[conv_id] = []
+    async def _load_conversation(self, conversation_id: str) -> Optional[List[Dict[str, Any]]]:
+        """Get a conversation's messages from the cache, loading them from storage on a miss.
+        
+        Args:
+            conversation_id: Conversation ID
             
-            # Store name if available
-            if conv_data.get("name"):
-                self._conversation_names[conv_id] = conv_data["name"]
+        Returns:
+            List of messages (the cached list), or None if the conversation doesn't exist
+        """
+        messages = self.conversations.get(conversation_id)
+        if messages is not None:
+            return messages
         
-        self._initialized = True
+        messages = await self.memory_store.get_conversation(conversation_id)
+        if messages is None:
+            return None
+        # Another request may have loaded it while we were reading
+        cached = self.conversations.get(conversation_id)
+        if cached is not None:
+            return cached
+        self.conversations.put(conversation_id, messages)
+        return messages
+    
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Get conversation cache statistics (entries, estimated bytes, hits, misses, evictions)."""
+        return self.conversations.get_stats()
     
     async def _generate_conversation_name(self, conversation_id: str) -> str:
         """Generate a default name for a conversation like 'Chat 1', 'Chat 2', etc."""
-        await self._initialize()
-        
-        # Count existing conversations to determine next number
-        all_conversations = await self.memory_store.list_conversations()
-        existing_count = len(all_conversations)
-        
-        # Find the next available number
+        # Find the next available number among existing "Chat N" names
+        chat_conversations = await self.memory_store.list_conversations(name_prefix="Chat ")
         used_numbers = set()
-        for conv in all_conversations:
+        for conv in chat_conversations:
             name = conv.get("name", "")
             if name and name.startswith("Chat "):
                 try:
@@ -87,19 +88,28 @@ class ChatManager:
         await self.memory_store.set_conversation_name(conversation_id, name)
         return name
     
-    async def send_message(
+    async def _start_turn(
         self,
         message: str,
-        conversation_id: Optional[str] = None,
-        sampler_params: Optional[Dict[str, Any]] = None
+        conversation_id: Optional[str]
     ) -> Dict[str, Any]:
-        """Process a user message and generate response."""
-        await self._initialize()
+        """Record the user message and gather what the LLM needs for a turn.
         
+        Args:
+            message: User message
+            conversation_id: Existing conversation ID, or None to start a new one
+            
+        Returns:
+            Dict with 'conversation_id', 'user_msg', 'context', 'history' (the messages
+            not covered by the rolling summary) and 'summary' (None if there is none)
+        """
         # Generate conversation ID if new
         if not conversation_id:
             conversation_id = generate_conversation_id()
-            self.conversations[conversation_id] = []
+        history = await self._load_conversation(conversation_id)
+        if history is None:
+            history = []
+            self.conversations[conversation_id] = history
             # Generate default name
             await self._generate_conversation_name(conversation_id)
         
@@ -113,14 +123,17 @@ class ChatManager:
             "content": message,
             "timestamp": get_timestamp()
         }
-        self.conversations[conversation_id].append(user_msg)
+        if not self.conversations.append(conversation_id, user_msg):
+            # Evicted while the conversation was being named; the turn keeps its own copy
+            history.append(user_msg)
         
         # Retrieve relevant context from memory (exclude current conversation)
-        context = await self.memory_store.retrieve_context(
-            query=message,
-            exclude_conversation_id=conversation_id,
-            conversation_id=conversation_id
-        )
+        with get_metrics().span("memory_retrieval"):
+            context = await self.memory_store.retrieve_context(
+                query=message,
+                exclude_conversation_id=conversation_id,
+                conversation_id=conversation_id
+            )
         
         # Validate context format
         if context is not None:
@@ -131,9 +144,6 @@ class ChatManager:
                 logger.warning("Context 'retrieved_messages' is not a list, ignoring")
                 context = {"retrieved_messages": []}
         
-        # Get conversation history
-        history = self.conversations[conversation_id]
-        
         # Validate history format
         if not isinstance(history, list):
             logger.error("History is not a list: %s", type(history))
@@ -149,6 +159,256 @@ class ChatManager:
                     msg.setdefault('role', 'user')
                     msg.setdefault('content', '')
         
+        # Older turns folded into the rolling summary are sent as the summary instead
+        summary, covered = await self.summarizer.get(conversation_id, history)
+        if covered:
+            logger.debug(f"[CHAT MANAGER] Summary replaces {covered} of {len(history)} history messages")
+            history = history[covered:]
+        
+        return {
+            "conversation_id": conversation_id,
+            "user_msg": user_msg,
+            "context": context,
+            "history": history,
+            "summary": summary
+        }
+    
+    async def _finish_turn(
+        self,
+        conversation_id: str,
+        user_msg: Dict[str, Any],
+        assistant_content: str,
+        parsed_tool_calls: Optional[List[Dict[str, Any]]] = None
+    ) -> None:
+        """Append the assistant reply and persist the exchange.
+        
+        Args:
+            conversation_id: Conversation ID
+            user_msg: User message recorded by _start_turn
+            assistant_content: Final assistant text
+            parsed_tool_calls: Tool calls in OpenAI format, if any were made
+        """
+        assistant_msg = {
+            "role": "assistant",
+            "content": assistant_content,
+            "timestamp": get_timestamp()
+        }
+        if parsed_tool_calls:
+            # CRITICAL: Store parsed_tool_calls (OpenAI format) not tool_calls_with_results (custom format)
+            assistant_msg["tool_calls"] = parsed_tool_calls
+        
+        # Save to vector store and memory
+        conv_name = self._conversation_names.get(conversation_id)
+        with get_metrics().span("persistence"):
+            await self.memory_store.store_conversation(
+                conversation_id=conversation_id,
+                messages=[user_msg, assistant_msg],
+                name=conv_name
+            )
+        
+        # Only extend the cached history if it is still the one this turn started from;
+        # if it was evicted (or reloaded without the user message) the next access reloads it
+        cached = self.conversations.get(conversation_id)
+        if cached is not None:
+            if cached and cached[-1] is user_msg:
+                self.conversations.append(conversation_id, assistant_msg)
+                self.summarizer.schedule(conversation_id, cached)
+            else:
+                self.conversations.invalidate(conversation_id)
+    
+    def _abandon_turn(self, conversation_id: str, user_msg: Dict[str, Any]) -> None:
+        """Drop a turn that ended without a reply (error or client disconnect) from the cache.
+        
+        The user message is only persisted together with the reply, so leaving it
+        cached would make the cache diverge from storage. A no-op once _finish_turn ran.
+        
+        Args:
+            conversation_id: Conversation ID
+            user_msg: User message recorded by _start_turn
+        """
+        cached = self.conversations.get(conversation_id)
+        if cached and cached[-1] is user_msg:
+            # The next access reloads the conversation as stored
+            self.conversations.invalidate(conversation_id)
+    
+    def _parse_tool_calls(self, tool_calls_data: Optional[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """Normalise tool calls returned by the LLM manager into OpenAI format.
+        
+        Args:
+            tool_calls_data: Raw tool calls from the LLM manager
+            
+        Returns:
+            List of tool calls in OpenAI format (arguments kept as JSON strings)
+        """
+        parsed_tool_calls = []
+        if tool_calls_data:
+            logger.info(f"[CHAT MANAGER] ✅ Tool calls received from LLM manager: {len(tool_calls_data)}")
+            for tc in tool_calls_data:
+                try:
+                    # OpenAI format: {"id": "...", "type": "function", "function": {"name": "...", "arguments": "..."}}
+                    function_data = tc.get("function", {})
+                    arguments_str = function_data.get("arguments", "{}")
+                    parsed_tool_calls.append({
+                        "id": tc.get("id"),
+                        "type": tc.get("type", "function"),
+                        "function": {
+                            "name": function_data.get("name"),
+                            "arguments": arguments_str  # Keep as string for OpenAI format
+                        }
+                    })
+                except (KeyError, AttributeError) as e:
+                    logger.warning(f"Failed to parse tool call: {e}")
+                    continue
+        
+        logger.info(f"Parsed tool calls: {len(parsed_tool_calls)}")
+        for i, tc in enumerate(parsed_tool_calls):
+            logger.info(f"  Tool call {i+1}: {tc.get('function', {}).get('name')} (id: {tc.get('id')})")
+        return parsed_tool_calls
+    
+    async def _execute_tool_calls(
+        self,
+        parsed_tool_calls: List[Dict[str, Any]],
+        conversation_id: str
+    ) -> List[Dict[str, Any]]:
+        """Execute parsed tool calls through the tool manager.
+        
+        Args:
+            parsed_tool_calls: Tool calls in OpenAI format
+            conversation_id: Conversation the calls belong to
+            
+        Returns:
+            List of tool execution results (empty if nothing could be executed)
+        """
+        if not parsed_tool_calls:
+            logger.info(f"[CHAT MANAGER] No tool calls in response")
+            return []
+        if not self.tool_manager:
+            logger.warning(f"[CHAT MANAGER] ⚠️  Tool calls detected but tool_manager is not available!")
+            return []
+        
+        logger.info(f"[CHAT MANAGER] 🔧 Executing {len(parsed_tool_calls)} tool call(s)...")
+        for i, tc in enumerate(parsed_tool_calls):
+            args_str = tc.get('function', {}).get('arguments', '{}')
+            logger.info(f"[CHAT MANAGER]   Tool call {i+1}: {tc.get('function', {}).get('name', 'unknown')} with args: {args_str}")
+        # Execute tools
+        with get_metrics().span("tool_execution"):
+            tool_execution_results = await self.tool_manager.execute_tools(
+                tool_calls=parsed_tool_calls,
+                conversation_id=conversation_id
+            )
+        
+        logger.info(f"[CHAT MANAGER] ✅ Tool execution completed - received {len(tool_execution_results) if tool_execution_results else 0} result(s)")
+        if tool_execution_results:
+            for i, result in enumerate(tool_execution_results):
+                logger.info(f"[CHAT MANAGER]   Result {i+1}: {result.get('name')} - success={result.get('success')}, error={result.get('error')}")
+        
+        # Validate tool execution results
+        if tool_execution_results is None:
+            logger.warning("tool_manager.execute_tools returned None, skipping tool results")
+            return []
+        if not isinstance(tool_execution_results, list):
+            logger.warning(f"tool_manager.execute_tools returned invalid type: {type(tool_execution_results)}, skipping tool results")
+            return []
+        return tool_execution_results
+    
+    def _format_tool_results(self, tool_execution_results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Format tool execution results for the LLM follow-up call.
+        
+        Args:
+            tool_execution_results: Results from the tool manager
+            
+        Returns:
+            List of tool result dicts accepted by LLMManager
+        """
+        tool_results = []
+        for i, res in enumerate(tool_execution_results):
+            if res is None:
+                logger.warning(f"Skipping None result at index {i} in tool_execution_results")
+                continue
+            if not isinstance(res, dict):
+                logger.warning(f"Skipping invalid result type at index {i}: {type(res)}")
+                continue
+            
+            tool_name = res.get("name", "unknown")
+            success = res.get("success", False)
+            error = res.get("error")
+            result_data = res.get("result")
+            
+            logger.info(f"  Tool result {i+1} ({tool_name}): success={success}, error={error is not None}")
+            if error:
+                logger.warning(f"    Error: {error}")
+            if result_data:
+                logger.debug(f"    Result: {str(result_data)[:200]}...")
+            
+            tool_results.append({
+                "id": res.get("id"),
+                "name": tool_name,
+                "result": result_data if success else f"Error: {error}",
+                "success": success,
+                "error": error,
+                "arguments": res.get("arguments", {})  # Include original arguments
+            })
+        
+        logger.info(f"Formatted {len(tool_results)} tool result(s) for LLM follow-up")
+        return tool_results
+    
+    def _format_tool_calls_with_results(
+        self,
+        parsed_tool_calls: List[Dict[str, Any]],
+        tool_execution_results: List[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        """Format tool calls with their execution results for frontend display.
+        
+        Args:
+            parsed_tool_calls: Tool calls in OpenAI format
+            tool_execution_results: Results from the tool manager, in call order
+            
+        Returns:
+            List of dicts with id, name, parsed arguments, success, result and error
+        """
+        tool_calls_with_results = []
+        for i, tool_call in enumerate(parsed_tool_calls):
+            tool_result = tool_execution_results[i] if i < len(tool_execution_results) else None
+            function_data = tool_call.get("function", {})
+            # Parse arguments for display
+            arguments_str = function_data.get("arguments", "{}")
+            try:
+                arguments = json.loads(arguments_str) if isinstance(arguments_str, str) else arguments_str
+            except json.JSONDecodeError:
+                arguments = {}
+            
+            tool_calls_with_results.append({
+                "id": tool_call.get("id"),
+                "name": function_data.get("name"),
+                "arguments": arguments,
+                "success": tool_result.get("success", False) if tool_result else False,
+                "result": tool_result.get("result") if tool_result else None,
+                "error": tool_result.get("error") if tool_result else None
+            })
+        return tool_calls_with_results
+    
+    @staticmethod
+    def _fallback_tool_response(tool_execution_results: List[Dict[str, Any]]) -> str:
+        """Build a plain reply when the follow-up LLM call produced nothing."""
+        tool_names = [r.get("name", "tool") for r in tool_execution_results if r.get("success")]
+        if tool_names:
+            return f"I have successfully executed the {', '.join(tool_names)} tool(s)."
+        return "I attempted to execute the requested tool(s)."
+    
+    async def send_message(
+        self,
+        message: str,
+        conversation_id: Optional[str] = None,
+        sampler_params: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """Process a user message and generate response."""
+        turn = await self._start_turn(message, conversation_id)
+        conversation_id = turn["conversation_id"]
+        user_msg = turn["user_msg"]
+        context = turn["context"]
+        history = turn["history"]
+        summary = turn["summary"]
+        
         # Get LLM settings
         llm_manager = self.service_manager.llm_manager
         
@@ -173,7 +433,9 @@ class ChatManager:
                 history=history,
                 context=context,
                 tool_results=tool_results,
-                stream=False
+                stream=False,
+                client_id=conversation_id,
+                summary=summary
             )
             
             # Validate response
@@ -184,114 +446,20 @@ class ChatManager:
             
             assistant_content = response.get("response", "")
             tool_calls_data = response.get("tool_calls", [])
+            prompt_cache = response.get("prompt_cache")
+            prompt_budget = response.get("prompt_budget")
             
             logger.info(f"[CHAT MANAGER] LLM response received - content length: {len(assistant_content)}, tool_calls: {len(tool_calls_data) if tool_calls_data else 0}")
             
             # Parse tool calls from OpenAI format
-            parsed_tool_calls = []
-            if tool_calls_data:
-                logger.info(f"[CHAT MANAGER] ✅ Tool calls received from LLM manager: {len(tool_calls_data)}")
-                for tc in tool_calls_data:
-                    try:
-                        # OpenAI format: {"id": "...", "type": "function", "function": {"name": "...", "arguments": "..."}}
-                        function_data = tc.get("function", {})
-                        arguments_str = function_data.get("arguments", "{}")
-                        # Arguments come as JSON string from OpenAI
-                        try:
-                            arguments = json.loads(arguments_str) if isinstance(arguments_str, str) else arguments_str
-                        except json.JSONDecodeError:
-                            arguments = {}
-                        
-                        parsed_tool_calls.append({
-                            "id": tc.get("id"),
-                            "type": tc.get("type", "function"),
-                            "function": {
-                                "name": function_data.get("name"),
-                                "arguments": arguments_str  # Keep as string for OpenAI format
-                            }
-                        })
-                    except (KeyError, AttributeError) as e:
-                        logger.warning(f"Failed to parse tool call: {e}")
-                        continue
-            
-            logger.info(f"Parsed tool calls: {len(parsed_tool_calls)}")
-            for i, tc in enumerate(parsed_tool_calls):
-                logger.info(f"  Tool call {i+1}: {tc.get('function', {}).get('name')} (id: {tc.get('id')})")
+            parsed_tool_calls = self._parse_tool_calls(tool_calls_data)
             
             # Handle tool calls if present
             initial_content = assistant_content
-            tool_execution_results = []  # Initialize to avoid UnboundLocalError
-            
-            if parsed_tool_calls and self.tool_manager:
-                logger.info(f"[CHAT MANAGER] 🔧 Executing {len(parsed_tool_calls)} tool call(s)...")
-                for i, tc in enumerate(parsed_tool_calls):
-                    args_str = tc.get('function', {}).get('arguments', '{}')
-                    try:
-                        args_dict = json.loads(args_str) if isinstance(args_str, str) else args_str
-                        logger.info(f"[CHAT MANAGER]   Tool call {i+1}: {tc.get('function', {}).get('name', 'unknown')}")
-                        logger.info(f"[CHAT MANAGER]     Arguments (raw): {args_str}")
-                        logger.info(f"[CHAT MANAGER]     Arguments (parsed): {json.dumps(args_dict, indent=6)}")
-                    except:
-                        logger.info(f"[CHAT MANAGER]   Tool call {i+1}: {tc.get('function', {}).get('name', 'unknown')} with args: {args_str}")
-                # Execute tools
-                logger.info(f"[CHAT MANAGER] Calling tool_manager.execute_tools with {len(parsed_tool_calls)} tool call(s)")
-                tool_execution_results = await self.tool_manager.execute_tools(
-                    tool_calls=parsed_tool_calls,
-                    conversation_id=conversation_id
-                )
-                
-                logger.info(f"[CHAT MANAGER] ✅ Tool execution completed - received {len(tool_execution_results) if tool_execution_results else 0} result(s)")
-                if tool_execution_results:
-                    for i, result in enumerate(tool_execution_results):
-                        logger.info(f"[CHAT MANAGER]   Result {i+1}: {result.get('name')} - success={result.get('success')}, error={result.get('error')}")
-            elif parsed_tool_calls and not self.tool_manager:
-                logger.warning(f"[CHAT MANAGER] ⚠️  Tool calls detected but tool_manager is not available!")
-                tool_execution_results = []  # Ensure it's initialized
-            else:
-                # No tool calls
-                logger.info(f"[CHAT MANAGER] No tool calls in response")
-                tool_execution_results = []  # Ensure it's initialized
+            tool_execution_results = await self._execute_tool_calls(parsed_tool_calls, conversation_id)
             
-            # Validate tool execution results (only if we have tool calls and results)
             if parsed_tool_calls:
-                if tool_execution_results is None:
-                    logger.warning("tool_manager.execute_tools returned None, skipping tool results")
-                    tool_execution_results = []
-                if not isinstance(tool_execution_results, list):
-                    logger.warning(f"tool_manager.execute_tools returned invalid type: {type(tool_execution_results)}, skipping tool results")
-                    tool_execution_results = []
-                
-                # Format tool results for LLM
-                tool_results = []
-                for i, res in enumerate(tool_execution_results):
-                    if res is None:
-                        logger.warning(f"Skipping None result at index {i} in tool_execution_results")
-                        continue
-                    if not isinstance(res, dict):
-                        logger.warning(f"Skipping invalid result type at index {i}: {type(res)}")
-                        continue
-                    
-                    tool_name = res.get("name", "unknown")
-                    success = res.get("success", False)
-                    error = res.get("error")
-                    result_data = res.get("result")
-                    
-                    logger.info(f"  Tool result {i+1} ({tool_name}): success={success}, error={error is not None}")
-                    if error:
-                        logger.warning(f"    Error: {error}")
-                    if result_data:
-                        logger.debug(f"    Result: {str(result_data)[:200]}...")
-                    
-                    tool_results.append({
-                        "id": res.get("id"),
-                        "name": tool_name,
-                        "result": result_data if success else f"Error: {error}",
-                        "success": success,
-                        "error": error,
-                        "arguments": res.get("arguments", {})  # Include original arguments
-                    })
-                
-                logger.info(f"Formatted {len(tool_results)} tool result(s) for LLM follow-up")
+                tool_results = self._format_tool_results(tool_execution_results)
                 
                 # CRITICAL: Before making follow-up call, we need to add the assistant message with tool_calls to history
                 # This ensures the history is correct for the follow-up call
@@ -315,7 +483,9 @@ class ChatManager:
                         history=history_with_tool_calls,
                         context=context,
                         tool_results=tool_results,
-                        stream=False
+                        stream=False,
+                        client_id=conversation_id,
+                        summary=summary
                     )
                     logger.info(f"Follow-up response received: {follow_up_response is not None}")
                     
@@ -328,6 +498,8 @@ class ChatManager:
                         raise Exception(f"Follow-up response is invalid type: {type(follow_up_response)}")
                     else:
                         follow_up_content = follow_up_response.get("response", "")
+                        prompt_cache = follow_up_response.get("prompt_cache") or prompt_cache
+                        prompt_budget = follow_up_response.get("prompt_budget") or prompt_budget
                         logger.info(f"Follow-up content length: {len(follow_up_content)}")
                         
                         # If follow-up content is empty, generate a fallback
@@ -336,11 +508,7 @@ class ChatManager:
                 except Exception as e:
                     logger.error(f"Follow-up LLM call failed: {e}", exc_info=True)
                     # Generate a simple response based on tool results
-                    tool_names = [r.get("name", "tool") for r in tool_execution_results if r.get("success")]
-                    if tool_names:
-                        follow_up_content = f"I have successfully executed the {', '.join(tool_names)} tool(s)."
-                    else:
-                        follow_up_content = "I attempted to execute the requested tool(s)."
+                    follow_up_content = self._fallback_tool_response(tool_execution_results)
                 
                 # Combine initial content with follow-up
                 if initial_content and follow_up_content:
@@ -354,88 +522,176 @@ class ChatManager:
                     tool_names = [r.get("name", "tool") for r in tool_execution_results if r.get("success")]
                     assistant_content = f"I have successfully executed the {', '.join(tool_names)} tool(s)." if tool_names else "Tool execution completed."
                 
-                # Format tool calls with execution results for frontend display
-                tool_calls_with_results = []
-                for i, tool_call in enumerate(parsed_tool_calls):
-                    tool_result = tool_execution_results[i] if i < len(tool_execution_results) else None
-                    function_data = tool_call.get("function", {})
-                    # Parse arguments for display
-                    arguments_str = function_data.get("arguments", "{}")
-                    try:
-                        arguments = json.loads(arguments_str) if isinstance(arguments_str, str) else arguments_str
-                    except json.JSONDecodeError:
-                        arguments = {}
-                    
-                    tool_calls_with_results.append({
-                        "id": tool_call.get("id"),
-                        "name": function_data.get("name"),
-                        "arguments": arguments,
-                        "success": tool_result.get("success", False) if tool_result else False,
-                        "result": tool_result.get("result") if tool_result else None,
-                        "error": tool_result.get("error") if tool_result else None
-                    })
-                
                 # Store assistant response with tool calls in OpenAI format
-                # CRITICAL: Store parsed_tool_calls (OpenAI format) not tool_calls_with_results (custom format)
-                assistant_msg = {
-                    "role": "assistant",
-                    "content": assistant_content,
-                    "tool_calls": parsed_tool_calls,  # Store in OpenAI format for history
-                    "timestamp": get_timestamp()
-                }
-                self.conversations[conversation_id].append(assistant_msg)
-                
-                # Save to vector store and memory
-                conv_name = self._conversation_names.get(conversation_id)
-                await self.memory_store.store_conversation(
-                    conversation_id=conversation_id,
-                    messages=[user_msg, assistant_msg],
-                    name=conv_name
-                )
+                await self._finish_turn(conversation_id, user_msg, assistant_content, parsed_tool_calls)
                 
                 return {
                     "response": assistant_content,
                     "conversation_id": conversation_id,
                     "context_used": context.get("retrieved_messages", []) if context else [],
-                    "tool_calls": tool_calls_with_results
+                    "tool_calls": self._format_tool_calls_with_results(parsed_tool_calls, tool_execution_results),
+                    "prompt_cache": prompt_cache,
+                    "prompt_budget": prompt_budget
                 }
             
             # No tool calls - store assistant response and return
-            assistant_msg = {
+            await self._finish_turn(conversation_id, user_msg, assistant_content)
+            
+            return {
+                "response": assistant_content,
+                "conversation_id": conversation_id,
+                "context_used": context.get("retrieved_messages", []) if context else [],
+                "tool_calls": [],
+                "prompt_cache": prompt_cache,
+                "prompt_budget": prompt_budget
+            }
+        except RuntimeError as e:
+            logger.error(f"LLM error: {e}")
+            raise RuntimeError("LLM service not available. Please ensure the LLM service is running.") from e
+        except httpx.TimeoutException as e:
+            logger.error(f"LLM request timed out: {e}")
+            raise RuntimeError("LLM request timed out. The model may be processing a large request.") from e
+        except httpx.HTTPStatusError as e:
+            logger.error(f"LLM service returned error status {e.response.status_code}: {e.response.text}")
+            raise RuntimeError(f"LLM service error: {e.response.status_code} - {e.response.text}") from e
+        except Exception as e:
+            logger.error(f"Error calling LLM service: {e}", exc_info=True)
+            raise RuntimeError(f"LLM request failed: {str(e)}") from e
+        finally:
+            self._abandon_turn(conversation_id, user_msg)
+    
+    async def send_message_stream(
+        self,
+        message: str,
+        conversation_id: Optional[str] = None,
+        sampler_params: Optional[Dict[str, Any]] = None,
+        allow_tools: bool = True,
+        tool_names: Optional[List[str]] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Process a user message and stream the response as it is generated.
+        
+        Mirrors send_message, but content deltas are yielded as soon as the LLM
+        server produces them. If the model requests tools, they are executed
+        after the first pass and the follow-up answer is streamed as well.
+        
+        Args:
+            message: User message
+            conversation_id: Existing conversation ID, or None to start a new one
+            sampler_params: Sampler settings to apply before generating
+            allow_tools: Whether tools may be offered to the model
+            tool_names: Only offer these tools (None = all tools)
+            
+        Yields:
+            {"type": "content", "content": str} for each delta,
+            {"type": "tool_calls", "tool_calls": list} once tools have run, and
+            a final {"type": "done", "response", "conversation_id", "context_used", "tool_calls",
+            "prompt_cache", "prompt_budget"}
+        """
+        turn = await self._start_turn(message, conversation_id)
+        conversation_id = turn["conversation_id"]
+        user_msg = turn["user_msg"]
+        context = turn["context"]
+        history = turn["history"]
+        summary = turn["summary"]
+        
+        llm_manager = self.service_manager.llm_manager
+        if sampler_params:
+            llm_manager.update_settings(sampler_params)
+        
+        try:
+            if not llm_manager.is_model_loaded():
+                raise RuntimeError("No model loaded. Please load a model first.")
+            
+            initial_content = ""
+            tool_calls_data = []
+            prompt_cache = None
+            prompt_budget = None
+            async for event in llm_manager.stream_response(
+                message=message,
+                history=history,
+                context=context,
+                allow_tools=allow_tools,
+                client_id=conversation_id,
+                tool_names=tool_names,
+                summary=summary
+            ):
+                if event["type"] == "content":
+                    yield event
+                else:
+                    initial_content = event.get("response", "")
+                    tool_calls_data = event.get("tool_calls", [])
+                    prompt_cache = event.get("prompt_cache")
+                    prompt_budget = event.get("prompt_budget")
+            
+            logger.info(f"[CHAT MANAGER] LLM stream finished - content length: {len(initial_content)}, tool_calls: {len(tool_calls_data) if tool_calls_data else 0}")
+            
+            parsed_tool_calls = self._parse_tool_calls(tool_calls_data)
+            tool_execution_results = await self._execute_tool_calls(parsed_tool_calls, conversation_id)
+            
+            if not parsed_tool_calls:
+                await self._finish_turn(conversation_id, user_msg, initial_content)
+                yield {
+                    "type": "done",
+                    "response": initial_content,
+                    "conversation_id": conversation_id,
+                    "context_used": context.get("retrieved_messages", []) if context else [],
+                    "tool_calls": [],
+                    "prompt_cache": prompt_cache,
+                    "prompt_budget": prompt_budget
+                }
+                return
+            
+            tool_calls_with_results = self._format_tool_calls_with_results(parsed_tool_calls, tool_execution_results)
+            yield {"type": "tool_calls", "tool_calls": tool_calls_with_results}
+            
+            history_with_tool_calls = history + [{
                 "role": "assistant",
-                "content": assistant_content,
+                "content": initial_content if initial_content else None,
+                "tool_calls": parsed_tool_calls,
                 "timestamp": get_timestamp()
-            }
-            self.conversations[conversation_id].append(assistant_msg)
+            }]
             
-            # Save to vector store and memory
-            conv_name = self._conversation_names.get(conversation_id)
-            await self.memory_store.store_conversation(
-                conversation_id=conversation_id,
-                messages=[user_msg, assistant_msg],
-                name=conv_name
-            )
+            # Stream the follow-up answer, separated from any text the model sent before its tool calls
+            logger.info("Streaming follow-up LLM call with tool results...")
+            follow_up_parts: List[str] = []
+            try:
+                async for event in llm_manager.stream_response(
+                    message=message,
+                    history=history_with_tool_calls,
+                    context=context,
+                    tool_results=self._format_tool_results(tool_execution_results),
+                    allow_tools=allow_tools,
+                    client_id=conversation_id,
+                    summary=summary
+                ):
+                    if event["type"] != "content":
+                        prompt_cache = event.get("prompt_cache") or prompt_cache
+                        prompt_budget = event.get("prompt_budget") or prompt_budget
+                        continue
+                    content = event["content"]
+                    if not follow_up_parts and initial_content:
+                        content = "\n\n" + content
+                    follow_up_parts.append(content)
+                    yield {"type": "content", "content": content}
+            except Exception as e:
+                logger.error(f"Follow-up LLM stream failed: {e}", exc_info=True)
             
-            # Format tool calls for response (convert to simple format)
-            formatted_tool_calls = []
-            for tc in parsed_tool_calls:
-                function_data = tc.get("function", {})
-                arguments_str = function_data.get("arguments", "{}")
-                try:
-                    arguments = json.loads(arguments_str) if isinstance(arguments_str, str) else arguments_str
-                except json.JSONDecodeError:
-                    arguments = {}
-                formatted_tool_calls.append({
-                    "id": tc.get("id"),
-                    "name": function_data.get("name"),
-                    "arguments": arguments
-                })
+            if not follow_up_parts:
+                fallback = self._fallback_tool_response(tool_execution_results)
+                follow_up_parts.append(f"\n\n{fallback}" if initial_content else fallback)
+                yield {"type": "content", "content": follow_up_parts[0]}
             
-            return {
+            assistant_content = f"{initial_content}{''.join(follow_up_parts)}".strip()
+            await self._finish_turn(conversation_id, user_msg, assistant_content, parsed_tool_calls)
+            
+            yield {
+                "type": "done",
                 "response": assistant_content,
                 "conversation_id": conversation_id,
                 "context_used": context.get("retrieved_messages", []) if context else [],
-                "tool_calls": formatted_tool_calls
+                "tool_calls": tool_calls_with_results,
+                "prompt_cache": prompt_cache,
+                "prompt_budget": prompt_budget
             }
         except RuntimeError as e:
             logger.error(f"LLM error: {e}")
@@ -444,31 +700,23 @@ class ChatManager:
             logger.error(f"LLM request timed out: {e}")
             raise RuntimeError("LLM request timed out. The model may be processing a large request.") from e
         except httpx.HTTPStatusError as e:
-            logger.error(f"LLM service returned error status {e.response.status_code}: {e.response.text}")
-            raise RuntimeError(f"LLM service error: {e.response.status_code} - {e.response.text}") from e
+            logger.error(f"LLM service returned error status {e.response.status_code}")
+            raise RuntimeError(f"LLM service error: {e.response.status_code}") from e
         except Exception as e:
             logger.error(f"Error calling LLM service: {e}", exc_info=True)
             raise RuntimeError(f"LLM request failed: {str(e)}") from e
+        finally:
+            self._abandon_turn(conversation_id, user_msg)
     
     
     async def get_conversation(self, conversation_id: str) -> Optional[List[Dict[str, Any]]]:
         """Get conversation by ID."""
-        await self._initialize()
-        
-        # Try to load from memory if not in cache
-        if conversation_id not in self.conversations:
-            messages = await self.memory_store.get_conversation(conversation_id)
-            if messages is not None:
-                self.conversations[conversation_id] = messages
-            else:
-                return None
-        
-        return self.conversations.get(conversation_id)
+        return await self._load_conversation(conversation_id)
     
     async def list_conversations(self) -> List[str]:
         """List all conversation IDs."""
-        await self._initialize()
-        return list(self.conversations.keys())
+        conversations = await self.memory_store.list_conversations()
+        return [conv["conversation_id"] for conv in conversations]
 
     async def set_conversation_name(self, conversation_id: str, name: str) -> bool:
         """Set the name of a conversation.
@@ -480,15 +728,9 @@ class ChatManager:
         Returns:
             True if successful, False if conversation not found
         """
-        await self._initialize()
-        
         # Check if conversation exists
-        if conversation_id not in self.conversations:
-            # Try to load it
-            messages = await self.memory_store.get_conversation(conversation_id)
-            if messages is None:
-                return False
-            self.conversations[conversation_id] = messages
+        if conversation_id not in self.conversations and self.memory_store.get_conversation_meta(conversation_id) is None:
+            return False
         
         # Update cache
         self._conversation_names[conversation_id] = name
@@ -504,17 +746,15 @@ class ChatManager:
     async def get_conversation_name(self, conversation_id: str) -> Optional[str]:
         """Get the name of a conversation.
         
-        OPTIMIZED: Loads single conversation instead of all conversations.
+        OPTIMIZED: Reads the conversation's catalogue entry instead of loading its messages.
         """
-        await self._initialize()
         if conversation_id in self._conversation_names:
             return self._conversation_names[conversation_id]
         
-        # OPTIMIZATION: Load single conversation directly instead of loading all
         try:
-            conv = await self.memory_store.get_conversation(conversation_id)
-            if conv:
-                name = conv.get("name")
+            meta = self.memory_store.get_conversation_meta(conversation_id)
+            if meta:
+                name = meta.get("name")
                 if name:
                     self._conversation_names[conversation_id] = name
                     return name
@@ -529,7 +769,6 @@ class ChatManager:
         Returns:
             New conversation ID
         """
-        await self._initialize()
         from ...utils.helpers import generate_conversation_id
         conversation_id = generate_conversation_id()
         self.conversations[conversation_id] = []
@@ -548,12 +787,11 @@ class ChatManager:
         Returns:
             True if deleted, False if not found
         """
-        await self._initialize()
-        
         # Delete from persistent storage
         success = await self.memory_store.delete_conversation(conversation_id)
         
         # Delete from memory cache
+        self.summarizer.forget(conversation_id)
         if conversation_id in self.conversations:
             del self.conversations[conversation_id]
         if conversation_id in self._conversation_names:
@@ -563,5 +801,4 @@ class ChatManager:
     
     async def get_conversation_count(self) -> int:
         """Get total number of conversations."""
-        await self._initialize()
-        return len(self.conversations)
\ No newline at end of file
+        return await self.memory_store.get_conversation_count()
\ No newline at end of file
@@ -0,0 +1,258 @@
+"""Background rolling summaries of long conversations."""
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Set, Tuple
+import asyncio
+import json
+import logging
+
+from ..llm.scheduler import Priority
+from ..memory.store import MemoryStore
+from ..metrics import get_metrics
+from ...config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+_SUMMARY_INSTRUCTIONS = (
+    "You maintain a running summary of a conversation between a user and an assistant. "
+    "Update the summary so it also covers the new messages. Keep facts about the user, names, "
+    "numbers, decisions, results of tool calls, open questions and the user's preferences; "
+    "leave out greetings and small talk. Write compact third-person prose of at most {words} words. "
+    "Reply with the updated summary only."
+)
+
+
+class ConversationSummarizer:
+    """Folds the older turns of long conversations into a persisted rolling summary.
+    
+    After a turn, once the history not yet covered by the summary passes
+    settings.chat_summary_trigger_tokens, a background task summarises all of it
+    except the newest settings.chat_summary_keep_tokens (cut at a user message),
+    folding the new messages into the previous summary. Requests use the
+    BACKGROUND scheduler priority, so queued user turns go first. A fold still
+    holds its slot until it finishes and replaces the server's cached prompt,
+    so with a single scheduler slot it only starts once the conversation has
+    been idle for settings.chat_summary_idle_seconds and the server is free.
+    
+    The summary is stored next to the conversation as {"text", "covers",
+    "last_timestamp", "updated_at"}: the first `covers` messages are replaced
+    by the text when prompting. It is ignored if the message it ends at no
+    longer matches (e.g. after an edit), and rebuilt on the next run.
+    """
+    
+    def __init__(self, service_manager: Any, memory_store: MemoryStore):
+        """Initialize the summarizer.
+        
+        Args:
+            service_manager: ServiceManager (for the LLM manager, which can change)
+            memory_store: Store the summaries are persisted in
+        """
+        self.service_manager = service_manager
+        self.memory_store = memory_store
+        self._summaries: "OrderedDict[str, Optional[Dict[str, Any]]]" = OrderedDict()  # None = none stored
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._folding: Set[str] = set()  # Conversations past the idle wait, sending fold requests
+        self._stats = {"runs": 0, "summaries": 0, "messages_folded": 0, "errors": 0}
+    
+    async def _load(self, conversation_id: str) -> Optional[Dict[str, Any]]:
+        if conversation_id in self._summaries:
+            self._summaries.move_to_end(conversation_id)
+            return self._summaries[conversation_id]
+        summary = await self.memory_store.get_conversation_summary(conversation_id)
+        self._remember(conversation_id, summary)
+        return summary
+    
+    def _remember(self, conversation_id: str, summary: Optional[Dict[str, Any]]):
+        self._summaries[conversation_id] = summary
+        self._summaries.move_to_end(conversation_id)
+        while len(self._summaries) > settings.chat_cache_max_conversations:
+            self._summaries.popitem(last=False)
+    
+    async def get(self, conversation_id: str, history: List[Dict[str, Any]]) -> Tuple[Optional[str], int]:
+        """Get the summary that applies to a conversation's history.
+        
+        Args:
+            conversation_id: Conversation ID
+            history: The conversation's messages
+        
+        Returns:
+            Tuple of (summary text, number of leading history messages it replaces),
+            or (None, 0) if there is no valid summary
+        """
+        if not settings.chat_summary_enabled:
+            return None, 0
+        summary = await self._load(conversation_id)
+        if not summary or not summary.get("text"):
+            return None, 0
+        covers = summary.get("covers", 0)
+        if (
+            covers <= 0
+            or covers >= len(history)
+            or history[covers - 1].get("timestamp") != summary.get("last_timestamp")
+            or history[covers].get("role") != "user"
+        ):
+            logger.debug(f"[SUMMARY] Stored summary of {conversation_id} doesn't match its history, ignoring it")
+            return None, 0
+        return summary["text"], covers
+    
+    def schedule(self, conversation_id: str, history: List[Dict[str, Any]]):
+        """Summarise a conversation in the background if it has grown past the threshold.
+        
+        Args:
+            conversation_id: Conversation ID
+            history: The conversation's messages after the turn (copied)
+        """
+        if not settings.chat_summary_enabled:
+            return
+        running = self._tasks.get(conversation_id)
+        if running is not None and not running.done():
+            if conversation_id in self._folding:
+                return
+            running.cancel()  # Still waiting for the conversation to go idle; restart the wait
+        task = asyncio.create_task(self._run(conversation_id, list(history)))
+        self._tasks[conversation_id] = task
+        task.add_done_callback(lambda done: self._tasks.pop(conversation_id, None) if self._tasks.get(conversation_id) is done else None)
+    
+    def forget(self, conversation_id: str):
+        """Drop a deleted conversation's summary and cancel its pending run."""
+        self._summaries.pop(conversation_id, None)
+        task = self._tasks.pop(conversation_id, None)
+        if task is not None and not task.done():
+            task.cancel()
+    
+    async def shutdown(self):
+        """Cancel running summaries."""
+        tasks = [task for task in self._tasks.values() if not task.done()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._tasks.clear()
+        self._folding.clear()
+    
+    async def _wait_until_idle(self):
+        """With a single scheduler slot, wait for the conversation to go idle and the server to be free."""
+        llm_manager = self.service_manager.llm_manager
+        if llm_manager is None or llm_manager.server_manager.scheduler.slots > 1:
+            return
+        await asyncio.sleep(settings.chat_summary_idle_seconds)
+        while True:
+            llm_manager = self.service_manager.llm_manager
+            if llm_manager is None:
+                return
+            stats = llm_manager.server_manager.scheduler.get_stats()
+            if not stats["active"] and not any(stats["queued"].values()):
+                return
+            await asyncio.sleep(1.0)
+    
+    async def _run(self, conversation_id: str, history: List[Dict[str, Any]]):
+        """Fold everything but the newest turns into the conversation's summary."""
+        await self._wait_until_idle()
+        llm_manager = self.service_manager.llm_manager
+        if llm_manager is None or not llm_manager.is_model_loaded():
+            return
+        self._folding.add(conversation_id)
+        try:
+            text, covers = await self.get(conversation_id, history)
+            pending = history[covers:]
+            counter = llm_manager.get_token_counter()
+            tokens = await counter.count_messages(pending)
+            if sum(tokens) < settings.chat_summary_trigger_tokens:
+                return
+            self._stats["runs"] += 1
+            
+            # Newest turns within chat_summary_keep_tokens stay verbatim; always keep the last user message
+            last_user = max((i for i, msg in enumerate(pending) if msg.get("role") == "user"), default=0)
+            cut, kept = last_user, 0
+            for i in range(len(pending) - 1, -1, -1):
+                kept += tokens[i]
+                if kept > settings.chat_summary_keep_tokens:
+                    break
+                if pending[i].get("role") == "user" and i < cut:
+                    cut = i
+            if cut <= 0:
+                return
+            
+            # Fold in chunks of at most chat_summary_trigger_tokens so each request stays small
+            with get_metrics().span("summarization"):
+                start = 0
+                while start < cut:
+                    end, size = start, 0
+                    while end < cut and (end == start or size + tokens[end] <= settings.chat_summary_trigger_tokens):
+                        size += tokens[end]
+                        end += 1
+                    text = await self._fold(llm_manager, conversation_id, text, pending[start:end])
+                    start = end
+            
+            summary = {
+                "text": text,
+                "covers": covers + cut,
+                "last_timestamp": history[covers + cut - 1].get("timestamp"),
+                "updated_at": datetime.utcnow().isoformat()
+            }
+            if await self.memory_store.set_conversation_summary(conversation_id, summary):
+                self._remember(conversation_id, summary)
+            self._stats["summaries"] += 1
+            self._stats["messages_folded"] += cut
+            logger.info(f"[SUMMARY] Folded {cut} message(s) of {conversation_id} into its summary "
+                        f"({covers + cut} covered, {len(history) - covers - cut} kept verbatim)")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self._stats["errors"] += 1
+            logger.warning(f"[SUMMARY] Summarising {conversation_id} failed: {e}")
+        finally:
+            self._folding.discard(conversation_id)
+    
+    @staticmethod
+    def _render(messages: List[Dict[str, Any]]) -> str:
+        """Render messages as a plain transcript."""
+        lines = []
+        for msg in messages:
+            role = "User" if msg.get("role") == "user" else "Assistant"
+            if msg.get("content"):
+                lines.append(f"{role}: {msg['content']}")
+            for call in msg.get("tool_calls") or []:
+                function = call.get("function", {})
+                lines.append(f"{role} called {function.get('name')}({function.get('arguments', '')})")
+        return "\n".join(lines)
+    
+    async def _fold(
+        self,
+        llm_manager: Any,
+        conversation_id: str,
+        summary: Optional[str],
+        messages: List[Dict[str, Any]]
+    ) -> str:
+        """Ask the model for the summary updated with some messages."""
+        server = llm_manager.server_manager
+        payload = {
+            "model": server.get_model_id() or llm_manager.current_model_name or "default",
+            "messages": [
+                {"role": "system", "content": _SUMMARY_INSTRUCTIONS.format(words=settings.chat_summary_max_tokens * 3 // 4)},
+                {"role": "user", "content": f"Current summary:\n{summary or '(none yet)'}\n\nNew messages:\n{self._render(messages)}"}
+            ],
+            "max_tokens": settings.chat_summary_max_tokens,
+            "temperature": 0.2,
+            "stream": False
+        }
+        async with server.scheduler.slot(Priority.BACKGROUND, client_id=f"summary:{conversation_id}"):
+            response = await server.get_client().post(
+                f"{server.get_server_url()}/v1/chat/completions",
+                json=payload,
+                timeout=settings.chat_summary_timeout
+            )
+        response.raise_for_status()
+        choices = response.json().get("choices") or []
+        text = ((choices[0].get("message") or {}).get("content") or "").strip() if choices else ""
+        if not text:
+            raise RuntimeError(f"empty summary (response: {json.dumps(choices)[:200]})")
+        return text
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get summarizer statistics."""
+        return {
+            **self._stats,
+            "running": sum(1 for task in self._tasks.values() if not task.done()),
+            "folding": len(self._folding),
+            "cached_summaries": len(self._summaries)
+        }
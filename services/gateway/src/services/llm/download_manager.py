@@ -10,6 +10,7 @@ import threading
 from .file_stores import DownloadHistoryStore
 from .download_models import Download, DownloadStatus
 from .download_executor import execute_download
+from .segmented_downloader import DownloadCancelled
 from .download_metadata import save_model_metadata
 
 logger = logging.getLogger(__name__)
@@ -196,6 +197,9 @@ class DownloadManager:
             # However, we should ensure the model is properly registered.
             logger.info(f"Model download and metadata save completed for {model_path}")
             
+        except DownloadCancelled:
+            logger.info(f"Download cancelled: {download.filename} (finished segments are kept for a retry)")
+        
         except Exception as e:
             download.status = DownloadStatus.FAILED
             download.error = str(e)
@@ -251,8 +255,8 @@ class DownloadManager:
     async def cancel_download(self, download_id: str) -> bool:
         """Cancel an active download.
         
-        Note: This marks the download as cancelled but may not immediately
-        stop the actual download process.
+        The transfer stops after its current chunk; finished segments stay on
+        disk, so retrying the download resumes it.
         
         Args:
             download_id: ID of the download to cancel
@@ -310,10 +314,10 @@ class DownloadManager:
         return deleted_count
     
     async def retry_download(self, download_id: str) -> Optional[Download]:
-        """Retry a failed download.
+        """Retry a failed or cancelled download (resuming its finished segments).
         
         Args:
-            download_id: ID of the failed download to retry
+            download_id: ID of the failed or cancelled download to retry
             
         Returns:
             New Download object if retry started, None otherwise
@@ -321,7 +325,7 @@ class DownloadManager:
         history = await self.get_download_history(limit=100)
         
         for record in history:
-            if record['id'] == download_id and record['status'] == DownloadStatus.FAILED.value:
+            if record['id'] == download_id and record['status'] in (DownloadStatus.FAILED.value, DownloadStatus.CANCELLED.value):
                 return await self.start_download(
                     repo_id=record['repo_id'],
                     filename=record['filename']
@@ -0,0 +1,347 @@
+"""Header-only GGUF metadata reader with a persistent cache.
+
+A GGUF file starts with its key/value metadata and tensor descriptors; the
+tensor data (almost all of the file) follows. This reader streams just the
+header, so it costs a few hundred KB of reads however large the model is,
+and skips the big tokenizer arrays without decoding them.
+"""
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, List, Optional, Tuple
+import json
+import logging
+import os
+import struct
+import threading
+
+from ...config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+GGUF_MAGIC = b"GGUF"
+# Bump when the extracted fields change so stale cache entries are re-read
+_CACHE_VERSION = 1
+# Arrays longer than this (tokenizer vocabularies and merges) are skipped, only their length is kept
+_MAX_ARRAY_ITEMS = 1024
+_READ_CHUNK = 1 << 20
+
+# GGUF metadata value types: type id -> (struct format, size) for fixed-size values
+_SCALAR_FORMATS = {
+    0: ("<B", 1),   # UINT8
+    1: ("<b", 1),   # INT8
+    2: ("<H", 2),   # UINT16
+    3: ("<h", 2),   # INT16
+    4: ("<I", 4),   # UINT32
+    5: ("<i", 4),   # INT32
+    6: ("<f", 4),   # FLOAT32
+    7: ("<?", 1),   # BOOL
+    10: ("<Q", 8),  # UINT64
+    11: ("<q", 8),  # INT64
+    12: ("<d", 8),  # FLOAT64
+}
+_TYPE_STRING = 8
+_TYPE_ARRAY = 9
+
+# ggml tensor types (ggml_type) by id
+GGML_TYPE_NAMES = {
+    0: "F32", 1: "F16", 2: "Q4_0", 3: "Q4_1", 6: "Q5_0", 7: "Q5_1", 8: "Q8_0", 9: "Q8_1",
+    10: "Q2_K", 11: "Q3_K", 12: "Q4_K", 13: "Q5_K", 14: "Q6_K", 15: "Q8_K",
+    16: "IQ2_XXS", 17: "IQ2_XS", 18: "IQ3_XXS", 19: "IQ1_S", 20: "IQ4_NL", 21: "IQ3_S",
+    22: "IQ2_S", 23: "IQ4_XS", 24: "I8", 25: "I16", 26: "I32", 27: "I64", 28: "F64",
+    29: "IQ1_M", 30: "BF16", 34: "TQ1_0", 35: "TQ2_0", 39: "MXFP4",
+}
+# Tensor types that hold unquantised weights (norms, biases) rather than the model's quantisation
+_UNQUANTISED_TYPES = {"F32", "F64", "I8", "I16", "I32", "I64"}
+
+
+class GGUFFormatError(ValueError):
+    """The file is not a GGUF file or its header is truncated."""
+
+
+class _HeaderStream:
+    """Buffered little-endian reader over the start of a file."""
+    
+    def __init__(self, f: BinaryIO):
+        self._f = f
+        self._buf = b""
+        self._pos = 0
+        self.offset = 0  # Bytes consumed from the start of the file
+    
+    def _ensure(self, size: int):
+        available = len(self._buf) - self._pos
+        if available >= size:
+            return
+        chunk = self._f.read(max(_READ_CHUNK, size - available))
+        self._buf = self._buf[self._pos:] + chunk
+        self._pos = 0
+        if len(self._buf) < size:
+            raise GGUFFormatError("Unexpected end of file in GGUF header")
+    
+    def read(self, size: int) -> bytes:
+        self._ensure(size)
+        data = self._buf[self._pos:self._pos + size]
+        self._pos += size
+        self.offset += size
+        return data
+    
+    def unpack(self, fmt: str, size: int) -> Any:
+        self._ensure(size)
+        value = struct.unpack_from(fmt, self._buf, self._pos)[0]
+        self._pos += size
+        self.offset += size
+        return value
+    
+    def skip(self, size: int):
+        available = len(self._buf) - self._pos
+        if size <= available:
+            self._pos += size
+        else:
+            self._f.seek(size - available, os.SEEK_CUR)
+            self._buf = b""
+            self._pos = 0
+        self.offset += size
+
+
+class GGUFHeader:
+    """Metadata and tensor descriptors read from a GGUF header."""
+    
+    def __init__(self, version: int, metadata: Dict[str, Any], array_lengths: Dict[str, int], tensors: List[Tuple[str, str, int]]):
+        self.version = version
+        self.metadata = metadata  # Key -> value (skipped arrays are absent)
+        self.array_lengths = array_lengths  # Key -> length of every array, including skipped ones
+        self.tensors = tensors  # (name, ggml type name, element count)
+    
+    def get(self, key: str, default: Any = None) -> Any:
+        return self.metadata.get(key, default)
+
+
+def _read_string(stream: _HeaderStream, wide: bool) -> str:
+    length = stream.unpack("<Q", 8) if wide else stream.unpack("<I", 4)
+    return stream.read(length).decode("utf-8", errors="replace")
+
+
+def _read_value(stream: _HeaderStream, value_type: int, wide: bool, key: str, array_lengths: Dict[str, int]) -> Any:
+    """Read one metadata value; returns None for skipped arrays."""
+    scalar = _SCALAR_FORMATS.get(value_type)
+    if scalar is not None:
+        return stream.unpack(*scalar)
+    if value_type == _TYPE_STRING:
+        return _read_string(stream, wide)
+    if value_type != _TYPE_ARRAY:
+        raise GGUFFormatError(f"Unknown GGUF value type {value_type} for {key}")
+    
+    item_type = stream.unpack("<I", 4)
+    count = stream.unpack("<Q", 8) if wide else stream.unpack("<I", 4)
+    array_lengths[key] = count
+    item_scalar = _SCALAR_FORMATS.get(item_type)
+    if count > _MAX_ARRAY_ITEMS:
+        if item_scalar is not None:
+            stream.skip(item_scalar[1] * count)
+        elif item_type == _TYPE_STRING:
+            length_fmt, length_size = ("<Q", 8) if wide else ("<I", 4)
+            for _ in range(count):
+                stream.skip(stream.unpack(length_fmt, length_size))
+        else:
+            for _ in range(count):
+                _read_value(stream, item_type, wide, key, {})
+        return None
+    return [_read_value(stream, item_type, wide, key, {}) for _ in range(count)]
+
+
+def read_gguf_header(path: Path, read_tensors: bool = True) -> GGUFHeader:
+    """Read the metadata (and tensor descriptors) of a GGUF file without touching tensor data.
+    
+    Args:
+        path: GGUF file
+        read_tensors: Also read the tensor descriptors (names, types, shapes)
+    
+    Returns:
+        GGUFHeader
+    
+    Raises:
+        GGUFFormatError: If the file isn't GGUF or the header is truncated
+        OSError: If the file can't be read
+    """
+    with open(path, "rb") as f:
+        stream = _HeaderStream(f)
+        if stream.read(4) != GGUF_MAGIC:
+            raise GGUFFormatError(f"{path} is not a GGUF file")
+        version = stream.unpack("<I", 4)
+        wide = version >= 2  # Version 1 used 32-bit counts and lengths
+        tensor_count = stream.unpack("<Q", 8) if wide else stream.unpack("<I", 4)
+        kv_count = stream.unpack("<Q", 8) if wide else stream.unpack("<I", 4)
+        
+        metadata: Dict[str, Any] = {}
+        array_lengths: Dict[str, int] = {}
+        for _ in range(kv_count):
+            key = _read_string(stream, wide)
+            value = _read_value(stream, stream.unpack("<I", 4), wide, key, array_lengths)
+            if value is not None:
+                metadata[key] = value
+        
+        tensors: List[Tuple[str, str, int]] = []
+        if read_tensors:
+            for _ in range(tensor_count):
+                name = _read_string(stream, wide)
+                n_dims = stream.unpack("<I", 4)
+                elements = 1
+                for _ in range(n_dims):
+                    elements *= stream.unpack("<Q", 8) if wide else stream.unpack("<I", 4)
+                type_id = stream.unpack("<I", 4)
+                stream.skip(8)  # Offset of the tensor data
+                tensors.append((name, GGML_TYPE_NAMES.get(type_id, f"TYPE_{type_id}"), elements))
+    
+    return GGUFHeader(version, metadata, array_lengths, tensors)
+
+
+def summarize_gguf_header(header: GGUFHeader) -> Dict[str, Any]:
+    """Pull the fields ModelInfoExtractor needs out of a GGUF header.
+    
+    Returns:
+        Dict with arch_key, context_length, parameter_count, num_layers,
+        hidden_size, expert_count, expert_used_count, chat_template,
+        vocab_size, quantization (dominant weight type) and quantization_types
+        (tensor count per ggml type); missing fields are None
+    """
+    arch_key = header.get("general.architecture")
+    arch_key = arch_key if isinstance(arch_key, str) else None
+    
+    def first(*keys: str) -> Any:
+        for key in keys:
+            value = header.get(key)
+            if value is not None:
+                return value
+        return None
+    
+    def arch_keys(*suffixes: str) -> List[str]:
+        keys = [f"{arch_key}.{suffix}" for suffix in suffixes] if arch_key else []
+        return keys + [f"llama.{suffix}" for suffix in suffixes]
+    
+    expert_count = first(*arch_keys("expert_count", "num_experts"), "general.expert_count")
+    if expert_count is None:
+        for key, value in header.metadata.items():
+            lowered = key.lower()
+            if "expert" in lowered and ("count" in lowered or "num" in lowered) and "used" not in lowered and isinstance(value, int):
+                expert_count = value
+                break
+    
+    chat_template = first("tokenizer.chat_template", "tokenizer.chat.template", "general.chat_template", "chat_template")
+    
+    type_counts: Dict[str, int] = {}
+    type_elements: Dict[str, int] = {}
+    for _, type_name, elements in header.tensors:
+        type_counts[type_name] = type_counts.get(type_name, 0) + 1
+        type_elements[type_name] = type_elements.get(type_name, 0) + elements
+    weight_types = {name: count for name, count in type_elements.items() if name not in _UNQUANTISED_TYPES}
+    dominant = max(weight_types or type_elements, key=(weight_types or type_elements).get) if type_elements else None
+    
+    parameter_count = header.get("general.parameter_count")
+    if parameter_count is None and type_elements:
+        parameter_count = sum(type_elements.values())
+    
+    context_length = first(*arch_keys("context_length"))
+    num_layers = first(*arch_keys("block_count"))
+    hidden_size = first(*arch_keys("embedding_length"))
+    expert_used_count = first(*arch_keys("expert_used_count", "num_experts_to_use"))
+    return {
+        "arch_key": arch_key,
+        "context_length": int(context_length) if isinstance(context_length, int) else None,
+        "parameter_count": int(parameter_count) if parameter_count else None,
+        "num_layers": int(num_layers) if isinstance(num_layers, int) else None,
+        "hidden_size": int(hidden_size) if isinstance(hidden_size, int) else None,
+        "expert_count": int(expert_count) if isinstance(expert_count, int) else None,
+        "expert_used_count": int(expert_used_count) if isinstance(expert_used_count, int) else None,
+        "chat_template": chat_template if isinstance(chat_template, str) else None,
+        "vocab_size": header.array_lengths.get("tokenizer.ggml.tokens"),
+        "quantization": dominant,
+        "quantization_types": type_counts,
+    }
+
+
+class GGUFMetadataCache:
+    """Summaries of GGUF headers, persisted to disk and keyed by (path, size, mtime).
+    
+    The whole cache is one JSON file, loaded on first use and rewritten
+    atomically after a new header has been read, so model info survives
+    restarts without re-reading any file that hasn't changed.
+    """
+    
+    def __init__(self, cache_path: Optional[Path] = None):
+        """Initialize the cache.
+        
+        Args:
+            cache_path: JSON file holding the cache (default: settings.gguf_metadata_cache_path)
+        """
+        self.cache_path = Path(cache_path or settings.gguf_metadata_cache_path)
+        self._entries: Optional[Dict[str, Dict[str, Any]]] = None
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "errors": 0}
+    
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        if self._entries is not None:
+            return self._entries
+        entries: Dict[str, Dict[str, Any]] = {}
+        try:
+            if self.cache_path.exists():
+                with open(self.cache_path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                if data.get("version") == _CACHE_VERSION:
+                    entries = data.get("entries", {})
+        except Exception as e:
+            logger.warning(f"[GGUF CACHE] Could not read {self.cache_path}, starting empty: {e}")
+        self._entries = entries
+        return entries
+    
+    def _save(self):
+        tmp_path = self.cache_path.with_name(self.cache_path.name + ".tmp")
+        try:
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"version": _CACHE_VERSION, "entries": self._entries}, f, ensure_ascii=False)
+            os.replace(tmp_path, self.cache_path)
+        except Exception as e:
+            logger.warning(f"[GGUF CACHE] Could not write {self.cache_path}: {e}")
+    
+    def get(self, model_path: Path) -> Dict[str, Any]:
+        """Get the header summary of a GGUF file, reading the header only if the file changed.
+        
+        Args:
+            model_path: GGUF file
+        
+        Returns:
+            Summary from summarize_gguf_header
+        
+        Raises:
+            GGUFFormatError: If the file isn't a readable GGUF file
+            OSError: If the file can't be read
+        """
+        model_path = Path(model_path).resolve()
+        stat = model_path.stat()
+        key = str(model_path)
+        with self._lock:
+            entry = self._load().get(key)
+            if entry and entry.get("size") == stat.st_size and entry.get("mtime_ns") == stat.st_mtime_ns:
+                self._stats["hits"] += 1
+                return entry["info"]
+        
+        self._stats["misses"] += 1
+        try:
+            info = summarize_gguf_header(read_gguf_header(model_path))
+        except Exception:
+            self._stats["errors"] += 1
+            raise
+        with self._lock:
+            entries = self._load()
+            entries[key] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "info": info}
+            # Forget files that are gone so the cache doesn't grow forever
+            for stale in [path for path in entries if not Path(path).exists()]:
+                del entries[stale]
+            self._save()
+        return info
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache statistics."""
+        return {**self._stats, "entries": len(self._entries or {}), "path": str(self.cache_path)}
+
+
+# Global instance
+gguf_metadata_cache = GGUFMetadataCache()
@@ -0,0 +1,420 @@
+"""Persistent catalogue of downloaded models, kept current by watching the model directories."""
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+
+from .gguf_header import gguf_metadata_cache
+from .model_file_utils import is_listed_model_file, list_downloaded_models, model_directories
+from .tool_calling_detector import _fetch_hf_metadata, detect_tool_calling_from_metadata
+from ...config.settings import settings
+
+try:
+    from watchfiles import Change, awatch
+    HAS_WATCHFILES = True
+except ImportError:
+    Change = None
+    awatch = None
+    HAS_WATCHFILES = False
+
+logger = logging.getLogger(__name__)
+
+# Bump when the row layout changes so the persisted catalogue is rebuilt
+_CATALOG_VERSION = 1
+
+# Seconds before Hub checks are retried after the Hub could not be reached
+_REMOTE_RETRY_INTERVAL = 300.0
+
+
+def _watch_filter(change: Any, path: str) -> bool:
+    """Pass model and metadata file changes plus directory events (moves and removals need a full scan)."""
+    if path.endswith((".gguf", ".json")):
+        return True
+    # A removed path can't be checked any more, so every deletion may be a directory
+    return change == Change.deleted or os.path.isdir(path)
+
+
+class LocalModelCatalog:
+    """Listing rows for downloaded GGUF models, served without touching the disk or network.
+    
+    Each row holds what /api/models shows for a model (display name, size,
+    metadata, MoE info, tool calling support) and is rebuilt only when the
+    model file or its metadata JSON changes, identified by size and mtime.
+    Rows are persisted, so after a restart the list is served from the last
+    catalogue while the directories are re-checked in the background.
+    
+    Changes are picked up by watching the model directories (inotify through
+    watchfiles) or, without watchfiles, by re-scanning every
+    settings.model_catalog_poll_interval seconds. Tool calling is detected
+    locally (saved metadata, then the GGUF chat template); models with a
+    HuggingFace repo that this doesn't confirm are checked against the Hub
+    once, in the background.
+    
+    The rows are published as a dict that is never modified afterwards: a sync
+    builds its changes outside any lock and then swaps in a new dict, so
+    listings read the current one without waiting for a scan.
+    """
+    
+    def __init__(self, downloader: Any, catalog_path: Optional[Path] = None):
+        """Initialize the catalogue.
+        
+        Args:
+            downloader: ModelDownloader whose models directory is catalogued
+            catalog_path: JSON file the catalogue is persisted to (default: settings.model_catalog_path)
+        """
+        self.downloader = downloader
+        self.catalog_path = Path(catalog_path or settings.model_catalog_path)
+        self._rows: Optional[Dict[str, Dict[str, Any]]] = None  # Model path -> row; replaced, never mutated
+        self._lock = threading.Lock()  # Guards swapping _rows; only held for the swap
+        self._sync_lock = threading.Lock()  # Serialises syncs (taken in worker threads only)
+        self._save_lock = threading.Lock()  # Serialises writes of the catalogue file
+        self._task: Optional[asyncio.Task] = None
+        self._remote_task: Optional[asyncio.Task] = None
+        self._remote_retry_at = 0.0  # time.monotonic() before which Hub checks aren't retried
+        self._ready: Optional[asyncio.Event] = None
+        self._rescan: Optional[asyncio.Event] = None
+        self._stop: Optional[asyncio.Event] = None
+        self._stats: Dict[str, Any] = {
+            "mode": None,
+            "syncs": 0,
+            "rows_built": 0,
+            "remote_checks": 0,
+            "remote_check_failures": 0,
+            "last_sync_ms": None
+        }
+    
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        """Get the published rows, loading the persisted catalogue on first use (don't modify them)."""
+        rows = self._rows
+        if rows is not None:
+            return rows
+        rows = {}
+        try:
+            if self.catalog_path.exists():
+                with open(self.catalog_path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                if data.get("version") == _CATALOG_VERSION:
+                    rows = data.get("models", {})
+        except Exception as e:
+            logger.warning(f"[MODEL CATALOG] Could not read {self.catalog_path}, rebuilding: {e}")
+        with self._lock:
+            if self._rows is None:
+                self._rows = rows
+            return self._rows
+    
+    def _publish(self, changes: Dict[str, Optional[Dict[str, Any]]]):
+        """Swap in a new rows dict with some rows replaced (None = removed)."""
+        self._load()
+        with self._lock:
+            rows = dict(self._rows)
+            for key, row in changes.items():
+                if row is None:
+                    rows.pop(key, None)
+                else:
+                    rows[key] = row
+            self._rows = rows
+    
+    def _save(self):
+        """Persist the published rows atomically (blocking)."""
+        with self._save_lock:
+            rows = self._load()
+            tmp_path = self.catalog_path.with_name(self.catalog_path.name + ".tmp")
+            try:
+                self.catalog_path.parent.mkdir(parents=True, exist_ok=True)
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump({"version": _CATALOG_VERSION, "models": rows}, f, ensure_ascii=False)
+                os.replace(tmp_path, self.catalog_path)
+            except Exception as e:
+                logger.warning(f"[MODEL CATALOG] Could not write {self.catalog_path}: {e}")
+    
+    @staticmethod
+    def _signature(path: Path) -> Optional[List[int]]:
+        """Size and mtime of a model file and the mtime of its metadata, or None if it's gone."""
+        try:
+            stat = path.stat()
+        except OSError:
+            return None
+        meta_mtime = 0
+        for meta_file in (path.with_suffix(".json"), path.parent / "model_info.json"):
+            try:
+                meta_mtime = max(meta_mtime, meta_file.stat().st_mtime_ns)
+            except OSError:
+                continue
+        return [stat.st_size, stat.st_mtime_ns, meta_mtime]
+    
+    def _build_row(self, path: Path) -> Dict[str, Any]:
+        """Compute the listing row of a model (local files only, no network)."""
+        downloader = self.downloader
+        info = downloader.get_model_info(path)
+        display_name = info["repo_name"] if info.get("has_metadata") and info.get("repo_name") else info["name"]
+        if downloader.get_model_folder(path):
+            model_id = str(path.relative_to(downloader.models_dir))
+        else:
+            model_id = path.name
+        
+        metadata = info.get("metadata", {})
+        tags = metadata.get("tags") or info.get("tags") or []
+        architecture = metadata.get("architecture") or info.get("architecture")
+        repo_id = metadata.get("repo_id") or info.get("repo_id")
+        
+        # Saved tool calling info first, then the chat template from the (cached) GGUF header
+        tool_calling_info = info.get("tool_calling") or metadata.get("tool_calling")
+        if tool_calling_info and isinstance(tool_calling_info, dict):
+            supports_tool_calling = bool(tool_calling_info.get("supports_tool_calling", False))
+            tool_calling_source = "metadata"
+        else:
+            supports_tool_calling, _ = detect_tool_calling_from_metadata(
+                model_id=model_id,
+                model_name=display_name,
+                architecture=architecture,
+                tags=tags,
+                repo_id=repo_id,
+                remote_fetch=False,
+                chat_template=self._chat_template(path)
+            )
+            tool_calling_source = "local"
+        
+        return {
+            "signature": self._signature(path),
+            "tool_calling_source": tool_calling_source,
+            # Hub tags may still show tool support the local checks missed
+            "remote_check_pending": tool_calling_source == "local" and not supports_tool_calling and bool(repo_id),
+            "detection": {"model_name": display_name, "architecture": architecture, "tags": tags, "repo_id": repo_id},
+            "supports_tool_calling": supports_tool_calling,
+            "model": {
+                "model_id": model_id,
+                "name": display_name,
+                "size": f"{info['size_gb']} GB" if info['size_gb'] >= 1 else f"{info['size_mb']} MB",
+                "format": "gguf",
+                "downloaded": True,
+                "repo_id": info.get("repo_id"),
+                "author": info.get("author"),
+                "description": info.get("description"),
+                "huggingface_url": info.get("huggingface_url"),
+                "downloaded_at": info.get("downloaded_at"),
+                "has_metadata": info.get("has_metadata", False),
+                "moe": info.get("moe")
+            }
+        }
+    
+    @staticmethod
+    def _chat_template(path: Path) -> Optional[str]:
+        try:
+            return gguf_metadata_cache.get(path).get("chat_template")
+        except Exception as e:
+            logger.debug(f"[MODEL CATALOG] No chat template for {path.name}: {e}")
+            return None
+    
+    @staticmethod
+    def _affected_models(rows: Dict[str, Dict[str, Any]], changed: Iterable[Path]) -> Optional[List[Path]]:
+        """Model files a set of changed paths can affect, or None if a full scan is needed."""
+        models: List[Path] = []
+        for path in changed:
+            if path.suffix.lower() == ".gguf":
+                models.append(path)
+            elif path.name == "model_info.json":
+                models.extend(Path(row_path) for row_path in rows if Path(row_path).parent == path.parent)
+            elif path.suffix.lower() == ".json":
+                models.append(path.with_suffix(".gguf"))
+            else:
+                return None  # A directory was moved or removed
+        return models
+    
+    def sync(self, changed: Optional[Iterable[Path]] = None) -> int:
+        """Bring the catalogue in line with the model files (blocking; run in a thread).
+        
+        Args:
+            changed: Paths reported changed by the watcher (None = scan the directories)
+        
+        Returns:
+            Number of rows added, rebuilt or removed
+        """
+        started = time.perf_counter()
+        with self._sync_lock:
+            rows = self._load()
+            candidates = self._affected_models(rows, changed) if changed is not None else None
+            if candidates is None:
+                candidates = list_downloaded_models(self.downloader.models_dir)
+                for stale in set(rows) - {str(path) for path in candidates}:
+                    candidates.append(Path(stale))
+            
+            # Build changed rows against the published snapshot, without holding the swap lock
+            changes: Dict[str, Optional[Dict[str, Any]]] = {}
+            for path in candidates:
+                key = str(path)
+                signature = self._signature(path) if is_listed_model_file(path) else None
+                if signature is None:
+                    if key in rows:
+                        changes[key] = None
+                    continue
+                if key in rows and rows[key].get("signature") == signature:
+                    continue
+                try:
+                    changes[key] = self._build_row(path)
+                    self._stats["rows_built"] += 1
+                except Exception as e:
+                    logger.warning(f"Error getting model info for {path.name}: {e}")
+                    if key in rows:
+                        changes[key] = None
+            updated = len(changes)
+            if updated:
+                self._publish(changes)
+                self._save()
+        
+        self._stats["syncs"] += 1
+        self._stats["last_sync_ms"] = round((time.perf_counter() - started) * 1000, 2)
+        if updated:
+            logger.info(f"[MODEL CATALOG] {updated} model(s) changed, {len(self._load())} catalogued "
+                        f"({self._stats['last_sync_ms']:.0f}ms)")
+        return updated
+    
+    def list_rows(self) -> List[Dict[str, Any]]:
+        """Get the catalogued models (copies of the rows, keyed by 'path' as well)."""
+        return [{**row, "path": path} for path, row in self._load().items()]
+    
+    async def wait_ready(self, timeout: float = 30.0):
+        """Wait for the first scan if nothing was catalogued before it (fresh install).
+        
+        Also retries pending Hub checks, at most every _REMOTE_RETRY_INTERVAL seconds.
+        """
+        if self._ready is not None and self._ready.is_set():
+            self._start_remote_checks()
+        has_rows = bool(self._load())
+        if has_rows or self._ready is None or self._ready.is_set():
+            return
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            logger.warning("[MODEL CATALOG] First scan is taking long, serving what is catalogued so far")
+    
+    def invalidate(self):
+        """Re-check the model directories soon (e.g. after a model was deleted or moved)."""
+        if self._rescan is not None:
+            self._rescan.set()
+    
+    def start(self):
+        """Start scanning and watching the model directories."""
+        if self._task and not self._task.done():
+            return
+        self._ready = asyncio.Event()
+        self._rescan = asyncio.Event()
+        self._stop = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+    
+    async def stop(self):
+        """Stop watching."""
+        if self._stop is not None:
+            self._stop.set()
+        for task in (self._task, self._remote_task):
+            if task and not task.done():
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._task = None
+        self._remote_task = None
+    
+    async def _run(self):
+        await asyncio.to_thread(self.sync)
+        self._ready.set()
+        self._start_remote_checks()
+        
+        directories = [directory for directory in model_directories(self.downloader.models_dir) if directory.exists()]
+        rescan_task = asyncio.create_task(self._rescan_loop(poll=False))
+        try:
+            if HAS_WATCHFILES and settings.model_catalog_watch and directories:
+                try:
+                    self._stats["mode"] = "watch"
+                    async for changes in awatch(
+                        *directories,
+                        watch_filter=_watch_filter,
+                        stop_event=self._stop
+                    ):
+                        await asyncio.to_thread(self.sync, {Path(path) for _, path in changes})
+                        self._start_remote_checks()
+                    return
+                except Exception as e:
+                    logger.warning(f"[MODEL CATALOG] Watching model directories failed ({e}), polling instead")
+            self._stats["mode"] = "poll"
+            rescan_task.cancel()
+            await self._rescan_loop(poll=True)
+        finally:
+            rescan_task.cancel()
+    
+    async def _rescan_loop(self, poll: bool):
+        """Full re-scans on invalidate() and, when polling, every poll interval."""
+        while not self._stop.is_set():
+            try:
+                await asyncio.wait_for(self._rescan.wait(), timeout=settings.model_catalog_poll_interval if poll else None)
+            except asyncio.TimeoutError:
+                pass
+            self._rescan.clear()
+            try:
+                await asyncio.to_thread(self.sync)
+            except Exception as e:
+                logger.error(f"[MODEL CATALOG] Re-scan failed: {e}", exc_info=True)
+            self._start_remote_checks()
+    
+    def _start_remote_checks(self):
+        if self._remote_task and not self._remote_task.done():
+            return
+        if time.monotonic() < self._remote_retry_at:
+            return
+        pending = [path for path, row in self._load().items() if row.get("remote_check_pending")]
+        if pending:
+            self._remote_task = asyncio.create_task(self._remote_checks(pending))
+    
+    async def _remote_checks(self, paths: List[str]):
+        """Check tool calling support against the HuggingFace Hub, once per model.
+        
+        A model stays pending until the Hub has answered for it; if the Hub can't be
+        reached the round stops and is retried after _REMOTE_RETRY_INTERVAL.
+        """
+        for path in paths:
+            row = self._load().get(path)
+            if not row or not row.get("remote_check_pending"):
+                continue
+            detection = row["detection"]
+            try:
+                remote_tags, remote_arch = await asyncio.to_thread(
+                    _fetch_hf_metadata, detection["repo_id"], raise_on_error=True
+                )
+            except Exception as e:
+                self._stats["remote_check_failures"] += 1
+                self._remote_retry_at = time.monotonic() + _REMOTE_RETRY_INTERVAL
+                logger.info(f"[MODEL CATALOG] Hub check for {Path(path).name} failed, retrying later: {e}")
+                return
+            supports, _ = await asyncio.to_thread(
+                detect_tool_calling_from_metadata,
+                model_id=row["model"]["model_id"],
+                model_name=detection["model_name"],
+                architecture=remote_arch or detection["architecture"],
+                tags=list(remote_tags) + list(detection["tags"] or []),
+                repo_id=detection["repo_id"],
+                remote_fetch=False,
+                chat_template=self._chat_template(Path(path))
+            )
+            self._stats["remote_checks"] += 1
+            with self._lock:
+                current = self._rows.get(path)
+                if current is row:
+                    self._rows = {**self._rows, path: {
+                        **row,
+                        "supports_tool_calling": supports,
+                        "tool_calling_source": "remote",
+                        "remote_check_pending": False
+                    }}
+            if current is row:
+                await asyncio.to_thread(self._save)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get catalogue statistics."""
+        rows = self._load()
+        pending = sum(1 for row in rows.values() if row.get("remote_check_pending"))
+        count = len(rows)
+        return {**self._stats, "models": count, "remote_checks_pending": pending, "watchfiles": HAS_WATCHFILES}
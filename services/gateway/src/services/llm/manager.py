@@ -6,16 +6,21 @@ import logging
 import re
 import time
 from pathlib import Path
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, AsyncIterator, Tuple
 
 # Third-party
 import httpx
 
 # Local
 from .downloader import ModelDownloader
+from .local_catalog import LocalModelCatalog
+from .model_pool import ModelPool, PooledModel
 from .sampler import SamplerSettings
+from .scheduler import Priority
 from .server_manager import LLMServerManager
+from .token_budget import PromptBudget, PromptBudgeter, TokenCounter
 from ...config.settings import settings
+from ..metrics import get_metrics
 
 logger = logging.getLogger(__name__)
 
@@ -29,10 +34,15 @@ class LLMManager:
     """
     
     def __init__(self, tool_registry: Optional[Any] = None):
-        self.server_manager = LLMServerManager()
+        self.model_pool = ModelPool()  # Resident models, one server process each
+        self.server_manager = self.model_pool.allocate_server()  # Server of the active model
         self.downloader = ModelDownloader()
+        self.model_catalog = LocalModelCatalog(self.downloader)
         self.current_model_name: Optional[str] = None
         self._current_model_path: Optional[str] = None  # Track current model path
+        self.current_chat_format: Optional[str] = None
+        self._load_lock = asyncio.Lock()  # One load/switch at a time
+        self._last_load_error: Optional[str] = None
         
         # Settings (kept for compatibility with existing code that reads these)
         self.sampler_settings = SamplerSettings(
@@ -57,18 +67,25 @@ class LLMManager:
         self._memory_store = None  # Will be set during initialization
         self.supports_tool_calling: bool = False  # Auto-detected when model loads
         self._suggested_chat_format: Optional[str] = None  # Suggested chat_format from detection
+        # KV cache reuse and prompt budget of the most recent request, for the stats endpoint only;
+        # per-request values are returned with each response
+        self.last_prompt_cache_stats: Optional[Dict[str, Optional[int]]] = None
+        self.prompt_cache_totals: Dict[str, int] = {"requests": 0, "prompt_tokens": 0, "cached_tokens": 0}
+        self.prompt_budgeter = PromptBudgeter()
+        self.last_prompt_budget: Optional[PromptBudget] = None
     
-    def _detect_tool_calling_support(self, model_path: str) -> bool:
-        """Detect if the loaded model supports tool calling (function calling).
+    def _detect_tool_calling_support(self, model_path: str) -> Tuple[bool, Optional[str]]:
+        """Detect if a model supports tool calling (function calling).
         
         Uses GGUF chat template as primary method, falls back to pattern matching.
         After server starts, can use verified template info from /props endpoint.
+        Doesn't change the manager's state, since another model may be active while this one loads.
         
         Args:
             model_path: Path to the model file
             
         Returns:
-            True if model supports tool calling, False otherwise
+            Tuple of (True if model supports tool calling, suggested chat_format or None)
         """
         from pathlib import Path
         from .model_info import ModelInfoExtractor
@@ -81,11 +98,12 @@ class LLMManager:
         logger.info(f"[TOOL CALLING DETECTION] Model filename: {model_name}")
         
         # First, check if we have verified template info from /props (after server started)
-        template_info = self.server_manager.get_template_info()
+        # The active server may belong to another resident model while a new one loads
+        serves_this_model = self._current_model_path is not None and ModelPool.key(self._current_model_path) == ModelPool.key(model_path)
+        template_info = self.server_manager.get_template_info() if serves_this_model else None
         if template_info and template_info.get("has_tool_use_template"):
             logger.info(f"[TOOL CALLING DETECTION] Using verified template info from /props: tool-use template available")
-            self._suggested_chat_format = None  # Let server use embedded template
-            return True
+            return True, None  # Let server use embedded template
         
         # Extract model info (includes chat_template from GGUF if available)
         # Use use_cache=False to ensure we get fresh data with chat_template
@@ -125,16 +143,13 @@ class LLMManager:
             chat_template=chat_template
         )
         
-        # Store suggested format for server configuration
-        self._suggested_chat_format = suggested_format
-        
         detection_method = "chat template" if chat_template else "pattern matching"
         logger.info(f"[TOOL CALLING DETECTION] Detection method: {detection_method}")
         if suggested_format:
             logger.info(f"[TOOL CALLING DETECTION] Suggested chat_format: {suggested_format}")
         logger.info(f"[TOOL CALLING DETECTION] Final result for {model_path}: supports_tool_calling={supports}")
         
-        return supports
+        return supports, suggested_format
     
     def get_suggested_chat_format(self) -> Optional[str]:
         """Get the suggested chat_format for the current model.
@@ -207,40 +222,42 @@ class LLMManager:
                     }
                 ]
             
-            async with httpx.AsyncClient(timeout=30.0) as client:
+            client = self.server_manager.get_client()
+            async with self.server_manager.scheduler.slot(Priority.BACKGROUND, client_id="tool_calling_verification"):
                 response = await client.post(
                     f"{self.server_manager.server_url}/v1/chat/completions",
                     json={
-                        "model": self.current_model_name or "default",
+                        "model": self.server_manager.get_model_id() or self.current_model_name or "default",
                         "messages": test_messages,
                         "tools": [test_tool],
                         "tool_choice": "auto",
                         "max_tokens": 100
-                    }
+                    },
+                    timeout=30.0
                 )
-                
-                if response.status_code == 200:
-                    result = response.json()
-                    choices = result.get("choices", [])
-                    if choices:
-                        message = choices[0].get("message", {})
-                        tool_calls = message.get("tool_calls")
-                        
-                        if tool_calls and len(tool_calls) > 0:
-                            logger.info(f"[TOOL CALLING VERIFICATION] SUCCESS - Model made {len(tool_calls)} tool call(s)")
-                            return True
-                        else:
-                            logger.warning("[TOOL CALLING VERIFICATION] FAILED - Model did not make tool calls")
-                            logger.debug(f"[TOOL CALLING VERIFICATION] Response: {result}")
-                            return False
+            
+            if response.status_code == 200:
+                result = response.json()
+                choices = result.get("choices", [])
+                if choices:
+                    message = choices[0].get("message", {})
+                    tool_calls = message.get("tool_calls")
+                    
+                    if tool_calls and len(tool_calls) > 0:
+                        logger.info(f"[TOOL CALLING VERIFICATION] SUCCESS - Model made {len(tool_calls)} tool call(s)")
+                        return True
                     else:
-                        logger.warning("[TOOL CALLING VERIFICATION] FAILED - No choices in response")
+                        logger.warning("[TOOL CALLING VERIFICATION] FAILED - Model did not make tool calls")
+                        logger.debug(f"[TOOL CALLING VERIFICATION] Response: {result}")
                         return False
                 else:
-                    logger.warning(f"[TOOL CALLING VERIFICATION] FAILED - Server returned status {response.status_code}")
-                    logger.debug(f"[TOOL CALLING VERIFICATION] Response: {response.text}")
+                    logger.warning("[TOOL CALLING VERIFICATION] FAILED - No choices in response")
                     return False
-                    
+            else:
+                logger.warning(f"[TOOL CALLING VERIFICATION] FAILED - Server returned status {response.status_code}")
+                logger.debug(f"[TOOL CALLING VERIFICATION] Response: {response.text}")
+                return False
+                
         except Exception as e:
             logger.warning(f"[TOOL CALLING VERIFICATION] Error during verification: {e}", exc_info=True)
             # Don't fail model load if verification fails - just log warning
@@ -334,6 +351,10 @@ class LLMManager:
         cache_type_v: Optional[str] = None,
         use_flash_attention: Optional[bool] = None,
         offload_kqv: Optional[bool] = None,
+        # Speculative decoding
+        speculative_mode: Optional[str] = None,
+        draft_model_path: Optional[str] = None,
+        draft_num_pred_tokens: Optional[int] = None,
         **kwargs  # Catch any unknown parameters
     ) -> bool:
         """Load a model via the server.
@@ -354,6 +375,9 @@ class LLMManager:
             rope_scaling_type: RoPE scaling type
             yarn_*: YaRN context extension parameters
             cache_type_k/v: KV cache data types
+            speculative_mode: None/"off", "prompt_lookup" or "draft_model"
+            draft_model_path: Draft GGUF for speculative_mode="draft_model"
+            draft_num_pred_tokens: Tokens drafted per decoding step
             # n_cpu_moe removed - not a valid parameter for OpenAI-compatible server
             
         Returns:
@@ -375,6 +399,13 @@ class LLMManager:
         if kwargs:
             logger.warning("Unknown parameters ignored: %s", list(kwargs.keys()))
         
+        # Prevent concurrent model loading (spam protection)
+        if self._load_lock.locked():
+            logger.warning("Model loading already in progress, ignoring duplicate request")
+            return False
+        await self._load_lock.acquire()
+        self._last_load_error = None
+        
         try:
             # Extract model info for optimization and MoE detection
             from .model_info import ModelInfoExtractor
@@ -418,13 +449,46 @@ class LLMManager:
             if cache_type_k or cache_type_v:
                 logger.info("KV Cache: K=%s V=%s", 
                            cache_type_k or "f16", cache_type_v or "f16")
+            if speculative_mode and speculative_mode != "off":
+                logger.info("Speculative decoding: %s (%s draft tokens)",
+                           speculative_mode, draft_num_pred_tokens or "default")
             logger.info("=" * 60)
             
+            # Options that need a server restart when they change
+            load_options = {
+                "n_ctx": effective_n_ctx,
+                "n_threads": effective_n_threads,
+                "n_gpu_layers": effective_n_gpu_layers,
+                "n_batch": effective_n_batch,
+                "use_mmap": effective_use_mmap,
+                "use_mlock": effective_use_mlock,
+                "flash_attn": flash_attn,
+                "rope_freq_base": rope_freq_base,
+                "rope_freq_scale": rope_freq_scale,
+                "main_gpu": main_gpu,
+                "tensor_split": tensor_split,
+                "cache_type_k": cache_type_k,
+                "cache_type_v": cache_type_v,
+                "speculative_mode": speculative_mode if speculative_mode != "off" else None,
+                "draft_model_path": draft_model_path,
+                "draft_num_pred_tokens": draft_num_pred_tokens
+            }
+            
+            # Already resident with the same options: switch to it without reloading
+            pooled = self.model_pool.get(model_path)
+            if pooled is not None and pooled.server.is_running() and pooled.load_options == load_options:
+                logger.info(f"[MODEL POOL] {pooled.model_name} is resident - switching without reload")
+                await self._activate_pooled_model(pooled, broadcast=True)
+                return True
+            
             # Start OpenAI-compatible server with model
+            previous = self.model_pool.get(self._current_model_path) if self._current_model_path else None
+            server = None
             try:
-                # Unload existing model if loaded
-                if self.current_model_name:
-                    await self.unload_model()
+                # Make room in the pool and get a server on a free port
+                server, admitted_memory_gb = await self._admit_model(
+                    model_path, model_info, effective_n_ctx, effective_n_gpu_layers
+                )
                 
                 # Extract and save chat template if available (for potential use with --chat-template-file)
                 from .model_info import ModelInfoExtractor
@@ -440,11 +504,11 @@ class LLMManager:
                 except Exception as e:
                     logger.warning(f"[MODEL LOAD] Could not extract/save template: {e}")
                 
-                # Detect tool calling support BEFORE starting server (needed for chat_format)
+                # Detect tool calling support BEFORE starting server (needed for chat_format).
+                # Kept in locals until the server is up: the active model keeps serving meanwhile
                 try:
-                    self.supports_tool_calling = self._detect_tool_calling_support(model_path)
-                    suggested_chat_format = self.get_suggested_chat_format()
-                    logger.info(f"[MODEL LOAD] Tool calling support: {'ENABLED' if self.supports_tool_calling else 'DISABLED'} for model {model_path}")
+                    supports_tool_calling, suggested_chat_format = self._detect_tool_calling_support(model_path)
+                    logger.info(f"[MODEL LOAD] Tool calling support: {'ENABLED' if supports_tool_calling else 'DISABLED'} for model {model_path}")
                     logger.info(f"[MODEL LOAD] Suggested chat format: {suggested_chat_format}")
                 except Exception as e:
                     logger.error(f"[MODEL LOAD] Error during tool calling detection: {e}", exc_info=True)
@@ -453,11 +517,11 @@ class LLMManager:
                     model_name_lower = Path(model_path).name.lower()
                     if ("llama" in architecture or "llama" in model_name_lower) and ("3.2" in model_name_lower or "3_2" in model_name_lower or "3.1" in model_name_lower or "3_1" in model_name_lower):
                         logger.warning(f"[MODEL LOAD] Detection failed but model is Llama 3.1/3.2 - forcing tool calling enabled")
-                        self.supports_tool_calling = True
-                        self._suggested_chat_format = None
+                        supports_tool_calling = True
+                        suggested_chat_format = None
                     else:
-                        self.supports_tool_calling = False
-                        self._suggested_chat_format = None
+                        supports_tool_calling = False
+                        suggested_chat_format = None
                 
                 # For Qwen and Llama models, explicitly ensure tool calling is enabled
                 # This runs REGARDLESS of detection result to handle edge cases
@@ -474,9 +538,9 @@ class LLMManager:
                 if is_llama and (is_llama_32 or is_llama_31):
                     logger.info(f"[LLAMA FORCE] Model is Llama 3.1/3.2 - FORCING tool calling enabled")
                     logger.info(f"[LLAMA FORCE] Architecture: {architecture}, Model: {model_name_lower}")
-                    self.supports_tool_calling = True
-                    logger.info(f"[LLAMA FORCE] Tool calling set to: {self.supports_tool_calling}")
-                elif is_qwen and self.supports_tool_calling:
+                    supports_tool_calling = True
+                    logger.info(f"[LLAMA FORCE] Tool calling set to: {supports_tool_calling}")
+                elif is_qwen and supports_tool_calling:
                     logger.info(f"[QWEN] Tool calling explicitly enabled for Qwen model - will not be disabled by verification")
                 
                 # Only use chat_format if we have a way to get the tokenizer
@@ -494,7 +558,7 @@ class LLMManager:
                 # For Llama 3.x models, use 'llama-3' format
                 # NOTE: llama-cpp-python only supports 'llama-3', NOT 'llama-3.1' or 'llama-3.2'
                 if "llama" in architecture or "llama" in model_name_lower:
-                    if self.supports_tool_calling:
+                    if supports_tool_calling:
                         # All Llama 3.x models (3.0, 3.1, 3.2) use 'llama-3' format
                         # CRITICAL: Must use 'llama-3', NOT 'llama-3.2' or 'llama-3.1'
                         if "3" in model_name_lower or "3.2" in model_name_lower or "3_2" in model_name_lower or "3.1" in model_name_lower or "3_1" in model_name_lower:
@@ -511,16 +575,16 @@ class LLMManager:
                             final_chat_format = "llama-2"
                 # For Qwen models with tool calling, use qwen format
                 elif "qwen" in architecture or "qwen" in model_name_lower:
-                    if self.supports_tool_calling:
+                    if supports_tool_calling:
                         logger.info(f"[QWEN] Tool calling detected - using 'chatml-function-calling' format for function calling")
                         final_chat_format = "chatml-function-calling"
                     else:
                         logger.info(f"[QWEN] No tool calling detected - using 'qwen' chat format")
                         final_chat_format = "qwen"
                 # For other models, check for tool-calling formats (but avoid functionary-v2 which needs external tokenizer)
-                elif self.supports_tool_calling:
+                elif supports_tool_calling:
                     # If we have a suggested format, use it; otherwise use chatml with jinja
-                    suggested_format = self.get_suggested_chat_format()
+                    suggested_format = suggested_chat_format
                     if suggested_format:
                         logger.info(f"[MODEL LOAD] Tool calling detected - using suggested format: {suggested_format}")
                         final_chat_format = suggested_format
@@ -544,7 +608,7 @@ class LLMManager:
                 
                 logger.info(f"[MODEL LOAD] Using chat format: {final_chat_format}")
                 logger.info(f"[MODEL LOAD] Embedded tokenizer will be used (no external tokenizer needed)")
-                logger.info(f"[MODEL LOAD] Tool calling support: {'ENABLED' if self.supports_tool_calling else 'DISABLED'}")
+                logger.info(f"[MODEL LOAD] Tool calling support: {'ENABLED' if supports_tool_calling else 'DISABLED'}")
                 
                 # Determine if we should use jinja flag and template file
                 # chatml-function-calling format handles tool calling automatically - no jinja/template needed
@@ -555,7 +619,7 @@ class LLMManager:
                     # chatml-function-calling format handles tool calling automatically
                     # No need for jinja flag or template files
                     logger.info("[MODEL LOAD] Using chatml-function-calling format - tool calling enabled automatically")
-                elif self.supports_tool_calling:
+                elif supports_tool_calling:
                     # For other formats that support tool calling, use jinja/template if available
                     use_jinja = True
                     if template_file_path and template_file_path.exists():
@@ -572,14 +636,11 @@ class LLMManager:
                 
                 hf_pretrained_model_name_or_path = None
                 
-                # Store current chat format for system prompt building
-                self.current_chat_format = final_chat_format
-                
                 # Start server with model
                 logger.info(f"[LLM MANAGER] Starting server with chat_format: {final_chat_format}")
                 logger.info(f"[LLM MANAGER] Template file: {chat_template_file_param}")
                 server_start_time = time.time()
-                server_started = await self.server_manager.start_server(
+                server_started = await server.start_server(
                     model_path=str(model_path),
                     n_ctx=effective_n_ctx,
                     n_threads=effective_n_threads,
@@ -595,13 +656,27 @@ class LLMManager:
                     chat_format=final_chat_format,  # Only pass if we have one and it's safe to use
                     use_jinja=use_jinja,  # Enable jinja for function calling
                     chat_template_file=chat_template_file_param,  # Use template file if available
+                    speculative_mode=load_options["speculative_mode"],
+                    draft_model_path=draft_model_path,
+                    draft_num_pred_tokens=draft_num_pred_tokens,
                     hf_pretrained_model_name_or_path=hf_pretrained_model_name_or_path  # Only pass if we have a valid base model repo
                 )
                 server_start_duration = time.time() - server_start_time
                 
                 if server_started:
-                    self.current_model_name = Path(model_path).name
-                    self._current_model_path = str(model_path)
+                    pooled = PooledModel(
+                        model_path=ModelPool.key(model_path),
+                        server=server,
+                        memory_gb=admitted_memory_gb,
+                        device=self.model_pool.device_for(effective_n_gpu_layers),
+                        load_options=load_options,
+                        supports_tool_calling=supports_tool_calling,
+                        suggested_chat_format=suggested_chat_format,
+                        chat_format=final_chat_format
+                    )
+                    self.model_pool.add(pooled)
+                    # Only now does the new model's state replace the one that kept serving
+                    await self._activate_pooled_model(pooled)
                     logger.info(f"[LLM MANAGER] ✓ Server started successfully in {server_start_duration:.2f}s")
                     logger.info(f"[LLM MANAGER] Model: {self.current_model_name}")
                     
@@ -663,23 +738,292 @@ class LLMManager:
                             else:
                                 logger.info(f"[TOOL CALLING] Runtime verification passed - tool calling confirmed")
                     
+                    pooled.supports_tool_calling = self.supports_tool_calling
+                    pooled.suggested_chat_format = self._suggested_chat_format
                     return True
                 else:
                     logger.error(f"[LLM MANAGER] ❌ Server failed to start after {server_start_duration:.2f}s")
-                    last_error = getattr(self.server_manager, '_last_error', 'Unknown error')
+                    last_error = getattr(server, '_last_error', 'Unknown error')
                     logger.error(f"[LLM MANAGER] Error: {last_error}")
-                    error_msg = self.server_manager.get_last_error() or "Failed to start model server"
+                    error_msg = server.get_last_error() or "Failed to start model server"
                     raise RuntimeError(error_msg)
             except FileNotFoundError as e:
                 logger.error("Model file not found: %s", e)
+                self._last_load_error = str(e)
+                await self._restore_after_failed_load(server, previous)
                 return False
             except Exception as e:
                 logger.error("Error starting model server: %s", e, exc_info=True)
+                self._last_load_error = str(e)
+                await self._restore_after_failed_load(server, previous)
                 return False
             
         except Exception as e:
             logger.error("Failed to load model: %s", e, exc_info=True)
+            self._last_load_error = str(e)
             return False
+        finally:
+            self._load_lock.release()
+    
+    async def _admit_model(
+        self,
+        model_path: str,
+        model_info: Dict[str, Any],
+        n_ctx: int,
+        n_gpu_layers: int
+    ) -> Tuple[LLMServerManager, float]:
+        """Evict least recently used models until a new one fits.
+        
+        The active model keeps serving during the load unless it had to be evicted.
+        
+        Args:
+            model_path: Model about to be started
+            model_info: Output of ModelInfoExtractor.extract_info
+            n_ctx: Context window it will be started with
+            n_gpu_layers: GPU layers it will be started with
+        
+        Returns:
+            Server manager on a free port and the model's estimated memory in GB
+        """
+        # A stale copy of the same model (stopped, or started with other options) goes first
+        stale = self.model_pool.get(model_path)
+        if stale is not None:
+            await self._evict_model(stale)
+        
+        memory_gb = self.model_pool.estimate_memory(model_path, model_info, n_ctx)
+        device = self.model_pool.device_for(n_gpu_layers)
+        for victim in self.model_pool.select_victims(memory_gb, device):
+            await self._evict_model(victim)
+        
+        logger.info(f"[MODEL POOL] Admitting {Path(model_path).name} (~{memory_gb:.2f}GB {device}), "
+                    f"{len(self.model_pool.entries())} other model(s) resident")
+        return self.model_pool.allocate_server(), memory_gb
+    
+    async def _evict_model(self, entry: PooledModel):
+        """Stop a resident model's server and drop it from the pool."""
+        logger.info(f"[MODEL POOL] Evicting {entry.model_name} ({entry.memory_gb:.2f}GB {entry.device})")
+        self.model_pool.remove(entry.model_path)
+        self.model_pool.evictions += 1
+        if entry.server is self.server_manager:
+            self.current_model_name = None
+            self._current_model_path = None
+            self.supports_tool_calling = False
+        try:
+            await entry.server.stop_server()
+        except Exception as e:
+            logger.error(f"[MODEL POOL] Error stopping {entry.model_name}: {e}", exc_info=True)
+    
+    async def _activate_pooled_model(self, entry: PooledModel, broadcast: bool = False):
+        """Make a resident model the active one.
+        
+        Args:
+            entry: Resident model
+            broadcast: Announce the switch to WebSocket clients as a model load
+        """
+        self.server_manager = entry.server
+        self.current_model_name = entry.model_name
+        self._current_model_path = entry.model_path
+        self.supports_tool_calling = entry.supports_tool_calling
+        self._suggested_chat_format = entry.suggested_chat_format
+        self.current_chat_format = entry.chat_format
+        self.model_pool.touch(entry)
+        
+        if broadcast:
+            try:
+                from ...services.websocket_manager import get_websocket_manager
+                ws_manager = get_websocket_manager()
+                await ws_manager.broadcast_model_loaded(
+                    model_id=entry.model_path,
+                    model_info={
+                        "model_name": entry.model_name,
+                        "model_path": entry.model_path,
+                        "supports_tool_calling": entry.supports_tool_calling,
+                        "suggested_chat_format": entry.suggested_chat_format,
+                        "resident": True,
+                    }
+                )
+            except Exception as e:
+                logger.debug(f"Failed to broadcast model_loaded event: {e}")
+    
+    async def _restore_after_failed_load(self, failed_server: Optional[LLMServerManager], previous: Optional[PooledModel]):
+        """Stop a server that failed to start and fall back to the previously active model if it is still resident."""
+        if failed_server is not None and failed_server.process is not None:
+            await failed_server.stop_server()
+        if previous is not None and self.model_pool.get(previous.model_path) is previous:
+            logger.info(f"[MODEL POOL] Load failed - {previous.model_name} stays active")
+            await self._activate_pooled_model(previous)
+        else:
+            self.current_model_name = None
+            self._current_model_path = None
+            self.supports_tool_calling = False
+    
+    def get_last_load_error(self) -> Optional[str]:
+        """Get the error of the last failed load_model call, if any."""
+        return self._last_load_error
+    
+    def get_server_for_model(self, model: Optional[str] = None) -> LLMServerManager:
+        """Route a request to the server of a resident model.
+        
+        Args:
+            model: Model path, file name or server model ID (None = active model)
+        
+        Returns:
+            Server manager of the matching resident model, or of the active model
+        """
+        if model:
+            entry = self.model_pool.find(model)
+            if entry is not None and entry.server.is_running():
+                entry.last_used = time.time()
+                return entry.server
+        return self.server_manager
+    
+    def get_loaded_models(self) -> List[Dict[str, Any]]:
+        """List resident models, most recently used first."""
+        models = []
+        for entry in reversed(self.model_pool.entries()):
+            info = entry.to_dict()
+            info["active"] = entry.server is self.server_manager
+            models.append(info)
+        return models
+    
+    async def stop_all_servers(self):
+        """Stop every resident model server (gateway shutdown)."""
+        for entry in self.model_pool.entries():
+            self.model_pool.remove(entry.model_path)
+            try:
+                await entry.server.stop_server()
+            except Exception as e:
+                logger.error(f"[MODEL POOL] Error stopping {entry.model_name}: {e}", exc_info=True)
+        await self.server_manager.stop_server()
+        self.current_model_name = None
+        self._current_model_path = None
+        self.supports_tool_calling = False
+    
+    async def benchmark_speculative(
+        self,
+        model: str,
+        prompt: str,
+        max_tokens: int = 256,
+        runs: int = 3,
+        speculative_options: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """Measure decode speed of a resident model with and without speculative decoding.
+        
+        The model is restarted twice (without drafting, then with it) and the
+        same greedy completion is timed on each; it is left running with the
+        options it had before, and the previously active model is reactivated.
+        
+        Args:
+            model: Resident model (path, file name or server model ID)
+            prompt: User message to complete; drafting helps most when the
+                answer repeats text from the prompt
+            max_tokens: Tokens generated per run
+            runs: Timed runs per configuration (after one warm-up run)
+            speculative_options: speculative_mode/draft_model_path/draft_num_pred_tokens
+                to test (default: the model's current options, else prompt lookup)
+        
+        Returns:
+            Per-configuration results, the speed-up and the acceptance rate
+            (None when the server does not report draft statistics)
+        
+        Raises:
+            ValueError: If the model is not resident
+            RuntimeError: If a configuration fails to load
+        """
+        entry = self.model_pool.find(model)
+        if entry is None:
+            raise ValueError(f"Model {model} is not loaded")
+        model_path = entry.model_path
+        original_options = dict(entry.load_options)
+        previous_active = self._current_model_path
+        
+        speculative_keys = ("speculative_mode", "draft_model_path", "draft_num_pred_tokens")
+        speculative_options = {key: value for key, value in (speculative_options or {}).items() if key in speculative_keys}
+        if not speculative_options.get("speculative_mode"):
+            speculative_options["speculative_mode"] = original_options.get("speculative_mode") or "prompt_lookup"
+        configurations = {
+            "baseline": {**original_options, **{key: None for key in speculative_keys}},
+            "speculative": {**original_options, **{key: original_options.get(key) for key in speculative_keys}, **speculative_options}
+        }
+        
+        results: Dict[str, Any] = {}
+        try:
+            for label, options in configurations.items():
+                if not await self.load_model(model_path, **options):
+                    raise RuntimeError(f"Failed to load {entry.model_name} for the {label} run: {self._last_load_error or 'unknown error'}")
+                results[label] = await self._time_generation(self.server_manager, prompt, max_tokens, runs)
+                results[label]["speculative"] = self.server_manager.get_speculative_config()
+        finally:
+            restored = self.model_pool.get(model_path)
+            if restored is None or restored.load_options != original_options:
+                logger.info(f"[SPECULATIVE BENCHMARK] Restoring {entry.model_name} with its original options")
+                await self.load_model(model_path, **original_options)
+            previous = self.model_pool.get(previous_active) if previous_active else None
+            if previous is not None and previous.server is not self.server_manager:
+                await self._activate_pooled_model(previous)
+        
+        baseline_tps = results["baseline"]["tokens_per_second"]
+        speculative_tps = results["speculative"]["tokens_per_second"]
+        speedup = round(speculative_tps / baseline_tps, 3) if baseline_tps else None
+        logger.info(f"[SPECULATIVE BENCHMARK] {entry.model_name}: {baseline_tps:.1f} -> {speculative_tps:.1f} tokens/s "
+                    f"(speed-up {speedup}, acceptance {results['speculative']['acceptance_rate']})")
+        return {
+            "model": entry.model_name,
+            "prompt_tokens": results["speculative"]["prompt_tokens"],
+            "max_tokens": max_tokens,
+            "runs": runs,
+            "baseline": results["baseline"],
+            "speculative": results["speculative"],
+            "speedup": speedup,
+            "acceptance_rate": results["speculative"]["acceptance_rate"]
+        }
+    
+    async def _time_generation(self, server: LLMServerManager, prompt: str, max_tokens: int, runs: int) -> Dict[str, Any]:
+        """Time greedy completions of a prompt on a server (one untimed warm-up run first).
+        
+        Returns:
+            Dictionary with generated tokens, elapsed seconds, tokens per second
+            and the draft acceptance rate if the server reports draft counts
+        """
+        payload = {
+            "model": server.get_model_id() or self.current_model_name or "default",
+            "messages": [{"role": "user", "content": prompt}],
+            "max_tokens": max_tokens,
+            "temperature": 0.0,  # Greedy, so every run and both configurations produce the same text
+            "stream": False
+        }
+        client = server.get_client()
+        completion_tokens = 0
+        prompt_tokens = 0
+        elapsed = 0.0
+        drafted = 0
+        accepted = 0
+        for run in range(runs + 1):
+            async with server.scheduler.slot(Priority.BACKGROUND, client_id="speculative_benchmark"):
+                started = time.perf_counter()
+                response = await client.post(f"{server.server_url}/v1/chat/completions", json=payload, timeout=300.0)
+                duration = time.perf_counter() - started
+            response.raise_for_status()
+            if run == 0:
+                continue  # Warm-up: loads weights into cache and fills the prompt cache
+            result = response.json()
+            usage = result.get("usage") or {}
+            completion_tokens += usage.get("completion_tokens", 0)
+            prompt_tokens = usage.get("prompt_tokens", prompt_tokens)
+            elapsed += duration
+            # llama.cpp's native server reports draft statistics; llama_cpp.server doesn't
+            timings = result.get("timings") or {}
+            drafted += timings.get("draft_n", 0)
+            accepted += timings.get("draft_n_accepted", 0)
+        
+        return {
+            "completion_tokens": completion_tokens,
+            "prompt_tokens": prompt_tokens,
+            "seconds": round(elapsed, 3),
+            "tokens_per_second": round(completion_tokens / elapsed, 2) if elapsed > 0 else 0.0,
+            "server_timings": server.get_server_timings(),
+            "acceptance_rate": round(accepted / drafted, 3) if drafted else None
+        }
     
     def is_model_loaded(self) -> bool:
         """Check if model is loaded (server is running)."""
@@ -700,9 +1044,11 @@ class LLMManager:
         return None
     
     async def unload_model(self) -> bool:
-        """Stop the model server."""
+        """Stop the active model's server and drop it from the pool."""
         try:
             # Stop the server
+            if self._current_model_path:
+                self.model_pool.remove(self._current_model_path)
             await self.server_manager.stop_server()
             
             model_id = self._current_model_path
@@ -898,13 +1244,17 @@ class LLMManager:
         else:
             self.user_profile = None
 
-    def _build_system_prompt(self) -> str:
+    def _build_system_prompt(self, include_clock: bool = True) -> str:
         """Build system prompt from base prompt, character card, and user profile.
         
         Note: This is used for building the system message sent to the OpenAI-compatible server.
         The server handles prompt formatting internally.
         
         For chatml-function-calling format, uses the exact system message from official docs.
+        
+        Args:
+            include_clock: Prepend the current date and time. The cache-friendly
+                layout passes False and adds a coarse clock after the history instead.
         """
         from datetime import datetime
         from ...utils.template_parser import parse_template_variables
@@ -921,16 +1271,19 @@ class LLMManager:
         if hasattr(self, 'current_chat_format') and self.current_chat_format == "chatml-function-calling":
             # Still include date/time even for chatml-function-calling format
             base_prompt = "A chat between a curious user and an artificial intelligence assistant. The assistant gives helpful, detailed, and polite answers to the user's questions. The assistant calls functions with appropriate input when necessary"
+            if not include_clock:
+                return base_prompt
             return f"{base_prompt}\n\nCurrent Date and Time: {current_datetime_iso} ({current_weekday}, {current_date_str} at {current_time_str})"
         
         prompt_parts = []
         
-        # Always add current date and time at the beginning
-        prompt_parts.append("CURRENT DATE AND TIME:")
-        prompt_parts.append(f"- ISO Format: {current_datetime_iso}")
-        prompt_parts.append(f"- Human Readable: {current_weekday}, {current_date_str} at {current_time_str}")
-        prompt_parts.append(f"- Use this as reference when parsing natural language dates like 'tomorrow', 'next week', 'friday at 2pm', etc.")
-        prompt_parts.append("")
+        # Add current date and time at the beginning (legacy layout)
+        if include_clock:
+            prompt_parts.append("CURRENT DATE AND TIME:")
+            prompt_parts.append(f"- ISO Format: {current_datetime_iso}")
+            prompt_parts.append(f"- Human Readable: {current_weekday}, {current_date_str} at {current_time_str}")
+            prompt_parts.append(f"- Use this as reference when parsing natural language dates like 'tomorrow', 'next week', 'friday at 2pm', etc.")
+            prompt_parts.append("")
         
         # Extract names for template parsing
         user_name = None
@@ -1071,19 +1424,21 @@ class LLMManager:
         # This is a no-op for now - options are passed per-request
         pass
     
-    def get_model_config(self, model_id: str) -> Dict[str, Any]:
-        """Get saved configuration for a model."""
+    def get_model_configs(self) -> Dict[str, Dict[str, Any]]:
+        """Get the saved configurations of all models, keyed by model ID."""
         try:
             config_path = settings.data_dir / "model_configs.json"
             if config_path.exists():
-                import json
                 with open(config_path, 'r', encoding='utf-8') as f:
-                    configs = json.load(f)
-                    return configs.get(model_id, {})
+                    return json.load(f)
         except Exception as e:
             logger.error("Failed to load model config: %s", e)
         return {}
     
+    def get_model_config(self, model_id: str) -> Dict[str, Any]:
+        """Get saved configuration for a model."""
+        return self.get_model_configs().get(model_id, {})
+    
     def save_model_config(self, model_id: str, config: Dict[str, Any]):
         """Save configuration for a model."""
         try:
@@ -1266,7 +1621,8 @@ class LLMManager:
         history: List[Dict[str, Any]],
         context: Optional[Dict[str, Any]],
         tool_results: Optional[List[Dict[str, Any]]],
-        message: str
+        message: str,
+        summary: Optional[str] = None
     ) -> List[Dict[str, Any]]:
         """Build OpenAI-formatted message list from history, context, tool results, and current message.
         
@@ -1275,20 +1631,29 @@ class LLMManager:
             context: Retrieved context from memory
             tool_results: Tool call results from previous executions
             message: Current user message
+            summary: Summary of the conversation before `history` (sent with the system prompt)
             
         Returns:
             List of OpenAI-formatted messages
         """
         messages = []
         
+        # In the cache-friendly layout everything before the current user message stays
+        # byte-identical between turns, so the server can reuse its KV cache for the prefix
+        cache_friendly = settings.llm_prompt_layout == "cache_friendly"
+        
         # Add system prompt
-        system_prompt = self._build_system_prompt()
+        system_prompt = self._build_system_prompt(include_clock=not cache_friendly)
+        # The summary only changes when older turns are folded in, so it belongs to the stable prefix
+        if summary:
+            summary_text = f"Summary of the earlier conversation:\n{summary}"
+            system_prompt = f"{system_prompt}\n\n{summary_text}" if system_prompt else summary_text
         if system_prompt:
             messages.append({"role": "system", "content": system_prompt})
             logger.debug(f"Added system prompt ({len(system_prompt)} chars)")
         
         # Add context if available
-        if context and context.get("retrieved_messages"):
+        if not cache_friendly and context and context.get("retrieved_messages"):
             context_text = "Relevant context from past conversations:\n"
             for msg in context["retrieved_messages"][:5]:
                 context_text += f"- {msg}\n"
@@ -1315,40 +1680,185 @@ class LLMManager:
         logger.debug(f"Added {history_added} history messages (filtered from {len(history)} total)")
         
         # Log messages before adding tool results
-        logger.debug(f"Messages before tool_results (count: {len(messages)}):")
-        for i, msg in enumerate(messages):
-            role = msg.get("role", "unknown")
-            has_tool_calls = "tool_calls" in msg and msg.get("tool_calls")
-            logger.debug(f"  Message {i}: role={role}, has_tool_calls={bool(has_tool_calls)}, content_length={len(str(msg.get('content', '')))}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Messages before tool_results (count: {len(messages)}):")
+            for i, msg in enumerate(messages):
+                role = msg.get("role", "unknown")
+                has_tool_calls = "tool_calls" in msg and msg.get("tool_calls")
+                logger.debug(f"  Message {i}: role={role}, has_tool_calls={bool(has_tool_calls)}, content_length={len(str(msg.get('content', '')))}")
         
         # Add tool results if available
         if tool_results:
             tool_result_messages = self._build_tool_result_messages(tool_results)
             logger.info(f"[MESSAGE BUILD] Adding {len(tool_result_messages)} tool result message(s)")
-            for i, tr_msg in enumerate(tool_result_messages):
-                logger.info(f"[MESSAGE BUILD]   Tool result {i+1}: role={tr_msg.get('role')}, tool_call_id={tr_msg.get('tool_call_id')}, content_length={len(str(tr_msg.get('content', '')))}")
+            if logger.isEnabledFor(logging.DEBUG):
+                for i, tr_msg in enumerate(tool_result_messages):
+                    logger.debug(f"[MESSAGE BUILD]   Tool result {i+1}: role={tr_msg.get('role')}, tool_call_id={tr_msg.get('tool_call_id')}, content_length={len(str(tr_msg.get('content', '')))}")
             messages.extend(tool_result_messages)
         
         # Add current user message
         # Note: In follow-up calls with tool_results, we still add the user message
         # as it provides context for the model's response
-        messages.append({"role": "user", "content": message})
-        logger.info(f"[MESSAGE BUILD] Added user message: {message[:100]}...")
+        if cache_friendly:
+            messages.append({"role": "user", "content": self._build_volatile_preamble(context) + message})
+        else:
+            messages.append({"role": "user", "content": message})
+        logger.info(f"[MESSAGE BUILD] Final message count: {len(messages)}")
         
         # Log final message structure
-        logger.info(f"[MESSAGE BUILD] Final message count: {len(messages)}")
-        for i, msg in enumerate(messages):
-            role = msg.get("role", "unknown")
-            has_tool_calls = "tool_calls" in msg and msg.get("tool_calls")
-            has_tool_call_id = "tool_call_id" in msg
-            content_preview = str(msg.get("content", ""))[:50] if msg.get("content") else "None"
-            logger.info(f"[MESSAGE BUILD]   Message {i}: role={role}, has_tool_calls={has_tool_calls}, has_tool_call_id={has_tool_call_id}, content='{content_preview}...'")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"[MESSAGE BUILD] Added user message: {message[:100]}...")
+            for i, msg in enumerate(messages):
+                role = msg.get("role", "unknown")
+                has_tool_calls = "tool_calls" in msg and msg.get("tool_calls")
+                has_tool_call_id = "tool_call_id" in msg
+                content_preview = str(msg.get("content", ""))[:50] if msg.get("content") else "None"
+                logger.debug(f"[MESSAGE BUILD]   Message {i}: role={role}, has_tool_calls={has_tool_calls}, has_tool_call_id={has_tool_call_id}, content='{content_preview}...'")
         
         # Final validation
         messages = self._validate_assistant_messages(messages)
         
         return messages
     
+    def _build_volatile_preamble(self, context: Optional[Dict[str, Any]]) -> str:
+        """Build the per-turn block placed in front of the current user message.
+        
+        Holds the content that changes every turn (clock and retrieved memory) so
+        that it never invalidates the cached prompt prefix. The clock is rounded
+        to the minute.
+        
+        Args:
+            context: Retrieved context from memory
+            
+        Returns:
+            Preamble text ending in a blank line, or an empty string
+        """
+        from datetime import datetime
+        
+        now = datetime.now()
+        parts = [
+            f"[Current date and time: {now.strftime('%A, %Y-%m-%d %H:%M')} - use this when parsing "
+            f"natural language dates like 'tomorrow', 'next week', 'friday at 2pm', etc.]"
+        ]
+        if context and context.get("retrieved_messages"):
+            parts.append("[Relevant context from past conversations:")
+            for msg in context["retrieved_messages"][:5]:
+                parts.append(f"- {msg}")
+            parts.append("]")
+            logger.debug(f"Added context ({len(context['retrieved_messages'])} messages)")
+        return "\n".join(parts) + "\n\n"
+    
+    def _record_prompt_cache_stats(
+        self,
+        usage: Optional[Dict[str, Any]],
+        timings: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Optional[int]]:
+        """Record how many prompt tokens the server reused from its KV cache.
+        
+        Prefers cache counts reported in the response (OpenAI-style
+        usage.prompt_tokens_details or llama.cpp timings) and falls back to the
+        prefix-match line llama-cpp-python prints for each request.
+        
+        Args:
+            usage: 'usage' object from the completion response, if any
+            timings: 'timings' object from the completion response, if any
+            
+        Returns:
+            Dict with 'prompt_tokens' and 'cached_tokens' (either may be None)
+        """
+        usage = usage or {}
+        timings = timings or {}
+        prompt_tokens = usage.get("prompt_tokens")
+        cached_tokens = (usage.get("prompt_tokens_details") or {}).get("cached_tokens")
+        if cached_tokens is None and "cache_n" in timings:
+            cached_tokens = timings["cache_n"]
+            if prompt_tokens is None and "prompt_n" in timings:
+                prompt_tokens = timings["cache_n"] + timings["prompt_n"]
+        
+        prefix_match = self.server_manager.pop_prefix_match()
+        if cached_tokens is None and prefix_match:
+            cached_tokens = prefix_match["cached_tokens"]
+            if prompt_tokens is None:
+                prompt_tokens = prefix_match["cached_tokens"] + prefix_match["evaluated_tokens"]
+        
+        stats = {"prompt_tokens": prompt_tokens, "cached_tokens": cached_tokens}
+        self.last_prompt_cache_stats = stats
+        self.prompt_cache_totals["requests"] += 1
+        if prompt_tokens is not None:
+            self.prompt_cache_totals["prompt_tokens"] += prompt_tokens
+        if cached_tokens is not None:
+            self.prompt_cache_totals["cached_tokens"] += cached_tokens
+        
+        if cached_tokens is not None and prompt_tokens:
+            logger.info(f"[PROMPT CACHE] Reused {cached_tokens}/{prompt_tokens} prompt tokens ({cached_tokens * 100 // prompt_tokens}%)")
+        else:
+            logger.debug(f"[PROMPT CACHE] Server did not report cache reuse (prompt_tokens={prompt_tokens})")
+        return stats
+    
+    def _record_generation_metrics(
+        self,
+        request_seconds: float,
+        decode_seconds: float,
+        usage: Optional[Dict[str, Any]],
+        timings: Optional[Dict[str, Any]] = None,
+        fallback_tokens: int = 0
+    ) -> Optional[float]:
+        """Record LLM request latency and decode throughput.
+        
+        Uses the server's own decode rate (llama.cpp timings) when reported,
+        otherwise completion tokens divided by the decode time.
+        
+        Args:
+            request_seconds: Total time for the request
+            decode_seconds: Time spent generating tokens (after the first token when streaming)
+            usage: 'usage' object from the completion response, if any
+            timings: 'timings' object from the completion response, if any
+            fallback_tokens: Token estimate used when the server reports no usage
+            
+        Returns:
+            Decode rate in tokens per second, or None if it couldn't be determined
+        """
+        metrics = get_metrics()
+        metrics.observe("chat_phase_seconds", request_seconds, phase="llm_request")
+        
+        tokens_per_second = (timings or {}).get("predicted_per_second")
+        if not tokens_per_second:
+            completion_tokens = (usage or {}).get("completion_tokens") or fallback_tokens
+            if completion_tokens and decode_seconds > 0:
+                tokens_per_second = completion_tokens / decode_seconds
+        if tokens_per_second:
+            metrics.observe("chat_decode_tokens_per_second", tokens_per_second)
+            logger.debug(f"[METRICS] Decode rate: {tokens_per_second:.1f} tokens/s")
+        return tokens_per_second
+    
+    def get_token_counter(self) -> TokenCounter:
+        """Get the token counter of the active model, creating it on first use."""
+        entry = self.model_pool.get(self._current_model_path) if self._current_model_path else None
+        if entry is None:
+            return TokenCounter(self._current_model_path or "", self.server_manager)
+        if entry.token_counter is None:
+            entry.token_counter = TokenCounter(entry.model_path, entry.server)
+        return entry.token_counter
+    
+    def _prompt_token_budget(self) -> int:
+        """Prompt tokens a request may use: the context window minus the reply, capped by settings."""
+        entry = self.model_pool.get(self._current_model_path) if self._current_model_path else None
+        n_ctx = (entry.load_options.get("n_ctx") if entry else None) or settings.llm_context_size
+        reply_tokens = max(self.sampler_settings.max_tokens, self.tool_calling_sampler_settings.max_tokens)
+        budget = max(n_ctx - reply_tokens, 0)
+        if settings.llm_prompt_token_budget > 0:
+            budget = min(budget, settings.llm_prompt_token_budget) if budget else settings.llm_prompt_token_budget
+        return budget
+    
+    def get_prompt_cache_stats(self) -> Dict[str, Any]:
+        """Get prompt cache reuse for the last request and since startup."""
+        return {
+            "layout": settings.llm_prompt_layout,
+            "last_request": self.last_prompt_cache_stats,
+            "last_budget": self.last_prompt_budget.to_dict() if self.last_prompt_budget else None,
+            "totals": dict(self.prompt_cache_totals)
+        }
+    
     def _should_force_tool_calling(self) -> bool:
         """Check if tool calling should be forced for Llama 3.1/3.2 models.
         
@@ -1437,7 +1947,7 @@ class LLMManager:
         """Get the model name to use in the request.
         
         For chatml-function-calling, returns "test" as per official docs.
-        For other formats, queries the server for the actual model ID.
+        For other formats, uses the model ID cached by the server manager at load time.
         
         Args:
             server_url: LLM server URL
@@ -1450,20 +1960,13 @@ class LLMManager:
             logger.info("[MODEL NAME] Using 'test' for chatml-function-calling format")
             return "test"
         
-        # Get the actual model ID from the server
-        model_name = self.current_model_name or "default"
-        try:
-            async with httpx.AsyncClient(timeout=5.0) as client:
-                response = await client.get(f"{server_url}/v1/models")
-                if response.status_code == 200:
-                    data = response.json()
-                    if data.get("data") and len(data["data"]) > 0:
-                        model_name = data["data"][0]["id"]
-                        logger.debug(f"Using model ID from server: {model_name}")
-        except Exception as e:
-            logger.warning(f"Could not query server for model ID, using default: {e}")
+        # Use the model ID the server reported when it became ready (cached, no round trip)
+        model_name = self.server_manager.get_model_id()
+        if model_name:
+            logger.debug(f"Using model ID from server: {model_name}")
+            return model_name
         
-        return model_name
+        return self.current_model_name or "default"
     
     def _build_request_payload(
         self,
@@ -1767,13 +2270,113 @@ class LLMManager:
         
         return tool_calls
     
+    async def _prepare_request(
+        self,
+        message: str,
+        history: List[Dict[str, Any]],
+        context: Optional[Dict[str, Any]],
+        tool_results: Optional[List[Dict[str, Any]]],
+        stream: bool,
+        allow_tools: bool = True,
+        tool_names: Optional[List[str]] = None,
+        summary: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Build the messages, tool list and payload for a generation request.
+        
+        Args:
+            message: Current user message
+            history: Conversation history
+            context: Retrieved context from memory
+            tool_results: Tool call results from previous tool executions
+            stream: Whether the request will be streamed
+            allow_tools: Whether tools may be sent with this request
+            tool_names: Only send these tools (None = all tools)
+            summary: Summary of the conversation before `history`
+            
+        Returns:
+            Dict with 'messages', 'tools', 'model_name', 'payload' and 'prompt_budget'
+        """
+        server_url = self.server_manager.get_server_url()
+        
+        # Get tool source
+        tool_source = await self._get_tool_source()
+        
+        if tool_results and logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Tool results count: {len(tool_results)}")
+            for i, result in enumerate(tool_results):
+                logger.debug(f"  Tool result {i+1}: {result.get('name')} - success={result.get('success')}")
+        
+        metrics = get_metrics()
+        
+        # Force enable tool calling for Llama 3.1/3.2 if needed
+        if self._should_force_tool_calling():
+            self.supports_tool_calling = True
+        
+        # Retrieve tools if tool calling is enabled
+        # IMPORTANT: Don't send tools in follow-up calls (when tool_results are present)
+        # The model already has the tool results and should respond normally
+        openai_tools = []
+        logger.debug(f"[TOOL CALLING] supports_tool_calling={self.supports_tool_calling}, tool_results={bool(tool_results)}, tool_source={bool(tool_source)}")
+        
+        if not allow_tools:
+            logger.info("[TOOL CALLING] Tools disabled for this request - tools will not be sent")
+        elif self.supports_tool_calling and not tool_results:
+            if tool_source:
+                with metrics.span("tool_schema_retrieval"):
+                    openai_tools = await self._retrieve_tools(tool_source)
+                    if tool_names is not None:
+                        openai_tools = [t for t in openai_tools if t.get('function', {}).get('name') in tool_names]
+                        logger.info(f"[TOOL CALLING] Sending routed tool subset: {tool_names}")
+                    # Ensure tools have required format fields
+                    if openai_tools:
+                        chat_format = getattr(self, 'current_chat_format', None)
+                        openai_tools = self._ensure_tool_format(openai_tools, chat_format)
+                logger.debug(f"[TOOL CALLING] {len(openai_tools)} tools ready")
+            else:
+                logger.warning("[TOOL CALLING] ⚠️  Tool calling enabled but no tool_source available - tools won't be sent")
+        elif tool_results:
+            logger.info("[TOOL CALLING] Follow-up call with tool results - not sending tools (model should respond normally)")
+        else:
+            logger.info("[TOOL CALLING] Tool calling is DISABLED - tools will not be sent")
+        
+        # Build messages for OpenAI format, leaving out the oldest history if it doesn't fit the budget
+        with metrics.span("prompt_build"):
+            openai_messages, openai_tools, budget_report = await self.prompt_budgeter.fit(
+                self.get_token_counter(),
+                lambda window, window_context: self._build_openai_messages(window, window_context, tool_results, message, summary),
+                history,
+                context,
+                openai_tools,
+                self._prompt_token_budget()
+            )
+        self.last_prompt_budget = budget_report
+        metrics.observe("chat_prompt_tokens", budget_report.prompt_tokens)
+        
+        # Get model name for request
+        model_name = await self._get_model_name_for_request(server_url)
+        
+        # Build request payload - THIS IS WHERE TOOL-CALLING SETTINGS ARE APPLIED
+        payload = self._build_request_payload(openai_messages, openai_tools, stream, model_name, server_url)
+        logger.debug(f"[TOOL CALLING] Payload built - temperature={payload.get('temperature', 'N/A')}, tools_in_payload={len(payload.get('tools', []))}, top_p={payload.get('top_p', 'N/A')}, top_k={payload.get('top_k', 'N/A')}")
+        
+        return {
+            "messages": openai_messages,
+            "tools": openai_tools,
+            "model_name": model_name,
+            "payload": payload,
+            "prompt_budget": budget_report
+        }
+    
     async def generate_response(
         self,
         message: str,
         history: List[Dict[str, Any]],
         context: Optional[Dict[str, Any]] = None,
         tool_results: Optional[List[Dict[str, Any]]] = None,
-        stream: bool = False
+        stream: bool = False,
+        priority: Priority = Priority.INTERACTIVE,
+        client_id: Optional[str] = None,
+        summary: Optional[str] = None
     ) -> Dict[str, Any]:
         """Generate a response using the OpenAI-compatible server.
         
@@ -1782,10 +2385,15 @@ class LLMManager:
             history: Conversation history (list of dicts with 'role' and 'content')
             context: Retrieved context from memory
             tool_results: Tool call results from previous tool executions
-            stream: Whether to stream the response (not yet implemented)
+            stream: Generate through stream_response() and return the assembled result
+                (use stream_response() directly to receive tokens as they arrive)
+            priority: Scheduling priority of the request
+            client_id: Client the per-client concurrency limit applies to (e.g. conversation ID)
+            summary: Summary of the conversation before `history`, if older turns were summarised
             
         Returns:
-            Dict with 'response' (str) and 'tool_calls' (list)
+            Dict with 'response' (str), 'tool_calls' (list), and this request's
+            'prompt_cache' (dict) and 'prompt_budget' (PromptBudget)
         """
         if not self.is_model_loaded():
             logger.error("No model loaded. Current model path: %s, Model name: %s", 
@@ -1793,7 +2401,20 @@ class LLMManager:
             raise RuntimeError("No model loaded. Please load a model first.")
         
         if stream:
-            raise NotImplementedError("Streaming not yet implemented")
+            # Consume the token stream and return the same shape as a non-streaming call
+            final: Dict[str, Any] = {}
+            async for event in self.stream_response(
+                message, history, context, tool_results,
+                priority=priority, client_id=client_id, summary=summary
+            ):
+                if event["type"] == "done":
+                    final = event
+            return {
+                "response": final.get("response", ""),
+                "tool_calls": final.get("tool_calls", []),
+                "prompt_cache": final.get("prompt_cache"),
+                "prompt_budget": final.get("prompt_budget")
+            }
         
         try:
             # Validate and clamp sampler settings
@@ -1807,73 +2428,17 @@ class LLMManager:
             server_url = self.server_manager.get_server_url()
             
             # Debug: Log tool calling support and availability
-            logger.info("=" * 60)
-            logger.info("GENERATE RESPONSE - TOOL CALLING DEBUG")
-            logger.info("=" * 60)
-            logger.info(f"Model supports tool calling: {self.supports_tool_calling}")
-            logger.info(f"Tool registry available: {hasattr(self, 'tool_registry') and self.tool_registry is not None}")
-            
-            # Get tool source
-            tool_source = await self._get_tool_source()
-            
-            logger.info(f"Tool results provided: {tool_results is not None and len(tool_results) > 0 if tool_results else False}")
-            if tool_results:
-                logger.info(f"Tool results count: {len(tool_results)}")
-                for i, result in enumerate(tool_results):
-                    logger.info(f"  Tool result {i+1}: {result.get('name')} - success={result.get('success')}")
-            logger.info("=" * 60)
+            logger.debug(f"Model supports tool calling: {self.supports_tool_calling}")
             
             # Always use OpenAI-compatible server for generation
             tool_calls = []
             response_text = ""
             
-            # Build messages for OpenAI format
-            openai_messages = self._build_openai_messages(history, context, tool_results, message)
-            
-            # Force enable tool calling for Llama 3.1/3.2 if needed
-            if self._should_force_tool_calling():
-                self.supports_tool_calling = True
-            
-            # Retrieve tools if tool calling is enabled
-            # IMPORTANT: Don't send tools in follow-up calls (when tool_results are present)
-            # The model already has the tool results and should respond normally
-            openai_tools = []
-            logger.warning(f"[TOOL CALLING] 🔍 Step 1: supports_tool_calling={self.supports_tool_calling}, tool_results={bool(tool_results)}, tool_source={bool(tool_source)}")
-            
-            if self.supports_tool_calling and not tool_results:
-                if tool_source:
-                    logger.warning(f"[TOOL CALLING] 🔍 Step 2: Retrieving tools from tool_source...")
-                    openai_tools = await self._retrieve_tools(tool_source)
-                    logger.warning(f"[TOOL CALLING] 🔍 Step 3: Retrieved {len(openai_tools)} tools from tool_source")
-                    if openai_tools:
-                        tool_names = [t.get('function', {}).get('name', 'unknown') for t in openai_tools[:3]]
-                        logger.warning(f"[TOOL CALLING] 🔍 Step 3b: Tool names: {tool_names}")
-                else:
-                    logger.warning("[TOOL CALLING] ⚠️  Tool calling enabled but no tool_source available - tools won't be sent")
-            elif tool_results:
-                logger.info("[TOOL CALLING] Follow-up call with tool results - not sending tools (model should respond normally)")
-            else:
-                logger.info("[TOOL CALLING] Tool calling is DISABLED - tools will not be sent")
-            
-            # Ensure tools have required format fields
-            if openai_tools:
-                chat_format = getattr(self, 'current_chat_format', None)
-                logger.warning(f"[TOOL CALLING] 🔍 Step 4: Formatting {len(openai_tools)} tools with chat_format={chat_format}")
-                openai_tools = self._ensure_tool_format(openai_tools, chat_format)
-                logger.warning(f"[TOOL CALLING] 🔍 Step 5: After formatting: {len(openai_tools)} tools ready")
-            else:
-                logger.warning(f"[TOOL CALLING] 🔍 Step 4: No tools to format (openai_tools is empty)")
-            
-            # Get model name for request
-            model_name = await self._get_model_name_for_request(server_url)
-            
-            # Build request payload - THIS IS WHERE TOOL-CALLING SETTINGS ARE APPLIED
-            # Log BEFORE building payload so we can verify tools are present
-            logger.warning(f"[TOOL CALLING] 🔍 Step 6: About to build payload with {len(openai_tools)} tools - will use {'TOOL-CALLING' if openai_tools else 'REGULAR'} settings")
-            payload = self._build_request_payload(openai_messages, openai_tools, stream, model_name, server_url)
-            actual_temp = payload.get('temperature', 'N/A')
-            actual_tools_count = len(payload.get('tools', []))
-            logger.warning(f"[TOOL CALLING] 🔍 Step 7: Payload built - temperature={actual_temp}, tools_in_payload={actual_tools_count}, top_p={payload.get('top_p', 'N/A')}, top_k={payload.get('top_k', 'N/A')}")
+            request = await self._prepare_request(message, history, context, tool_results, stream, summary=summary)
+            openai_messages = request["messages"]
+            openai_tools = request["tools"]
+            model_name = request["model_name"]
+            payload = request["payload"]
             
             # Log request for debugging
             from .debug_logger import log_llm_request, log_llm_response, log_llm_error
@@ -1891,70 +2456,81 @@ class LLMManager:
             
             # Make request to OpenAI-compatible server
             try:
-                # Log request details for debugging empty responses (INFO level so it's captured)
-                logger.info(f"[GENERATE] Request payload summary:")
-                logger.info(f"  Messages count: {len(payload.get('messages', []))}")
-                logger.info(f"  Tools count: {len(payload.get('tools', []))}")
-                logger.info(f"  Max tokens: {payload.get('max_tokens', 'default')}")
-                logger.info(f"  Temperature: {payload.get('temperature', 'default')} {'(TOOL-CALLING SETTINGS)' if openai_tools else '(REGULAR SETTINGS)'}")
-                logger.info(f"  Top_p: {payload.get('top_p', 'default')}")
-                logger.info(f"  Top_k: {payload.get('top_k', 'default')}")
-                logger.info(f"  Stop tokens sent to LLM: {payload.get('stop', 'NOT SET')}")
-                if payload.get('messages'):
-                    logger.info(f"  Last message role: {payload['messages'][-1].get('role')}")
-                    logger.info(f"  Last message preview: {str(payload['messages'][-1].get('content', ''))[:100]}")
+                # Log request details for debugging empty responses
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug(f"[GENERATE] Request payload summary:")
+                    logger.debug(f"  Messages count: {len(payload.get('messages', []))}")
+                    logger.debug(f"  Tools count: {len(payload.get('tools', []))}")
+                    logger.debug(f"  Max tokens: {payload.get('max_tokens', 'default')}")
+                    logger.debug(f"  Temperature: {payload.get('temperature', 'default')} {'(TOOL-CALLING SETTINGS)' if openai_tools else '(REGULAR SETTINGS)'}")
+                    logger.debug(f"  Top_p: {payload.get('top_p', 'default')}")
+                    logger.debug(f"  Top_k: {payload.get('top_k', 'default')}")
+                    logger.debug(f"  Stop tokens sent to LLM: {payload.get('stop', 'NOT SET')}")
+                    if payload.get('messages'):
+                        logger.debug(f"  Last message role: {payload['messages'][-1].get('role')}")
+                        logger.debug(f"  Last message preview: {str(payload['messages'][-1].get('content', ''))[:100]}")
                 
-                async with httpx.AsyncClient(timeout=30.0) as client:  # Reduced from 300s to 30s
+                client = self.server_manager.get_client()
+                async with self.server_manager.scheduler.slot(priority, client_id):
+                    self.server_manager.pop_prefix_match()  # Drop any stale cache report from an earlier request
                     response = await client.post(
                         f"{server_url}/v1/chat/completions",
-                        json=payload
+                        json=payload,
+                        timeout=30.0
                     )
-                    request_duration = (time.time() - request_start) * 1000  # Convert to ms
-                    response.raise_for_status()
-                    resp_data = response.json()
-                    logger.info(f"[GENERATE] Received response from LLM server, status={response.status_code}")
-                    
-                    # Log FULL raw response for debugging - this is critical
-                    logger.info(f"[GENERATE] FULL RAW RESPONSE:")
-                    logger.info(f"  Response keys: {list(resp_data.keys())}")
-                    logger.info(f"  Full response JSON: {json.dumps(resp_data, indent=2, default=str)}")
+                request_duration = (time.time() - request_start) * 1000  # Convert to ms
+                response.raise_for_status()
+                resp_data = response.json()
+                prompt_cache = self._record_prompt_cache_stats(resp_data.get("usage"), resp_data.get("timings"))
+                # Non-streaming requests have no first-token timestamp; use the whole request as decode time
+                self._record_generation_metrics(
+                    request_duration / 1000,
+                    request_duration / 1000,
+                    resp_data.get("usage"),
+                    resp_data.get("timings")
+                )
+                logger.info(f"[GENERATE] Received response from LLM server, status={response.status_code}")
+                
+                # Log FULL raw response for debugging (serialising it is expensive, so only at DEBUG)
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug(f"[GENERATE] FULL RAW RESPONSE:")
+                    logger.debug(f"  Response keys: {list(resp_data.keys())}")
+                    logger.debug(f"  Full response JSON: {json.dumps(resp_data, indent=2, default=str)}")
                     
                     if "choices" in resp_data and len(resp_data["choices"]) > 0:
                         choice = resp_data["choices"][0]
-                        logger.info(f"[GENERATE] Choice details:")
-                        logger.info(f"  Finish reason: {choice.get('finish_reason')}")
-                        logger.info(f"  Index: {choice.get('index')}")
+                        logger.debug(f"[GENERATE] Choice details:")
+                        logger.debug(f"  Finish reason: {choice.get('finish_reason')}")
+                        logger.debug(f"  Index: {choice.get('index')}")
                         message_obj = choice.get('message', {})
-                        logger.info(f"  Message keys: {list(message_obj.keys())}")
-                        logger.info(f"  Message full: {json.dumps(message_obj, indent=2, default=str)}")
+                        logger.debug(f"  Message keys: {list(message_obj.keys())}")
+                        logger.debug(f"  Message full: {json.dumps(message_obj, indent=2, default=str)}")
                         content = message_obj.get('content', '') or ''
-                        logger.info(f"  Content: {repr(content)}")
-                        logger.info(f"  Content length: {len(content)}")
+                        logger.debug(f"  Content: {repr(content)}")
+                        logger.debug(f"  Content length: {len(content)}")
                         if message_obj.get('tool_calls'):
-                            logger.info(f"  Tool calls count: {len(message_obj['tool_calls'])}")
-                            logger.info(f"  Tool calls: {json.dumps(message_obj['tool_calls'], indent=2, default=str)}")
-                    
-                    # Extract tool calls for logging
-                    tool_calls_for_log = []
-                    if resp_data.get("choices") and len(resp_data["choices"]) > 0:
-                        message_obj = resp_data["choices"][0].get("message", {})
-                        logger.info(f"[TOOL CALLING] Response message keys: {list(message_obj.keys())}")
-                        logger.info(f"[TOOL CALLING] Response has 'tool_calls' key: {'tool_calls' in message_obj}")
-                        if message_obj.get("tool_calls"):
-                            tool_calls_for_log = message_obj["tool_calls"]
-                            logger.info(f"[TOOL CALLING] ✅ Found {len(tool_calls_for_log)} tool call(s) in response!")
-                        else:
-                            content = message_obj.get("content", "")
-                            logger.info(f"[TOOL CALLING] No tool_calls in response, content length: {len(content)}")
-                            logger.debug(f"[TOOL CALLING] Response content preview: {content[:200]}")
-                    
-                    # Log response
-                    log_llm_response(
-                        log_entry=debug_log,
-                        response=resp_data,
-                        duration_ms=request_duration,
-                        tool_calls=tool_calls_for_log if tool_calls_for_log else None
-                    )
+                            logger.debug(f"  Tool calls count: {len(message_obj['tool_calls'])}")
+                            logger.debug(f"  Tool calls: {json.dumps(message_obj['tool_calls'], indent=2, default=str)}")
+                
+                # Extract tool calls for logging
+                tool_calls_for_log = []
+                if resp_data.get("choices") and len(resp_data["choices"]) > 0:
+                    message_obj = resp_data["choices"][0].get("message", {})
+                    if message_obj.get("tool_calls"):
+                        tool_calls_for_log = message_obj["tool_calls"]
+                        logger.info(f"[TOOL CALLING] ✅ Found {len(tool_calls_for_log)} tool call(s) in response!")
+                    else:
+                        content = message_obj.get("content", "")
+                        logger.info(f"[TOOL CALLING] No tool_calls in response, content length: {len(content)}")
+                        logger.debug(f"[TOOL CALLING] Response content preview: {content[:200]}")
+                
+                # Log response
+                log_llm_response(
+                    log_entry=debug_log,
+                    response=resp_data,
+                    duration_ms=request_duration,
+                    tool_calls=tool_calls_for_log if tool_calls_for_log else None
+                )
                 
                 # SIMPLIFIED EXTRACTION: Just get the content directly, no complex logic
                 if "choices" in resp_data and len(resp_data["choices"]) > 0:
@@ -1977,15 +2553,10 @@ class LLMManager:
                         # Convert to string if it's not None/empty
                         response_text = str(content_raw)
                     
-                    logger.info(f"[GENERATE] Content extracted: type={type(content_raw)}, value={repr(content_raw)}, final={repr(response_text)}")
-                    logger.info(f"[GENERATE] Tool calls parsed: {len(tool_calls)}")
+                    logger.debug(f"[GENERATE] Content extracted: type={type(content_raw)}, value={repr(content_raw)}, final={repr(response_text)}")
                     
                     # Log response details for debugging
-                    logger.info(f"[GENERATE] Response extracted:")
-                    logger.info(f"  Content length: {len(response_text)}")
-                    logger.info(f"  Tool calls: {len(tool_calls)}")
-                    logger.info(f"  Finish reason: {finish_reason}")
-                    logger.info(f"  Message keys: {list(message_obj.keys())}")
+                    logger.info(f"[GENERATE] Response extracted: content_length={len(response_text)}, tool_calls={len(tool_calls)}, finish_reason={finish_reason}")
                     
                     # Only warn about empty content if there are NO tool calls
                     # If tool calls exist, empty content is EXPECTED and NORMAL
@@ -2042,27 +2613,29 @@ class LLMManager:
                 payload_retry["tool_choice"] = "none"
                 
                 try:
-                    async with httpx.AsyncClient(timeout=30.0) as client:
+                    client = self.server_manager.get_client()
+                    async with self.server_manager.scheduler.slot(priority, client_id):
                         retry_response = await client.post(
                             f"{server_url}/v1/chat/completions",
-                            json=payload_retry
+                            json=payload_retry,
+                            timeout=30.0
                         )
-                        retry_response.raise_for_status()
-                        retry_data = retry_response.json()
+                    retry_response.raise_for_status()
+                    retry_data = retry_response.json()
+                    
+                    if "choices" in retry_data and len(retry_data["choices"]) > 0:
+                        retry_choice = retry_data["choices"][0]
+                        retry_message = retry_choice.get("message", {})
+                        retry_content = retry_message.get("content", "") or ""
+                        retry_tool_calls = self._parse_tool_calls_from_response(retry_message, retry_content)
                         
-                        if "choices" in retry_data and len(retry_data["choices"]) > 0:
-                            retry_choice = retry_data["choices"][0]
-                            retry_message = retry_choice.get("message", {})
-                            retry_content = retry_message.get("content", "") or ""
-                            retry_tool_calls = self._parse_tool_calls_from_response(retry_message, retry_content)
-                            
-                            if retry_content or retry_tool_calls:
-                                logger.info(f"[TOOL CALLING] ✅ Retry successful! Got content: {len(retry_content)} chars, tool_calls: {len(retry_tool_calls)}")
-                                response_text = retry_content
-                                tool_calls = retry_tool_calls
-                                resp_data = retry_data  # Update resp_data for logging
-                            else:
-                                logger.warning("[TOOL CALLING] Retry also returned empty - this is a deeper issue")
+                        if retry_content or retry_tool_calls:
+                            logger.info(f"[TOOL CALLING] ✅ Retry successful! Got content: {len(retry_content)} chars, tool_calls: {len(retry_tool_calls)}")
+                            response_text = retry_content
+                            tool_calls = retry_tool_calls
+                            resp_data = retry_data  # Update resp_data for logging
+                        else:
+                            logger.warning("[TOOL CALLING] Retry also returned empty - this is a deeper issue")
                 except Exception as retry_e:
                     logger.error(f"[TOOL CALLING] Retry failed: {retry_e}")
             
@@ -2118,7 +2691,9 @@ class LLMManager:
             
             return {
                 "response": response_text,
-                "tool_calls": tool_calls
+                "tool_calls": tool_calls,
+                "prompt_cache": prompt_cache,
+                "prompt_budget": request["prompt_budget"]
             }
         except ValueError as e:
             # Validation errors - return clear error message
@@ -2132,6 +2707,229 @@ class LLMManager:
             # Don't crash the server - raise a runtime error with clear message
             raise RuntimeError(f"Generation failed: {str(e)}") from e
     
+    async def stream_response(
+        self,
+        message: str,
+        history: List[Dict[str, Any]],
+        context: Optional[Dict[str, Any]] = None,
+        tool_results: Optional[List[Dict[str, Any]]] = None,
+        allow_tools: bool = True,
+        priority: Priority = Priority.INTERACTIVE,
+        client_id: Optional[str] = None,
+        tool_names: Optional[List[str]] = None,
+        summary: Optional[str] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Stream a response from the OpenAI-compatible server.
+        
+        Content deltas are yielded as soon as the server sends them. Tool call
+        deltas are accumulated by index and returned with the final event.
+        
+        Args:
+            message: Current user message
+            history: Conversation history (list of dicts with 'role' and 'content')
+            context: Retrieved context from memory
+            tool_results: Tool call results from previous tool executions
+            allow_tools: Whether tools may be sent with this request
+            priority: Scheduling priority of the request
+            client_id: Client the per-client concurrency limit applies to (e.g. conversation ID)
+            tool_names: Only send these tools (None = all tools)
+            summary: Summary of the conversation before `history`, if older turns were summarised
+            
+        Yields:
+            {"type": "content", "content": str} for each content delta, then
+            {"type": "done", "response": str, "tool_calls": list, "finish_reason": str,
+            "prompt_cache": dict, "prompt_budget": PromptBudget}
+        """
+        if not self.is_model_loaded():
+            raise RuntimeError("No model loaded. Please load a model first.")
+        
+        self._validate_sampler_settings()
+        
+        if not await self.server_manager.health_check():
+            raise RuntimeError("LLM server is not responding. Please reload the model.")
+        
+        server_url = self.server_manager.get_server_url()
+        request = await self._prepare_request(
+            message, history, context, tool_results, stream=True, allow_tools=allow_tools, tool_names=tool_names,
+            summary=summary
+        )
+        openai_tools = request["tools"]
+        payload = request["payload"]
+        payload["stream"] = True
+        
+        from .debug_logger import log_llm_request, log_llm_response, log_llm_error
+        debug_log = log_llm_request(
+            payload=payload,
+            metadata={
+                "chat_format": getattr(self, 'current_chat_format', None),
+                "model_name": request["model_name"],
+                "supports_tool_calling": self.supports_tool_calling,
+                "server_url": server_url,
+                "tool_count": len(openai_tools) if openai_tools else 0,
+                "stream": True
+            }
+        )
+        request_start = time.time()
+        
+        content_parts: List[str] = []
+        tool_call_deltas: Dict[int, Dict[str, Any]] = {}
+        finish_reason = None
+        usage = None
+        timings = None
+        first_token_at = None
+        delta_count = 0
+        self.server_manager.pop_prefix_match()  # Drop any stale cache report from an earlier request
+        
+        try:
+            async for chunk in self._iter_stream_chunks(server_url, payload, priority, client_id):
+                usage = chunk.get("usage") or usage
+                timings = chunk.get("timings") or timings
+                choice = chunk["choices"][0]
+                delta = choice.get("delta") or {}
+                if delta.get("content") or delta.get("tool_calls"):
+                    delta_count += 1
+                    if first_token_at is None:
+                        first_token_at = time.time()
+                        get_metrics().observe("chat_time_to_first_token_seconds", first_token_at - request_start)
+                if delta.get("content"):
+                    content_parts.append(delta["content"])
+                    yield {"type": "content", "content": delta["content"]}
+                if delta.get("tool_calls"):
+                    self._merge_tool_call_deltas(tool_call_deltas, delta["tool_calls"])
+                if choice.get("finish_reason"):
+                    finish_reason = choice["finish_reason"]
+            
+            # Same fallback as generate_response: an empty reply with tools attached
+            # is retried without tools so normal chat still works
+            if not content_parts and not tool_call_deltas and openai_tools:
+                logger.warning("[TOOL CALLING] Got empty streamed response with tools and no tool calls - retrying without tools")
+                payload_retry = {k: v for k, v in payload.items() if k not in ("tools", "tool_choice")}
+                async for chunk in self._iter_stream_chunks(server_url, payload_retry, priority, client_id):
+                    choice = chunk["choices"][0]
+                    delta = choice.get("delta") or {}
+                    if delta.get("content"):
+                        content_parts.append(delta["content"])
+                        yield {"type": "content", "content": delta["content"]}
+                    if choice.get("finish_reason"):
+                        finish_reason = choice["finish_reason"]
+        except httpx.HTTPStatusError as e:
+            error_detail = f"HTTP {e.response.status_code}"
+            logger.error(f"[STREAM] HTTP error: {error_detail}")
+            log_llm_error(log_entry=debug_log, error=error_detail, duration_ms=(time.time() - request_start) * 1000)
+            raise Exception(f"Generation failed: {error_detail}") from e
+        except Exception as e:
+            error_msg = f"{type(e).__name__}: {str(e)}"
+            logger.error(f"[STREAM] Exception: {error_msg}")
+            log_llm_error(log_entry=debug_log, error=error_msg, duration_ms=(time.time() - request_start) * 1000)
+            raise
+        
+        response_text = "".join(content_parts)
+        prompt_cache = self._record_prompt_cache_stats(usage, timings)
+        request_end = time.time()
+        # Each streamed delta is roughly one token when the server doesn't report usage
+        self._record_generation_metrics(
+            request_end - request_start,
+            request_end - (first_token_at or request_start),
+            usage,
+            timings,
+            fallback_tokens=delta_count
+        )
+        tool_calls = self._parse_tool_calls_standard({
+            "tool_calls": [tool_call_deltas[i] for i in sorted(tool_call_deltas)]
+        })
+        
+        log_llm_response(
+            log_entry=debug_log,
+            response={"choices": [{"message": {"content": response_text, "tool_calls": tool_calls or None}, "finish_reason": finish_reason}]},
+            duration_ms=(time.time() - request_start) * 1000,
+            tool_calls=tool_calls if tool_calls else None
+        )
+        logger.info(f"[STREAM] Response streamed: {len(response_text)} characters, {len(tool_calls)} tool call(s), finish_reason={finish_reason}")
+        
+        yield {
+            "type": "done",
+            "response": response_text,
+            "tool_calls": tool_calls,
+            "finish_reason": finish_reason,
+            "prompt_cache": prompt_cache,
+            "prompt_budget": request["prompt_budget"]
+        }
+    
+    async def _iter_stream_chunks(
+        self,
+        server_url: str,
+        payload: Dict[str, Any],
+        priority: Priority = Priority.INTERACTIVE,
+        client_id: Optional[str] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Yield parsed chunks from a streamed /v1/chat/completions request.
+        
+        The scheduler slot is held until the stream ends or the consumer stops
+        iterating (e.g. the client disconnected).
+        
+        Args:
+            server_url: LLM server URL
+            payload: Request payload (must have stream=True)
+            priority: Scheduling priority of the request
+            client_id: Client the per-client concurrency limit applies to
+            
+        Yields:
+            Chunk dicts that contain at least one choice
+        """
+        client = self.server_manager.get_client()
+        async with self.server_manager.scheduler.slot(priority, client_id):
+            async with client.stream(
+                "POST",
+                f"{server_url}/v1/chat/completions",
+                json=payload,
+                timeout=httpx.Timeout(300.0, connect=5.0)
+            ) as response:
+                response.raise_for_status()
+                async for line in response.aiter_lines():
+                    if not line.startswith("data: "):
+                        continue
+                    data_str = line[6:].strip()
+                    if data_str == "[DONE]":
+                        break
+                    try:
+                        chunk = json.loads(data_str)
+                    except json.JSONDecodeError:
+                        continue
+                    if chunk.get("choices"):
+                        yield chunk
+    
+    @staticmethod
+    def _merge_tool_call_deltas(accumulated: Dict[int, Dict[str, Any]], deltas: List[Dict[str, Any]]) -> None:
+        """Merge streamed tool_calls deltas into complete tool calls.
+        
+        OpenAI-style streams send the id and function name once per call and the
+        arguments as string fragments, keyed by the call's index.
+        
+        Args:
+            accumulated: Tool calls built so far, keyed by index (updated in place)
+            deltas: tool_calls list from one stream chunk's delta
+        """
+        for delta in deltas:
+            index = delta.get("index", len(accumulated))
+            entry = accumulated.setdefault(index, {
+                "id": None,
+                "type": "function",
+                "function": {"name": "", "arguments": ""}
+            })
+            if delta.get("id"):
+                entry["id"] = delta["id"]
+            if delta.get("type"):
+                entry["type"] = delta["type"]
+            function = delta.get("function") or {}
+            if function.get("name") and not entry["function"]["name"]:
+                entry["function"]["name"] = function["name"]
+            if function.get("arguments"):
+                entry["function"]["arguments"] += function["arguments"]
+        
+        for index, entry in accumulated.items():
+            if not entry["id"]:
+                entry["id"] = f"call_{index}_{int(time.time())}"
+    
     def _validate_history(self, history: List[Dict[str, Any]]) -> None:
         """Validate conversation history format.
         
@@ -200,6 +200,59 @@ class MemoryCalculator:
             }
         }
     
+    def estimate_gguf_memory(
+        self,
+        file_size_bytes: int,
+        model_params: Dict[str, Any],
+        context_length: int = 2048
+    ) -> float:
+        """
+        Estimate the resident memory of a GGUF model served with a given context.
+        
+        The file size is used for the weights (it already reflects the
+        quantization); KV cache, activations and overhead come from
+        estimate_total_memory.
+        
+        Args:
+            file_size_bytes: Size of the GGUF file
+            model_params: Same shape as for estimate_total_memory
+            context_length: Context window size
+            
+        Returns:
+            Estimated total in GB
+        """
+        estimate = self.estimate_total_memory(model_params, context_length=context_length)
+        weights_gb = file_size_bytes / (1024 ** 3)
+        return round(estimate["total_gb"] - estimate["model_size_gb"] + weights_gb, 2)
+    
+    def detect_memory_budget(self, fraction: float = 0.8) -> Dict[str, float]:
+        """
+        Detect how much RAM and VRAM resident models may use.
+        
+        Args:
+            fraction: Share of total memory available to models
+            
+        Returns:
+            Dict with "ram_gb" and "vram_gb" (0 when no GPU is detected)
+        """
+        budget = {"ram_gb": 0.0, "vram_gb": 0.0}
+        try:
+            import psutil
+            budget["ram_gb"] = round(psutil.virtual_memory().total / (1024 ** 3) * fraction, 2)
+        except Exception as e:
+            logger.debug(f"Could not detect system RAM: {e}")
+        try:
+            import torch
+            if torch.cuda.is_available():
+                total_vram = sum(
+                    torch.cuda.get_device_properties(i).total_memory
+                    for i in range(torch.cuda.device_count())
+                )
+                budget["vram_gb"] = round(total_vram / (1024 ** 3) * fraction, 2)
+        except Exception as e:
+            logger.debug(f"Could not detect VRAM: {e}")
+        return budget
+    
     def get_recommended_vram(self, total_gb: float) -> int:
         """
         Get recommended VRAM based on estimated usage.
@@ -11,6 +11,39 @@ from huggingface_hub import HfApi, hf_hub_download
 logger = logging.getLogger(__name__)
 
 
+def model_directories(models_dir: Path) -> List[Path]:
+    """Directories downloaded models are looked for in.
+    
+    Args:
+        models_dir: Base directory for models
+        
+    Returns:
+        The models directory, plus the legacy data/models directory if it is a different one
+    """
+    directories = [models_dir]
+    base_dir = models_dir.parent.parent.parent if models_dir.parent.parent.parent.exists() else None
+    legacy_models_dir = base_dir / "data" / "models" if base_dir else None
+    if legacy_models_dir and legacy_models_dir != models_dir:
+        directories.append(legacy_models_dir)
+    return directories
+
+
+def is_listed_model_file(path: Path) -> bool:
+    """Check whether a GGUF file is one the model list should show.
+    
+    Filters out ARM-specific quantizations on non-ARM systems
+    (Q4_0_4_4, Q4_0_4_8, Q4_0_8_8 are ARM NEON/i8mm/SVE optimizations).
+    """
+    if path.suffix.lower() != ".gguf":
+        return False
+    import platform
+    machine = platform.machine().lower()
+    if machine in ('arm64', 'aarch64', 'armv8', 'armv7l'):
+        return True
+    arm_quant_patterns = ['q4_0_4_4', 'q4_0_4_8', 'q4_0_8_8']
+    return not any(pattern in path.name.lower() for pattern in arm_quant_patterns)
+
+
 def list_downloaded_models(models_dir: Path) -> List[Path]:
     """List all downloaded GGUF models.
     
@@ -28,37 +61,19 @@ def list_downloaded_models(models_dir: Path) -> List[Path]:
         List of paths to downloaded model files
     """
     gguf_files = []
-    
-    # Scan primary location: services/data/models/
-    if models_dir.exists():
-        gguf_files.extend(models_dir.glob("**/*.gguf"))
-    
-    # Scan legacy location: data/models/ (if different from primary)
-    base_dir = models_dir.parent.parent.parent if models_dir.parent.parent.parent.exists() else None
-    legacy_models_dir = base_dir / "data" / "models" if base_dir else None
-    if legacy_models_dir and legacy_models_dir.exists() and legacy_models_dir != models_dir:
-        gguf_files.extend(legacy_models_dir.glob("**/*.gguf"))
+    for directory in model_directories(models_dir):
+        if directory.exists():
+            gguf_files.extend(directory.glob("**/*.gguf"))
     
     # Remove duplicates
     gguf_files = list(set(gguf_files))
     
-    # Filter out ARM-specific quantizations on non-ARM systems
-    # Q4_0_4_4, Q4_0_4_8, Q4_0_8_8 are ARM NEON/i8mm/SVE optimizations
-    import platform
-    machine = platform.machine().lower()
-    is_arm = machine in ('arm64', 'aarch64', 'armv8', 'armv7l')
-    
-    if not is_arm:
-        arm_quant_patterns = ['q4_0_4_4', 'q4_0_4_8', 'q4_0_8_8']
-        original_count = len(gguf_files)
-        gguf_files = [
-            f for f in gguf_files 
-            if not any(pattern in f.name.lower() for pattern in arm_quant_patterns)
-        ]
-        filtered_count = original_count - len(gguf_files)
-        if filtered_count > 0:
-            logger.debug("Filtered out %d ARM-specific quantizations from downloaded models list", 
-                       filtered_count)
+    original_count = len(gguf_files)
+    gguf_files = [f for f in gguf_files if is_listed_model_file(f)]
+    filtered_count = original_count - len(gguf_files)
+    if filtered_count > 0:
+        logger.debug("Filtered out %d ARM-specific quantizations from downloaded models list", 
+                   filtered_count)
     
     return gguf_files
 
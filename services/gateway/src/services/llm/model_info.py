@@ -15,12 +15,7 @@ import json
 import logging
 import time
 
-try:
-    import numpy as np
-    HAS_NUMPY = True
-except ImportError:
-    HAS_NUMPY = False
-    np = None
+from .gguf_header import GGUFFormatError, gguf_metadata_cache
 
 logger = logging.getLogger(__name__)
 
@@ -223,245 +218,71 @@ class ModelInfoExtractor:
             return None
     
     def _extract_gguf_metadata(self, model_path: Path) -> Dict[str, Any]:
-        """Extract metadata directly from GGUF file."""
+        """Extract metadata from the GGUF header (cached on disk by path, size and mtime)."""
         try:
-            import gguf
-            try:
-                reader = gguf.GGUFReader(str(model_path))
-            except (ValueError, TypeError, AttributeError) as reader_error:
-                # Handle unknown quantization types or other GGUF format issues
-                error_msg = str(reader_error)
-                if "GGMLQuantizationType" in error_msg or "quantization" in error_msg.lower():
-                    logger.warning(f"GGUF file has unknown quantization type, attempting to read with error tolerance: {error_msg}")
-                    # Try to read anyway - some fields might still be accessible
-                    try:
-                        reader = gguf.GGUFReader(str(model_path))
-                    except Exception:
-                        logger.error(f"Cannot read GGUF file due to format issue: {error_msg}")
-                        return {}
-                else:
-                    raise
-            
-            # Extract key info
-            info = {}
-            
-            # Architecture
-            arch = "Unknown"
-            if "general.architecture" in reader.fields:
-                arch_key = reader.fields["general.architecture"].parts[-1].tobytes().decode("utf-8")
-                arch = self.ARCH_NAMES.get(arch_key, arch_key.capitalize())
-            info["architecture"] = arch
-            
-            # Context length
-            ctx_len = 2048
-            for key in ["llama.context_length", f"{arch_key}.context_length"]:
-                if key in reader.fields:
-                    ctx_len = int(reader.fields[key].parts[-1][0])
-                    break
-            info["context_length"] = ctx_len
-            
-            # Parameters (rough estimate from file size if not in metadata)
-            # Some GGUFs have parameter count metadata
-            if "general.parameter_count" in reader.fields:
-                param_count = int(reader.fields["general.parameter_count"].parts[-1][0])
-                info["num_parameters"] = param_count
-                # Convert to readable string (e.g. 7B)
-                if param_count > 1e9:
-                    info["parameters"] = f"{param_count / 1e9:.1f}B"
-                else:
-                    info["parameters"] = f"{param_count / 1e6:.1f}M"
-            
-            # MoE Info - Enhanced detection from GGUF
-            moe_info = {"is_moe": False}
-            
-            # Try multiple possible keys for expert count (different architectures use different keys)
-            expert_count = None
-            expert_count_keys = [
-                f"{arch_key}.expert_count",  # Most common
-                f"{arch_key}.num_experts",   # Alternative naming
-                "llama.expert_count",        # Fallback for llama-based MoE
-                "llama.num_experts",         # Fallback alternative
-                "general.expert_count",      # Some models use general prefix
-            ]
-            
-            for key in expert_count_keys:
-                if key in reader.fields:
-                    try:
-                        expert_count = int(reader.fields[key].parts[-1][0])
-                        if expert_count > 1:
-                            logger.debug(f"Found expert count {expert_count} from key: {key}")
-                            break
-                    except (ValueError, IndexError, KeyError, TypeError):
-                        continue
-            
-            # If not found, try searching all fields for expert-related keys
-            if not expert_count:
-                logger.debug(f"Expert count not found in standard keys, searching all GGUF fields...")
-                for field_name in reader.fields.keys():
-                    if "expert" in field_name.lower() and ("count" in field_name.lower() or "num" in field_name.lower()):
-                        try:
-                            field_value = reader.fields[field_name]
-                            # Try to extract integer value
-                            if hasattr(field_value, 'parts') and field_value.parts:
-                                value = field_value.parts[-1]
-                                if isinstance(value, (list, tuple)) and len(value) > 0:
-                                    expert_count = int(value[0])
-                                elif isinstance(value, (int, float)):
-                                    expert_count = int(value)
-                                if expert_count and expert_count > 1:
-                                    logger.debug(f"Found expert count {expert_count} from field: {field_name}")
-                                    break
-                        except (ValueError, IndexError, KeyError, TypeError, AttributeError) as e:
-                            logger.debug(f"Error extracting expert count from field {field_name}: {e}")
-                            continue
-            
-            if expert_count and expert_count > 1:
-                moe_info = {
-                    "is_moe": True,
-                    "num_experts": expert_count,
-                    "experts_per_token": 2  # Default, hard to extract sometimes
-                }
-                # Try to find experts used count (multiple possible keys)
-                experts_per_token_keys = [
-                    f"{arch_key}.expert_used_count",
-                    f"{arch_key}.num_experts_to_use",
-                    "llama.expert_used_count",
-                    "llama.num_experts_to_use",
-                ]
-                for used_key in experts_per_token_keys:
-                    if used_key in reader.fields:
-                        try:
-                            moe_info["experts_per_token"] = int(reader.fields[used_key].parts[-1][0])
-                            break
-                        except (ValueError, IndexError, KeyError):
-                            continue
-            else:
-                # Fallback: check architecture name for MoE models
-                if "mixtral" in arch_key.lower():
-                    moe_info = {
-                        "is_moe": True,
-                        "num_experts": 8,  # Default for Mixtral
-                        "experts_per_token": 2
-                    }
-                elif "moe" in arch_key.lower() or "mixture" in arch_key.lower():
-                    # Generic MoE model but couldn't extract count - mark as MoE but require manual entry
-                    moe_info = {
-                        "is_moe": True,
-                        "num_experts": None,  # Unknown - will require manual entry
-                        "experts_per_token": 2
-                    }
-            info["moe"] = moe_info
-            
-            # Layer count
-            layer_key = f"{arch_key}.block_count"
-            if layer_key in reader.fields:
-                info["num_layers"] = int(reader.fields[layer_key].parts[-1][0])
-                
-            # Hidden size
-            embd_key = f"{arch_key}.embedding_length"
-            if embd_key in reader.fields:
-                info["hidden_size"] = int(reader.fields[embd_key].parts[-1][0])
-            
-            # Extract chat template from GGUF metadata
-            # Try multiple possible keys for chat template
-            chat_template_keys = [
-                "tokenizer.chat_template",
-                "tokenizer.chat.template",
-                "general.chat_template",
-                "chat_template",
-            ]
-            
-            chat_template = None
-            for key in chat_template_keys:
-                if key in reader.fields:
-                    logger.debug(f"Found chat_template key: {key}")
-                    try:
-                        field_value = reader.fields[key]
-                        logger.debug(f"Field value type: {type(field_value)}")
-                        # Extract string value from GGUF field
-                        # GGUF fields can have different structures
-                        if hasattr(field_value, 'parts') and field_value.parts:
-                            # Get the last part (usually contains the actual data)
-                            last_part = field_value.parts[-1]
-                            logger.debug(f"Last part type: {type(last_part)}, hasattr numpy: {HAS_NUMPY}")
-                            if HAS_NUMPY:
-                                logger.debug(f"Is numpy array: {isinstance(last_part, np.ndarray)}")
-                                if isinstance(last_part, np.ndarray):
-                                    logger.debug(f"  dtype: {last_part.dtype}, shape: {last_part.shape}")
-                            
-                            # Handle different data types
-                            if isinstance(last_part, bytes):
-                                chat_template = last_part.decode("utf-8")
-                            elif isinstance(last_part, str):
-                                chat_template = last_part
-                            else:
-                                # Try to handle numpy arrays, memmaps, lists, tuples
-                                try:
-                                    if HAS_NUMPY:
-                                        # Check if it's a numpy array (including memmap)
-                                        # memmap is a subclass of ndarray, so this should work
-                                        if isinstance(last_part, np.ndarray):
-                                            logger.debug(f"Found numpy array for {key}: dtype={last_part.dtype}, shape={last_part.shape}")
-                                            # Convert numpy array to bytes
-                                            if last_part.dtype == np.uint8:
-                                                chat_template = bytes(last_part).decode("utf-8")
-                                            else:
-                                                # Convert to uint8 first
-                                                chat_template = bytes(last_part.astype(np.uint8)).decode("utf-8")
-                                        elif isinstance(last_part, (list, tuple)) and len(last_part) > 0:
-                                            # List/tuple of bytes or ints
-                                            if isinstance(last_part[0], bytes):
-                                                chat_template = b''.join(last_part).decode("utf-8")
-                                            elif isinstance(last_part[0], (int, np.integer)):
-                                                chat_template = bytes(last_part).decode("utf-8")
-                                            else:
-                                                # Try to decode as bytes anyway
-                                                chat_template = bytes(last_part).decode("utf-8")
-                                    else:
-                                        # No numpy - try to handle as list/tuple
-                                        if isinstance(last_part, (list, tuple)) and len(last_part) > 0:
-                                            if isinstance(last_part[0], bytes):
-                                                chat_template = b''.join(last_part).decode("utf-8")
-                                            elif isinstance(last_part[0], int):
-                                                chat_template = bytes(last_part).decode("utf-8")
-                                            else:
-                                                chat_template = ''.join(str(x) for x in last_part)
-                                except (ValueError, UnicodeDecodeError, TypeError, AttributeError) as e:
-                                    logger.debug(f"Error decoding array field {key}: {e}")
-                                    # Try alternative: convert to string
-                                    try:
-                                        chat_template = ''.join(str(x) for x in last_part) if hasattr(last_part, '__iter__') else str(last_part)
-                                    except:
-                                        pass
-                            
-                            if chat_template:
-                                logger.debug(f"Extracted chat template from GGUF key: {key} (length: {len(chat_template)})")
-                                break
-                    except (ValueError, IndexError, KeyError, TypeError, AttributeError, UnicodeDecodeError) as e:
-                        logger.debug(f"Error extracting chat template from key {key}: {e}")
-                        continue
-            
-            if chat_template:
-                info["chat_template"] = chat_template
-                
-            return info
-            
-        except ImportError:
-            logger.warning("gguf library not installed, skipping GGUF metadata extraction")
-            return {}
-        except (ValueError, TypeError, AttributeError, KeyError) as e:
-            # Handle specific GGUF format errors gracefully
-            error_msg = str(e)
-            if "GGMLQuantizationType" in error_msg or "quantization" in error_msg.lower():
-                logger.warning(f"GGUF file has unsupported quantization type, will use fallback methods: {error_msg}")
-            else:
-                logger.warning(f"Error reading some GGUF metadata fields (will use fallbacks): {error_msg}")
-            # Return empty dict - fallback methods (config.json, name parsing) will be used
+            header = gguf_metadata_cache.get(model_path)
+        except (GGUFFormatError, OSError) as e:
+            logger.warning(f"Error reading GGUF header of {model_path.name} (will use fallbacks): {e}")
             return {}
         except Exception as e:
             logger.error(f"Unexpected error reading GGUF metadata: {e}")
             # Still return empty dict so fallback methods can be used
             return {}
+        
+        info = {}
+        
+        # Architecture
+        arch_key = header.get("arch_key") or ""
+        info["architecture"] = self.ARCH_NAMES.get(arch_key, arch_key.capitalize()) if arch_key else "Unknown"
+        info["context_length"] = header.get("context_length") or 2048
+        
+        # Parameters (general.parameter_count, else summed over the tensor shapes)
+        param_count = header.get("parameter_count")
+        if param_count:
+            info["num_parameters"] = param_count
+            # Convert to readable string (e.g. 7B)
+            if param_count > 1e9:
+                info["parameters"] = f"{param_count / 1e9:.1f}B"
+            else:
+                info["parameters"] = f"{param_count / 1e6:.1f}M"
+        
+        # MoE Info
+        moe_info = {"is_moe": False}
+        expert_count = header.get("expert_count")
+        if expert_count and expert_count > 1:
+            moe_info = {
+                "is_moe": True,
+                "num_experts": expert_count,
+                "experts_per_token": header.get("expert_used_count") or 2  # Default, hard to extract sometimes
+            }
+        elif "mixtral" in arch_key.lower():
+            moe_info = {
+                "is_moe": True,
+                "num_experts": 8,  # Default for Mixtral
+                "experts_per_token": 2
+            }
+        elif "moe" in arch_key.lower() or "mixture" in arch_key.lower():
+            # Generic MoE model but couldn't extract count - mark as MoE but require manual entry
+            moe_info = {
+                "is_moe": True,
+                "num_experts": None,  # Unknown - will require manual entry
+                "experts_per_token": 2
+            }
+        info["moe"] = moe_info
+        
+        if header.get("num_layers"):
+            info["num_layers"] = header["num_layers"]
+        if header.get("hidden_size"):
+            info["hidden_size"] = header["hidden_size"]
+        if header.get("chat_template"):
+            info["chat_template"] = header["chat_template"]
+        
+        # Quantisation actually used by the weight tensors
+        if header.get("quantization"):
+            info["quantization"] = header["quantization"]
+            info["quantization_types"] = header.get("quantization_types") or {}
+        
+        return info
 
     def extract_info(self, model_name: str, use_cache: bool = True) -> Dict[str, Any]:
         """
@@ -576,8 +397,8 @@ class ModelInfoExtractor:
                 # Rough estimate: 12 × layers × hidden_size²
                 num_parameters = 12 * num_layers * (hidden_size ** 2)
         
-        # Detect quantization from name
-        quantization = self._detect_quantization(model_name)
+        # Detect quantization from name (more specific, e.g. Q4_K_M), else from the GGUF tensor types
+        quantization = self._detect_quantization(model_name) or gguf_info.get("quantization")
         
         # Get file size if it's a file
         file_size_gb = None
@@ -650,6 +471,7 @@ class ModelInfoExtractor:
             "num_layers": num_layers,
             "hidden_size": hidden_size,
             "quantization": quantization,
+            "quantization_types": gguf_info.get("quantization_types"),  # GGUF tensors per ggml type
             "file_size_gb": round(file_size_gb, 2) if file_size_gb else None,
             "context": {
                 "max_length": context_length,
@@ -0,0 +1,227 @@
+"""Pool of resident models, each served by its own llama server process."""
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+import logging
+import time
+
+from .memory_calculator import memory_calculator
+from .server_manager import LLMServerManager
+from .token_budget import TokenCounter
+from ...config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PooledModel:
+    """A model resident in its own server process."""
+    model_path: str
+    server: LLMServerManager
+    memory_gb: float
+    device: str  # "gpu" or "cpu": which budget the model counts against
+    load_options: Dict[str, Any] = field(default_factory=dict)
+    supports_tool_calling: bool = False
+    suggested_chat_format: Optional[str] = None
+    chat_format: Optional[str] = None
+    loaded_at: float = field(default_factory=time.time)
+    last_used: float = field(default_factory=time.time)
+    token_counter: Optional[TokenCounter] = None  # Created on first use
+    
+    @property
+    def model_name(self) -> str:
+        return Path(self.model_path).name
+    
+    def matches(self, model: str) -> bool:
+        """Check whether a model path, file name or server model ID refers to this model."""
+        return model in (self.model_path, self.model_name, self.server.get_model_id())
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to dictionary for JSON serialization."""
+        return {
+            "model_path": self.model_path,
+            "model_name": self.model_name,
+            "server_url": self.server.get_server_url(),
+            "running": self.server.is_running(),
+            "memory_gb": self.memory_gb,
+            "device": self.device,
+            "supports_tool_calling": self.supports_tool_calling,
+            "chat_format": self.chat_format,
+            "speculative": self.server.get_speculative_config(),
+            "loaded_at": self.loaded_at,
+            "last_used": self.last_used
+        }
+
+
+class ModelPool:
+    """Resident models admitted against RAM/VRAM budgets, evicted least recently used first.
+    
+    The pool only does bookkeeping: it decides which models have to go for a
+    new one to fit and hands out server managers on free ports. Starting and
+    stopping servers is left to LLMManager, which owns the load sequence.
+    """
+    
+    def __init__(
+        self,
+        max_models: Optional[int] = None,
+        ram_budget_gb: Optional[float] = None,
+        vram_budget_gb: Optional[float] = None
+    ):
+        """Initialize the pool.
+        
+        Args:
+            max_models: Most models kept resident (default: settings.llm_pool_max_models)
+            ram_budget_gb: RAM for CPU models (default: setting, or detected when 0)
+            vram_budget_gb: VRAM for GPU models (default: setting, or detected when 0)
+        """
+        self.max_models = max(1, max_models if max_models is not None else settings.llm_pool_max_models)
+        ram_budget_gb = ram_budget_gb if ram_budget_gb is not None else settings.llm_pool_ram_budget_gb
+        vram_budget_gb = vram_budget_gb if vram_budget_gb is not None else settings.llm_pool_vram_budget_gb
+        if not ram_budget_gb or not vram_budget_gb:
+            detected = memory_calculator.detect_memory_budget()
+            ram_budget_gb = ram_budget_gb or detected["ram_gb"]
+            vram_budget_gb = vram_budget_gb or detected["vram_gb"]
+        self.budgets = {"cpu": ram_budget_gb, "gpu": vram_budget_gb}
+        self._entries: "OrderedDict[str, PooledModel]" = OrderedDict()  # Least recently used first
+        self.evictions = 0
+    
+    @staticmethod
+    def key(model_path: str) -> str:
+        """Normalise a model path into a pool key."""
+        return str(Path(model_path).resolve())
+    
+    def get(self, model_path: str) -> Optional[PooledModel]:
+        """Get the resident entry for a model path, or None."""
+        return self._entries.get(self.key(model_path))
+    
+    def find(self, model: str) -> Optional[PooledModel]:
+        """Find a resident model by path, file name or server model ID."""
+        entry = self._entries.get(self.key(model)) if model else None
+        if entry is not None:
+            return entry
+        for entry in self._entries.values():
+            if entry.matches(model):
+                return entry
+        return None
+    
+    def touch(self, entry: PooledModel):
+        """Mark a model as most recently used."""
+        entry.last_used = time.time()
+        self._entries.move_to_end(self.key(entry.model_path))
+    
+    def add(self, entry: PooledModel):
+        """Add a started model as most recently used."""
+        self._entries[self.key(entry.model_path)] = entry
+        self.touch(entry)
+    
+    def remove(self, model_path: str) -> Optional[PooledModel]:
+        """Remove a model from the pool (the caller stops its server)."""
+        return self._entries.pop(self.key(model_path), None)
+    
+    def entries(self) -> List[PooledModel]:
+        """Resident models, least recently used first."""
+        return list(self._entries.values())
+    
+    def used_gb(self, device: str) -> float:
+        """Memory used by resident models on a device."""
+        return sum(entry.memory_gb for entry in self._entries.values() if entry.device == device)
+    
+    def select_victims(self, memory_gb: float, device: str) -> List[PooledModel]:
+        """Choose least recently used models to evict so a new model fits.
+        
+        Args:
+            memory_gb: Estimated memory of the model to admit
+            device: Budget the new model counts against
+        
+        Returns:
+            Entries to evict, least recently used first. If the model is larger
+            than the whole budget, every model on that device is returned and
+            the load is attempted anyway.
+        """
+        budget = self.budgets.get(device) or 0.0
+        candidates = list(self._entries.values())
+        count = len(candidates)
+        used = sum(entry.memory_gb for entry in candidates if entry.device == device)
+        
+        victims = []
+        for entry in candidates:
+            over_count = count >= self.max_models
+            over_budget = budget > 0 and used + memory_gb > budget
+            if not over_count and not over_budget:
+                break
+            if over_count or entry.device == device:
+                victims.append(entry)
+                count -= 1
+                if entry.device == device:
+                    used -= entry.memory_gb
+        
+        if budget > 0 and memory_gb > budget:
+            logger.warning(f"[MODEL POOL] Model needs ~{memory_gb:.1f}GB but the {device} budget is {budget:.1f}GB")
+        return victims
+    
+    def allocate_server(self) -> LLMServerManager:
+        """Create a server manager on a port no resident model uses.
+        
+        The first model gets the port of settings.llm_service_url so a single
+        resident model behaves exactly like before; others count up from
+        settings.llm_pool_base_port.
+        """
+        used_ports = {entry.server.server_port for entry in self._entries.values()}
+        primary = LLMServerManager()
+        if primary.server_port not in used_ports:
+            return primary
+        port = settings.llm_pool_base_port
+        while port in used_ports:
+            port += 1
+        return LLMServerManager(port=port)
+    
+    def estimate_memory(self, model_path: str, model_info: Dict[str, Any], n_ctx: int) -> float:
+        """Estimate the resident memory of a model with MemoryCalculator.
+        
+        Args:
+            model_path: GGUF file
+            model_info: Output of ModelInfoExtractor.extract_info
+            n_ctx: Context window the server will be started with
+        
+        Returns:
+            Estimated memory in GB
+        """
+        model_params = {
+            "num_parameters": model_info.get("num_parameters"),
+            "num_layers": model_info.get("num_layers"),
+            "hidden_size": model_info.get("hidden_size"),
+            "quantization": model_info.get("quantization"),
+            "model_name": model_info.get("name") or Path(model_path).name
+        }
+        try:
+            file_size = Path(model_path).stat().st_size
+        except OSError:
+            file_size = 0
+        return memory_calculator.estimate_gguf_memory(file_size, model_params, context_length=n_ctx)
+    
+    def device_for(self, n_gpu_layers: int) -> str:
+        """Budget a model counts against, given its GPU offload."""
+        return "gpu" if n_gpu_layers != 0 and self.budgets["gpu"] > 0 else "cpu"
+    
+    def terminate_all_sync(self):
+        """Terminate every resident server without an event loop (signal handlers)."""
+        for entry in self._entries.values():
+            try:
+                entry.server.terminate_sync(timeout=2)
+            except Exception as e:
+                logger.debug(f"[MODEL POOL] Error terminating {entry.model_name}: {e}")
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get pool statistics.
+        
+        Returns:
+            Dictionary with budgets, usage, eviction count and resident models
+        """
+        return {
+            "max_models": self.max_models,
+            "budgets_gb": dict(self.budgets),
+            "used_gb": {device: round(self.used_gb(device), 2) for device in self.budgets},
+            "evictions": self.evictions,
+            "models": [entry.to_dict() for entry in reversed(self._entries.values())]
+        }
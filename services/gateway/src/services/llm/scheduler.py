@@ -0,0 +1,211 @@
+"""Admission control for generation requests sent to a llama server."""
+from contextlib import asynccontextmanager
+from enum import IntEnum
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+import asyncio
+import itertools
+import logging
+import time
+
+from ...config.settings import settings
+from ..metrics import get_metrics
+
+logger = logging.getLogger(__name__)
+
+# How often a queued request checks whether its client is still connected
+_DISCONNECT_POLL_INTERVAL = 0.5
+
+
+class Priority(IntEnum):
+    """Request priority (lower runs first)."""
+    INTERACTIVE = 0  # The user's chat turn: pre-check, answer and tool follow-ups
+    NORMAL = 1  # OpenAI-compatible proxy clients
+    BACKGROUND = 2  # Verification, test calls and other work nobody is waiting on
+
+
+class ClientDisconnectedError(Exception):
+    """Raised when a queued request's client goes away before it got a slot."""
+
+
+class SlotLease:
+    """A granted scheduler slot. release() is idempotent."""
+    
+    def __init__(self, scheduler: "RequestScheduler", client_id: str):
+        self._scheduler = scheduler
+        self._client_id = client_id
+        self.released = False
+    
+    def release(self):
+        """Give the slot back to the scheduler."""
+        if not self.released:
+            self.released = True
+            self._scheduler._release(self._client_id)
+
+
+class _Waiter:
+    __slots__ = ("priority", "seq", "client_id", "future", "enqueued_at")
+    
+    def __init__(self, priority: Priority, seq: int, client_id: str):
+        self.priority = priority
+        self.seq = seq
+        self.client_id = client_id
+        self.future: asyncio.Future = asyncio.get_running_loop().create_future()
+        self.enqueued_at = time.perf_counter()
+
+
+class RequestScheduler:
+    """Priority queue in front of a llama server's decode slots.
+    
+    At most `slots` requests talk to the server at once and each client holds
+    at most `per_client_limit` of them. Waiting requests are granted in
+    priority order, FIFO within a priority; a request whose client is at its
+    limit is skipped so it doesn't hold up other clients. Cancelling a waiting
+    request (e.g. because its client disconnected) removes it from the queue.
+    """
+    
+    def __init__(self, name: str = "llm", slots: Optional[int] = None, per_client_limit: Optional[int] = None):
+        """Initialize the scheduler.
+        
+        Args:
+            name: Label for metrics (the server port)
+            slots: Concurrent requests (default: settings.llm_scheduler_slots)
+            per_client_limit: Concurrent requests per client, 0 = unlimited
+                (default: settings.llm_scheduler_per_client_limit)
+        """
+        self.name = name
+        self.slots = max(1, slots if slots is not None else settings.llm_scheduler_slots)
+        self.per_client_limit = per_client_limit if per_client_limit is not None else settings.llm_scheduler_per_client_limit
+        self._active = 0
+        self._active_by_client: Dict[str, int] = {}
+        self._waiters: List[_Waiter] = []
+        self._seq = itertools.count()
+        self._stats = {"granted": 0, "cancelled": 0, "disconnected": 0}
+    
+    @asynccontextmanager
+    async def slot(
+        self,
+        priority: Priority = Priority.INTERACTIVE,
+        client_id: Optional[str] = None,
+        is_disconnected: Optional[Callable[[], Awaitable[bool]]] = None
+    ) -> AsyncIterator[None]:
+        """Hold a server slot for the duration of the block.
+        
+        Args:
+            priority: Request priority
+            client_id: Client the per-client limit applies to (None = shared "anonymous")
+            is_disconnected: Async callable polled while queued, e.g. Request.is_disconnected
+        
+        Raises:
+            ClientDisconnectedError: If is_disconnected reports the client gone while queued
+        """
+        lease = await self.acquire(priority, client_id, is_disconnected)
+        try:
+            yield
+        finally:
+            lease.release()
+    
+    async def acquire(
+        self,
+        priority: Priority = Priority.INTERACTIVE,
+        client_id: Optional[str] = None,
+        is_disconnected: Optional[Callable[[], Awaitable[bool]]] = None
+    ) -> SlotLease:
+        """Wait for a server slot, for callers whose request outlives one block (e.g. proxied streams).
+        
+        Same arguments as slot(). The caller must release the returned lease.
+        """
+        client_id = client_id or "anonymous"
+        priority = Priority(priority)
+        waiter = _Waiter(priority, next(self._seq), client_id)
+        self._waiters.append(waiter)
+        self._dispatch()
+        try:
+            while not waiter.future.done():
+                if is_disconnected is None:
+                    await waiter.future
+                    break
+                try:
+                    await asyncio.wait_for(asyncio.shield(waiter.future), timeout=_DISCONNECT_POLL_INTERVAL)
+                except asyncio.TimeoutError:
+                    if await is_disconnected():
+                        self._stats["disconnected"] += 1
+                        raise ClientDisconnectedError(f"Client {client_id} disconnected while queued")
+        except BaseException:
+            if waiter.future.done() and not waiter.future.cancelled():
+                # Granted just as we gave up: hand the slot back
+                self._release(client_id)
+            else:
+                waiter.future.cancel()
+                self._remove_waiter(waiter)
+                self._stats["cancelled"] += 1
+                self._dispatch()
+            raise
+        
+        wait = time.perf_counter() - waiter.enqueued_at
+        get_metrics().observe("llm_queue_wait_seconds", wait, priority=priority.name.lower())
+        if wait > 1.0:
+            logger.debug(f"[SCHEDULER] {priority.name.lower()} request from {client_id} waited {wait:.2f}s for a slot")
+        return SlotLease(self, client_id)
+    
+    def _can_run(self, client_id: str) -> bool:
+        if self._active >= self.slots:
+            return False
+        return not self.per_client_limit or self._active_by_client.get(client_id, 0) < self.per_client_limit
+    
+    def _dispatch(self):
+        """Grant free slots to the highest-priority waiters that may run."""
+        if self._waiters and self._active < self.slots:
+            for waiter in sorted(self._waiters, key=lambda w: (w.priority, w.seq)):
+                if self._active >= self.slots:
+                    break
+                if waiter.future.done() or not self._can_run(waiter.client_id):
+                    continue
+                self._remove_waiter(waiter)
+                self._active += 1
+                self._active_by_client[waiter.client_id] = self._active_by_client.get(waiter.client_id, 0) + 1
+                self._stats["granted"] += 1
+                waiter.future.set_result(None)
+        self._update_gauges()
+    
+    def _release(self, client_id: str):
+        self._active -= 1
+        remaining = self._active_by_client.get(client_id, 0) - 1
+        if remaining > 0:
+            self._active_by_client[client_id] = remaining
+        else:
+            self._active_by_client.pop(client_id, None)
+        self._dispatch()
+    
+    def _remove_waiter(self, waiter: _Waiter):
+        try:
+            self._waiters.remove(waiter)
+        except ValueError:
+            pass
+    
+    def _queued_by_priority(self) -> Dict[str, int]:
+        queued = {priority.name.lower(): 0 for priority in Priority}
+        for waiter in self._waiters:
+            queued[waiter.priority.name.lower()] += 1
+        return queued
+    
+    def _update_gauges(self):
+        metrics = get_metrics()
+        for priority, depth in self._queued_by_priority().items():
+            metrics.set_gauge("llm_queue_depth", depth, server=self.name, priority=priority)
+        metrics.set_gauge("llm_active_requests", self._active, server=self.name)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get scheduler state.
+        
+        Returns:
+            Dictionary with slot usage, queue depth per priority, per-client
+            active counts and lifetime counters
+        """
+        return {
+            "slots": self.slots,
+            "per_client_limit": self.per_client_limit,
+            "active": self._active,
+            "queued": self._queued_by_priority(),
+            "active_by_client": dict(self._active_by_client),
+            **self._stats
+        }
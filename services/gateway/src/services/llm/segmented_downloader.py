@@ -0,0 +1,323 @@
+"""Multi-connection, resumable HTTP downloads of large model files."""
+from collections import deque
+from concurrent.futures import FIRST_EXCEPTION, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import Callable, Dict, Optional, Set, Tuple
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+
+import httpx
+
+from ...config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# Bump when the segment state layout changes so old state files are ignored
+_STATE_VERSION = 1
+_CHUNK_SIZE = 1 << 20
+_HASH_CHUNK_SIZE = 8 << 20
+# Attempts per segment before the download fails; a retry continues where the last one stopped
+_SEGMENT_ATTEMPTS = 5
+_PROGRESS_INTERVAL = 0.5
+# Progress samples the reported speed is averaged over
+_SPEED_WINDOW = 10
+
+
+class DownloadCancelled(Exception):
+    """The download was cancelled; completed segments are kept for a resume."""
+
+
+class DownloadIntegrityError(ValueError):
+    """The downloaded file doesn't match its expected size or SHA-256."""
+
+
+class SegmentedDownloader:
+    """Downloads one file over several HTTP Range connections.
+
+    The file is pre-allocated as `<name>.incomplete` and split into segments of
+    settings.model_download_segment_mb, which worker threads fetch in parallel
+    and write in place. Finished segments are recorded in `<name>.segments`, so
+    after a crash or cancel only unfinished segments are fetched again.
+
+    When a SHA-256 is given, a hashing thread follows the download, reading
+    back each segment as soon as it and all segments before it are complete
+    (while it is still in the page cache), so verification finishes shortly
+    after the last byte arrives. Servers without Range support get a single
+    connection and no resume.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        destination: Path,
+        expected_size: int = 0,
+        sha256: Optional[str] = None,
+        headers: Optional[Dict[str, str]] = None,
+        connections: Optional[int] = None,
+        segment_size: Optional[int] = None,
+        on_progress: Optional[Callable[[int, int, float], None]] = None,
+        is_cancelled: Optional[Callable[[], bool]] = None
+    ):
+        """Initialize the downloader.
+
+        Args:
+            url: URL of the file (redirects are followed)
+            destination: Final path of the file
+            expected_size: File size if known (0 = taken from the server)
+            sha256: Expected SHA-256 hex digest (None = not verified)
+            headers: Extra request headers (e.g. authorization)
+            connections: Parallel connections (default: settings.model_download_connections)
+            segment_size: Segment size in bytes (default: settings.model_download_segment_mb)
+            on_progress: Called with (bytes downloaded, total bytes, speed in bytes/s)
+            is_cancelled: Polled between chunks; returning True stops the download
+        """
+        self.url = url
+        self.destination = Path(destination)
+        self.expected_size = expected_size
+        self.sha256 = sha256.lower() if sha256 else None
+        self.headers = headers or {}
+        self.connections = max(1, connections or settings.model_download_connections)
+        self.segment_size = max(_CHUNK_SIZE, segment_size or settings.model_download_segment_mb * 1024 * 1024)
+        self.on_progress = on_progress
+        self.is_cancelled = is_cancelled or (lambda: False)
+        self.part_path = self.destination.with_name(self.destination.name + ".incomplete")
+        self.state_path = self.destination.with_name(self.destination.name + ".segments")
+
+        self._resolved_url = url
+        self._total = 0
+        self._ranged = True
+        self._done: Set[int] = set()
+        self._bytes = 0  # Bytes on disk: finished segments plus the progress of running ones
+        self._lock = threading.Lock()
+        self._segment_done = threading.Condition(self._lock)
+        self._stop = threading.Event()
+        self._digest: Optional[str] = None
+
+    @property
+    def segment_count(self) -> int:
+        return max(1, -(-self._total // self.segment_size)) if self._ranged else 1
+
+    def _segment_range(self, index: int) -> Tuple[int, int]:
+        """Byte range [start, end) of a segment."""
+        if not self._ranged:
+            return 0, self._total
+        start = index * self.segment_size
+        return start, min(self._total, start + self.segment_size)
+
+    def _probe(self, client: httpx.Client):
+        """Resolve redirects and find the size and Range support of the file."""
+        with client.stream("GET", self.url, headers={**self.headers, "Range": "bytes=0-0"}) as response:
+            response.raise_for_status()
+            self._resolved_url = str(response.url)
+            content_range = response.headers.get("Content-Range", "")
+            if response.status_code == 206 and "/" in content_range and not content_range.endswith("/*"):
+                self._ranged = True
+                self._total = int(content_range.rsplit("/", 1)[1])
+            else:
+                self._ranged = False
+                self._total = int(response.headers.get("Content-Length") or 0)
+        if self.expected_size and self._total and self._total != self.expected_size:
+            raise DownloadIntegrityError(f"Server reports {self._total} bytes for {self.destination.name}, expected {self.expected_size}")
+        self._total = self._total or self.expected_size
+        if not self._ranged:
+            logger.info(f"[DOWNLOAD] Server doesn't support range requests, downloading {self.destination.name} on one connection")
+
+    def _load_state(self):
+        """Pick up the segments finished by an earlier attempt, if it was for the same file."""
+        if not self._ranged or not self.part_path.exists() or not self.state_path.exists():
+            return
+        try:
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+            if (
+                state.get("version") == _STATE_VERSION
+                and state.get("size") == self._total
+                and state.get("segment_size") == self.segment_size
+                and state.get("sha256") == self.sha256
+                and self.part_path.stat().st_size == self._total
+            ):
+                self._done = {int(index) for index in state.get("done", [])}
+                self._bytes = sum(end - start for start, end in map(self._segment_range, self._done))
+                logger.info(f"[DOWNLOAD] Resuming {self.destination.name}: {len(self._done)}/{self.segment_count} segments "
+                            f"({self._bytes} bytes) already downloaded")
+        except Exception as e:
+            logger.warning(f"[DOWNLOAD] Ignoring unreadable segment state {self.state_path}: {e}")
+            self._done = set()
+
+    def _save_state(self):
+        """Record finished segments. Must be called with the lock held."""
+        if not self._ranged:
+            return
+        tmp_path = self.state_path.with_name(self.state_path.name + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "version": _STATE_VERSION,
+                "url": self.url,
+                "size": self._total,
+                "segment_size": self.segment_size,
+                "sha256": self.sha256,
+                "done": sorted(self._done)
+            }, f)
+        os.replace(tmp_path, self.state_path)
+
+    def _allocate(self):
+        """Create the partial file at full size, unless a resumable one exists."""
+        if self._done:
+            return
+        self.part_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.part_path, "wb") as f:
+            if self._ranged and self._total:
+                if hasattr(os, "posix_fallocate"):
+                    try:
+                        os.posix_fallocate(f.fileno(), 0, self._total)
+                    except OSError as e:
+                        logger.debug(f"[DOWNLOAD] posix_fallocate failed ({e}), using a sparse file")
+                f.truncate(self._total)
+        self.state_path.unlink(missing_ok=True)
+
+    def _fetch_segment(self, client: httpx.Client, index: int):
+        """Download one segment into its place in the partial file, retrying where it stopped."""
+        start, end = self._segment_range(index)
+        written = 0
+        for attempt in range(1, _SEGMENT_ATTEMPTS + 1):
+            headers = dict(self.headers)
+            if self._ranged:
+                headers["Range"] = f"bytes={start + written}-{end - 1}"
+            elif written:
+                # No ranges: start over
+                with self._lock:
+                    self._bytes -= written
+                written = 0
+            try:
+                with client.stream("GET", self._resolved_url, headers=headers) as response:
+                    if response.status_code in (401, 403) and self._resolved_url != self.url:
+                        # Signed redirect URLs expire; resolve again on the next attempt
+                        self._resolved_url = self.url
+                    response.raise_for_status()
+                    if self._ranged and response.status_code != 206:
+                        raise RuntimeError(f"Server ignored the range request for segment {index}")
+                    with open(self.part_path, "r+b") as f:
+                        f.seek(start + written)
+                        for chunk in response.iter_bytes(_CHUNK_SIZE):
+                            if self._stop.is_set() or self.is_cancelled():
+                                raise DownloadCancelled()
+                            chunk = chunk[:end - start - written] if self._ranged else chunk
+                            f.write(chunk)
+                            written += len(chunk)
+                            with self._lock:
+                                self._bytes += len(chunk)
+                if self._ranged and written < end - start:
+                    raise RuntimeError(f"Segment {index} ended after {written} of {end - start} bytes")
+                break
+            except DownloadCancelled:
+                raise
+            except Exception as e:
+                if attempt == _SEGMENT_ATTEMPTS or self._stop.is_set():
+                    raise
+                logger.warning(f"[DOWNLOAD] Segment {index} of {self.destination.name} failed "
+                               f"(attempt {attempt}/{_SEGMENT_ATTEMPTS}): {e}")
+                time.sleep(min(2 ** attempt, 30))
+
+        if not self._ranged:
+            self._total = written
+        with self._segment_done:
+            self._done.add(index)
+            self._save_state()
+            self._segment_done.notify_all()
+
+    def _hash_segments(self):
+        """SHA-256 the file in order, each segment once it and all before it are complete."""
+        hasher = hashlib.sha256()
+        with open(self.part_path, "rb") as f:
+            for index in range(self.segment_count):
+                with self._segment_done:
+                    while index not in self._done and not self._stop.is_set():
+                        self._segment_done.wait(1.0)
+                if self._stop.is_set():
+                    return
+                start, end = self._segment_range(index)
+                f.seek(start)
+                remaining = end - start if self._ranged else None
+                while remaining is None or remaining > 0:
+                    data = f.read(_HASH_CHUNK_SIZE if remaining is None else min(_HASH_CHUNK_SIZE, remaining))
+                    if not data:
+                        break
+                    hasher.update(data)
+                    if remaining is not None:
+                        remaining -= len(data)
+        self._digest = hasher.hexdigest()
+
+    def download(self) -> Path:
+        """Download the file (blocking).
+
+        Returns:
+            Path to the downloaded file
+
+        Raises:
+            DownloadCancelled: If is_cancelled() returned True (progress is kept)
+            DownloadIntegrityError: If size or SHA-256 don't match (the partial file is removed)
+            httpx.HTTPError: If the server keeps failing
+        """
+        limits = httpx.Limits(max_connections=self.connections + 1, max_keepalive_connections=self.connections + 1)
+        timeout = httpx.Timeout(30.0, read=60.0)
+        with httpx.Client(follow_redirects=True, limits=limits, timeout=timeout) as client:
+            self._probe(client)
+            self._load_state()
+            self._allocate()
+
+            pending = [index for index in range(self.segment_count) if index not in self._done]
+            workers = min(self.connections, len(pending)) if self._ranged else 1
+            logger.info(f"[DOWNLOAD] {self.destination.name}: {self._total} bytes, {len(pending)} segment(s) "
+                        f"to fetch over {max(workers, 1)} connection(s)")
+
+            with ThreadPoolExecutor(max_workers=max(workers, 1) + 1, thread_name_prefix="download") as pool:
+                hash_future = pool.submit(self._hash_segments) if self.sha256 else None
+                futures = {pool.submit(self._fetch_segment, client, index) for index in pending}
+                samples = deque([(time.monotonic(), self._bytes)], maxlen=_SPEED_WINDOW)
+                try:
+                    while futures:
+                        finished, futures = wait(futures, timeout=_PROGRESS_INTERVAL, return_when=FIRST_EXCEPTION)
+                        for future in finished:
+                            future.result()
+                        samples.append((time.monotonic(), self._bytes))
+                        self._report(samples)
+                except BaseException:
+                    self._stop.set()
+                    for future in futures:
+                        future.cancel()
+                    raise
+                if hash_future is not None:
+                    hash_future.result()
+
+        actual_size = self.part_path.stat().st_size
+        if self._total and actual_size != self._total:
+            self._discard()
+            raise DownloadIntegrityError(f"{self.destination.name} is {actual_size} bytes, expected {self._total}")
+        if self.sha256 and self._digest != self.sha256:
+            self._discard()
+            raise DownloadIntegrityError(f"SHA-256 of {self.destination.name} is {self._digest}, expected {self.sha256}")
+
+        os.replace(self.part_path, self.destination)
+        self.state_path.unlink(missing_ok=True)
+        logger.info(f"[DOWNLOAD] {self.destination.name} complete ({actual_size} bytes"
+                    f"{', SHA-256 verified' if self.sha256 else ''})")
+        return self.destination
+
+    def _report(self, samples: deque):
+        if self.on_progress is None:
+            return
+        (first_time, first_bytes), (last_time, last_bytes) = samples[0], samples[-1]
+        elapsed = last_time - first_time
+        speed = (last_bytes - first_bytes) / elapsed if elapsed > 0 else 0.0
+        try:
+            self.on_progress(last_bytes, self._total, speed)
+        except Exception as e:
+            logger.debug(f"[DOWNLOAD] Progress callback failed: {e}")
+
+    def _discard(self):
+        self.part_path.unlink(missing_ok=True)
+        self.state_path.unlink(missing_ok=True)
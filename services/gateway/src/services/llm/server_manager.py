@@ -4,35 +4,86 @@ import logging
 import subprocess
 import signal
 import os
+import re
 import sys
+from collections import deque
 from pathlib import Path
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, Deque, List, Set
+from urllib.parse import urlparse
 import httpx
 import time
 import threading
 
 from ...config.settings import settings
 from ...utils.request_logger import get_request_log_store
+from ..metrics import get_metrics
+from .scheduler import RequestScheduler
 
 logger = logging.getLogger(__name__)
 
+# llama-cpp-python logs this for every completion when the new prompt shares a prefix with the cached one
+_PREFIX_MATCH_RE = re.compile(r"(\d+) prefix-match hit, remaining (\d+) prompt tokens to eval")
+# llama.cpp timing summary, e.g.
+# "llama_print_timings: prompt eval time = 234.56 ms / 78 tokens ( 3.01 ms per token, 332.54 tokens per second)"
+_TIMING_RE = re.compile(
+    r"(prompt eval|eval) time\s*=\s*([\d.]+) ms /\s*(\d+) (?:tokens|runs)\s*\(\s*[\d.]+ ms per token,\s*([\d.]+) tokens per second\)"
+)
+_ERROR_RE = re.compile(r"error|failed|exception|traceback", re.IGNORECASE)
+_WARNING_RE = re.compile(r"warn", re.IGNORECASE)
+_DEBUG_RE = re.compile(r"debug", re.IGNORECASE)
+# Longest line read from the server in one piece (longer lines are split)
+_MAX_LINE_BYTES = 1024 * 1024
+
+
+def _pid_exited(pid: int) -> bool:
+    """Check without blocking whether a child process has exited (POSIX only)."""
+    if not hasattr(os, "WNOHANG"):
+        return False
+    try:
+        waited_pid, _ = os.waitpid(pid, os.WNOHANG)
+        return waited_pid != 0
+    except ChildProcessError:
+        return True  # Already reaped
+
 
 class LLMServerManager:
     """Manages the OpenAI-compatible llama-cpp-python server process."""
     
-    def __init__(self):
-        self.process: Optional[subprocess.Popen] = None
-        self.server_url: str = settings.llm_service_url
-        self.server_port: int = 8001
+    # PIDs of servers started by this gateway, shared by all instances so that
+    # orphan cleanup never kills a sibling server of the model pool
+    _owned_pids: Set[int] = set()
+    
+    def __init__(self, port: Optional[int] = None):
+        """Initialize the server manager.
+        
+        Args:
+            port: Port to serve on (None = the port of settings.llm_service_url)
+        """
+        self.process: Optional[asyncio.subprocess.Process] = None
         self.server_host: str = "127.0.0.1"
+        self.server_port: int = port or urlparse(settings.llm_service_url).port or 8001
+        self.server_url: str = f"http://{self.server_host}:{self.server_port}"
+        self.scheduler = RequestScheduler(name=str(self.server_port))  # Admission control for generation requests
         self._model_path: Optional[str] = None
         self._server_config: Optional[Dict[str, Any]] = None
         self._last_error: Optional[str] = None
-        self._subprocess_logs: List[str] = []
+        self._subprocess_logs: Deque[str] = deque(maxlen=settings.llm_server_log_buffer_lines)
+        self._last_server_timings: Dict[str, Dict[str, float]] = {}  # Latest llama.cpp timing lines by phase
+        self._log_forward_window = 0.0  # Start of the current one-second forwarding window
+        self._log_forwarded = 0  # Lines forwarded in the current window
+        self._log_suppressed = 0  # Lines not forwarded in the current window
         self._log_reader_task: Optional[asyncio.Task] = None
         self._template_info: Optional[Dict[str, Any]] = None  # Store template info from /props
         self._available_flags: Optional[Dict[str, bool]] = None  # Cache available flags
         self._loading_lock = threading.Lock()  # Prevent concurrent model loading
+        self._client: Optional[httpx.AsyncClient] = None  # Shared keep-alive client for all server traffic
+        self._model_id: Optional[str] = None  # Model ID reported by /v1/models, cached at load time
+        self._healthy: bool = False
+        self._last_health_check: Optional[float] = None
+        self._health_monitor_task: Optional[asyncio.Task] = None
+        self.health_check_interval: float = 5.0  # Seconds between background liveness probes
+        self._last_prefix_match: Optional[Dict[str, int]] = None  # KV cache reuse reported by the server log
+        self._speculative: Optional[Dict[str, Any]] = None  # Speculative decoding the server was started with
         
     async def start_server(
         self,
@@ -46,6 +97,9 @@ class LLMServerManager:
         chat_format: Optional[str] = None,
         use_jinja: bool = False,
         chat_template_file: Optional[str] = None,
+        speculative_mode: Optional[str] = None,
+        draft_model_path: Optional[str] = None,
+        draft_num_pred_tokens: Optional[int] = None,
         **kwargs
     ) -> bool:
         """Start the OpenAI-compatible server with the specified model.
@@ -61,6 +115,9 @@ class LLMServerManager:
             chat_format: Chat format to use (e.g., "functionary-v2", "chatml-function-calling")
             use_jinja: Whether to enable jinja template support (for function calling)
             chat_template_file: Path to a custom chat template .jinja file
+            speculative_mode: Speculative decoding: None/"off", "prompt_lookup" or "draft_model"
+            draft_model_path: Draft GGUF for speculative_mode="draft_model"
+            draft_num_pred_tokens: Tokens drafted per decoding step (default: 10)
             **kwargs: Additional server parameters
             
         Returns:
@@ -72,7 +129,7 @@ class LLMServerManager:
             return False
         
         try:
-            # CRITICAL: Check for and kill any zombie processes on port 8001
+            # CRITICAL: Check for and kill any zombie processes on our port
             await self._cleanup_port_conflicts()
             
             # Also cleanup any orphaned llama-cpp-python processes
@@ -212,6 +269,9 @@ class LLMServerManager:
                         else:
                             cmd.extend([f"--{key}", str(value)])
             
+            # Speculative decoding is opt-in per model, so it applies to every chat format
+            cmd.extend(self._speculative_args(speculative_mode, draft_model_path, draft_num_pred_tokens))
+            
             logger.info(f"Starting OpenAI-compatible server: {' '.join(cmd)}")
             
             try:
@@ -219,18 +279,18 @@ class LLMServerManager:
                 env = os.environ.copy()
                 env['PYTHONIOENCODING'] = 'utf-8'
                 
-                self.process = subprocess.Popen(
-                    cmd,
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.STDOUT,  # Merge stderr into stdout
+                self.process = await asyncio.create_subprocess_exec(
+                    *cmd,
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.STDOUT,  # Merge stderr into stdout
                     env=env,
                     cwd=str(Path(__file__).parent.parent.parent.parent.parent),
-                    text=True,
-                    bufsize=1
+                    limit=_MAX_LINE_BYTES
                 )
+                LLMServerManager._owned_pids.add(self.process.pid)
                 
                 # Start reading subprocess output
-                self._subprocess_logs = []
+                self._subprocess_logs.clear()
                 self._log_reader_task = asyncio.create_task(self._read_subprocess_output())
                 
                 # Wait for server to be ready
@@ -252,27 +312,18 @@ class LLMServerManager:
                 logger.info(f"[MODEL LOAD] Timeout: {max_wait}s (model size: {model_size_gb:.2f}GB)")
                 
                 while elapsed < max_wait:
-                    if self.process.poll() is not None:
-                        # Process has terminated - cancel log reader and get remaining output
+                    if self.process.returncode is not None:
+                        # Process has terminated - let the log reader drain the remaining output
                         if self._log_reader_task:
-                            self._log_reader_task.cancel()
                             try:
-                                await self._log_reader_task
-                            except asyncio.CancelledError:
+                                await asyncio.wait_for(self._log_reader_task, timeout=1)
+                            except (asyncio.TimeoutError, asyncio.CancelledError):
                                 pass
-                        
-                        # Get any remaining output
-                        try:
-                            remaining_output, _ = self.process.communicate(timeout=1)
-                            if remaining_output:
-                                error_output = remaining_output if isinstance(remaining_output, str) else remaining_output.decode('utf-8', errors='ignore')
-                            else:
-                                error_output = '\n'.join(self._subprocess_logs) if self._subprocess_logs else ""
-                        except Exception:
-                            error_output = '\n'.join(self._subprocess_logs) if self._subprocess_logs else ""
+                        error_output = '\n'.join(self._subprocess_logs)
                         
                         logger.error(f"Server process exited with code {self.process.returncode}")
                         logger.error(f"Output: {error_output}")
+                        LLMServerManager._owned_pids.discard(self.process.pid)
                         self.process = None
                         # Store error for retrieval
                         self._last_error = f"Server failed to start: {error_output}"
@@ -280,14 +331,16 @@ class LLMServerManager:
                     
                     # Check if server is responding (use /v1/models as health check)
                     try:
-                        async with httpx.AsyncClient(timeout=1.0) as client:  # Reduced from 2.0 to 1.0
-                            response = await client.get(f"{self.server_url}/v1/models")
-                            if response.status_code == 200:
-                                logger.info(f"[MODEL LOAD] ✓ Server is ready at {self.server_url} (took {elapsed:.1f}s)")
-                                # Verify template support after server is ready
-                                if use_jinja or chat_template_file:
-                                    await self._verify_template_support()
-                                return True
+                        models_data = await self._probe_models(timeout=1.0)
+                        if models_data is not None:
+                            logger.info(f"[MODEL LOAD] ✓ Server is ready at {self.server_url} (took {elapsed:.1f}s)")
+                            self._cache_model_id(models_data)
+                            self._record_health(True)
+                            self._start_health_monitor()
+                            # Verify template support after server is ready
+                            if use_jinja or chat_template_file:
+                                await self._verify_template_support()
+                            return True
                     except Exception as e:
                         # Log only every 2 seconds to avoid spam
                         if int(elapsed) % 2 == 0 and elapsed > 0:
@@ -299,7 +352,7 @@ class LLMServerManager:
                         logger.info(f"[MODEL LOAD] Still waiting for server... ({elapsed:.1f}s / {max_wait}s)")
                 
                 # Get error output from logs
-                error_output = '\n'.join(self._subprocess_logs[-20:]) if self._subprocess_logs else "No output captured"
+                error_output = '\n'.join(list(self._subprocess_logs)[-20:]) if self._subprocess_logs else "No output captured"
                 logger.error(f"[MODEL LOAD] ❌ Server failed to start within {max_wait}s")
                 logger.error(f"[MODEL LOAD] Last 20 log lines:\n{error_output}")
                 self._last_error = f"Server failed to start within {max_wait} seconds. Last error: {error_output[-200:]}"
@@ -331,6 +384,11 @@ class LLMServerManager:
         Returns:
             True if server stopped successfully, False otherwise
         """
+        # Stop liveness monitoring and drop pooled connections to the old process
+        await self._stop_health_monitor()
+        await self._close_client()
+        self._model_id = None
+        
         if self.process is None:
             return True
         
@@ -345,29 +403,31 @@ class LLMServerManager:
                 pass
             self._log_reader_task = None
         
+        LLMServerManager._owned_pids.discard(self.process.pid)
         try:
             # Try graceful shutdown first
-            self.process.terminate()
+            if self.process.returncode is None:
+                self.process.terminate()
             
             # Wait up to 10 seconds for graceful shutdown
             try:
-                self.process.wait(timeout=10)
+                await asyncio.wait_for(self.process.wait(), timeout=10)
                 logger.info("✓ Server stopped gracefully")
                 self.process = None
                 self._model_path = None
                 self._server_config = None
-                self._subprocess_logs = []
+                self._subprocess_logs.clear()
                 return True
-            except subprocess.TimeoutExpired:
+            except asyncio.TimeoutError:
                 # Force kill if graceful shutdown failed
                 logger.warning("Server did not stop gracefully, forcing kill...")
                 self.process.kill()
-                self.process.wait()
+                await self.process.wait()
                 logger.info("✓ Server force-killed")
                 self.process = None
                 self._model_path = None
                 self._server_config = None
-                self._subprocess_logs = []
+                self._subprocess_logs.clear()
                 return True
                 
         except Exception as e:
@@ -380,11 +440,11 @@ class LLMServerManager:
             self.process = None
             self._model_path = None
             self._server_config = None
-            self._subprocess_logs = []
+            self._subprocess_logs.clear()
             return False
     
     async def _cleanup_port_conflicts(self):
-        """Check for and kill any processes using port 8001."""
+        """Check for and kill any processes using our port."""
         try:
             import psutil
             logger.info(f"[CLEANUP] Checking for processes on port {self.server_port}...")
@@ -395,7 +455,7 @@ class LLMServerManager:
                     connections = proc.connections()
                     for conn in connections:
                         if conn.status == psutil.CONN_LISTEN and conn.laddr.port == self.server_port:
-                            if proc.pid != os.getpid():  # Don't kill ourselves
+                            if proc.pid != os.getpid() and proc.pid not in LLMServerManager._owned_pids:  # Don't kill ourselves or our servers
                                 logger.warning(f"[CLEANUP] Found zombie process {proc.pid} ({proc.name()}) using port {self.server_port}")
                                 logger.warning(f"[CLEANUP] Cmdline: {' '.join(proc.info.get('cmdline', []))}")
                                 try:
@@ -431,8 +491,8 @@ class LLMServerManager:
             
             for proc in psutil.process_iter(['pid', 'name', 'cmdline']):
                 try:
-                    if proc.pid == current_pid:
-                        continue  # Don't kill ourselves
+                    if proc.pid == current_pid or proc.pid in LLMServerManager._owned_pids:
+                        continue  # Don't kill ourselves or servers we manage
                     
                     cmdline = proc.info.get('cmdline', [])
                     if not cmdline:
@@ -492,24 +552,161 @@ class LLMServerManager:
         """
         if self.process is None:
             return False
-        return self.process.poll() is None
+        return self.process.returncode is None
     
-    async def health_check(self) -> bool:
+    def terminate_sync(self, timeout: float = 2.0):
+        """Terminate the server process without an event loop (e.g. from a signal handler).
+        
+        Args:
+            timeout: Seconds to wait for a graceful exit before killing
+        """
+        process = self.process
+        if process is None or process.returncode is not None:
+            return
+        LLMServerManager._owned_pids.discard(process.pid)
+        try:
+            process.terminate()
+            deadline = time.monotonic() + timeout
+            while time.monotonic() < deadline:
+                if _pid_exited(process.pid):
+                    return
+                time.sleep(0.05)
+            process.kill()
+        except ProcessLookupError:
+            pass  # Already gone
+    
+    async def health_check(self, force: bool = False) -> bool:
         """Check if the server is healthy (responding to requests).
         
+        Uses the result of the background liveness monitor when it is fresh,
+        so callers on the request path don't pay for an extra round trip.
+        
+        Args:
+            force: Probe the server now instead of using the monitored state
+        
         Returns:
             True if server is healthy, False otherwise
         """
         if not self.is_running():
             return False
         
+        if not force and self._last_health_check is not None:
+            if time.time() - self._last_health_check < self.health_check_interval * 2:
+                return self._healthy
+        
+        healthy = await self._probe_models(timeout=1.0) is not None
+        self._record_health(healthy)
+        return healthy
+    
+    def get_client(self) -> httpx.AsyncClient:
+        """Get the shared HTTP client for talking to the llama server.
+        
+        The client keeps a keep-alive connection pool that lives as long as the
+        server process, so requests after the first skip connection setup.
+        Callers pass a per-request ``timeout`` where the default doesn't fit.
+        
+        Returns:
+            Pooled httpx.AsyncClient
+        """
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                timeout=httpx.Timeout(30.0, connect=5.0),
+                limits=httpx.Limits(
+                    max_connections=32,
+                    max_keepalive_connections=8,
+                    keepalive_expiry=60.0
+                )
+            )
+        return self._client
+    
+    async def _close_client(self):
+        """Close the pooled HTTP client, if any."""
+        if self._client is not None:
+            try:
+                await self._client.aclose()
+            except Exception as e:
+                logger.debug(f"Error closing LLM server client: {e}")
+            self._client = None
+    
+    def get_model_id(self) -> Optional[str]:
+        """Get the model ID reported by the server's /v1/models endpoint.
+        
+        Returns:
+            Model ID cached when the server became ready, or None
+        """
+        return self._model_id
+    
+    async def _probe_models(self, timeout: float = 1.0) -> Optional[Dict[str, Any]]:
+        """Query /v1/models on the pooled client.
+        
+        llama-cpp-python has no /health endpoint, so /v1/models doubles as the liveness probe.
+        
+        Returns:
+            Parsed response body if the server answered 200, None otherwise
+        """
         try:
-            async with httpx.AsyncClient(timeout=1.0) as client:  # Reduced from 2.0 to 1.0
-                # Use /v1/models as health check (llama-cpp-python doesn't have /health endpoint)
-                response = await client.get(f"{self.server_url}/v1/models")
-                return response.status_code == 200
+            response = await self.get_client().get(f"{self.server_url}/v1/models", timeout=timeout)
+            if response.status_code == 200:
+                return response.json()
         except Exception:
-            return False
+            pass
+        return None
+    
+    def _cache_model_id(self, models_data: Dict[str, Any]):
+        """Remember the model ID from a /v1/models response."""
+        data = models_data.get("data") if isinstance(models_data, dict) else None
+        if data and len(data) > 0 and data[0].get("id"):
+            self._model_id = data[0]["id"]
+            logger.debug(f"Cached model ID from server: {self._model_id}")
+    
+    def _record_health(self, healthy: bool):
+        """Store the outcome of a liveness probe."""
+        if healthy != self._healthy:
+            logger.info(f"LLM server health changed: {'healthy' if healthy else 'unhealthy'}")
+        self._healthy = healthy
+        self._last_health_check = time.time()
+    
+    def _start_health_monitor(self):
+        """Start the background liveness monitor if it isn't running."""
+        if self._health_monitor_task is None or self._health_monitor_task.done():
+            self._health_monitor_task = asyncio.create_task(self._health_monitor_loop())
+    
+    async def _stop_health_monitor(self):
+        """Cancel the background liveness monitor."""
+        if self._health_monitor_task:
+            self._health_monitor_task.cancel()
+            try:
+                await self._health_monitor_task
+            except asyncio.CancelledError:
+                pass
+            self._health_monitor_task = None
+        self._healthy = False
+        self._last_health_check = None
+    
+    async def _health_monitor_loop(self):
+        """Background task that keeps the cached health state current."""
+        try:
+            while self.is_running():
+                await asyncio.sleep(self.health_check_interval)
+                models_data = await self._probe_models(timeout=2.0)
+                self._record_health(models_data is not None)
+                if models_data is not None and self._model_id is None:
+                    self._cache_model_id(models_data)
+            self._record_health(False)
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            logger.error(f"Error in LLM server health monitor: {e}", exc_info=True)
+    
+    def pop_prefix_match(self) -> Optional[Dict[str, int]]:
+        """Return and clear the last prompt-cache prefix match seen in the server log.
+        
+        Returns:
+            Dict with 'cached_tokens' and 'evaluated_tokens', or None if no match was logged
+        """
+        prefix_match = self._last_prefix_match
+        self._last_prefix_match = None
+        return prefix_match
     
     def get_server_url(self) -> str:
         """Get the server URL.
@@ -540,6 +737,7 @@ class LLMServerManager:
             "jinja": False,
             "chat_template_file": False,
             "chat-template-file": False,
+            "draft_model": False,
         }
         
         try:
@@ -568,6 +766,13 @@ class LLMServerManager:
                 logger.info("✓ --chat_template_file flag is available")
             else:
                 logger.debug("--chat-template-file flag not found in server help")
+            
+            # Speculative decoding (llama-cpp-python >= 0.2.58)
+            if "--draft_model" in help_text:
+                flags_to_check["draft_model"] = True
+                logger.info("✓ --draft_model flag is available")
+            else:
+                logger.debug("--draft_model flag not found in server help")
                 
         except Exception as e:
             logger.warning(f"Could not check available flags: {e}")
@@ -586,31 +791,30 @@ class LLMServerManager:
             return None
         
         try:
-            async with httpx.AsyncClient(timeout=5.0) as client:
-                response = await client.get(f"{self.server_url}/props")
-                if response.status_code == 200:
-                    props_data = response.json()
-                    
-                    template_info = {
-                        "chat_template": props_data.get("chat_template"),
-                        "chat_template_tool_use": props_data.get("chat_template_tool_use"),
-                        "has_tool_use_template": bool(props_data.get("chat_template_tool_use")),
-                        "has_standard_template": bool(props_data.get("chat_template")),
-                    }
-                    
-                    self._template_info = template_info
-                    
-                    if template_info["has_tool_use_template"]:
-                        logger.info("✓ Template verification: Tool-use template is available")
-                    elif template_info["has_standard_template"]:
-                        logger.info("✓ Template verification: Standard template is available (tool-use template not found)")
-                    else:
-                        logger.warning("⚠ Template verification: No templates found in /props")
-                    
-                    return template_info
+            response = await self.get_client().get(f"{self.server_url}/props", timeout=5.0)
+            if response.status_code == 200:
+                props_data = response.json()
+                
+                template_info = {
+                    "chat_template": props_data.get("chat_template"),
+                    "chat_template_tool_use": props_data.get("chat_template_tool_use"),
+                    "has_tool_use_template": bool(props_data.get("chat_template_tool_use")),
+                    "has_standard_template": bool(props_data.get("chat_template")),
+                }
+                
+                self._template_info = template_info
+                
+                if template_info["has_tool_use_template"]:
+                    logger.info("✓ Template verification: Tool-use template is available")
+                elif template_info["has_standard_template"]:
+                    logger.info("✓ Template verification: Standard template is available (tool-use template not found)")
                 else:
-                    logger.warning(f"Failed to get /props: status {response.status_code}")
-                    return None
+                    logger.warning("⚠ Template verification: No templates found in /props")
+                
+                return template_info
+            else:
+                logger.warning(f"Failed to get /props: status {response.status_code}")
+                return None
         except Exception as e:
             logger.warning(f"Error verifying template support: {e}")
             return None
@@ -623,54 +827,156 @@ class LLMServerManager:
         """
         return self._template_info
     
+    def _speculative_args(
+        self,
+        mode: Optional[str],
+        draft_model_path: Optional[str],
+        num_pred_tokens: Optional[int]
+    ) -> List[str]:
+        """Build the speculative decoding flags and remember what was enabled.
+        
+        llama_cpp.server drafts with prompt lookup only ("--draft_model
+        prompt-lookup-decoding"): it proposes continuations by matching n-grams
+        of the context, which pays off when answers quote the prompt (code
+        edits, summaries, RAG). It cannot load a second GGUF as a draft model,
+        so "draft_model" falls back to prompt lookup with a warning.
+        
+        Args:
+            mode: None/"off", "prompt_lookup" or "draft_model"
+            draft_model_path: Draft GGUF requested with mode "draft_model"
+            num_pred_tokens: Tokens drafted per step (None = 10)
+        
+        Returns:
+            Command-line arguments to append (empty when disabled or unsupported)
+        """
+        self._speculative = None
+        if not mode or mode == "off":
+            return []
+        if not self._check_available_flags().get("draft_model", False):
+            logger.warning("⚠ --draft_model flag not available in this llama-cpp-python version - speculative decoding disabled")
+            return []
+        if mode == "draft_model":
+            logger.warning(f"⚠ llama_cpp.server cannot run a separate draft model ({draft_model_path}) - "
+                           f"using prompt-lookup decoding instead")
+        num_pred_tokens = num_pred_tokens or 10
+        self._speculative = {
+            "requested_mode": mode,
+            "mode": "prompt_lookup",
+            "draft_model_path": draft_model_path,
+            "num_pred_tokens": num_pred_tokens
+        }
+        logger.info(f"✓ Speculative decoding: prompt lookup, {num_pred_tokens} draft tokens per step")
+        return ["--draft_model", "prompt-lookup-decoding", "--draft_model_num_pred_tokens", str(num_pred_tokens)]
+    
+    def get_speculative_config(self) -> Optional[Dict[str, Any]]:
+        """Get the speculative decoding the server runs with (None = disabled)."""
+        return dict(self._speculative) if self._speculative else None
+    
+    def get_server_timings(self) -> Dict[str, Dict[str, float]]:
+        """Get the latest llama.cpp timing lines parsed from the server log.
+        
+        Returns:
+            Dict keyed by "prompt_eval"/"eval" with ms, tokens and tokens_per_second
+        """
+        return dict(self._last_server_timings)
+    
+    def get_recent_logs(self, limit: Optional[int] = None) -> List[str]:
+        """Get recent server log lines (oldest first)."""
+        lines = list(self._subprocess_logs)
+        return lines[-limit:] if limit else lines
+    
     async def _read_subprocess_output(self):
-        """Read subprocess output and add to request logs."""
+        """Read subprocess output into the ring buffer and request logs until EOF."""
         if not self.process or not self.process.stdout:
             return
         
+        stdout = self.process.stdout
         try:
-            while self.process.poll() is None:
-                line = await asyncio.to_thread(self.process.stdout.readline)
-                if not line:
-                    await asyncio.sleep(0.1)
-                    continue
-                
-                line = line.strip()
-                if not line:
-                    continue
-                
-                # Store in subprocess logs
-                self._subprocess_logs.append(line)
-                
-                # Determine log level from content
-                level = "INFO"
-                line_lower = line.lower()
-                if "error" in line_lower or "failed" in line_lower or "exception" in line_lower or "traceback" in line_lower:
-                    level = "ERROR"
-                elif "warning" in line_lower or "warn" in line_lower:
-                    level = "WARNING"
-                elif "debug" in line_lower:
-                    level = "DEBUG"
-                
-                # Add to request log store if available
-                log_store = get_request_log_store()
-                if log_store:
-                    log_store.add_log(
-                        level=level,
-                        logger_name="llm_server",
-                        message=line
-                    )
+            while True:
+                try:
+                    raw = await stdout.readline()
+                except ValueError:
+                    # Line longer than the stream limit; the reader has discarded it
+                    raw = b"[line too long, truncated]"
+                if not raw:
+                    break  # EOF: the process closed its output
                 
-                # Also log to standard logger
-                if level == "ERROR":
-                    logger.error(f"[LLM SERVER] {line}")
-                elif level == "WARNING":
-                    logger.warning(f"[LLM SERVER] {line}")
-                else:
-                    logger.debug(f"[LLM SERVER] {line}")
+                line = raw.decode("utf-8", errors="replace").strip()
+                if line:
+                    self._handle_server_log_line(line)
         except asyncio.CancelledError:
             # Task was cancelled, this is expected
             pass
         except Exception as e:
             logger.error(f"Error reading subprocess output: {e}", exc_info=True)
-
+    
+    def _handle_server_log_line(self, line: str):
+        """Record one server log line: buffer it, parse cache/timing info and forward it."""
+        self._subprocess_logs.append(line)
+        
+        prefix_match = _PREFIX_MATCH_RE.search(line)
+        if prefix_match:
+            self._last_prefix_match = {
+                "cached_tokens": int(prefix_match.group(1)),
+                "evaluated_tokens": int(prefix_match.group(2))
+            }
+        elif "time" in line:
+            timing = _TIMING_RE.search(line)
+            if timing:
+                phase = "prompt_eval" if timing.group(1) == "prompt eval" else "eval"
+                tokens_per_second = float(timing.group(4))
+                self._last_server_timings[phase] = {
+                    "ms": float(timing.group(2)),
+                    "tokens": int(timing.group(3)),
+                    "tokens_per_second": tokens_per_second
+                }
+                get_metrics().observe(f"llm_server_{phase}_tokens_per_second", tokens_per_second)
+        
+        # Determine log level from content
+        if _ERROR_RE.search(line):
+            level = "ERROR"
+        elif _WARNING_RE.search(line):
+            level = "WARNING"
+        elif _DEBUG_RE.search(line):
+            level = "DEBUG"
+        else:
+            level = "INFO"
+        
+        # Add to request log store if available (rate-limited so verbose logs can't flood it)
+        log_store = get_request_log_store()
+        if log_store and self._should_forward(level):
+            log_store.add_log(
+                level=level,
+                logger_name="llm_server",
+                message=line
+            )
+        
+        # Also log to standard logger
+        if level == "ERROR":
+            logger.error(f"[LLM SERVER] {line}")
+        elif level == "WARNING":
+            logger.warning(f"[LLM SERVER] {line}")
+        else:
+            logger.debug(f"[LLM SERVER] {line}")
+    
+    def _should_forward(self, level: str) -> bool:
+        """Apply the per-second forwarding budget; errors and warnings are always forwarded."""
+        now = time.monotonic()
+        if now - self._log_forward_window >= 1.0:
+            if self._log_suppressed:
+                log_store = get_request_log_store()
+                if log_store:
+                    log_store.add_log(
+                        level="INFO",
+                        logger_name="llm_server",
+                        message=f"[{self._log_suppressed} server log line(s) not forwarded; see the server log buffer]"
+                    )
+            self._log_forward_window = now
+            self._log_forwarded = 0
+            self._log_suppressed = 0
+        
+        if level in ("ERROR", "WARNING") or self._log_forwarded < settings.llm_server_log_forward_rate:
+            self._log_forwarded += 1
+            return True
+        self._log_suppressed += 1
+        return False
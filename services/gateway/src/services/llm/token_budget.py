@@ -0,0 +1,313 @@
+"""Prompt token counting and budgeting against the model's context window."""
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import asyncio
+import hashlib
+import json
+import logging
+import threading
+
+from ...config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# Tokens a chat template adds around each message (role header and end-of-turn marker)
+_MESSAGE_OVERHEAD_TOKENS = 4
+# Characters per token when no tokenizer is available
+_CHARS_PER_TOKEN = 4
+# When history has to be cut, cut it down to this fraction of the budget so the
+# cut point (and with it the cached prompt prefix) stays put for several turns
+_HISTORY_LOW_WATER = 0.75
+# Retrieved context items the message builder uses at most
+_MAX_CONTEXT_ITEMS = 5
+# Conversations whose history cut point is remembered
+_MAX_REMEMBERED_CUTS = 256
+
+
+def _text_key(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8", "replace")).hexdigest()
+
+
+def message_text(message: Dict[str, Any]) -> str:
+    """Text of a chat message as the template sees it (content plus any tool calls)."""
+    content = message.get("content") or ""
+    if isinstance(content, list):
+        content = "".join(part.get("text", "") for part in content if isinstance(part, dict))
+    tool_calls = message.get("tool_calls")
+    if tool_calls:
+        content = f"{content}{json.dumps(tool_calls, sort_keys=True, default=str)}"
+    return str(content)
+
+
+class TokenCounter:
+    """Counts tokens with a model's own tokenizer, caching the count per text.
+    
+    Tokenizes in-process with a vocab-only llama_cpp.Llama, which reads just
+    the tokenizer from the GGUF and doesn't wait behind generation on the
+    server. Without llama_cpp it asks the server's /extras/tokenize/count
+    endpoint, and if that fails too it estimates from the text length.
+    Estimates are not cached, so real counts replace them once available.
+    """
+    
+    def __init__(self, model_path: str, server: Optional[Any] = None, max_entries: Optional[int] = None):
+        """Initialize the counter.
+        
+        Args:
+            model_path: GGUF whose tokenizer is used
+            server: LLMServerManager serving the model (fallback tokenizer)
+            max_entries: Counts kept in memory (default: settings.llm_token_count_cache_size)
+        """
+        self.model_path = model_path
+        self.server = server
+        self.max_entries = max_entries or settings.llm_token_count_cache_size
+        self.source = "estimate"  # "vocab", "server" or "estimate": how the last miss was counted
+        self._cache: "OrderedDict[str, int]" = OrderedDict()
+        self._vocab = None
+        self._vocab_failed = False
+        self._vocab_lock = threading.Lock()
+        self._server_failed = False
+        self._stats = {"hits": 0, "misses": 0, "estimated": 0}
+    
+    def _tokenize_local(self, texts: List[str]) -> Optional[List[int]]:
+        """Count tokens with the in-process vocab (runs in a worker thread)."""
+        with self._vocab_lock:
+            if self._vocab is None and not self._vocab_failed:
+                try:
+                    from llama_cpp import Llama
+                    self._vocab = Llama(model_path=self.model_path, vocab_only=True, verbose=False)
+                    logger.info(f"[TOKEN BUDGET] Loaded tokenizer of {self.model_path}")
+                except Exception as e:
+                    self._vocab_failed = True
+                    logger.info(f"[TOKEN BUDGET] In-process tokenizer unavailable ({e}), using the server")
+            if self._vocab is None:
+                return None
+            return [len(self._vocab.tokenize(text.encode("utf-8", "replace"), add_bos=False, special=True)) for text in texts]
+    
+    async def _tokenize_server(self, texts: List[str]) -> Optional[List[int]]:
+        """Count tokens with the server's tokenize endpoint."""
+        if self.server is None or self._server_failed or not self.server.is_running():
+            return None
+        client = self.server.get_client()
+        counts = []
+        try:
+            for text in texts:
+                response = await client.post(
+                    f"{self.server.get_server_url()}/extras/tokenize/count",
+                    json={"input": text},
+                    timeout=10.0
+                )
+                response.raise_for_status()
+                counts.append(int(response.json()["count"]))
+        except Exception as e:
+            self._server_failed = True
+            logger.warning(f"[TOKEN BUDGET] Server tokenize endpoint failed ({e}), estimating token counts")
+            return None
+        return counts
+    
+    async def count(self, texts: List[str]) -> List[int]:
+        """Count the tokens of each text.
+        
+        Args:
+            texts: Texts to count
+        
+        Returns:
+            Token count per text
+        """
+        counts: List[Optional[int]] = []
+        missing: List[int] = []
+        for i, text in enumerate(texts):
+            key = _text_key(text)
+            cached = self._cache.get(key)
+            if cached is None:
+                missing.append(i)
+            else:
+                self._cache.move_to_end(key)
+            counts.append(cached)
+        self._stats["hits"] += len(texts) - len(missing)
+        
+        if missing:
+            self._stats["misses"] += len(missing)
+            pending = [texts[i] for i in missing]
+            fresh = await asyncio.to_thread(self._tokenize_local, pending)
+            self.source = "vocab"
+            if fresh is None:
+                fresh = await self._tokenize_server(pending)
+                self.source = "server"
+            if fresh is None:
+                fresh = [len(text) // _CHARS_PER_TOKEN + 1 for text in pending]
+                self.source = "estimate"
+                self._stats["estimated"] += len(pending)
+            for i, count in zip(missing, fresh):
+                counts[i] = count
+                if self.source != "estimate":
+                    self._cache[_text_key(texts[i])] = count
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+        return counts
+    
+    async def count_messages(self, messages: List[Dict[str, Any]]) -> List[int]:
+        """Count the tokens of chat messages, including per-message template overhead."""
+        counts = await self.count([message_text(message) for message in messages])
+        return [count + _MESSAGE_OVERHEAD_TOKENS for count in counts]
+    
+    async def count_tools(self, tools: List[Dict[str, Any]]) -> int:
+        """Count the tokens tool schemas add to the prompt (as their JSON)."""
+        if not tools:
+            return 0
+        return sum(await self.count([json.dumps(tool, sort_keys=True) for tool in tools]))
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache statistics."""
+        return {**self._stats, "entries": len(self._cache), "source": self.source}
+
+
+@dataclass
+class PromptBudget:
+    """What was sent in one request, measured against the prompt budget."""
+    budget: int  # Prompt tokens allowed (0 = unlimited)
+    prompt_tokens: int  # Counted tokens of the messages and tools sent
+    tool_tokens: int
+    history_messages: int  # History messages sent
+    history_dropped: int  # Oldest history messages left out
+    context_items: int  # Retrieved context items sent
+    context_dropped: int
+    tools_dropped: bool  # Tool schemas left out because nothing else fit
+    over_budget: bool  # Still over budget with everything optional removed
+    source: str  # Tokenizer used: "vocab", "server" or "estimate"
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to dictionary for JSON serialization."""
+        return asdict(self)
+
+
+class PromptBudgeter:
+    """Fits history, retrieved context and tool schemas into a prompt token budget.
+    
+    The system prompt, tool results and the current message are always sent.
+    What's left of the budget goes to the tool schemas, then the retrieved
+    context, then as much of the newest history as fits. History is cut at a
+    user message so tool calls never lose their results. A cut goes down to
+    _HISTORY_LOW_WATER of the budget and is remembered per conversation, so
+    the same oldest message stays first (keeping the server's KV cache prefix
+    valid) until the conversation has grown by another quarter of the budget.
+    """
+    
+    def __init__(self):
+        self._cuts: "OrderedDict[str, str]" = OrderedDict()  # Conversation key -> key of its first sent message
+    
+    @staticmethod
+    def _conversation_key(history: List[Dict[str, Any]]) -> Optional[str]:
+        if not history:
+            return None
+        first = history[0]
+        return _text_key(f"{first.get('role')}|{first.get('timestamp')}|{message_text(first)}")
+    
+    @staticmethod
+    def _message_key(message: Dict[str, Any]) -> str:
+        return _text_key(f"{message.get('role')}|{message.get('timestamp')}|{message_text(message)}")
+    
+    async def fit(
+        self,
+        counter: TokenCounter,
+        build_messages: Callable[[List[Dict[str, Any]], Optional[Dict[str, Any]]], List[Dict[str, Any]]],
+        history: List[Dict[str, Any]],
+        context: Optional[Dict[str, Any]],
+        tools: List[Dict[str, Any]],
+        budget: int
+    ) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]], PromptBudget]:
+        """Build the request messages within the budget.
+        
+        Args:
+            counter: Token counter of the loaded model
+            build_messages: Builds the OpenAI messages from (history, context)
+            history: Full conversation history, oldest first
+            context: Retrieved context ("retrieved_messages" list) or None
+            tools: Tool schemas that would be sent
+            budget: Prompt tokens allowed (0 = unlimited, only count)
+        
+        Returns:
+            Messages, tools and the PromptBudget report
+        """
+        context_items = list((context or {}).get("retrieved_messages") or [])[:_MAX_CONTEXT_ITEMS]
+        
+        def with_items(count: int) -> Optional[Dict[str, Any]]:
+            return {**context, "retrieved_messages": context_items[:count]} if context else context
+        
+        async def total(messages: List[Dict[str, Any]]) -> int:
+            return sum(await counter.count_messages(messages))
+        
+        tool_tokens = await counter.count_tools(tools)
+        conversation = self._conversation_key(history)
+        start = self._remembered_start(conversation, history)
+        messages = build_messages(history[start:], context)
+        prompt_tokens = await total(messages) + tool_tokens
+        
+        item_count = len(context_items)
+        tools_dropped = False
+        if budget > 0 and prompt_tokens > budget:
+            # Shed retrieved context, then tools, until the parts that don't scale with history fit
+            base_tokens = await total(build_messages([], with_items(item_count)))
+            while base_tokens + tool_tokens > budget and item_count > 0:
+                item_count -= 1
+                base_tokens = await total(build_messages([], with_items(item_count)))
+            if base_tokens + tool_tokens > budget and tools:
+                logger.warning(f"[TOKEN BUDGET] Prompt without history needs {base_tokens + tool_tokens} tokens "
+                               f"(budget {budget}) - leaving out tool schemas")
+                tools, tool_tokens, tools_dropped = [], 0, True
+            
+            # Newest history that fits under the low-water mark, cut at a user message
+            room = int(budget * _HISTORY_LOW_WATER) - base_tokens - tool_tokens
+            history_tokens = await counter.count_messages(history)
+            start, used = len(history), 0
+            for i in range(len(history) - 1, -1, -1):
+                used += history_tokens[i]
+                if used > room:
+                    break
+                if history[i].get("role") == "user":
+                    start = i
+            
+            messages = build_messages(history[start:], with_items(item_count))
+            prompt_tokens = await total(messages) + tool_tokens
+            self._remember_start(conversation, history, start)
+        
+        if prompt_tokens > budget > 0:
+            logger.warning(f"[TOKEN BUDGET] Prompt is {prompt_tokens} tokens, over the {budget} token budget")
+        report = PromptBudget(
+            budget=budget,
+            prompt_tokens=prompt_tokens,
+            tool_tokens=tool_tokens,
+            history_messages=len(history) - start,
+            history_dropped=start,
+            context_items=item_count,
+            context_dropped=len(context_items) - item_count,
+            tools_dropped=tools_dropped,
+            over_budget=budget > 0 and prompt_tokens > budget,
+            source=counter.source
+        )
+        if start or report.context_dropped:
+            logger.info(f"[TOKEN BUDGET] {prompt_tokens}/{budget} tokens: dropped {start} oldest history message(s), "
+                        f"{report.context_dropped} context item(s)")
+        return messages, tools, report
+    
+    def _remembered_start(self, conversation: Optional[str], history: List[Dict[str, Any]]) -> int:
+        """Index of the first history message sent last time (0 if not cut)."""
+        cut = self._cuts.get(conversation) if conversation else None
+        if cut is None:
+            return 0
+        self._cuts.move_to_end(conversation)
+        for i, message in enumerate(history):
+            if self._message_key(message) == cut:
+                return i
+        return 0
+    
+    def _remember_start(self, conversation: Optional[str], history: List[Dict[str, Any]], start: int):
+        if conversation is None:
+            return
+        if 0 < start < len(history):
+            self._cuts[conversation] = self._message_key(history[start])
+            self._cuts.move_to_end(conversation)
+            while len(self._cuts) > _MAX_REMEMBERED_CUTS:
+                self._cuts.popitem(last=False)
+        else:
+            self._cuts.pop(conversation, None)
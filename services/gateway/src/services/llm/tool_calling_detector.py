@@ -107,9 +107,13 @@ def detect_tool_calling_from_chat_template(chat_template: str) -> Tuple[bool, Op
 
 
 @lru_cache(maxsize=128)
-def _fetch_hf_metadata(repo_id: str) -> Tuple[List[str], Optional[str]]:
+def _fetch_hf_metadata(repo_id: str, raise_on_error: bool = False) -> Tuple[List[str], Optional[str]]:
     """Fetch tags and primary architecture from HuggingFace for stronger assurance.
     
+    Args:
+        repo_id: HuggingFace repo id
+        raise_on_error: Re-raise request errors instead of returning empty metadata
+    
     Returns:
         (tags, architecture) where tags is a list of strings and architecture is optional.
     """
@@ -127,6 +131,8 @@ def _fetch_hf_metadata(repo_id: str) -> Tuple[List[str], Optional[str]]:
             pass
         return tags, architecture
     except Exception as e:
+        if raise_on_error:
+            raise
         logger.debug("HF metadata fetch failed for %s: %s", repo_id, e)
         return [], None
 
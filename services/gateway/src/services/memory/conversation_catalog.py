@@ -0,0 +1,241 @@
+"""SQLite-backed metadata catalogue for conversations."""
+
+import base64
+import json
+import logging
+import sqlite3
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_COLUMNS = ("conversation_id", "name", "created_at", "updated_at", "message_count", "pinned")
+
+
+def _timestamp(value: Optional[str]) -> float:
+    """Convert an ISO timestamp to epoch seconds for ordering (0 if missing or invalid)."""
+    if not value:
+        return 0.0
+    try:
+        return datetime.fromisoformat(str(value).replace("Z", "+00:00")).timestamp()
+    except (ValueError, TypeError):
+        return 0.0
+
+
+def encode_cursor(entry: Dict[str, Any]) -> str:
+    """Build an opaque pagination cursor pointing just after a listed entry."""
+    key = [1 if entry.get("pinned") else 0, _timestamp(entry.get("updated_at")), entry["conversation_id"]]
+    return base64.urlsafe_b64encode(json.dumps(key).encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> Tuple[int, float, str]:
+    """Decode a cursor produced by encode_cursor.
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        pinned, updated_ts, conversation_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return int(pinned), float(updated_ts), str(conversation_id)
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
+class ConversationCatalog:
+    """Conversation metadata table ordered by (pinned, updated_at).
+
+    Listing a page is an index range scan, so it costs O(page) regardless of how
+    many conversations exist. Name search matches a case-insensitive prefix.
+    """
+
+    def __init__(self, db_path: Path):
+        """Open (and create if needed) the catalogue database.
+
+        Args:
+            db_path: SQLite database file
+        """
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS conversations (
+                conversation_id TEXT PRIMARY KEY,
+                name TEXT,
+                name_key TEXT,
+                created_at TEXT,
+                updated_at TEXT,
+                updated_ts REAL NOT NULL DEFAULT 0,
+                message_count INTEGER NOT NULL DEFAULT 0,
+                pinned INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE INDEX IF NOT EXISTS idx_conversations_order
+                ON conversations (pinned DESC, updated_ts DESC, conversation_id DESC);
+            CREATE INDEX IF NOT EXISTS idx_conversations_name
+                ON conversations (name_key);
+        """)
+
+    def close(self):
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
+
+    @staticmethod
+    def _row_to_entry(row: sqlite3.Row) -> Dict[str, Any]:
+        entry = {column: row[column] for column in _COLUMNS}
+        entry["pinned"] = bool(entry["pinned"])
+        return entry
+
+    @staticmethod
+    def _entry_params(entry: Dict[str, Any]) -> Tuple[Any, ...]:
+        name = entry.get("name")
+        return (
+            entry["conversation_id"],
+            name,
+            name.lower() if name else None,
+            entry.get("created_at"),
+            entry.get("updated_at"),
+            _timestamp(entry.get("updated_at")),
+            int(entry.get("message_count") or 0),
+            1 if entry.get("pinned") else 0
+        )
+
+    def upsert_many(self, entries: Iterable[Dict[str, Any]]):
+        """Insert or replace catalogue entries.
+
+        Args:
+            entries: Dicts with conversation_id, name, created_at, updated_at, message_count, pinned
+        """
+        params = [self._entry_params(entry) for entry in entries]
+        if not params:
+            return
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO conversations "
+                    "(conversation_id, name, name_key, created_at, updated_at, updated_ts, message_count, pinned) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    params
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def upsert(self, entry: Dict[str, Any]):
+        """Insert or replace a single catalogue entry."""
+        self.upsert_many([entry])
+
+    def delete_many(self, conversation_ids: Iterable[str]) -> int:
+        """Remove entries.
+
+        Returns:
+            Number of entries removed
+        """
+        ids = [(conversation_id,) for conversation_id in conversation_ids]
+        if not ids:
+            return 0
+        with self._lock:
+            before = self._conn.total_changes
+            self._conn.executemany("DELETE FROM conversations WHERE conversation_id = ?", ids)
+            return self._conn.total_changes - before
+
+    def clear(self) -> int:
+        """Remove every entry.
+
+        Returns:
+            Number of entries removed
+        """
+        with self._lock:
+            return self._conn.execute("DELETE FROM conversations").rowcount
+
+    def get(self, conversation_id: str) -> Optional[Dict[str, Any]]:
+        """Get one entry, or None if it is not catalogued."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM conversations WHERE conversation_id = ?", (conversation_id,)
+            ).fetchone()
+        return self._row_to_entry(row) if row else None
+
+    def list(
+        self,
+        limit: Optional[int] = None,
+        offset: int = 0,
+        cursor: Optional[str] = None,
+        name_prefix: Optional[str] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """List entries pinned first, then most recently updated.
+
+        Args:
+            limit: Maximum number of entries (None = all)
+            offset: Entries to skip (ignored when a cursor is given)
+            cursor: Cursor returned by a previous call, to continue after its last entry
+            name_prefix: Only include conversations whose name starts with this (case-insensitive)
+
+        Returns:
+            Tuple of (entries, cursor for the next page or None when there are no more)
+        """
+        where = []
+        params: List[Any] = []
+        if cursor:
+            pinned, updated_ts, conversation_id = decode_cursor(cursor)
+            where.append("(pinned, updated_ts, conversation_id) < (?, ?, ?)")
+            params.extend([pinned, updated_ts, conversation_id])
+            offset = 0
+        if name_prefix:
+            key = name_prefix.lower()
+            # Range scan on the name index; the upper bound is the next possible prefix
+            where.append("name_key >= ? AND name_key < ?")
+            params.extend([key, key + "\U0010ffff"])
+
+        sql = "SELECT * FROM conversations"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY pinned DESC, updated_ts DESC, conversation_id DESC"
+        if limit:
+            # Fetch one extra row to know whether another page exists
+            sql += " LIMIT ? OFFSET ?"
+            params.extend([limit + 1, max(0, offset)])
+        elif offset:
+            sql += " LIMIT -1 OFFSET ?"
+            params.append(max(0, offset))
+
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        entries = [self._row_to_entry(row) for row in rows]
+
+        next_cursor = None
+        if limit and len(entries) > limit:
+            entries = entries[:limit]
+            next_cursor = encode_cursor(entries[-1])
+        return entries, next_cursor
+
+    def ids(self) -> List[str]:
+        """Get every catalogued conversation ID."""
+        with self._lock:
+            return [row[0] for row in self._conn.execute("SELECT conversation_id FROM conversations")]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get aggregate counts.
+
+        Returns:
+            Dictionary with conversation_count, message_count and last_updated
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(message_count), 0) FROM conversations"
+            ).fetchone()
+            last = self._conn.execute(
+                "SELECT updated_at FROM conversations ORDER BY updated_ts DESC LIMIT 1"
+            ).fetchone()
+        return {
+            "conversation_count": row[0],
+            "message_count": row[1],
+            "last_updated": last[0] if last else None
+        }
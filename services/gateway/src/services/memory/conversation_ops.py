@@ -15,7 +15,9 @@ async def store_conversation_with_vector(
     messages: List[Dict[str, Any]],
     name: Optional[str] = None,
     should_save_vector_func=None,
-    user_profile_id: Optional[str] = None
+    user_profile_id: Optional[str] = None,
+    ingestion_queue=None,
+    replace: bool = False
 ) -> None:
     """Store conversation messages in memory with optional vector storage.
     
@@ -23,13 +25,15 @@ async def store_conversation_with_vector(
         file_store: File conversation store instance
         vector_store: Vector store instance
         conversation_id: Unique conversation identifier
-        messages: List of message dictionaries
+        messages: List of new message dictionaries (or the full conversation when replace is True)
         name: Optional conversation name
         should_save_vector_func: Optional async function to check if vector saving is enabled
+        ingestion_queue: Optional VectorIngestionQueue; when given, vector writes happen
+            in the background instead of before this call returns
+        replace: Replace the stored messages instead of appending to them
     """
     # Get existing metadata to preserve created_at and pinned status
-    index = await file_store._load_index()
-    existing_meta = index.get("conversations", {}).get(conversation_id, {})
+    existing_meta = file_store.get_conversation_meta(conversation_id) or {}
     
     # Preserve name if not provided
     final_name = name if name else existing_meta.get("name")
@@ -39,7 +43,8 @@ async def store_conversation_with_vector(
         "created_at": existing_meta.get("created_at") or datetime.utcnow().isoformat(),
         "pinned": existing_meta.get("pinned", False)
     }
-    await file_store.save_conversation(
+    save = file_store.save_conversation if replace else file_store.append_messages
+    await save(
         conversation_id=conversation_id,
         messages=messages,
         name=final_name,
@@ -73,6 +78,15 @@ async def store_conversation_with_vector(
                     message_timestamp = datetime.utcnow()
                 
                 logger.debug(f"Saving user fact to vector memory: {message_content[:100]}...")
+                if ingestion_queue is not None:
+                    ingestion_queue.enqueue(
+                        conversation_id=conversation_id,
+                        message=message_content,
+                        role=message_role,
+                        timestamp=message_timestamp,
+                        user_profile_id=user_profile_id
+                    )
+                    continue
                 await vector_store.add_message(
                     conversation_id=conversation_id,
                     message=message_content,
@@ -1,9 +1,525 @@
 """Embedding model wrapper."""
-from typing import List, Union
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
 from sentence_transformers import SentenceTransformer
 from ...config.settings import settings
 import numpy as np
 import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingBatcher:
+    """Merges concurrent encode requests into batched forward passes.
+    
+    Requests are queued and a single worker task drains the queue, waiting up to
+    `window_ms` after the first request for more to arrive (or until
+    `max_batch_size` texts are collected). Each batch is encoded in one call on
+    a dedicated worker thread, and the rows are handed back to the callers.
+    """
+    
+    def __init__(
+        self,
+        encode_fn: Callable[[List[str]], np.ndarray],
+        window_ms: float = 5.0,
+        max_batch_size: int = 32
+    ):
+        """Initialize the batcher.
+        
+        Args:
+            encode_fn: Blocking function that encodes a list of texts into a 2D array
+            window_ms: How long to wait for more requests after the first one (milliseconds)
+            max_batch_size: Maximum number of texts per forward pass
+        """
+        self._encode_fn = encode_fn
+        self.window_ms = window_ms
+        self.max_batch_size = max(1, max_batch_size)
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="embedding-encoder")
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker_task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._stats = {
+            "requests": 0,
+            "batches": 0,
+            "texts": 0,
+            "max_batch_size_seen": 0,
+            "total_queue_wait_ms": 0.0,
+            "max_queue_wait_ms": 0.0,
+            "total_encode_ms": 0.0
+        }
+    
+    def _ensure_worker(self):
+        """Start the worker task on the running event loop if it isn't running."""
+        loop = asyncio.get_running_loop()
+        if self._worker_task is None or self._worker_task.done() or self._loop is not loop:
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._worker_task = loop.create_task(self._worker())
+    
+    async def encode(self, texts: List[str]) -> np.ndarray:
+        """Queue texts for encoding and wait for their embeddings.
+        
+        Args:
+            texts: Texts to encode
+        
+        Returns:
+            2D numpy array with one row per text
+        """
+        self._ensure_worker()
+        future = self._loop.create_future()
+        await self._queue.put((texts, future, time.perf_counter()))
+        return await future
+    
+    async def _collect_batch(self) -> List[Tuple[List[str], asyncio.Future, float]]:
+        """Wait for the next request, then gather more until the window or size limit."""
+        batch = [await self._queue.get()]
+        count = len(batch[0][0])
+        deadline = self._loop.time() + self.window_ms / 1000.0
+        while count < self.max_batch_size:
+            timeout = deadline - self._loop.time()
+            if timeout <= 0:
+                break
+            try:
+                item = await asyncio.wait_for(self._queue.get(), timeout)
+            except asyncio.TimeoutError:
+                break
+            batch.append(item)
+            count += len(item[0])
+        return batch
+    
+    async def _worker(self):
+        """Drain the queue, encoding each collected batch in one call."""
+        try:
+            while True:
+                batch = await self._collect_batch()
+                # Callers that gave up (e.g. request cancelled) don't need encoding
+                batch = [item for item in batch if not item[1].done()]
+                if not batch:
+                    continue
+                
+                texts = [text for item in batch for text in item[0]]
+                started = time.perf_counter()
+                try:
+                    embeddings = await self._loop.run_in_executor(self._executor, self._encode_fn, texts)
+                except Exception as e:
+                    logger.error(f"Embedding batch of {len(texts)} text(s) failed: {e}")
+                    for _, future, _ in batch:
+                        if not future.done():
+                            future.set_exception(e)
+                    continue
+                
+                self._record_batch(batch, len(texts), started)
+                
+                offset = 0
+                for item_texts, future, _ in batch:
+                    rows = embeddings[offset:offset + len(item_texts)]
+                    offset += len(item_texts)
+                    if not future.done():
+                        future.set_result(rows)
+        except asyncio.CancelledError:
+            pass
+    
+    def _record_batch(self, batch: List[Tuple[List[str], asyncio.Future, float]], text_count: int, started: float):
+        """Update batch-size and queue-wait statistics."""
+        stats = self._stats
+        stats["requests"] += len(batch)
+        stats["batches"] += 1
+        stats["texts"] += text_count
+        stats["max_batch_size_seen"] = max(stats["max_batch_size_seen"], text_count)
+        stats["total_encode_ms"] += (time.perf_counter() - started) * 1000
+        for _, _, enqueued in batch:
+            wait_ms = (started - enqueued) * 1000
+            stats["total_queue_wait_ms"] += wait_ms
+            stats["max_queue_wait_ms"] = max(stats["max_queue_wait_ms"], wait_ms)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get batching statistics.
+        
+        Returns:
+            Dictionary with request/batch counts, average and max batch size,
+            average and max queue wait, and average encode time
+        """
+        stats = self._stats
+        batches = stats["batches"] or 1
+        requests = stats["requests"] or 1
+        return {
+            "window_ms": self.window_ms,
+            "max_batch_size": self.max_batch_size,
+            "requests": stats["requests"],
+            "batches": stats["batches"],
+            "texts": stats["texts"],
+            "avg_batch_size": round(stats["texts"] / batches, 2),
+            "max_batch_size_seen": stats["max_batch_size_seen"],
+            "avg_queue_wait_ms": round(stats["total_queue_wait_ms"] / requests, 3),
+            "max_queue_wait_ms": round(stats["max_queue_wait_ms"], 3),
+            "avg_encode_ms": round(stats["total_encode_ms"] / batches, 3)
+        }
+    
+    def submit(self, fn: Callable[..., Any], *args: Any):
+        """Run a blocking function on the encoder thread, after any work already queued there.
+        
+        Args:
+            fn: Function to run
+            *args: Arguments for fn
+        
+        Returns:
+            concurrent.futures.Future of the call
+        """
+        return self._executor.submit(fn, *args)
+    
+    def close(self):
+        """Stop the worker task and shut down the encoder thread."""
+        if self._worker_task and not self._worker_task.done():
+            self._worker_task.cancel()
+        self._worker_task = None
+        self._executor.shutdown(wait=False)
+
+
+class EmbeddingCache:
+    """Content-addressed embedding cache with an LRU memory tier and an optional disk tier.
+    
+    Entries are keyed by a hash of the model name and the whitespace-normalized
+    text. The disk tier keeps float32 vectors in an append-only file that is
+    read through a memory map, plus a parallel file of keys, so cached
+    embeddings survive restarts. Each model gets its own disk directory.
+    
+    The disk tier holds at most `max_disk_entries` vectors. Past that it is
+    compacted to the most recently used three quarters: the kept rows are
+    written to a new generation of files, which `meta.json` then names, so a
+    crash mid-compaction leaves the previous files in use. Disk writes happen
+    on the thread passed to put_many (the encoder thread) and readers only
+    take `_disk_lock` to look up and read a row.
+    """
+    
+    def __init__(
+        self,
+        model_name: str,
+        max_entries: int = 4096,
+        disk_dir: Optional[Path] = None,
+        max_disk_entries: int = 100000
+    ):
+        """Initialize the cache.
+        
+        Args:
+            model_name: Embedding model the cached vectors belong to
+            max_entries: Maximum number of vectors kept in memory
+            disk_dir: Root directory for the disk tier, or None to keep the cache in memory only
+            max_disk_entries: Maximum number of vectors kept on disk before compaction
+        """
+        self.max_entries = max(1, max_entries)
+        self.max_disk_entries = max(1, max_disk_entries)
+        self.disk_root = Path(disk_dir) if disk_dir else None
+        self._memory: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "disk_compactions": 0}
+        self._disk_lock = threading.Lock()  # Guards the disk index, memory map and generation
+        self._reset_disk_state()
+        self.model_name = model_name
+        self._open_disk_tier()
+    
+    def _reset_disk_state(self):
+        """Forget the current disk tier (files are left in place)."""
+        self._disk_dir: Optional[Path] = None
+        self._disk_index: "OrderedDict[str, int]" = OrderedDict()  # Key -> row, least recently used first
+        self._dimension: Optional[int] = None
+        self._generation = 0
+        self._disk_rows = 0  # Complete rows in the current vector file
+        self._mmap: Optional[np.memmap] = None
+    
+    @staticmethod
+    def _normalize(text: str) -> str:
+        """Collapse whitespace so trivially different copies of a text share an entry."""
+        return " ".join(text.split())
+    
+    def _key(self, text: str) -> str:
+        """Build the cache key for a text under the current model."""
+        return hashlib.sha256(f"{self.model_name}\0{self._normalize(text)}".encode("utf-8")).hexdigest()
+    
+    @staticmethod
+    def _file_names(generation: int) -> Tuple[str, str]:
+        """Vector and key file names of a disk tier generation (0 = files from before compaction)."""
+        if generation == 0:
+            return "vectors.f32", "keys.txt"
+        return f"vectors.{generation}.f32", f"keys.{generation}.txt"
+    
+    def _write_meta(self, disk_dir: Path, dimension: int, generation: int):
+        """Atomically replace meta.json, which names the current generation."""
+        tmp_path = disk_dir / "meta.json.tmp"
+        with open(tmp_path, "w") as f:
+            f.write(json.dumps({"model": self.model_name, "dimension": dimension, "generation": generation}))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, disk_dir / "meta.json")
+    
+    @classmethod
+    def _remove_stale_files(cls, disk_dir: Path, generation: int):
+        """Delete vector and key files of other generations (old or from a crashed compaction)."""
+        current = set(cls._file_names(generation))
+        for pattern in ("vectors*.f32", "keys*.txt"):
+            for path in disk_dir.glob(pattern):
+                if path.name not in current:
+                    path.unlink(missing_ok=True)
+    
+    def _open_disk_tier(self):
+        """Load the key index for the current model's disk directory."""
+        if not self.disk_root:
+            return
+        safe_name = re.sub(r"[^A-Za-z0-9_.-]", "_", self.model_name)
+        self._disk_dir = self.disk_root / safe_name
+        try:
+            self._disk_dir.mkdir(parents=True, exist_ok=True)
+            meta_path = self._disk_dir / "meta.json"
+            if not meta_path.exists():
+                return
+            meta = json.loads(meta_path.read_text())
+            if meta.get("model") != self.model_name or not meta.get("dimension"):
+                logger.warning(f"Embedding disk cache at {self._disk_dir} belongs to another model, clearing it")
+                self._clear_disk_files()
+                return
+            self._dimension = int(meta["dimension"])
+            self._generation = int(meta.get("generation", 0))
+            self._remove_stale_files(self._disk_dir, self._generation)
+            vectors_name, keys_name = self._file_names(self._generation)
+            keys_path = self._disk_dir / keys_name
+            vectors_path = self._disk_dir / vectors_name
+            keys = keys_path.read_text().split("\n")[:-1] if keys_path.exists() else []
+            rows = vectors_path.stat().st_size // (self._dimension * 4) if vectors_path.exists() else 0
+            # A crash mid-append leaves extra vector rows or a partial key line; cut both
+            # files back to the rows that have a key so later appends stay aligned
+            rows = min(rows, len(keys))
+            if vectors_path.exists():
+                os.truncate(vectors_path, rows * self._dimension * 4)
+            if keys_path.exists():
+                os.truncate(keys_path, rows * 65)  # 64 hex digits and a newline per key
+            self._disk_index = OrderedDict((key, row) for row, key in enumerate(keys[:rows]))
+            self._disk_rows = rows
+            logger.info(f"Loaded embedding disk cache with {len(self._disk_index)} entries from {self._disk_dir}")
+        except Exception as e:
+            logger.warning(f"Could not open embedding disk cache, continuing without it: {e}")
+            self._reset_disk_state()
+    
+    def _clear_disk_files(self):
+        """Delete the current model's disk tier files."""
+        (self._disk_dir / "meta.json").unlink(missing_ok=True)
+        self._remove_stale_files(self._disk_dir, -1)
+        self._disk_index = OrderedDict()
+        self._dimension = None
+        self._generation = 0
+        self._disk_rows = 0
+        self._mmap = None
+    
+    def _read_disk(self, key: str) -> Optional[np.ndarray]:
+        """Read a vector from the disk tier, remapping the file if it has grown."""
+        with self._disk_lock:
+            row = self._disk_index.get(key)
+            if row is None or self._disk_dir is None:
+                return None
+            self._disk_index.move_to_end(key)
+            if self._mmap is None or row >= self._mmap.shape[0]:
+                vectors_name, _ = self._file_names(self._generation)
+                self._mmap = np.memmap(self._disk_dir / vectors_name, dtype=np.float32, mode="r", shape=(self._disk_rows, self._dimension))
+            return np.array(self._mmap[row])
+    
+    def _write_disk(self, items: List[Tuple[str, np.ndarray]]):
+        """Append vectors to the disk tier, compacting it once it is over its cap.
+        
+        Only ever runs on one thread at a time (the encoder thread), so the files
+        are appended outside the lock and only the index update takes it.
+        """
+        with self._disk_lock:
+            disk_dir, generation, start = self._disk_dir, self._generation, self._disk_rows
+            if disk_dir is None:
+                return
+            if self._dimension is None and items:
+                self._dimension = int(np.asarray(items[0][1]).size)
+                self._write_meta(disk_dir, self._dimension, generation)
+            dimension = self._dimension
+            seen = set()
+            new_items = []
+            for key, embedding in items:
+                vector = np.asarray(embedding, dtype=np.float32).reshape(-1)
+                if key in self._disk_index or key in seen or vector.shape[0] != dimension:
+                    continue
+                seen.add(key)
+                new_items.append((key, vector))
+        if not new_items:
+            return
+        
+        # Vectors first, then keys: a key is only ever recorded for a complete row
+        vectors_name, keys_name = self._file_names(generation)
+        with open(disk_dir / vectors_name, "ab") as f:
+            f.write(b"".join(vector.tobytes() for _, vector in new_items))
+        with open(disk_dir / keys_name, "a") as f:
+            f.write("".join(key + "\n" for key, _ in new_items))
+        
+        with self._disk_lock:
+            if self._disk_dir != disk_dir or self._generation != generation:
+                return  # Model changed meanwhile
+            for offset, (key, _) in enumerate(new_items):
+                self._disk_index[key] = start + offset
+            self._disk_rows = start + len(new_items)
+            over_cap = len(self._disk_index) > self.max_disk_entries
+        if over_cap:
+            self._compact_disk()
+    
+    def _compact_disk(self):
+        """Rewrite the disk tier keeping only the most recently used entries."""
+        with self._disk_lock:
+            disk_dir, generation, dimension = self._disk_dir, self._generation, self._dimension
+            if disk_dir is None or dimension is None:
+                return
+            keep_count = max(1, self.max_disk_entries * 3 // 4)
+            keep = list(self._disk_index.items())[-keep_count:]
+        
+        old_vectors_name, _ = self._file_names(generation)
+        new_generation = generation + 1
+        vectors_name, keys_name = self._file_names(new_generation)
+        old_rows = (disk_dir / old_vectors_name).stat().st_size // (dimension * 4)
+        old = np.memmap(disk_dir / old_vectors_name, dtype=np.float32, mode="r", shape=(old_rows, dimension))
+        with open(disk_dir / vectors_name, "wb") as f:
+            for start in range(0, len(keep), 4096):
+                rows = [row for _, row in keep[start:start + 4096]]
+                f.write(np.ascontiguousarray(old[rows]).tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+        del old
+        with open(disk_dir / keys_name, "w") as f:
+            f.write("".join(key + "\n" for key, _ in keep))
+            f.flush()
+            os.fsync(f.fileno())
+        
+        with self._disk_lock:
+            if self._disk_dir != disk_dir or self._generation != generation:
+                return  # Model changed meanwhile
+            self._write_meta(disk_dir, dimension, new_generation)
+            self._generation = new_generation
+            self._disk_index = OrderedDict((key, row) for row, (key, _) in enumerate(keep))
+            self._disk_rows = len(keep)
+            self._mmap = None
+        self._remove_stale_files(disk_dir, new_generation)
+        self._stats["disk_compactions"] += 1
+        logger.info(f"Compacted embedding disk cache to {len(keep)} entries")
+    
+    def _write_disk_safely(self, items: List[Tuple[str, np.ndarray]]):
+        try:
+            self._write_disk(items)
+        except Exception as e:
+            logger.warning(f"Embedding disk cache write failed: {e}")
+    
+    def get(self, text: str) -> Optional[np.ndarray]:
+        """Look up the embedding for a text.
+        
+        Args:
+            text: Text to look up
+        
+        Returns:
+            Cached embedding, or None on a miss
+        """
+        key = self._key(text)
+        embedding = self._memory.get(key)
+        if embedding is not None:
+            self._memory.move_to_end(key)
+            self._stats["memory_hits"] += 1
+            if key in self._disk_index:
+                # Keep hot entries at the recent end of the disk tier too, so compaction keeps them
+                with self._disk_lock:
+                    if key in self._disk_index:
+                        self._disk_index.move_to_end(key)
+            return embedding
+        
+        try:
+            embedding = self._read_disk(key)
+        except Exception as e:
+            logger.warning(f"Embedding disk cache read failed: {e}")
+            embedding = None
+        if embedding is not None:
+            self._stats["disk_hits"] += 1
+            self._remember(key, embedding)
+            return embedding
+        
+        self._stats["misses"] += 1
+        return None
+    
+    def put(self, text: str, embedding: np.ndarray):
+        """Store the embedding for a text in both tiers (the disk write is blocking).
+        
+        Args:
+            text: Text the embedding was computed from
+            embedding: 1D embedding vector
+        """
+        self.put_many([text], [embedding])
+    
+    def put_many(
+        self,
+        texts: List[str],
+        embeddings: List[np.ndarray],
+        submit: Optional[Callable[..., Any]] = None
+    ):
+        """Store embeddings for several texts in both tiers.
+        
+        Args:
+            texts: Texts the embeddings were computed from
+            embeddings: 1D embedding vector per text
+            submit: Runs the disk write off the caller's thread, e.g. EmbeddingBatcher.submit
+                (None = write before returning)
+        """
+        items = [(self._key(text), embedding) for text, embedding in zip(texts, embeddings)]
+        for key, embedding in items:
+            self._remember(key, embedding)
+        if self._disk_dir is None or not items:
+            return
+        if submit is not None:
+            submit(self._write_disk_safely, items)
+        else:
+            self._write_disk_safely(items)
+    
+    def _remember(self, key: str, embedding: np.ndarray):
+        """Insert into the memory tier, evicting the least recently used entry."""
+        self._memory[key] = embedding
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+    
+    def set_model(self, model_name: str):
+        """Invalidate the cache for a new embedding model.
+        
+        Args:
+            model_name: New embedding model name
+        """
+        if model_name == self.model_name:
+            return
+        logger.info(f"Embedding model changed from {self.model_name} to {model_name}, invalidating embedding cache")
+        self._memory.clear()
+        with self._disk_lock:
+            self._reset_disk_state()
+            self.model_name = model_name
+            self._open_disk_tier()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache statistics.
+        
+        Returns:
+            Dictionary with hit/miss counters and tier sizes
+        """
+        lookups = self._stats["memory_hits"] + self._stats["disk_hits"] + self._stats["misses"]
+        hits = self._stats["memory_hits"] + self._stats["disk_hits"]
+        return {
+            **self._stats,
+            "hit_rate": round(hits / lookups, 3) if lookups else 0.0,
+            "memory_entries": len(self._memory),
+            "max_memory_entries": self.max_entries,
+            "disk_entries": len(self._disk_index),
+            "max_disk_entries": self.max_disk_entries,
+            "disk_enabled": self._disk_dir is not None
+        }
 
 
 class EmbeddingModel:
@@ -11,12 +527,25 @@ class EmbeddingModel:
     
     This class handles embedding generation using sentence-transformers.
     Models are automatically downloaded from HuggingFace on first use.
+    Async encode calls are served from an EmbeddingCache where possible and the
+    remaining texts are micro-batched through an EmbeddingBatcher.
     """
     
     def __init__(self):
         self.model_name = settings.embedding_model
         self.model: Union[SentenceTransformer, None] = None
         self._initialized = False
+        self._batcher = EmbeddingBatcher(
+            self._encode_batch,
+            window_ms=settings.embedding_batch_window_ms,
+            max_batch_size=settings.embedding_max_batch_size
+        )
+        self._cache = EmbeddingCache(
+            self.model_name,
+            max_entries=settings.embedding_cache_size,
+            disk_dir=settings.embedding_cache_dir if settings.embedding_disk_cache else None,
+            max_disk_entries=settings.embedding_disk_cache_max_entries
+        )
     
     def _initialize_model(self):
         """Initialize embedding model (auto-downloads on first use).
@@ -37,9 +566,34 @@ class EmbeddingModel:
                 print(f"Error initializing embedding model: {e}")
                 raise
     
+    def _encode_batch(self, texts: List[str]) -> np.ndarray:
+        """Encode a batch of texts (runs on the batcher's worker thread).
+        
+        Args:
+            texts: Texts to encode
+        
+        Returns:
+            2D numpy array of embeddings
+        """
+        if not self.model:
+            self._initialize_model()
+        
+        if not self.model:
+            raise RuntimeError("Failed to initialize embedding model")
+        
+        return self.model.encode(
+            texts,
+            batch_size=self._batcher.max_batch_size,
+            convert_to_numpy=True,
+            show_progress_bar=False
+        )
+    
     async def encode(self, text: Union[str, List[str]]) -> np.ndarray:
         """Generate embedding for text.
         
+        Cached texts skip the model entirely; the rest of concurrent calls are
+        merged into a single forward pass.
+        
         Args:
             text: Single text string or list of text strings
         
@@ -49,26 +603,33 @@ class EmbeddingModel:
         Raises:
             RuntimeError: If model initialization fails
         """
-        if not self.model:
-            # Run model initialization in thread pool to avoid blocking
-            loop = asyncio.get_event_loop()
-            await loop.run_in_executor(None, self._initialize_model)
+        self._check_model_changed()
         
-        if not self.model:
-            raise RuntimeError("Failed to initialize embedding model")
+        texts = [text] if isinstance(text, str) else list(text)
+        if not texts:
+            return await self._batcher.encode([])
         
-        # Run encoding in thread pool (sentence-transformers is CPU-bound)
-        loop = asyncio.get_event_loop()
-        embedding = await loop.run_in_executor(
-            None,
-            lambda: self.model.encode(
-                text,
-                convert_to_numpy=True,
-                show_progress_bar=False
-            )
-        )
+        embeddings: List[Optional[np.ndarray]] = [self._cache.get(t) for t in texts]
+        missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+        if missing:
+            encoded = await self._batcher.encode([texts[i] for i in missing])
+            for i, embedding in zip(missing, encoded):
+                embeddings[i] = embedding
+            # Disk writes run on the encoder thread, not the event loop
+            self._cache.put_many([texts[i] for i in missing], list(encoded), submit=self._batcher.submit)
         
-        return embedding
+        if isinstance(text, str):
+            return embeddings[0]
+        return np.vstack(embeddings)
+    
+    def _check_model_changed(self):
+        """Switch to the configured model if settings.embedding_model changed."""
+        if settings.embedding_model == self.model_name:
+            return
+        self.model_name = settings.embedding_model
+        self.model = None
+        self._initialized = False
+        self._cache.set_model(self.model_name)
     
     def encode_sync(self, text: Union[str, List[str]]) -> np.ndarray:
         """Synchronous version of encode (for use in non-async contexts).
@@ -101,3 +662,36 @@ class EmbeddingModel:
         
         # Get dimension from model
         return self.model.get_sentence_embedding_dimension()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get embedding statistics.
+        
+        Returns:
+            Dictionary with model name, batching and cache statistics
+        """
+        return {
+            "model": self.model_name,
+            "loaded": self.model is not None,
+            "batching": self._batcher.get_stats(),
+            "cache": self._cache.get_stats()
+        }
+    
+    def close(self):
+        """Stop the batching worker and release the encoder thread."""
+        self._batcher.close()
+
+
+_shared_embedder: Optional[EmbeddingModel] = None
+
+
+def get_embedder() -> EmbeddingModel:
+    """Get the process-wide embedding model.
+    
+    Every service shares this instance, so the model is loaded once and a
+    single EmbeddingCache owns the disk cache directory.
+    """
+    global _shared_embedder
+    if _shared_embedder is None:
+        logger.info("Lazy loading embedding model...")
+        _shared_embedder = EmbeddingModel()
+    return _shared_embedder
@@ -1,55 +1,317 @@
 """Fast file-based conversation storage using JSON files."""
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime
 from pathlib import Path
+import asyncio
 import json
+import os
 import aiofiles
 import logging
+from .conversation_catalog import ConversationCatalog
 
 logger = logging.getLogger(__name__)
 
 
+def _atomic_write_json(path: Path, data: Dict[str, Any]):
+    """Write JSON to a temporary file, fsync it and rename it over the target."""
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(json.dumps(data, indent=2, default=str, ensure_ascii=False))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def _read_jsonl(path: Path) -> List[Dict[str, Any]]:
+    """Read a JSONL file, skipping a partial trailing line left by a crash mid-write."""
+    records = []
+    if not path.exists():
+        return records
+    with open(path, 'r', encoding='utf-8') as f:
+        lines = f.readlines()
+    for number, line in enumerate(lines, 1):
+        text = line.strip()
+        if not text:
+            continue
+        try:
+            records.append(json.loads(text))
+        except json.JSONDecodeError:
+            if number == len(lines) and not line.endswith("\n"):
+                logger.warning(f"Skipping partial trailing record in {path.name}")
+            else:
+                logger.error(f"Skipping corrupt record on line {number} of {path.name}")
+    return records
+
+
+def _truncate_partial_tail(path: Path):
+    """Cut a JSONL file back to its last complete line, dropping a partial record left by a crash."""
+    if not path.exists():
+        return
+    with open(path, 'rb+') as f:
+        size = f.seek(0, os.SEEK_END)
+        if size == 0:
+            return
+        f.seek(size - 1)
+        if f.read(1) == b"\n":
+            return
+        # Scan backwards for the last newline
+        end = size
+        while end > 0:
+            start = max(0, end - 4096)
+            f.seek(start)
+            chunk = f.read(end - start)
+            newline = chunk.rfind(b"\n")
+            if newline != -1:
+                end = start + newline + 1
+                break
+            end = start
+        f.truncate(end)
+        f.flush()
+        os.fsync(f.fileno())
+    logger.warning(f"Truncated partial trailing record in {path.name} ({size - end} bytes)")
+
+
+def _append_jsonl(path: Path, record: Dict[str, Any]):
+    """Append one record to a JSONL file and fsync it.
+    
+    If the file doesn't end in a newline (a partial record from a crash), the
+    record starts on a fresh line so it can't be joined to the partial one.
+    """
+    line = (json.dumps(record, default=str, ensure_ascii=False) + "\n").encode('utf-8')
+    with open(path, 'ab+') as f:
+        size = f.seek(0, os.SEEK_END)
+        if size > 0:
+            f.seek(size - 1)
+            if f.read(1) != b"\n":
+                line = b"\n" + line
+        f.write(line)
+        f.flush()
+        os.fsync(f.fileno())
+
+
 class FileConversationStore:
     """Fast file-based storage for conversations using JSON files.
     
     Structure:
-    - conversations/{id}.json - Each conversation as a JSON file
-    - conversations/index.json - Metadata index for fast listing
+    - conversations/{id}.json - Conversation snapshot (messages as of the last compaction)
+    - conversations/{id}.log - Append-only JSONL of changes since the snapshot
+    - conversations/{id}.summary - Rolling summary of the conversation's older turns
+    - conversations/catalog.db - SQLite metadata catalogue for listing and search
+    
+    Saving a turn appends one record to the conversation log and updates one
+    catalogue row, so it costs O(new messages). Once a log grows past its
+    threshold it is folded into its snapshot, which is written to a temporary file
+    and atomically renamed into place. Log records carry a sequence number and the
+    snapshot stores the last one it contains, so a crash between writing the
+    snapshot and removing the log never applies a record twice. Appends are
+    fsynced, and a partial record left by a crash mid-append is cut off before
+    the next append so it can't swallow the record written after it.
+    
+    Listing reads a page straight from the catalogue. Catalogue rows whose file
+    is gone and files missing from the catalogue are fixed up by reconcile(),
+    which runs in the background rather than on every listing.
     """
     
-    def __init__(self, base_dir: Path):
+    def __init__(
+        self,
+        base_dir: Path,
+        compact_after_records: int = 100,
+        reconcile_interval: float = 300.0
+    ):
+        """Initialize the store.
+        
+        Args:
+            base_dir: Base directory for conversation storage
+            compact_after_records: Log records per conversation before it is compacted
+            reconcile_interval: Seconds between background catalogue reconciliations (0 = startup only)
+        """
         self.base_dir = Path(base_dir)
         self.conversations_dir = self.base_dir / "conversations"
-        self.index_file = self.conversations_dir / "index.json"
         self.conversations_dir.mkdir(parents=True, exist_ok=True)
-        self._index_cache: Optional[Dict[str, Any]] = None
+        self.compact_after_records = max(1, compact_after_records)
+        self.reconcile_interval = reconcile_interval
+        self.catalog = ConversationCatalog(self.conversations_dir / "catalog.db")
+        self._migrate_legacy_index()
+        # conversation_id -> {"seq": last sequence number, "records": records in the log,
+        #                     "vector_memory": current vector memory settings}
+        self._log_state: Dict[str, Dict[str, Any]] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._reconcile_task: Optional[asyncio.Task] = None
+        self._last_reconcile: Optional[Dict[str, Any]] = None
     
-    async def _load_index(self) -> Dict[str, Any]:
-        """Load the conversations index file."""
-        if self._index_cache is not None:
-            return self._index_cache
-        
-        if not self.index_file.exists():
-            self._index_cache = {"conversations": {}}
-            return self._index_cache
+    def _conv_file(self, conversation_id: str) -> Path:
+        return self.conversations_dir / f"{conversation_id}.json"
+    
+    def _log_file(self, conversation_id: str) -> Path:
+        return self.conversations_dir / f"{conversation_id}.log"
+    
+    def _summary_file(self, conversation_id: str) -> Path:
+        return self.conversations_dir / f"{conversation_id}.summary"
+    
+    def _lock(self, conversation_id: str) -> asyncio.Lock:
+        """Get the lock serialising writes to one conversation."""
+        lock = self._locks.get(conversation_id)
+        if lock is None:
+            lock = self._locks[conversation_id] = asyncio.Lock()
+        return lock
+    
+    def _migrate_legacy_index(self):
+        """Import index.json (and its journal) into the catalogue, then retire them."""
+        index_file = self.conversations_dir / "index.json"
+        journal_file = self.conversations_dir / "index.journal"
+        if not index_file.exists() and not journal_file.exists():
+            return
         
         try:
-            async with aiofiles.open(self.index_file, 'r', encoding='utf-8') as f:
-                content = await f.read()
-                self._index_cache = json.loads(content)
-                return self._index_cache
+            conversations = {}
+            if index_file.exists():
+                with open(index_file, 'r', encoding='utf-8') as f:
+                    conversations = json.load(f).get("conversations", {})
+            for record in _read_jsonl(journal_file):
+                if "put" in record:
+                    conversations[record["put"]] = record.get("entry", {})
+                elif "del" in record:
+                    conversations.pop(record["del"], None)
+            
+            self.catalog.upsert_many(
+                {**entry, "conversation_id": conv_id}
+                for conv_id, entry in conversations.items()
+            )
+            for path in (index_file, journal_file):
+                if path.exists():
+                    os.replace(path, path.with_name(path.name + ".migrated"))
+            logger.info(f"Migrated {len(conversations)} conversations from index.json to the catalogue")
         except Exception as e:
-            logger.error(f"Error loading index: {e}")
-            self._index_cache = {"conversations": {}}
-            return self._index_cache
+            logger.error(f"Error migrating conversation index: {e}")
     
-    async def _save_index(self):
-        """Save the conversations index file."""
-        try:
-            async with aiofiles.open(self.index_file, 'w', encoding='utf-8') as f:
-                await f.write(json.dumps(self._index_cache, indent=2, default=str))
-        except Exception as e:
-            logger.error(f"Error saving index: {e}")
+    def get_conversation_meta(self, conversation_id: str) -> Optional[Dict[str, Any]]:
+        """Get catalogue metadata for a conversation.
+        
+        Args:
+            conversation_id: Conversation ID
+        
+        Returns:
+            Dict with name, created_at, updated_at, message_count and pinned, or None
+        """
+        return self.catalog.get(conversation_id)
+    
+    async def _load_state(self, conversation_id: str, track: bool = False) -> Optional[Dict[str, Any]]:
+        """Load a conversation snapshot and apply its log.
+        
+        Args:
+            conversation_id: Conversation ID
+            track: Remember the log position for appends (only with the conversation lock held)
+        
+        Returns:
+            Conversation data (as stored in the snapshot), or None if not found
+        """
+        conv_file = self._conv_file(conversation_id)
+        if not conv_file.exists():
+            return None
+        
+        async with aiofiles.open(conv_file, 'r', encoding='utf-8') as f:
+            data = json.loads(await f.read())
+        data.setdefault("messages", [])
+        
+        snapshot_seq = data.get("log_seq", 0)
+        last_seq = snapshot_seq
+        applied = 0
+        log_file = self._log_file(conversation_id)
+        if track:
+            # Appends follow, so drop any partial record a crash left at the end
+            await asyncio.to_thread(_truncate_partial_tail, log_file)
+        for record in _read_jsonl(log_file):
+            seq = record.get("seq", 0)
+            if seq <= snapshot_seq:
+                continue  # Already folded into the snapshot
+            self._apply_record(data, record)
+            last_seq = max(last_seq, seq)
+            applied += 1
+        
+        data["log_seq"] = last_seq
+        data["message_count"] = len(data["messages"])
+        if track:
+            self._log_state[conversation_id] = {
+                "seq": last_seq,
+                "records": applied,
+                "vector_memory": dict(data.get("vector_memory") or {})
+            }
+        return data
+    
+    @staticmethod
+    def _apply_record(data: Dict[str, Any], record: Dict[str, Any]):
+        """Apply one log record to conversation data."""
+        op = record.get("op")
+        if op == "append":
+            data["messages"].extend(record.get("messages", []))
+        elif op == "update":
+            index = record.get("index", -1)
+            if 0 <= index < len(data["messages"]):
+                data["messages"][index].update(record.get("fields", {}))
+        elif op == "meta":
+            if "name" in record:
+                data["name"] = record["name"]
+            if "pinned" in record:
+                data.setdefault("metadata", {})["pinned"] = record["pinned"]
+            if "vector_memory" in record:
+                data.setdefault("vector_memory", {}).update(record["vector_memory"])
+        if record.get("updated_at"):
+            data["updated_at"] = record["updated_at"]
+    
+    async def _append_log(self, conversation_id: str, record: Dict[str, Any]):
+        """Append a record to a conversation log, compacting it when it grows too long.
+        
+        Must be called with the conversation lock held.
+        """
+        state = self._log_state.get(conversation_id)
+        if state is None:
+            if await self._load_state(conversation_id, track=True) is None:
+                raise FileNotFoundError(f"Conversation {conversation_id} has no snapshot")
+            state = self._log_state[conversation_id]
+        
+        record["seq"] = state["seq"] + 1
+        await asyncio.to_thread(_append_jsonl, self._log_file(conversation_id), record)
+        state["seq"] = record["seq"]
+        state["records"] += 1
+        if "vector_memory" in record:
+            state["vector_memory"].update(record["vector_memory"])
+        
+        if state["records"] >= self.compact_after_records:
+            await self._compact(conversation_id)
+    
+    async def _compact(self, conversation_id: str):
+        """Fold a conversation log into its snapshot.
+        
+        Must be called with the conversation lock held.
+        """
+        data = await self._load_state(conversation_id, track=True)
+        if data is None:
+            return
+        await asyncio.to_thread(_atomic_write_json, self._conv_file(conversation_id), data)
+        self._log_file(conversation_id).unlink(missing_ok=True)
+        self._log_state[conversation_id] = {
+            "seq": data["log_seq"],
+            "records": 0,
+            "vector_memory": dict(data.get("vector_memory") or {})
+        }
+        logger.debug(f"Compacted conversation {conversation_id} ({data['message_count']} messages)")
+    
+    async def compact_all(self) -> int:
+        """Compact every conversation that has a pending log.
+        
+        Returns:
+            Number of conversations compacted
+        """
+        count = 0
+        for log_file in self.conversations_dir.glob("*.log"):
+            conversation_id = log_file.stem
+            try:
+                async with self._lock(conversation_id):
+                    await self._compact(conversation_id)
+                count += 1
+            except Exception as e:
+                logger.error(f"Error compacting conversation {conversation_id}: {e}")
+        return count
     
     async def get_conversation(
         self,
@@ -65,24 +327,107 @@ class FileConversationStore:
         Returns:
             List of messages or None if not found
         """
-        conv_file = self.conversations_dir / f"{conversation_id}.json"
+        try:
+            data = await self._load_state(conversation_id)
+            if data is None:
+                return None
+            messages = data["messages"]
+            
+            if limit:
+                messages = messages[-limit:]  # Get last N messages
+            
+            return messages
+        except Exception as e:
+            logger.error(f"Error reading conversation {conversation_id}: {e}")
+            return None
+    
+    async def get_conversation_summary(self, conversation_id: str) -> Optional[Dict[str, Any]]:
+        """Get the rolling summary stored next to a conversation.
         
-        if not conv_file.exists():
+        Args:
+            conversation_id: Conversation ID
+        
+        Returns:
+            Summary dict as saved by set_conversation_summary, or None if there is none
+        """
+        summary_file = self._summary_file(conversation_id)
+        if not summary_file.exists():
+            return None
+        try:
+            async with aiofiles.open(summary_file, 'r', encoding='utf-8') as f:
+                return json.loads(await f.read())
+        except Exception as e:
+            logger.error(f"Error reading summary of conversation {conversation_id}: {e}")
             return None
+    
+    async def set_conversation_summary(self, conversation_id: str, summary: Dict[str, Any]) -> bool:
+        """Replace the rolling summary of a conversation.
+        
+        Args:
+            conversation_id: Conversation ID
+            summary: Summary dict (stored as JSON)
         
+        Returns:
+            True if successful, False if the conversation doesn't exist or the write failed
+        """
         try:
-            async with aiofiles.open(conv_file, 'r', encoding='utf-8') as f:
-                content = await f.read()
-                data = json.loads(content)
-                messages = data.get("messages", [])
+            async with self._lock(conversation_id):
+                if not self._conv_file(conversation_id).exists():
+                    return False
+                await asyncio.to_thread(_atomic_write_json, self._summary_file(conversation_id), summary)
+            return True
+        except Exception as e:
+            logger.error(f"Error saving summary of conversation {conversation_id}: {e}")
+            return False
+    
+    async def append_messages(
+        self,
+        conversation_id: str,
+        messages: List[Dict[str, Any]],
+        name: Optional[str] = None,
+        metadata: Optional[Dict[str, Any]] = None
+    ) -> bool:
+        """Append messages to a conversation, creating it if needed.
+        
+        Args:
+            conversation_id: Conversation ID
+            messages: New messages to append
+            name: Conversation name
+            metadata: Additional metadata (created_at, pinned) used when creating the conversation
+        
+        Returns:
+            True if successful, False otherwise
+        """
+        now = datetime.utcnow().isoformat()
+        try:
+            async with self._lock(conversation_id):
+                if not self._conv_file(conversation_id).exists():
+                    return await self._write_snapshot(conversation_id, messages, name, metadata)
                 
-                if limit:
-                    messages = messages[-limit:]  # Get last N messages
+                entry = self.catalog.get(conversation_id)
+                name_changed = name is not None and (entry is None or entry.get("name") != name)
+                if messages:
+                    record = {"op": "append", "messages": messages, "updated_at": now}
+                    await self._append_log(conversation_id, record)
+                if name_changed:
+                    await self._append_log(conversation_id, {"op": "meta", "name": name, "updated_at": now})
+                if not messages and not name_changed:
+                    return True
                 
-                return messages
+                if entry is None:
+                    # Missing from the catalogue; rebuild the entry from the file
+                    data = await self._load_state(conversation_id, track=True)
+                    entry = self._entry_from_data(conversation_id, data)
+                else:
+                    entry["message_count"] = entry.get("message_count", 0) + len(messages)
+                    if name_changed:
+                        entry["name"] = name
+                entry["updated_at"] = now
+                self.catalog.upsert(entry)
+            return True
         except Exception as e:
-            logger.error(f"Error reading conversation {conversation_id}: {e}")
-            return None
+            logger.error(f"Error appending to conversation {conversation_id}: {e}")
+            return False
     
     async def save_conversation(
         self,
@@ -91,7 +436,9 @@ class FileConversationStore:
         name: Optional[str] = None,
         metadata: Optional[Dict[str, Any]] = None
     ) -> bool:
-        """Save a conversation to a JSON file.
+        """Save a conversation, replacing all of its messages.
+        
+        Use append_messages for adding a turn; this rewrites the whole snapshot.
         
         Args:
             conversation_id: Conversation ID
@@ -99,18 +446,30 @@ class FileConversationStore:
             name: Conversation name
             metadata: Additional metadata
         """
-        conv_file = self.conversations_dir / f"{conversation_id}.json"
+        async with self._lock(conversation_id):
+            return await self._write_snapshot(conversation_id, messages, name, metadata)
+    
+    async def _write_snapshot(
+        self,
+        conversation_id: str,
+        messages: List[Dict[str, Any]],
+        name: Optional[str],
+        metadata: Optional[Dict[str, Any]]
+    ) -> bool:
+        """Replace a conversation snapshot. Must be called with the conversation lock held."""
+        conv_file = self._conv_file(conversation_id)
         
         # Prepare conversation data
         now = datetime.utcnow().isoformat()
         
-        # Load existing vector memory settings if file exists
+        # Load existing vector memory settings and log position if file exists
         vector_memory = {"custom": False, "save_enabled": None, "read_enabled": None}
+        log_seq = 0
         if conv_file.exists():
             try:
-                async with aiofiles.open(conv_file, 'r', encoding='utf-8') as f:
-                    existing_data = json.loads(await f.read())
-                    vector_memory = existing_data.get("vector_memory", vector_memory)
+                existing_data = await self._load_state(conversation_id, track=True)
+                vector_memory = existing_data.get("vector_memory", vector_memory)
+                log_seq = existing_data.get("log_seq", 0)
             except Exception:
                 pass
         
@@ -131,27 +490,29 @@ class FileConversationStore:
             "updated_at": now,
             "message_count": len(messages),
             "metadata": metadata or {},
-            "vector_memory": vector_memory
+            "vector_memory": vector_memory,
+            "log_seq": log_seq
         }
         
         try:
-            # Save conversation file
-            async with aiofiles.open(conv_file, 'w', encoding='utf-8') as f:
-                await f.write(json.dumps(conv_data, indent=2, default=str))
+            # Save conversation file (the snapshot now supersedes the log)
+            await asyncio.to_thread(_atomic_write_json, conv_file, conv_data)
+            self._log_file(conversation_id).unlink(missing_ok=True)
+            self._log_state[conversation_id] = {
+                "seq": log_seq,
+                "records": 0,
+                "vector_memory": dict(vector_memory)
+            }
             
-            # Update index
-            index = await self._load_index()
-            index["conversations"][conversation_id] = {
+            # Update catalogue
+            self.catalog.upsert({
                 "conversation_id": conversation_id,
                 "name": name,
                 "created_at": conv_data["created_at"],
                 "updated_at": conv_data["updated_at"],
                 "message_count": len(messages),
                 "pinned": metadata.get("pinned", False) if metadata else False
-            }
-            self._index_cache = index
-            await self._save_index()
-            
+            })
             return True
         except Exception as e:
             logger.error(f"Error saving conversation {conversation_id}: {e}")
@@ -160,169 +521,193 @@ class FileConversationStore:
     async def list_conversations(
         self,
         limit: Optional[int] = None,
-        offset: int = 0
+        offset: int = 0,
+        name_prefix: Optional[str] = None
     ) -> List[Dict[str, Any]]:
-        """List all conversations from index (very fast).
-        
-        Automatically removes stale entries (indexed but file missing).
-        Also adds orphaned files (files that exist but aren't in index).
+        """List conversations from the catalogue, pinned first then most recently updated.
         
         Args:
             limit: Maximum number to return
             offset: Offset for pagination
+            name_prefix: Only include conversations whose name starts with this (case-insensitive)
         
         Returns:
             List of conversation metadata
         """
-        index = await self._load_index()
-        conversations = list(index.get("conversations", {}).values())
-        
-        # Clean up stale entries (files that don't exist)
-        valid_convs = []
-        stale_ids = []
-        indexed_conv_ids = set()
-        for conv_data in conversations:
-            conv_id = conv_data.get("conversation_id")
-            if not conv_id:
-                continue
-            indexed_conv_ids.add(conv_id)
-            conv_file = self.conversations_dir / f"{conv_id}.json"
-            if conv_file.exists():
-                valid_convs.append(conv_data)
-            else:
-                stale_ids.append(conv_id)
+        conversations, _ = self.catalog.list(limit=limit, offset=offset, name_prefix=name_prefix)
+        return conversations
+    
+    async def list_conversations_page(
+        self,
+        limit: int,
+        cursor: Optional[str] = None,
+        name_prefix: Optional[str] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """List one page of conversations using cursor pagination.
         
-        # Find orphaned files (files that exist but aren't in index)
-        orphaned_files = []
-        if self.conversations_dir.exists():
-            for conv_file in self.conversations_dir.glob("*.json"):
-                if conv_file.name == "index.json":
-                    continue
-                conv_id = conv_file.stem  # Get ID from filename (without .json)
-                if conv_id not in indexed_conv_ids:
-                    orphaned_files.append(conv_id)
-        
-        # Add orphaned files to index
-        if orphaned_files:
-            logger.info(f"Found {len(orphaned_files)} orphaned conversation files, adding to index")
-            for conv_id in orphaned_files:
-                try:
-                    # Try to load the conversation to get metadata
-                    messages = await self.get_conversation(conv_id)
-                    if messages is not None:
-                        # Extract metadata from file
-                        conv_file = self.conversations_dir / f"{conv_id}.json"
-                        async with aiofiles.open(conv_file, 'r', encoding='utf-8') as f:
-                            content = await f.read()
-                            data = json.loads(content)
-                            # Add to index
-                            index["conversations"][conv_id] = {
-                                "conversation_id": conv_id,
-                                "name": data.get("name"),
-                                "created_at": data.get("created_at", datetime.utcnow().isoformat()),
-                                "updated_at": data.get("updated_at", datetime.utcnow().isoformat()),
-                                "message_count": len(messages),
-                                "pinned": False
-                            }
-                            # Also add to valid_convs
-                            valid_convs.append(index["conversations"][conv_id])
-                            logger.info(f"Added orphaned conversation {conv_id} to index")
-                except Exception as e:
-                    logger.error(f"Error adding orphaned conversation {conv_id} to index: {e}")
+        Args:
+            limit: Page size
+            cursor: Cursor from the previous page (None for the first page)
+            name_prefix: Only include conversations whose name starts with this (case-insensitive)
+        
+        Returns:
+            Tuple of (conversation metadata, cursor for the next page or None)
+        
+        Raises:
+            ValueError: If the cursor is malformed
+        """
+        return self.catalog.list(limit=limit, cursor=cursor, name_prefix=name_prefix)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get catalogue statistics.
+        
+        Returns:
+            Dictionary with conversation and message counts, last update and last reconciliation
+        """
+        return {**self.catalog.get_stats(), "last_reconcile": self._last_reconcile}
+    
+    @staticmethod
+    def _entry_from_data(conversation_id: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Build a catalogue entry from loaded conversation data."""
+        now = datetime.utcnow().isoformat()
+        return {
+            "conversation_id": conversation_id,
+            "name": data.get("name"),
+            "created_at": data.get("created_at", now),
+            "updated_at": data.get("updated_at", now),
+            "message_count": data["message_count"],
+            "pinned": (data.get("metadata") or {}).get("pinned", False)
+        }
+    
+    async def reconcile(self) -> Dict[str, Any]:
+        """Bring the catalogue in line with the files on disk.
+        
+        Removes stale entries (catalogued but file missing) and adds orphaned
+        files (files that exist but aren't catalogued).
+        
+        Returns:
+            Dictionary with the number of stale and orphaned conversations fixed
+        """
+        def _scan():
+            return {conv_file.stem for conv_file in self.conversations_dir.glob("*.json")}
         
-        # Remove stale entries from index
+        on_disk = await asyncio.to_thread(_scan)
+        catalogued = set(self.catalog.ids())
+        
+        stale_ids = [conv_id for conv_id in catalogued - on_disk if not self._conv_file(conv_id).exists()]
         if stale_ids:
-            logger.warning(f"Removing {len(stale_ids)} stale conversation entries from index")
+            logger.warning(f"Removing {len(stale_ids)} stale conversation entries from catalogue")
+            self.catalog.delete_many(stale_ids)
             for stale_id in stale_ids:
-                if stale_id in index.get("conversations", {}):
-                    del index["conversations"][stale_id]
-        
-        # Save index if we made changes
-        if stale_ids or orphaned_files:
-            self._index_cache = index
-            await self._save_index()
-        
-        conversations = valid_convs
-        
-        # Sort by pinned first, then updated_at descending
-        conversations.sort(
-            key=lambda x: (
-                not x.get("pinned", False),
-                -(datetime.fromisoformat(x.get("updated_at", "")).timestamp() 
-                  if x.get("updated_at") else 0)
-            ),
-            reverse=False
-        )
-        
-        # Apply pagination
-        if limit:
-            conversations = conversations[offset:offset + limit]
-        elif offset:
-            conversations = conversations[offset:]
+                self._log_file(stale_id).unlink(missing_ok=True)
+                self._summary_file(stale_id).unlink(missing_ok=True)
+                self._log_state.pop(stale_id, None)
+        
+        added = 0
+        orphaned = on_disk - catalogued
+        if orphaned:
+            logger.info(f"Found {len(orphaned)} orphaned conversation files, adding to catalogue")
+        for conv_id in orphaned:
+            try:
+                async with self._lock(conv_id):
+                    if self.catalog.get(conv_id) is not None:
+                        continue  # Saved while we were scanning
+                    data = await self._load_state(conv_id)
+                    if data is None:
+                        continue
+                    self.catalog.upsert(self._entry_from_data(conv_id, data))
+                added += 1
+                logger.info(f"Added orphaned conversation {conv_id} to catalogue")
+            except Exception as e:
+                logger.error(f"Error adding orphaned conversation {conv_id} to catalogue: {e}")
         
-        return conversations
+        self._last_reconcile = {
+            "at": datetime.utcnow().isoformat(),
+            "stale_removed": len(stale_ids),
+            "orphans_added": added
+        }
+        return self._last_reconcile
+    
+    def start_reconciliation(self):
+        """Start the background reconciliation task (runs once now, then periodically)."""
+        if self._reconcile_task and not self._reconcile_task.done():
+            return
+        self._reconcile_task = asyncio.create_task(self._reconcile_loop())
+    
+    async def stop_reconciliation(self):
+        """Stop the background reconciliation task."""
+        if self._reconcile_task and not self._reconcile_task.done():
+            self._reconcile_task.cancel()
+            try:
+                await self._reconcile_task
+            except asyncio.CancelledError:
+                pass
+        self._reconcile_task = None
+    
+    async def _reconcile_loop(self):
+        """Reconcile the catalogue at startup and then every reconcile_interval seconds."""
+        while True:
+            try:
+                result = await self.reconcile()
+                logger.debug(f"Conversation catalogue reconciled: {result}")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error reconciling conversation catalogue: {e}", exc_info=True)
+            if not self.reconcile_interval or self.reconcile_interval <= 0:
+                return
+            await asyncio.sleep(self.reconcile_interval)
     
     async def clear_all(self) -> int:
-        """Clear all conversations (delete all files and reset index).
+        """Clear all conversations (delete all files and reset the catalogue).
         
         Returns:
             Number of conversations deleted
         """
-        index = await self._load_index()
-        count = len(index.get("conversations", {}))
+        count = self.catalog.get_stats()["conversation_count"]
         
-        # Delete all conversation files
+        # Delete all conversation snapshots, logs and summaries
         if self.conversations_dir.exists():
-            for conv_file in self.conversations_dir.glob("*.json"):
-                if conv_file.name != "index.json":
-                    try:
-                        conv_file.unlink()
-                    except Exception as e:
-                        logger.error(f"Error deleting {conv_file}: {e}")
+            for conv_file in [path for pattern in ("*.json", "*.log", "*.summary") for path in self.conversations_dir.glob(pattern)]:
+                try:
+                    conv_file.unlink()
+                except Exception as e:
+                    logger.error(f"Error deleting {conv_file}: {e}")
+        self._log_state.clear()
         
-        # Reset index
-        self._index_cache = {"conversations": {}}
-        await self._save_index()
+        # Reset catalogue
+        self.catalog.clear()
         
         logger.info(f"Cleared all {count} conversations")
         return count
     
-    def clear_index_cache(self):
-        """Clear the index cache to force a fresh reload on next access."""
-        self._index_cache = None
-        logger.debug("Cleared index cache")
-    
     async def delete_conversation(self, conversation_id: str) -> bool:
-        """Delete a conversation file and remove from index."""
-        conv_file = self.conversations_dir / f"{conversation_id}.json"
+        """Delete a conversation file and remove it from the catalogue."""
+        conv_file = self._conv_file(conversation_id)
         
         try:
             file_deleted = False
-            # Delete file
-            if conv_file.exists():
-                conv_file.unlink()
-                file_deleted = True
-                logger.debug(f"Deleted conversation file: {conv_file}")
-            else:
-                logger.debug(f"Conversation file does not exist: {conv_file}")
+            async with self._lock(conversation_id):
+                # Delete snapshot, log and summary
+                if conv_file.exists():
+                    conv_file.unlink()
+                    file_deleted = True
+                    logger.debug(f"Deleted conversation file: {conv_file}")
+                else:
+                    logger.debug(f"Conversation file does not exist: {conv_file}")
+                self._log_file(conversation_id).unlink(missing_ok=True)
+                self._summary_file(conversation_id).unlink(missing_ok=True)
+                self._log_state.pop(conversation_id, None)
+            self._locks.pop(conversation_id, None)
             
-            # Remove from index
-            index = await self._load_index()
-            index_updated = False
-            if conversation_id in index.get("conversations", {}):
-                del index["conversations"][conversation_id]
-                index_updated = True
-                logger.debug(f"Removed conversation {conversation_id} from index")
+            # Remove from catalogue, even if the file didn't exist
+            catalog_updated = self.catalog.delete_many([conversation_id]) > 0
+            if catalog_updated:
+                logger.debug(f"Removed conversation {conversation_id} from catalogue")
             
-            # Always save index if it was updated, even if file didn't exist
-            if index_updated:
-                self._index_cache = index
-                await self._save_index()
-                logger.debug(f"Saved updated index after deleting conversation {conversation_id}")
-            
-            # Return True if either file was deleted or index was updated (or both)
-            # This handles cases where file might be missing but index entry exists
-            return file_deleted or index_updated
+            # Return True if either file was deleted or catalogue was updated (or both)
+            # This handles cases where file might be missing but catalogue entry exists
+            return file_deleted or catalog_updated
         except Exception as e:
             logger.error(f"Error deleting conversation {conversation_id}: {e}", exc_info=True)
             return False
@@ -345,48 +730,78 @@ class FileConversationStore:
         Returns:
             True if successful, False otherwise
         """
-        conv_file = self.conversations_dir / f"{conversation_id}.json"
-        
-        if not conv_file.exists():
+        if not self._conv_file(conversation_id).exists():
             return False
         
         try:
-            async with aiofiles.open(conv_file, 'r', encoding='utf-8') as f:
-                content = await f.read()
-                data = json.loads(content)
-            
-            messages = data.get("messages", [])
-            if message_index >= len(messages):
-                return False
-            
-            # Update message
-            messages[message_index]["content"] = new_content
-            if role:
-                messages[message_index]["role"] = role
-            messages[message_index]["timestamp"] = datetime.utcnow().isoformat()
-            
-            # Update file
-            data["messages"] = messages
-            data["updated_at"] = datetime.utcnow().isoformat()
-            
-            async with aiofiles.open(conv_file, 'w', encoding='utf-8') as f:
-                await f.write(json.dumps(data, indent=2, ensure_ascii=False))
-            
-            # Update index
-            index = await self._load_index()
-            if conversation_id in index.get("conversations", {}):
-                index["conversations"][conversation_id]["updated_at"] = datetime.utcnow().isoformat()
-                index["conversations"][conversation_id]["message_count"] = len(messages)
-                self._index_cache = index
-                await self._save_index()
+            now = datetime.utcnow().isoformat()
+            async with self._lock(conversation_id):
+                data = await self._load_state(conversation_id, track=True)
+                if data is None or message_index >= len(data["messages"]):
+                    return False
+                
+                fields = {"content": new_content, "timestamp": now}
+                if role:
+                    fields["role"] = role
+                await self._append_log(conversation_id, {
+                    "op": "update",
+                    "index": message_index,
+                    "fields": fields,
+                    "updated_at": now
+                })
+                
+                # Update catalogue
+                entry = self.catalog.get(conversation_id)
+                if entry:
+                    entry["updated_at"] = now
+                    entry["message_count"] = len(data["messages"])
+                    self.catalog.upsert(entry)
             
             return True
         except Exception as e:
             logger.error(f"Error updating message: {e}", exc_info=True)
             return False
-        except Exception as e:
-            logger.error(f"Error deleting conversation {conversation_id}: {e}", exc_info=True)
-            return False
+    
+    async def get_vector_memory(self, conversation_id: str) -> Optional[Dict[str, Any]]:
+        """Get the per-conversation vector memory settings, including pending log changes.
+        
+        Served from the tracked log state; the conversation is only read once per process.
+        
+        Args:
+            conversation_id: Conversation ID
+        
+        Returns:
+            Dict with custom, save_enabled and read_enabled, or None if the conversation doesn't exist
+        """
+        state = self._log_state.get(conversation_id)
+        if state is None:
+            async with self._lock(conversation_id):
+                state = self._log_state.get(conversation_id)
+                if state is None:
+                    if await self._load_state(conversation_id, track=True) is None:
+                        return None
+                    state = self._log_state[conversation_id]
+        return dict(state["vector_memory"])
+    
+    async def set_vector_memory(self, conversation_id: str, vector_memory: Dict[str, Any]) -> bool:
+        """Record new per-conversation vector memory settings in the conversation log.
+        
+        Args:
+            conversation_id: Conversation ID
+            vector_memory: Settings to apply (custom, save_enabled, read_enabled)
+        
+        Returns:
+            True if recorded, False if the conversation doesn't exist
+        """
+        async with self._lock(conversation_id):
+            if not self._conv_file(conversation_id).exists():
+                return False
+            await self._append_log(conversation_id, {
+                "op": "meta",
+                "vector_memory": vector_memory,
+                "updated_at": datetime.utcnow().isoformat()
+            })
+        return True
     
     async def update_conversation_metadata(
         self,
@@ -395,40 +810,30 @@ class FileConversationStore:
         pinned: Optional[bool] = None,
         **kwargs
     ) -> bool:
-        """Update conversation metadata in index and file."""
-        index = await self._load_index()
-        
-        if conversation_id not in index.get("conversations", {}):
-            return False
-        
-        # Update index
-        conv_meta = index["conversations"][conversation_id]
-        if name is not None:
-            conv_meta["name"] = name
-        if pinned is not None:
-            conv_meta["pinned"] = pinned
-        conv_meta["updated_at"] = datetime.utcnow().isoformat()
-        
-        # Update conversation file if it exists
-        conv_file = self.conversations_dir / f"{conversation_id}.json"
-        if conv_file.exists():
-            try:
-                async with aiofiles.open(conv_file, 'r', encoding='utf-8') as f:
-                    content = await f.read()
-                    data = json.loads(content)
-                
+        """Update conversation metadata in catalogue and file."""
+        async with self._lock(conversation_id):
+            conv_meta = self.catalog.get(conversation_id)
+            if conv_meta is None:
+                return False
+            
+            # Update catalogue
+            if name is not None:
+                conv_meta["name"] = name
+            if pinned is not None:
+                conv_meta["pinned"] = pinned
+            conv_meta["updated_at"] = datetime.utcnow().isoformat()
+            self.catalog.upsert(conv_meta)
+            
+            # Record the change in the conversation log if the conversation exists
+            if self._conv_file(conversation_id).exists():
+                record = {"op": "meta", "updated_at": conv_meta["updated_at"]}
                 if name is not None:
-                    data["name"] = name
+                    record["name"] = name
                 if pinned is not None:
-                    data["metadata"]["pinned"] = pinned
-                data["updated_at"] = conv_meta["updated_at"]
-                
-                async with aiofiles.open(conv_file, 'w', encoding='utf-8') as f:
-                    await f.write(json.dumps(data, indent=2, default=str))
-            except Exception as e:
-                logger.error(f"Error updating conversation file {conversation_id}: {e}")
+                    record["pinned"] = pinned
+                try:
+                    await self._append_log(conversation_id, record)
+                except Exception as e:
+                    logger.error(f"Error updating conversation file {conversation_id}: {e}")
         
-        self._index_cache = index
-        await self._save_index()
         return True
-
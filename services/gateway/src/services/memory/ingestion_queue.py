@@ -0,0 +1,311 @@
+"""Write-behind queue for vector store ingestion."""
+
+import asyncio
+import json
+import logging
+import time
+import uuid
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Deque, Dict, List, Optional
+
+from .vector_store import message_vector_id
+
+logger = logging.getLogger(__name__)
+
+
+class VectorIngestionQueue:
+    """Background queue that embeds and writes messages to the vector store in batches.
+    
+    Messages are journaled to a JSONL file when enqueued and acknowledged once
+    written, so anything still pending at shutdown or after a crash is replayed
+    on the next start. Each record carries the message's vector store ID, so a
+    replayed message that was already written is not added a second time.
+    Failed batches are retried with exponential backoff.
+    """
+    
+    def __init__(
+        self,
+        vector_store: Any,
+        journal_path: Path,
+        batch_size: int = 32,
+        batch_window: float = 0.05,
+        max_attempts: int = 5,
+        retry_backoff: float = 1.0
+    ):
+        """Initialize the queue.
+        
+        Args:
+            vector_store: VectorStore instance (must provide add_messages)
+            journal_path: JSONL file used to persist pending messages
+            batch_size: Maximum number of messages written per batch
+            batch_window: Seconds to wait for more messages before writing a partial batch
+            max_attempts: Attempts per message before it is dropped
+            retry_backoff: Base delay in seconds between retries (doubles per attempt)
+        """
+        self.vector_store = vector_store
+        self.journal_path = Path(journal_path)
+        self.batch_size = max(1, batch_size)
+        self.batch_window = batch_window
+        self.max_attempts = max(1, max_attempts)
+        self.retry_backoff = retry_backoff
+        self._pending: Deque[Dict[str, Any]] = deque()
+        self._in_flight: List[Dict[str, Any]] = []
+        self._wakeup = asyncio.Event()
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._worker_task: Optional[asyncio.Task] = None
+        self._journal_lines = 0
+        self._stats = {
+            "enqueued": 0,
+            "written": 0,
+            "failed": 0,
+            "retries": 0,
+            "batches": 0,
+            "last_batch_size": 0,
+            "last_lag_seconds": None
+        }
+    
+    async def start(self):
+        """Replay any journaled messages and start the background worker."""
+        if self._worker_task and not self._worker_task.done():
+            return
+        self._replay_journal()
+        self._worker_task = asyncio.create_task(self._worker())
+        logger.info(f"Vector ingestion queue started ({len(self._pending)} pending message(s) replayed)")
+    
+    async def stop(self, timeout: Optional[float] = 10.0):
+        """Drain the queue (up to timeout) and stop the worker.
+        
+        Messages that could not be written stay in the journal for the next start.
+        
+        Args:
+            timeout: Seconds to wait for the queue to drain, or None to wait indefinitely
+        """
+        if not await self.flush(timeout=timeout):
+            logger.warning(f"Vector ingestion queue stopped with {len(self._pending) + len(self._in_flight)} message(s) pending; they will be replayed on next start")
+        if self._worker_task and not self._worker_task.done():
+            self._worker_task.cancel()
+            try:
+                await self._worker_task
+            except asyncio.CancelledError:
+                pass
+        self._worker_task = None
+    
+    def enqueue(
+        self,
+        conversation_id: str,
+        message: str,
+        role: str,
+        timestamp: datetime,
+        user_profile_id: Optional[str] = None
+    ) -> None:
+        """Queue a message for embedding and vector storage.
+        
+        Args:
+            conversation_id: Unique conversation identifier
+            message: Message text content
+            role: Message role (user/assistant/system)
+            timestamp: Message timestamp
+            user_profile_id: User profile ID (uses current user if None)
+        """
+        if not message or not message.strip():
+            return
+        
+        item = {
+            "id": uuid.uuid4().hex,
+            "vector_id": message_vector_id(conversation_id, timestamp.isoformat(), role, message),
+            "conversation_id": conversation_id,
+            "message": message,
+            "role": role,
+            "timestamp": timestamp.isoformat(),
+            "user_profile_id": user_profile_id,
+            "enqueued_at": time.time(),
+            "attempts": 0
+        }
+        self._append_journal(item)
+        self._pending.append(item)
+        self._stats["enqueued"] += 1
+        self._idle.clear()
+        self._wakeup.set()
+    
+    async def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every queued message has been written (or dropped).
+        
+        Args:
+            timeout: Seconds to wait, or None to wait indefinitely
+        
+        Returns:
+            True if the queue drained, False on timeout
+        """
+        if self._idle.is_set():
+            return True
+        if not self._worker_task or self._worker_task.done():
+            # No worker to drain the queue (not started or already stopped)
+            return False
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+    
+    def discard_conversation(self, conversation_id: str) -> int:
+        """Drop pending messages for a conversation that is being deleted.
+        
+        Args:
+            conversation_id: Conversation ID
+        
+        Returns:
+            Number of messages discarded
+        """
+        kept = deque(item for item in self._pending if item["conversation_id"] != conversation_id)
+        discarded = [item for item in self._pending if item["conversation_id"] == conversation_id]
+        self._pending = kept
+        for item in discarded:
+            self._append_journal({"ack": item["id"]})
+        self._update_idle()
+        return len(discarded)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get queue statistics.
+        
+        Returns:
+            Dictionary with queue depth, lag of the oldest pending message and counters
+        """
+        oldest = self._in_flight[0] if self._in_flight else (self._pending[0] if self._pending else None)
+        return {
+            "depth": len(self._pending),
+            "in_flight": len(self._in_flight),
+            "lag_seconds": round(time.time() - oldest["enqueued_at"], 3) if oldest else 0.0,
+            "running": self._worker_task is not None and not self._worker_task.done(),
+            **self._stats
+        }
+    
+    def _update_idle(self):
+        """Set the idle event when nothing is pending or in flight."""
+        if not self._pending and not self._in_flight:
+            self._idle.set()
+            self._compact_journal()
+    
+    async def _worker(self):
+        """Collect pending messages into batches and write them."""
+        while True:
+            if not self._pending:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                # Give concurrent requests a moment to add to the same batch
+                await asyncio.sleep(self.batch_window)
+            
+            batch = []
+            while self._pending and len(batch) < self.batch_size:
+                batch.append(self._pending.popleft())
+            if not batch:
+                continue  # Pending messages were discarded while we waited
+            self._in_flight = batch
+            
+            try:
+                await self.vector_store.add_messages([
+                    {
+                        "id": item.get("vector_id"),
+                        "conversation_id": item["conversation_id"],
+                        "message": item["message"],
+                        "role": item["role"],
+                        "timestamp": datetime.fromisoformat(item["timestamp"]),
+                        "user_profile_id": item["user_profile_id"]
+                    }
+                    for item in batch
+                ])
+            except asyncio.CancelledError:
+                # Keep the batch for the next start (it is still in the journal)
+                self._pending.extendleft(reversed(batch))
+                self._in_flight = []
+                raise
+            except Exception as e:
+                self._in_flight = []
+                await self._retry_batch(batch, e)
+                continue
+            
+            now = time.time()
+            for item in batch:
+                self._append_journal({"ack": item["id"]})
+            self._stats["written"] += len(batch)
+            self._stats["batches"] += 1
+            self._stats["last_batch_size"] = len(batch)
+            self._stats["last_lag_seconds"] = round(now - batch[0]["enqueued_at"], 3)
+            self._in_flight = []
+            logger.debug(f"Wrote {len(batch)} message(s) to vector store ({len(self._pending)} pending)")
+            self._update_idle()
+    
+    async def _retry_batch(self, batch: List[Dict[str, Any]], error: Exception):
+        """Requeue a failed batch with backoff, dropping messages out of attempts."""
+        retry = []
+        for item in batch:
+            item["attempts"] += 1
+            if item["attempts"] >= self.max_attempts:
+                logger.error(f"Dropping message for conversation {item['conversation_id']} after {item['attempts']} failed vector store attempts: {error}")
+                self._append_journal({"ack": item["id"]})
+                self._stats["failed"] += 1
+            else:
+                retry.append(item)
+        
+        if retry:
+            self._stats["retries"] += len(retry)
+            delay = self.retry_backoff * (2 ** (retry[0]["attempts"] - 1))
+            logger.warning(f"Vector store write failed for {len(retry)} message(s), retrying in {delay:.1f}s: {error}")
+            self._pending.extendleft(reversed(retry))
+            await asyncio.sleep(delay)
+        self._update_idle()
+    
+    def _append_journal(self, record: Dict[str, Any]):
+        """Append a record to the journal file."""
+        try:
+            self.journal_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.journal_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record) + "\n")
+            self._journal_lines += 1
+        except Exception as e:
+            logger.warning(f"Could not write vector ingestion journal: {e}")
+    
+    def _compact_journal(self):
+        """Truncate the journal once everything in it has been acknowledged."""
+        if self._journal_lines == 0:
+            return
+        try:
+            self.journal_path.unlink(missing_ok=True)
+            self._journal_lines = 0
+        except Exception as e:
+            logger.warning(f"Could not compact vector ingestion journal: {e}")
+    
+    def _replay_journal(self):
+        """Load messages that were enqueued but never acknowledged."""
+        if not self.journal_path.exists():
+            return
+        items: Dict[str, Dict[str, Any]] = {}
+        try:
+            with open(self.journal_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # Partial line from a crash mid-write
+                    if "ack" in record:
+                        items.pop(record["ack"], None)
+                    elif "id" in record:
+                        items[record["id"]] = record
+        except Exception as e:
+            logger.warning(f"Could not read vector ingestion journal: {e}")
+            return
+        
+        # Rewrite the journal with only the pending messages
+        self.journal_path.unlink(missing_ok=True)
+        self._journal_lines = 0
+        for item in items.values():
+            self._append_journal(item)
+            self._pending.append(item)
+        if self._pending:
+            self._idle.clear()
+            self._wakeup.set()
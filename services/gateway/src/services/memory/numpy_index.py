@@ -0,0 +1,576 @@
+"""In-process NumPy vector index (used for vector_store_type "faiss")."""
+
+import json
+import logging
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class NumpyVectorIndex:
+    """Cosine-similarity index for one user profile, backed by memory-mapped .npy files.
+    
+    Vectors are L2-normalized and stored as float16 in a `vectors` .npy file,
+    with a parallel `alive` tombstone array. Row metadata is appended to a
+    `rows` JSONL file and mirrored in columnar arrays (conversation code, timestamp)
+    so filters are vectorized. Search is an exact blocked matmul followed by
+    argpartition, or an IVF probe over k-means lists once the index is large
+    enough and `ivf_lists` is set.
+    
+    `manifest.json` names the current set of files. Growing or compacting the
+    index writes a new set next to the old one and commits it by atomically
+    replacing the manifest, so a crash mid-rewrite leaves the previous set in
+    use. Files the manifest doesn't name are leftovers and are removed on load.
+    """
+    
+    MANIFEST = "manifest.json"
+    MIN_CAPACITY = 1024
+    SEARCH_BLOCK = 65536  # Rows converted to float32 per matmul block
+    
+    def __init__(
+        self,
+        directory: Path,
+        ivf_lists: int = 0,
+        ivf_probes: int = 8,
+        ivf_min_vectors: int = 50000
+    ):
+        """Open (or create) the index stored in a directory.
+        
+        Args:
+            directory: Directory holding the index files
+            ivf_lists: Number of IVF lists (0 = always exact search)
+            ivf_probes: Lists scanned per query in IVF mode
+            ivf_min_vectors: Live vectors required before IVF is used
+        """
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.ivf_lists = max(0, ivf_lists)
+        self.ivf_probes = max(1, ivf_probes)
+        self.ivf_min_vectors = ivf_min_vectors
+        self._files: Optional[Dict[str, str]] = None  # Current file set, as named by the manifest
+        self._generation = 0
+        self._reset_state()
+        self._load()
+    
+    @property
+    def _manifest_path(self) -> Path:
+        return self.directory / self.MANIFEST
+    
+    @property
+    def _vectors_path(self) -> Path:
+        return self.directory / self._files["vectors"]
+    
+    @property
+    def _alive_path(self) -> Path:
+        return self.directory / self._files["alive"]
+    
+    @property
+    def _rows_path(self) -> Path:
+        return self.directory / self._files["rows"]
+    
+    @staticmethod
+    def _generation_files(generation: int) -> Dict[str, str]:
+        """File names of one generation of the index."""
+        return {
+            "vectors": f"vectors.{generation}.npy",
+            "alive": f"alive.{generation}.npy",
+            "rows": f"rows.{generation}.jsonl"
+        }
+    
+    def _commit(self, files: Dict[str, str], generation: int):
+        """Make a file set current by atomically replacing the manifest, then drop unlisted files."""
+        tmp_path = self.directory / (self.MANIFEST + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"generation": generation, "files": files}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self._manifest_path)
+        self._files = files
+        self._generation = generation
+        self._remove_unlisted_files()
+    
+    def _remove_unlisted_files(self):
+        """Delete index files the manifest doesn't name (old generations, crashed rewrites)."""
+        listed = set(self._files.values()) if self._files else set()
+        for pattern in ("vectors*.npy", "alive*.npy", "rows*.jsonl"):
+            for path in self.directory.glob(pattern):
+                if path.name not in listed:
+                    try:
+                        path.unlink()
+                    except OSError as e:
+                        logger.warning(f"Could not remove stale index file {path}: {e}")
+    
+    def _reset_state(self):
+        """Clear all in-memory state."""
+        self._vectors: Optional[np.ndarray] = None  # float16 memmap (capacity, dim)
+        self._alive: Optional[np.ndarray] = None  # bool memmap (capacity,)
+        self._dimension: Optional[int] = None
+        self._count = 0
+        self._ids: List[str] = []
+        self._documents: List[str] = []
+        self._roles: List[str] = []
+        self._timestamp_strings: List[str] = []
+        self._id_rows: Dict[str, int] = {}
+        self._conversation_codes: Dict[str, int] = {}
+        self._conversation_ids: List[str] = []
+        self._conv_codes = np.zeros(0, dtype=np.int32)
+        self._timestamps = np.zeros(0, dtype=np.float64)
+        self._centroids: Optional[np.ndarray] = None
+        self._assignments = np.zeros(0, dtype=np.int32)
+        self._ivf_trained_at = 0
+    
+    def _load(self):
+        """Load the index from disk if it exists."""
+        try:
+            if self._manifest_path.exists():
+                with open(self._manifest_path, "r", encoding="utf-8") as f:
+                    manifest = json.load(f)
+                self._files = manifest["files"]
+                self._generation = int(manifest.get("generation", 0))
+                self._remove_unlisted_files()
+            elif (self.directory / "vectors.npy").exists() and (self.directory / "alive.npy").exists():
+                # Index written before manifests existed
+                self._commit({"vectors": "vectors.npy", "alive": "alive.npy", "rows": "rows.jsonl"}, 0)
+            else:
+                return
+        except Exception as e:
+            logger.error(f"Could not read vector index manifest at {self.directory}, starting empty: {e}", exc_info=True)
+            self._files = None
+            return
+        if not self._vectors_path.exists() or not self._alive_path.exists():
+            self._files = None
+            return
+        try:
+            self._vectors = np.load(self._vectors_path, mmap_mode="r+")
+            self._alive = np.load(self._alive_path, mmap_mode="r+")
+            self._dimension = int(self._vectors.shape[1])
+            capacity = self._vectors.shape[0]
+            self._resize_columns(capacity)
+            
+            records = []
+            if self._rows_path.exists():
+                with open(self._rows_path, "r", encoding="utf-8") as f:
+                    for line in f:
+                        try:
+                            records.append(json.loads(line))
+                        except json.JSONDecodeError:
+                            break  # Partial last line from a crash mid-write
+            for record in records[:capacity]:
+                self._append_columns(record)
+            # Rows written to the matrix without metadata (crash) are unusable
+            self._alive[self._count:] = False
+            logger.info(f"Loaded vector index {self.directory.name}: {self.count()} live / {self._count} rows, dim={self._dimension}")
+        except Exception as e:
+            logger.error(f"Could not load vector index at {self.directory}, starting empty: {e}", exc_info=True)
+            self._reset_state()
+    
+    def _create_files(self, capacity: int, dimension: int):
+        """Create empty vector, tombstone and row files as a new generation."""
+        generation = self._generation + 1
+        files = self._generation_files(generation)
+        self._dimension = dimension
+        vectors = np.lib.format.open_memmap(self.directory / files["vectors"], mode="w+", dtype=np.float16, shape=(capacity, dimension))
+        alive = np.lib.format.open_memmap(self.directory / files["alive"], mode="w+", dtype=np.bool_, shape=(capacity,))
+        vectors.flush()
+        alive.flush()
+        (self.directory / files["rows"]).touch()
+        self._commit(files, generation)
+        self._vectors, self._alive = vectors, alive
+        self._resize_columns(capacity)
+    
+    def _ensure_capacity(self, needed: int):
+        """Grow the memory-mapped files (doubling) so `needed` rows fit."""
+        capacity = self._vectors.shape[0]
+        if needed <= capacity:
+            return
+        new_capacity = max(needed, capacity * 2)
+        self._rewrite_files(np.arange(self._count), new_capacity)
+        self._resize_columns(new_capacity)
+    
+    def _rewrite_files(self, rows: np.ndarray, capacity: int, records: Optional[List[Dict[str, Any]]] = None):
+        """Write the given rows into a new generation of files and commit it.
+        
+        Args:
+            rows: Row indices to copy, in their new order
+            capacity: Capacity of the new files
+            records: Row metadata for the new row file (None = keep the current row file)
+        """
+        generation = self._generation + 1
+        files = self._generation_files(generation)
+        if records is None:
+            files["rows"] = self._files["rows"]
+        new_vectors = np.lib.format.open_memmap(self.directory / files["vectors"], mode="w+", dtype=np.float16, shape=(capacity, self._dimension))
+        new_alive = np.lib.format.open_memmap(self.directory / files["alive"], mode="w+", dtype=np.bool_, shape=(capacity,))
+        for start in range(0, len(rows), self.SEARCH_BLOCK):
+            block = rows[start:start + self.SEARCH_BLOCK]
+            new_vectors[start:start + len(block)] = self._vectors[block]
+            new_alive[start:start + len(block)] = self._alive[block]
+        new_vectors.flush()
+        new_alive.flush()
+        if records is not None:
+            with open(self.directory / files["rows"], "w", encoding="utf-8") as f:
+                for record in records:
+                    f.write(json.dumps(record) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+        
+        # Release the old maps before the commit removes their files
+        self._vectors = None
+        self._alive = None
+        self._commit(files, generation)
+        self._vectors = new_vectors
+        self._alive = new_alive
+    
+    def _resize_columns(self, capacity: int):
+        """Resize the in-memory columnar arrays to the file capacity."""
+        for name in ("_conv_codes", "_timestamps", "_assignments"):
+            old = getattr(self, name)
+            new = np.zeros(capacity, dtype=old.dtype)
+            new[:min(len(old), capacity)] = old[:capacity]
+            setattr(self, name, new)
+    
+    def _append_columns(self, record: Dict[str, Any]):
+        """Add one row's metadata to the in-memory columns."""
+        row = self._count
+        conversation_id = record.get("conversation_id") or ""
+        code = self._conversation_codes.get(conversation_id)
+        if code is None:
+            code = len(self._conversation_ids)
+            self._conversation_codes[conversation_id] = code
+            self._conversation_ids.append(conversation_id)
+        
+        timestamp = record.get("timestamp") or ""
+        try:
+            epoch = datetime.fromisoformat(timestamp.replace("Z", "+00:00")).timestamp()
+        except (ValueError, AttributeError):
+            epoch = 0.0
+        
+        self._ids.append(record["id"])
+        self._documents.append(record.get("document", ""))
+        self._roles.append(record.get("role", "user"))
+        self._timestamp_strings.append(timestamp)
+        self._id_rows[record["id"]] = row
+        self._conv_codes[row] = code
+        self._timestamps[row] = epoch
+        self._count += 1
+    
+    def add(
+        self,
+        ids: List[str],
+        embeddings: np.ndarray,
+        documents: List[str],
+        metadatas: List[Dict[str, Any]]
+    ) -> int:
+        """Append vectors with their documents and metadata.
+        
+        IDs that already exist are skipped (matching ChromaDB's add).
+        
+        Args:
+            ids: Unique row IDs
+            embeddings: 2D array of embeddings, one row per ID
+            documents: Document text per row
+            metadatas: Dicts with 'conversation_id', 'role' and 'timestamp' per row
+        
+        Returns:
+            Number of rows added
+        """
+        vectors = np.asarray(embeddings, dtype=np.float32).reshape(len(ids), -1)
+        keep = [i for i, row_id in enumerate(ids) if row_id not in self._id_rows]
+        if not keep:
+            return 0
+        vectors = vectors[keep]
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors = vectors / np.maximum(norms, 1e-12)
+        
+        if self._vectors is None:
+            self._create_files(max(self.MIN_CAPACITY, len(keep)), vectors.shape[1])
+        elif vectors.shape[1] != self._dimension:
+            raise ValueError(f"Embedding dimension {vectors.shape[1]} does not match index dimension {self._dimension}")
+        
+        start = self._count
+        end = start + len(keep)
+        self._ensure_capacity(end)
+        self._vectors[start:end] = vectors.astype(np.float16)
+        self._alive[start:end] = True
+        self._vectors.flush()
+        self._alive.flush()
+        
+        # Metadata is written after the vectors; rows without metadata are ignored on load
+        records = [
+            {
+                "id": ids[i],
+                "document": documents[i],
+                "conversation_id": metadatas[i].get("conversation_id"),
+                "role": metadatas[i].get("role"),
+                "timestamp": metadatas[i].get("timestamp")
+            }
+            for i in keep
+        ]
+        with open(self._rows_path, "a", encoding="utf-8") as f:
+            for record in records:
+                f.write(json.dumps(record) + "\n")
+        for record in records:
+            self._append_columns(record)
+        
+        if self._centroids is not None:
+            self._assignments[start:end] = np.argmax(vectors @ self._centroids.T, axis=1)
+        return len(keep)
+    
+    def delete_rows(self, rows: np.ndarray) -> int:
+        """Tombstone rows, compacting the files once most rows are dead.
+        
+        Args:
+            rows: Row indices to delete
+        
+        Returns:
+            Number of live rows deleted
+        """
+        if self._alive is None or len(rows) == 0:
+            return 0
+        rows = np.asarray(rows, dtype=np.int64)
+        rows = rows[self._alive[rows]]
+        if len(rows) == 0:
+            return 0
+        self._alive[rows] = False
+        self._alive.flush()
+        
+        dead = self._count - self.count()
+        if dead > max(self.MIN_CAPACITY, self._count // 2):
+            self.compact()
+        return len(rows)
+    
+    def delete_ids(self, ids: List[str]) -> int:
+        """Delete rows by ID.
+        
+        Args:
+            ids: Row IDs
+        
+        Returns:
+            Number of live rows deleted
+        """
+        rows = [self._id_rows[row_id] for row_id in ids if row_id in self._id_rows]
+        return self.delete_rows(np.array(rows, dtype=np.int64))
+    
+    def delete_conversation(self, conversation_id: str) -> int:
+        """Delete every row belonging to a conversation.
+        
+        Args:
+            conversation_id: Conversation ID
+        
+        Returns:
+            Number of live rows deleted
+        """
+        code = self._conversation_codes.get(conversation_id)
+        if code is None:
+            return 0
+        return self.delete_rows(np.flatnonzero(self._conv_codes[:self._count] == code))
+    
+    def compact(self):
+        """Rewrite the index without tombstoned rows."""
+        if self._vectors is None:
+            return
+        keep = np.flatnonzero(self._alive[:self._count])
+        records = [
+            {
+                "id": self._ids[row],
+                "document": self._documents[row],
+                "conversation_id": self._conversation_ids[self._conv_codes[row]],
+                "role": self._roles[row],
+                "timestamp": self._timestamp_strings[row]
+            }
+            for row in keep
+        ]
+        capacity = max(self.MIN_CAPACITY, len(keep) * 2)
+        self._rewrite_files(keep, capacity, records)
+        
+        vectors, alive, dimension = self._vectors, self._alive, self._dimension
+        self._reset_state()
+        self._vectors, self._alive, self._dimension = vectors, alive, dimension
+        self._resize_columns(capacity)
+        for record in records:
+            self._append_columns(record)
+        logger.info(f"Compacted vector index {self.directory.name} to {self._count} rows")
+    
+    def clear(self) -> int:
+        """Delete all rows and the index files.
+        
+        Returns:
+            Number of live rows that were removed
+        """
+        removed = self.count()
+        self._reset_state()
+        self._files = None
+        self._manifest_path.unlink(missing_ok=True)
+        self._remove_unlisted_files()
+        return removed
+    
+    def count(self) -> int:
+        """Number of live rows."""
+        if self._alive is None or self._count == 0:
+            return 0
+        return int(np.count_nonzero(self._alive[:self._count]))
+    
+    def get_conversation_rows(self, conversation_id: str) -> List[Dict[str, Any]]:
+        """List live rows of a conversation in insertion order.
+        
+        Args:
+            conversation_id: Conversation ID
+        
+        Returns:
+            List of dicts with 'id', 'document' and 'metadata'
+        """
+        code = self._conversation_codes.get(conversation_id)
+        if code is None:
+            return []
+        rows = np.flatnonzero((self._conv_codes[:self._count] == code) & self._alive[:self._count])
+        return [self._row_result(int(row)) for row in rows]
+    
+    def search(
+        self,
+        query_embedding: np.ndarray,
+        top_k: int = 5,
+        conversation_id: Optional[str] = None,
+        exclude_conversation_id: Optional[str] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None
+    ) -> List[Dict[str, Any]]:
+        """Find the rows most similar to a query embedding.
+        
+        Args:
+            query_embedding: 1D query embedding
+            top_k: Number of results to return
+            conversation_id: Only search this conversation
+            exclude_conversation_id: Skip this conversation
+            since: Only rows at or after this time
+            until: Only rows at or before this time
+        
+        Returns:
+            List of dicts with 'id', 'document', 'score' (cosine similarity) and 'metadata',
+            best match first
+        """
+        n = self._count
+        if n == 0 or top_k <= 0 or self._vectors is None:
+            return []
+        
+        query = np.asarray(query_embedding, dtype=np.float32).reshape(-1)
+        if query.shape[0] != self._dimension:
+            raise ValueError(f"Query dimension {query.shape[0]} does not match index dimension {self._dimension}")
+        query = query / max(float(np.linalg.norm(query)), 1e-12)
+        
+        mask = np.array(self._alive[:n], dtype=bool)
+        if conversation_id is not None:
+            code = self._conversation_codes.get(conversation_id)
+            if code is None:
+                return []
+            mask &= self._conv_codes[:n] == code
+        if exclude_conversation_id is not None:
+            code = self._conversation_codes.get(exclude_conversation_id)
+            if code is not None:
+                mask &= self._conv_codes[:n] != code
+        if since is not None:
+            mask &= self._timestamps[:n] >= since.timestamp()
+        if until is not None:
+            mask &= self._timestamps[:n] <= until.timestamp()
+        
+        rows = np.flatnonzero(mask)
+        if self._use_ivf():
+            probe_mask = self._ivf_probe_mask(query, n)
+            probed = np.flatnonzero(mask & probe_mask)
+            # Fall back to exact search if the probed lists can't fill top_k
+            if len(probed) >= top_k:
+                rows = probed
+        if len(rows) == 0:
+            return []
+        
+        scores = self._score_rows(rows, query)
+        k = min(top_k, len(rows))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        
+        results = []
+        for i in top:
+            result = self._row_result(int(rows[i]))
+            result["score"] = float(scores[i])
+            results.append(result)
+        return results
+    
+    def _score_rows(self, rows: np.ndarray, query: np.ndarray) -> np.ndarray:
+        """Dot products of the query with the given rows, in float32 blocks."""
+        scores = np.empty(len(rows), dtype=np.float32)
+        contiguous = len(rows) == rows[-1] - rows[0] + 1
+        for start in range(0, len(rows), self.SEARCH_BLOCK):
+            end = min(start + self.SEARCH_BLOCK, len(rows))
+            if contiguous:
+                block = self._vectors[rows[start]:rows[start] + (end - start)]
+            else:
+                block = self._vectors[rows[start:end]]
+            scores[start:end] = block.astype(np.float32) @ query
+        return scores
+    
+    def _row_result(self, row: int) -> Dict[str, Any]:
+        """Build the result dict for a row."""
+        return {
+            "id": self._ids[row],
+            "document": self._documents[row],
+            "metadata": {
+                "conversation_id": self._conversation_ids[self._conv_codes[row]],
+                "role": self._roles[row],
+                "timestamp": self._timestamp_strings[row]
+            }
+        }
+    
+    def _use_ivf(self) -> bool:
+        """Train (or retrain) IVF lists when enabled and the index is large enough."""
+        if not self.ivf_lists:
+            return False
+        live = self.count()
+        if live < max(self.ivf_min_vectors, self.ivf_lists * 39):
+            self._centroids = None
+            return False
+        if self._centroids is None or self._count >= self._ivf_trained_at * 2:
+            self._train_ivf()
+        return True
+    
+    def _train_ivf(self, iterations: int = 10):
+        """Spherical k-means over a sample of live vectors, then assign every row."""
+        n = self._count
+        live_rows = np.flatnonzero(self._alive[:n])
+        rng = np.random.default_rng(0)
+        sample_rows = np.sort(rng.choice(live_rows, size=min(len(live_rows), self.ivf_lists * 64), replace=False))
+        data = self._vectors[sample_rows].astype(np.float32)
+        
+        centroids = data[rng.choice(len(data), size=self.ivf_lists, replace=False)].copy()
+        for _ in range(iterations):
+            assign = np.argmax(data @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assign, data)
+            empty = ~sums.any(axis=1)
+            sums[empty] = centroids[empty]  # Keep the old centroid for empty lists
+            centroids = sums / np.maximum(np.linalg.norm(sums, axis=1, keepdims=True), 1e-12)
+        
+        for start in range(0, n, self.SEARCH_BLOCK):
+            end = min(start + self.SEARCH_BLOCK, n)
+            block = self._vectors[start:end].astype(np.float32)
+            self._assignments[start:end] = np.argmax(block @ centroids.T, axis=1)
+        self._centroids = centroids
+        self._ivf_trained_at = n
+        logger.info(f"Trained IVF for vector index {self.directory.name}: {self.ivf_lists} lists over {n} rows")
+    
+    def _ivf_probe_mask(self, query: np.ndarray, n: int) -> np.ndarray:
+        """Mask of rows whose list is among the closest `ivf_probes` centroids."""
+        probes = min(self.ivf_probes, len(self._centroids))
+        centroid_scores = self._centroids @ query
+        probe_lists = np.argpartition(-centroid_scores, probes - 1)[:probes]
+        return np.isin(self._assignments[:n], probe_lists)
+    
+    def close(self):
+        """Flush the memory maps."""
+        if self._vectors is not None:
+            self._vectors.flush()
+        if self._alive is not None:
+            self._alive.flush()
@@ -39,7 +39,12 @@ class ContextRetriever:
         min_score = min_score or self.similarity_threshold
         
         # Perform semantic search
-        results = await self.vector_store.search(query=query, top_k=top_k * 2, user_profile_id=user_profile_id)  # Get more for filtering
+        results = await self.vector_store.search(
+            query=query,
+            top_k=top_k * 2,  # Get more for filtering
+            user_profile_id=user_profile_id,
+            exclude_conversation_id=exclude_conversation_id
+        )
         
         # Filter by similarity threshold and exclude conversation if needed
         filtered_results = []
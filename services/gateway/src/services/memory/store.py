@@ -1,5 +1,5 @@
 """Memory storage service."""
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime
 import logging
 from pathlib import Path
@@ -23,6 +23,7 @@ from .vector_memory_settings import (
     set_conversation_vector_memory_settings as set_conversation_vector_memory_settings_impl
 )
 from .conversation_ops import store_conversation_with_vector
+from .ingestion_queue import VectorIngestionQueue
 from ...config.settings import settings
 
 logger = logging.getLogger(__name__)
@@ -33,7 +34,11 @@ class MemoryStore:
     
     def __init__(self):
         logger.info("      Creating FileConversationStore (fast JSON file storage)...")
-        self.file_store = FileConversationStore(settings.memory_dir)
+        self.file_store = FileConversationStore(
+            settings.memory_dir,
+            compact_after_records=settings.conversation_log_compact_records,
+            reconcile_interval=settings.conversation_reconcile_interval
+        )
         logger.info("      FileConversationStore created")
         logger.info("      Creating FileSettingsStore (fast JSON file storage)...")
         self.settings_store = FileSettingsStore(settings.memory_dir)
@@ -41,6 +46,11 @@ class MemoryStore:
         logger.info("      Creating VectorStore (embedding model loads on first use)...")
         self.vector_store = VectorStore()
         logger.info("      VectorStore created")
+        self.ingestion_queue = VectorIngestionQueue(
+            self.vector_store,
+            settings.memory_dir / "vector_ingest_queue.jsonl",
+            batch_size=settings.vector_ingest_batch_size
+        )
         logger.info("      Creating ContextRetriever...")
         self.retriever = ContextRetriever(self.vector_store)
         logger.info("      ContextRetriever created")
@@ -67,7 +77,16 @@ class MemoryStore:
         """Initialize memory store resources."""
         # Clean up old SQLite data (we use file store now)
         await self._cleanup_old_data()
-        
+        # Start background vector ingestion (replays anything left from the last run)
+        await self.ingestion_queue.start()
+        # Check the conversation catalogue against files in the background
+        self.file_store.start_reconciliation()
+    
+    async def shutdown(self):
+        """Flush pending vector writes and stop background tasks."""
+        await self.file_store.stop_reconciliation()
+        await self.ingestion_queue.stop(timeout=10.0)
+    
     async def _cleanup_old_data(self):
         """Remove old SQLite database files - we use file store only now."""
         try:
@@ -95,7 +114,8 @@ class MemoryStore:
         self,
         conversation_id: str,
         messages: List[Dict[str, Any]],
-        name: Optional[str] = None
+        name: Optional[str] = None,
+        replace: bool = False
     ):
         """Store conversation messages in memory.
         
@@ -103,8 +123,9 @@ class MemoryStore:
         
         Args:
             conversation_id: Unique conversation identifier
-            messages: List of message dictionaries with 'role', 'content', and optionally 'timestamp'
+            messages: New message dictionaries with 'role', 'content', and optionally 'timestamp'
             name: Optional conversation name to set
+            replace: Replace all stored messages with `messages` instead of appending them
         """
         user_profile_id = await self._get_current_user_profile_id()
         await store_conversation_with_vector(
@@ -114,7 +135,9 @@ class MemoryStore:
             messages=messages,
             name=name,
             should_save_vector_func=lambda cid: self._should_save_vector_memory(cid),
-            user_profile_id=user_profile_id
+            user_profile_id=user_profile_id,
+            ingestion_queue=self.ingestion_queue,
+            replace=replace
         )
     
     async def retrieve_context(
@@ -176,21 +199,71 @@ class MemoryStore:
     async def list_conversations(
         self,
         limit: Optional[int] = None,
-        offset: int = 0
+        offset: int = 0,
+        name_prefix: Optional[str] = None
     ) -> List[Dict[str, Any]]:
         """List all conversations with metadata.
         
-        Uses fast file-based index for instant listing, with auto-cleanup of stale entries.
+        Reads from the conversation catalogue, pinned first then most recently updated.
         
         Args:
             limit: Maximum number of conversations to return
             offset: Offset for pagination
+            name_prefix: Only include conversations whose name starts with this (case-insensitive)
         
         Returns:
             List of conversation dictionaries with metadata
         """
-        # File store now handles cleanup automatically
-        return await self.file_store.list_conversations(limit=limit, offset=offset)
+        return await self.file_store.list_conversations(limit=limit, offset=offset, name_prefix=name_prefix)
+    
+    async def list_conversations_page(
+        self,
+        limit: int,
+        cursor: Optional[str] = None,
+        name_prefix: Optional[str] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """List one page of conversations using cursor pagination.
+        
+        Args:
+            limit: Page size
+            cursor: Cursor from the previous page (None for the first page)
+            name_prefix: Only include conversations whose name starts with this (case-insensitive)
+        
+        Returns:
+            Tuple of (conversation dictionaries, cursor for the next page or None)
+        
+        Raises:
+            ValueError: If the cursor is malformed
+        """
+        return await self.file_store.list_conversations_page(limit, cursor=cursor, name_prefix=name_prefix)
+    
+    async def get_conversation_summary(self, conversation_id: str) -> Optional[Dict[str, Any]]:
+        """Get the rolling summary of a conversation's older turns, or None."""
+        return await self.file_store.get_conversation_summary(conversation_id)
+    
+    async def set_conversation_summary(self, conversation_id: str, summary: Dict[str, Any]) -> bool:
+        """Store the rolling summary of a conversation's older turns.
+        
+        Args:
+            conversation_id: Conversation ID
+            summary: Summary dict (see ConversationSummarizer)
+            
+        Returns:
+            True if successful, False otherwise
+        """
+        return await self.file_store.set_conversation_summary(conversation_id, summary)
+    
+    def get_conversation_meta(self, conversation_id: str) -> Optional[Dict[str, Any]]:
+        """Get catalogue metadata (name, timestamps, message count, pinned) for a conversation."""
+        return self.file_store.get_conversation_meta(conversation_id)
+    
+    async def reconcile_conversations(self) -> Dict[str, Any]:
+        """Fix catalogue entries whose file is missing and add files missing from the catalogue.
+        
+        Returns:
+            Dictionary with the number of stale and orphaned conversations fixed
+        """
+        return await self.file_store.reconcile()
         
     async def reset_all_data(self, keep_models: bool = True) -> Dict[str, Any]:
         """Reset all app data (conversations, settings, vector store).
@@ -218,33 +291,10 @@ class MemoryStore:
             results["settings_cleared"] = True
             
             # Clear vector store (clear all user collections)
+            await self.ingestion_queue.flush(timeout=30.0)
             try:
-                if self.vector_store.client and self.vector_store.store_type == "chromadb":
-                    # ChromaDB: Delete all collections (each user has their own collection)
-                    try:
-                        # Get all collections and delete them
-                        collections = self.vector_store.client.list_collections()
-                        deleted_count = 0
-                        for coll in collections:
-                            try:
-                                count = coll.count()
-                                self.vector_store.client.delete_collection(name=coll.name)
-                                deleted_count += count
-                                logger.info(f"Deleted collection {coll.name} with {count} entries")
-                            except Exception as e:
-                                logger.warning(f"Could not delete collection {coll.name}: {e}")
-                        
-                        # Clear cache
-                        self.vector_store._collections_cache.clear()
-                        self.vector_store.collection = None
-                        
-                        logger.info(f"Deleted {deleted_count} total entries from vector store across all users")
-                        results["vector_store_cleared"] = True
-                    except Exception as e:
-                        logger.warning(f"Could not clear vector store entries: {e}")
-                        results["vector_store_cleared"] = False
-                else:
-                    results["vector_store_cleared"] = True  # No vector store or not ChromaDB
+                self.vector_store.clear_all()
+                results["vector_store_cleared"] = True
             except Exception as e:
                 logger.error(f"Error clearing vector store: {e}")
                 results["vector_store_cleared"] = False
@@ -265,7 +315,9 @@ class MemoryStore:
             True if deletion was successful, False otherwise
         """
         try:
-            # Delete from vector store
+            # Delete from vector store (drop queued writes first so none land after the delete)
+            self.ingestion_queue.discard_conversation(conversation_id)
+            await self.ingestion_queue.flush(timeout=30.0)
             user_profile_id = await self._get_current_user_profile_id()
             await self.vector_store.delete_conversation(conversation_id, user_profile_id=user_profile_id)
             
@@ -281,8 +333,7 @@ class MemoryStore:
         Returns:
             Number of conversations
         """
-        conversations = await self.file_store.list_conversations()
-        return len(conversations)
+        return self.file_store.get_stats()["conversation_count"]
     
     async def set_conversation_name(self, conversation_id: str, name: str) -> bool:
         """Set the name of a conversation.
@@ -328,11 +379,7 @@ class MemoryStore:
         Returns:
             Number of messages
         """
-        conversations = await self.file_store.list_conversations()
-        total = 0
-        for conv in conversations:
-            total += conv.get("message_count", 0)
-        return total
+        return self.file_store.get_stats()["message_count"]
 
     async def update_message(
         self,
@@ -386,31 +433,19 @@ class MemoryStore:
                 else:
                     old_timestamp_dt = old_timestamp
                 
-                # Find and delete old vector entry
+                # Find and delete old vector entry (it may still be queued)
+                await self.ingestion_queue.flush(timeout=30.0)
                 user_profile_id = await self._get_current_user_profile_id()
-                collection = self.vector_store._get_collection(user_profile_id)
-                if collection and self.vector_store.store_type == "chromadb":
-                    try:
-                        # Get all messages for this conversation
-                        results = collection.get(
-                            where={"conversation_id": conversation_id},
-                            include=["documents", "metadatas"]
-                        )
-                        
-                        # Find matching entry by content
-                        for i, doc in enumerate(results.get("documents", [])):
-                            if doc == old_content:
-                                # Check timestamp if available
-                                meta = results.get("metadatas", [])[i] if i < len(results.get("metadatas", [])) else {}
-                                stored_timestamp = meta.get("timestamp", "")
-                                
-                                # Delete if content matches (and optionally timestamp)
-                                if not stored_timestamp or stored_timestamp.startswith(old_timestamp_dt.isoformat()[:19]):
-                                    collection.delete(ids=[results["ids"][i]])
-                                    logger.info(f"Deleted old vector entry for updated message in conversation {conversation_id}")
-                                    break
-                    except Exception as e:
-                        logger.warning(f"Error deleting old vector entry: {e}")
+                try:
+                    if await self.vector_store.delete_matching_message(
+                        conversation_id=conversation_id,
+                        content=old_content,
+                        timestamp=old_timestamp_dt,
+                        user_profile_id=user_profile_id
+                    ):
+                        logger.info(f"Deleted old vector entry for updated message in conversation {conversation_id}")
+                except Exception as e:
+                    logger.warning(f"Error deleting old vector entry: {e}")
             
             # Add new vector entry
             if new_content and new_content.strip():
@@ -436,24 +471,20 @@ class MemoryStore:
         Returns:
             ISO timestamp string or None
         """
-        conversations = await self.file_store.list_conversations()
-        if not conversations:
-            return None
-        
-        # Get most recent updated_at
-        latest = max(
-            (conv.get("updated_at") for conv in conversations if conv.get("updated_at")),
-            default=None
-        )
-        return latest
+        return self.file_store.get_stats()["last_updated"]
     
     async def get_db_size(self) -> int:
-        """Get size of file store in bytes (for compatibility).
+        """Get size of the conversation catalogue database in bytes.
         
         Returns:
-            Size in bytes (0 since we don't use database anymore)
+            Size in bytes
         """
-        return 0
+        db_path = self.file_store.catalog.db_path
+        return sum(
+            path.stat().st_size
+            for path in (db_path, db_path.with_name(db_path.name + "-wal"))
+            if path.exists()
+        )
     
     async def get_vector_store_stats(self) -> Dict[str, Any]:
         """Get vector store statistics.
@@ -465,16 +496,13 @@ class MemoryStore:
             "type": self.vector_store.store_type,
             "initialized": self.vector_store.collection is not None,
             "entry_count": 0,
-            "last_entry": None
+            "last_entry": None,
+            "embedding": self.vector_store.embedder.get_stats() if self.vector_store.embedder else None,
+            "ingestion": self.ingestion_queue.get_stats()
         }
         
         if self.vector_store.collection:
-            try:
-                # Get count from ChromaDB collection
-                count_result = self.vector_store.collection.count()
-                stats["entry_count"] = count_result if count_result else 0
-            except Exception:
-                stats["entry_count"] = 0
+            stats["entry_count"] = self.vector_store.get_collection_count()
         
         return stats
     
@@ -504,7 +532,7 @@ class MemoryStore:
         """Check if vector memory saving is enabled for a conversation."""
         return await should_save_vector_memory(
             conversation_id,
-            self.file_store.conversations_dir,
+            self.file_store,
             self.get_setting
         )
     
@@ -512,7 +540,7 @@ class MemoryStore:
         """Check if vector memory reading is enabled for a conversation."""
         return await should_read_vector_memory(
             conversation_id,
-            self.file_store.conversations_dir,
+            self.file_store,
             self.get_setting
         )
     
@@ -528,7 +556,7 @@ class MemoryStore:
             self.file_store,
             lambda s: apply_global_settings_to_all_conversations(
                 s,
-                self.file_store.conversations_dir,
+                self.file_store,
                 self.file_store.list_conversations
             )
         )
@@ -537,7 +565,7 @@ class MemoryStore:
         """Get per-conversation vector memory settings from file store."""
         return await get_conversation_vector_memory_settings_impl(
             conversation_id,
-            self.file_store.conversations_dir
+            self.file_store
         )
     
     async def set_conversation_vector_memory_settings(
@@ -549,7 +577,7 @@ class MemoryStore:
         await set_conversation_vector_memory_settings_impl(
             conversation_id,
             settings,
-            self.file_store.conversations_dir
+            self.file_store
         )
     
     # System prompt methods
@@ -1,6 +1,7 @@
 """Vector store for semantic search."""
 from typing import List, Dict, Any, Optional
 from datetime import datetime
+import hashlib
 import os
 import logging
 from collections import defaultdict
@@ -15,15 +16,36 @@ chromadb_logger.disabled = True
 
 import chromadb
 from chromadb.config import Settings as ChromaSettings
-from .embeddings import EmbeddingModel
+from .embeddings import EmbeddingModel, get_embedder
+from .numpy_index import NumpyVectorIndex
 from ...config.settings import settings
 
 
+def message_vector_id(conversation_id: str, timestamp: str, role: str, message: str) -> str:
+    """Build the vector store ID of a message.
+    
+    The ID is derived from a SHA-1 digest rather than hash(), which is randomised
+    per process, so the same message gets the same ID across restarts.
+    
+    Args:
+        conversation_id: Conversation ID
+        timestamp: Message timestamp (ISO format)
+        role: Message role
+        message: Message text
+    
+    Returns:
+        Vector store ID
+    """
+    digest = hashlib.sha1("\x1f".join((conversation_id, timestamp, role or "", message)).encode("utf-8")).hexdigest()
+    return f"{conversation_id}_{timestamp}_{digest[:16]}"
+
+
 class VectorStore:
-    """Vector store using ChromaDB.
+    """Vector store using ChromaDB or an in-process NumPy index.
     
     Supports user-specific collections: each user profile has its own collection
-    to keep vector memory separate between users.
+    to keep vector memory separate between users. With store_type "faiss" each
+    collection is a NumpyVectorIndex under vector_store_dir/numpy_index.
     """
     
     def __init__(self, user_profile_id: Optional[str] = None):
@@ -42,6 +64,16 @@ class VectorStore:
         self._initialize_store()
         logger.info("      Initialization complete (embedding model will load on first use)")
     
+    def get_embedder(self) -> EmbeddingModel:
+        """Get the embedding model, loading it on first use.
+        
+        This is the process-wide embedder, shared with other services (e.g. the tool
+        router) so the model is only in memory once and one cache owns its disk directory.
+        """
+        if self.embedder is None:
+            self.embedder = get_embedder()
+        return self.embedder
+    
     def _get_collection_name(self, user_profile_id: Optional[str] = None) -> str:
         """Get collection name for a user profile.
         
@@ -55,7 +87,7 @@ class VectorStore:
         return f"conversations_user_{profile_id}"
     
     def _initialize_store(self):
-        """Initialize vector store (ChromaDB)."""
+        """Initialize vector store (ChromaDB or NumPy index)."""
         logger = logging.getLogger(__name__)
         if self.store_type == "chromadb":
             try:
@@ -82,11 +114,10 @@ class VectorStore:
                 self.collection = None
                 self.client = None
         elif self.store_type == "faiss":
-            # FAISS support not implemented - using ChromaDB only
-            logger.warning("FAISS store type requested but not implemented, using ChromaDB")
-            self.store_type = "chromadb"
-            # Re-initialize with ChromaDB
-            self._initialize_chromadb()
+            # In-process NumPy index: no database to open, files are memory-mapped on first use
+            self._index_root = settings.vector_store_dir / "numpy_index"
+            self.collection = self._get_collection()
+            logger.info("      NumPy vector index ready for user: %s", self.user_profile_id)
     
     def _get_collection(self, user_profile_id: Optional[str] = None) -> Optional[Any]:
         """Get collection for a specific user profile.
@@ -95,17 +126,32 @@ class VectorStore:
             user_profile_id: User profile ID, or None to use current user
         
         Returns:
-            ChromaDB collection or None
+            ChromaDB collection, NumpyVectorIndex, or None
         """
-        if not self.client:
-            return None
-        
         profile_id = user_profile_id or self.user_profile_id
         
         # Check cache first
         if profile_id in self._collections_cache:
             return self._collections_cache[profile_id]
         
+        if self.store_type == "faiss":
+            try:
+                index = NumpyVectorIndex(
+                    self._index_root / self._get_collection_name(profile_id),
+                    ivf_lists=settings.vector_index_ivf_lists,
+                    ivf_probes=settings.vector_index_ivf_probes,
+                    ivf_min_vectors=settings.vector_index_ivf_min_vectors
+                )
+                self._collections_cache[profile_id] = index
+                return index
+            except Exception as e:
+                logger = logging.getLogger(__name__)
+                logger.error(f"Error opening vector index for user {profile_id}: {e}", exc_info=True)
+                return None
+        
+        if not self.client:
+            return None
+        
         # Get or create collection for this user
         try:
             collection_name = self._get_collection_name(profile_id)
@@ -140,14 +186,10 @@ class VectorStore:
         if not message or not message.strip():
             return  # Skip empty messages
         
-        # Lazy initialize embedder if needed
-        if self.embedder is None:
-            logger = logging.getLogger(__name__)
-            logger.info("Lazy loading embedding model...")
-            self.embedder = EmbeddingModel()
+        embedder = self.get_embedder()
         
         # Generate embedding
-        embedding = await self.embedder.encode(message)
+        embedding = await embedder.encode(message)
         
         # Get user-specific collection
         collection = self._get_collection(user_profile_id)
@@ -156,7 +198,7 @@ class VectorStore:
         if self.store_type == "chromadb" and collection:
             try:
                 # Create unique ID for this message
-                message_id = f"{conversation_id}_{timestamp.isoformat()}_{hash(message) % 1000000}"
+                message_id = message_vector_id(conversation_id, timestamp.isoformat(), role, message)
                 
                 # Add to ChromaDB
                 collection.add(
@@ -170,19 +212,85 @@ class VectorStore:
                     }]
                 )
             except Exception as e:
-                print(f"Error adding message to vector store: {e}")
-        elif self.store_type == "faiss":
-            # FAISS not implemented - should not reach here
-            raise NotImplementedError("FAISS store type is not implemented")
-            pass
+                logger = logging.getLogger(__name__)
+                logger.error(f"Error adding message to vector store: {e}", exc_info=True)
+        elif self.store_type == "faiss" and collection:
+            try:
+                message_id = message_vector_id(conversation_id, timestamp.isoformat(), role, message)
+                collection.add(
+                    ids=[message_id],
+                    embeddings=embedding.reshape(1, -1),
+                    documents=[message],
+                    metadatas=[{
+                        "conversation_id": conversation_id,
+                        "role": role,
+                        "timestamp": timestamp.isoformat()
+                    }]
+                )
+            except Exception as e:
+                logger = logging.getLogger(__name__)
+                logger.error(f"Error adding message to vector store: {e}", exc_info=True)
+    
+    async def add_messages(self, items: List[Dict[str, Any]]):
+        """Add a batch of messages to the vector store.
+        
+        All texts are embedded in one call and written with one collection.add
+        per user profile. Unlike add_message, errors are raised so the caller
+        can retry.
+        
+        Args:
+            items: Dicts with 'conversation_id', 'message', 'role', 'timestamp'
+                (datetime) and optionally 'user_profile_id' and 'id' (see message_vector_id)
+        """
+        items = [item for item in items if item.get("message") and item["message"].strip()]
+        if not items:
+            return
+        
+        embedder = self.get_embedder()
+        
+        embeddings = await embedder.encode([item["message"] for item in items])
+        
+        by_profile: Dict[Optional[str], List[int]] = defaultdict(list)
+        for i, item in enumerate(items):
+            by_profile[item.get("user_profile_id")].append(i)
+        
+        for user_profile_id, indices in by_profile.items():
+            collection = self._get_collection(user_profile_id)
+            if not collection:
+                raise RuntimeError(f"Vector store collection unavailable for user {user_profile_id or self.user_profile_id}")
+            collection.add(
+                embeddings=embeddings[indices] if self.store_type == "faiss" else [embeddings[i].tolist() for i in indices],
+                documents=[items[i]["message"] for i in indices],
+                ids=[
+                    items[i].get("id") or message_vector_id(
+                        items[i]["conversation_id"], items[i]["timestamp"].isoformat(), items[i]["role"], items[i]["message"]
+                    )
+                    for i in indices
+                ],
+                metadatas=[
+                    {
+                        "conversation_id": items[i]["conversation_id"],
+                        "role": items[i]["role"],
+                        "timestamp": items[i]["timestamp"].isoformat()
+                    }
+                    for i in indices
+                ]
+            )
     
-    async def search(self, query: str, top_k: int = 5, user_profile_id: Optional[str] = None) -> List[Dict[str, Any]]:
+    async def search(
+        self,
+        query: str,
+        top_k: int = 5,
+        user_profile_id: Optional[str] = None,
+        exclude_conversation_id: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
         """Search for similar messages.
         
         Args:
             query: Search query text
             top_k: Number of results to return
             user_profile_id: User profile ID (uses current user if None)
+            exclude_conversation_id: Conversation ID to leave out of the results
         
         Returns:
             List of dictionaries with text, score, and metadata
@@ -191,13 +299,9 @@ class VectorStore:
             return []
         
         # Generate query embedding
-        # Lazy initialize embedder if needed
-        if self.embedder is None:
-            logger = logging.getLogger(__name__)
-            logger.info("Lazy loading embedding model...")
-            self.embedder = EmbeddingModel()
+        embedder = self.get_embedder()
         
-        query_embedding = await self.embedder.encode(query)
+        query_embedding = await embedder.encode(query)
         
         # Get user-specific collection
         collection = self._get_collection(user_profile_id)
@@ -205,10 +309,14 @@ class VectorStore:
         # Search in vector database
         if self.store_type == "chromadb" and collection:
             try:
+                query_kwargs = {}
+                if exclude_conversation_id:
+                    query_kwargs["where"] = {"conversation_id": {"$ne": exclude_conversation_id}}
                 results = collection.query(
                     query_embeddings=[query_embedding.tolist()],
                     n_results=top_k,
-                    include=["documents", "metadatas", "distances"]
+                    include=["documents", "metadatas", "distances"],
+                    **query_kwargs
                 )
                 
                 # Format results
@@ -232,12 +340,29 @@ class VectorStore:
                 
                 return formatted_results
             except Exception as e:
-                print(f"Error searching vector store: {e}")
+                logger = logging.getLogger(__name__)
+                logger.error(f"Error searching vector store: {e}", exc_info=True)
+                return []
+        elif self.store_type == "faiss" and collection:
+            try:
+                # Scores are cosine similarities of normalized embeddings, the same
+                # scale the ChromaDB path produces for normalized sentence embeddings
+                return [
+                    {
+                        "text": hit["document"],
+                        "score": max(0.0, hit["score"]),
+                        "metadata": hit["metadata"]
+                    }
+                    for hit in collection.search(
+                        query_embedding,
+                        top_k=top_k,
+                        exclude_conversation_id=exclude_conversation_id
+                    )
+                ]
+            except Exception as e:
+                logger = logging.getLogger(__name__)
+                logger.error(f"Error searching vector store: {e}", exc_info=True)
                 return []
-        elif self.store_type == "faiss":
-            # FAISS not implemented - should not reach here
-            raise NotImplementedError("FAISS store type is not implemented")
-            return []
         
         return []
     
@@ -252,6 +377,12 @@ class VectorStore:
             True if deletion was successful, False otherwise
         """
         collection = self._get_collection(user_profile_id)
+        if self.store_type == "faiss" and collection:
+            deleted = collection.delete_conversation(conversation_id)
+            if deleted:
+                logger = logging.getLogger(__name__)
+                logger.info(f"Deleted {deleted} messages from vector store for conversation {conversation_id}")
+            return True
         if self.store_type == "chromadb" and collection:
             try:
                 # Get all messages for this conversation
@@ -290,14 +421,18 @@ class VectorStore:
             True if deletion was successful, False otherwise
         """
         collection = self._get_collection(user_profile_id)
-        if self.store_type == "chromadb" and collection:
+        if collection and self.store_type in ("chromadb", "faiss"):
             try:
                 logger = logging.getLogger(__name__)
                 # Get all messages for this conversation from vector store
-                results = collection.get(
-                    where={"conversation_id": conversation_id},
-                    include=["metadatas"]
-                )
+                if self.store_type == "faiss":
+                    rows = collection.get_conversation_rows(conversation_id)
+                    results = {"ids": [row["id"] for row in rows], "metadatas": [row["metadata"] for row in rows]}
+                else:
+                    results = collection.get(
+                        where={"conversation_id": conversation_id},
+                        include=["metadatas"]
+                    )
                 
                 ids_to_delete = []
                 if results["ids"] and results["metadatas"]:
@@ -319,7 +454,10 @@ class VectorStore:
                         ids_to_delete.append(messages_with_index[i][1])
                 
                 if ids_to_delete:
-                    collection.delete(ids=ids_to_delete)
+                    if self.store_type == "faiss":
+                        collection.delete_ids(ids_to_delete)
+                    else:
+                        collection.delete(ids=ids_to_delete)
                     logger.info(f"Deleted {len(ids_to_delete)} messages from vector store after index {message_index} for conversation {conversation_id}")
                 
                 return True
@@ -340,15 +478,108 @@ class VectorStore:
             Number of items in collection, or 0 if unavailable
         """
         collection = self._get_collection(user_profile_id)
-        if self.store_type == "chromadb" and collection:
+        if collection:
             try:
                 return collection.count()
             except Exception:
                 return 0
         return 0
     
+    async def delete_matching_message(
+        self,
+        conversation_id: str,
+        content: str,
+        timestamp: datetime,
+        user_profile_id: Optional[str] = None
+    ) -> bool:
+        """Delete the stored entry for a message, matched by content and timestamp.
+        
+        Args:
+            conversation_id: Conversation ID
+            content: Exact message text
+            timestamp: Message timestamp (matched to the second)
+            user_profile_id: User profile ID (uses current user if None)
+        
+        Returns:
+            True if an entry was deleted
+        """
+        collection = self._get_collection(user_profile_id)
+        if not collection:
+            return False
+        
+        if self.store_type == "faiss":
+            entries = [
+                (row["id"], row["document"], row["metadata"])
+                for row in collection.get_conversation_rows(conversation_id)
+            ]
+        else:
+            results = collection.get(
+                where={"conversation_id": conversation_id},
+                include=["documents", "metadatas"]
+            )
+            metadatas = results.get("metadatas") or []
+            entries = [
+                (results["ids"][i], doc, metadatas[i] if i < len(metadatas) else {})
+                for i, doc in enumerate(results.get("documents") or [])
+            ]
+        
+        for entry_id, doc, meta in entries:
+            if doc != content:
+                continue
+            stored_timestamp = (meta or {}).get("timestamp", "")
+            # Delete if content matches (and optionally timestamp)
+            if not stored_timestamp or stored_timestamp.startswith(timestamp.isoformat()[:19]):
+                if self.store_type == "faiss":
+                    collection.delete_ids([entry_id])
+                else:
+                    collection.delete(ids=[entry_id])
+                return True
+        return False
+    
+    def clear_all(self) -> int:
+        """Delete every stored entry for all user profiles.
+        
+        Returns:
+            Number of entries deleted
+        """
+        logger = logging.getLogger(__name__)
+        deleted_count = 0
+        if self.store_type == "faiss":
+            index_root = getattr(self, "_index_root", None)
+            if index_root and index_root.exists():
+                for index_dir in index_root.iterdir():
+                    if not index_dir.is_dir():
+                        continue
+                    profile_id = index_dir.name.replace("conversations_user_", "", 1)
+                    index = self._collections_cache.get(profile_id) or NumpyVectorIndex(index_dir)
+                    deleted_count += index.clear()
+            # Cleared indexes reset their in-memory state, so cached ones stay usable
+            self.collection = self._get_collection()
+        elif self.client:
+            # ChromaDB: Delete all collections (each user has their own collection)
+            for coll in self.client.list_collections():
+                try:
+                    count = coll.count()
+                    self.client.delete_collection(name=coll.name)
+                    deleted_count += count
+                    logger.info(f"Deleted collection {coll.name} with {count} entries")
+                except Exception as e:
+                    logger.warning(f"Could not delete collection {coll.name}: {e}")
+            
+            # Clear cache
+            self._collections_cache.clear()
+            self.collection = None
+        
+        logger.info(f"Deleted {deleted_count} total entries from vector store across all users")
+        return deleted_count
+    
     def cleanup(self):
         """Cleanup resources and close connections."""
+        # The embedder is shared process-wide, so it is released rather than closed
+        self.embedder = None
+        if self.store_type == "faiss":
+            for index in self._collections_cache.values():
+                index.close()
         if self.store_type == "chromadb" and self.client:
             try:
                 # ChromaDB client cleanup - close any open connections
@@ -0,0 +1,206 @@
+"""Latency, throughput and queue metrics for the chat pipeline."""
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Deque, Dict, Iterator, List, Optional, Tuple
+import bisect
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Latency buckets in seconds (Prometheus-style upper bounds)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+# Decode throughput buckets in tokens per second
+THROUGHPUT_BUCKETS = (1, 2, 5, 10, 15, 20, 30, 40, 60, 80, 120, 200, 400)
+# Prompt processing throughput buckets in tokens per second
+PROMPT_THROUGHPUT_BUCKETS = (10, 25, 50, 100, 200, 400, 800, 1600, 3200, 6400, 12800)
+# Prompt size buckets in tokens
+PROMPT_TOKEN_BUCKETS = (128, 256, 512, 1024, 2048, 4096, 8192, 16384, 32768, 65536, 131072)
+
+# name -> (help text, buckets)
+_METRIC_DEFINITIONS: Dict[str, Tuple[str, Tuple[float, ...]]] = {
+    "chat_phase_seconds": ("Time spent in each phase of a chat turn", LATENCY_BUCKETS),
+    "chat_time_to_first_token_seconds": ("Time from sending a request to the LLM server until the first content token", LATENCY_BUCKETS),
+    "chat_decode_tokens_per_second": ("LLM decode throughput per request", THROUGHPUT_BUCKETS),
+    "llm_server_prompt_eval_tokens_per_second": ("Prompt eval throughput reported in the llama server log", PROMPT_THROUGHPUT_BUCKETS),
+    "llm_server_eval_tokens_per_second": ("Decode throughput reported in the llama server log", THROUGHPUT_BUCKETS),
+    "llm_queue_wait_seconds": ("Time a request waited for a llama server slot", LATENCY_BUCKETS),
+    "chat_prompt_tokens": ("Prompt tokens sent per LLM request, as counted by the prompt budgeter", PROMPT_TOKEN_BUCKETS),
+}
+
+# name -> help text
+_GAUGE_DEFINITIONS: Dict[str, str] = {
+    "llm_queue_depth": "Requests waiting for a llama server slot",
+    "llm_active_requests": "Requests currently holding a llama server slot",
+}
+
+
+class Histogram:
+    """Cumulative-bucket histogram that also keeps recent samples for percentiles."""
+    
+    def __init__(self, buckets: Tuple[float, ...], max_samples: int = 1024):
+        self.buckets = buckets
+        self.bucket_counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self._samples: Deque[float] = deque(maxlen=max_samples)
+    
+    def observe(self, value: float):
+        index = bisect.bisect_left(self.buckets, value)
+        if index < len(self.buckets):
+            self.bucket_counts[index] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+        self._samples.append(value)
+    
+    def percentile(self, q: float) -> Optional[float]:
+        """Percentile (0-100) over the recent samples, or None if empty."""
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))]
+    
+    def cumulative_counts(self) -> List[int]:
+        counts = []
+        running = 0
+        for bucket_count in self.bucket_counts:
+            running += bucket_count
+            counts.append(running)
+        return counts
+    
+    def summary(self) -> Dict[str, Any]:
+        percentiles = {f"p{q}": self.percentile(q) for q in (50, 95, 99)}
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 6),
+            "mean": round(self.sum / self.count, 6) if self.count else None,
+            "max": round(self.max, 6),
+            **{key: round(value, 6) if value is not None else None for key, value in percentiles.items()}
+        }
+
+
+class MetricsRegistry:
+    """Collects span durations and other observations into labelled histograms, plus gauges."""
+    
+    def __init__(self):
+        self._histograms: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], Histogram] = {}
+        self._gauges: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], float] = {}
+        self._lock = threading.Lock()
+        self._started_at = time.time()
+    
+    def observe(self, name: str, value: float, **labels: str):
+        """Record one observation.
+        
+        Args:
+            name: Metric name (see _METRIC_DEFINITIONS)
+            value: Observed value
+            **labels: Label values, e.g. phase="memory_retrieval"
+        """
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                buckets = _METRIC_DEFINITIONS.get(name, ("", LATENCY_BUCKETS))[1]
+                histogram = self._histograms[key] = Histogram(buckets)
+            histogram.observe(value)
+    
+    def set_gauge(self, name: str, value: float, **labels: str):
+        """Set the current value of a gauge.
+        
+        Args:
+            name: Gauge name (see _GAUGE_DEFINITIONS)
+            value: Current value
+            **labels: Label values, e.g. priority="interactive"
+        """
+        with self._lock:
+            self._gauges[(name, tuple(sorted(labels.items())))] = value
+    
+    @contextmanager
+    def span(self, phase: str) -> Iterator[None]:
+        """Time a block of code as one phase of a chat turn.
+        
+        Args:
+            phase: Phase name recorded as the "phase" label of chat_phase_seconds
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            duration = time.perf_counter() - start
+            self.observe("chat_phase_seconds", duration, phase=phase)
+            logger.debug(f"[METRICS] {phase} took {duration * 1000:.1f}ms")
+    
+    def reset(self):
+        """Drop all recorded observations (gauges keep their current values)."""
+        with self._lock:
+            self._histograms.clear()
+            self._started_at = time.time()
+    
+    def get_snapshot(self) -> Dict[str, Any]:
+        """Get all metrics as JSON-friendly summaries.
+        
+        Returns:
+            Dict with collection start time and, per metric, a list of {labels, summary}
+        """
+        with self._lock:
+            items = sorted(self._histograms.items())
+            metrics: Dict[str, List[Dict[str, Any]]] = {}
+            for (name, labels), histogram in items:
+                metrics.setdefault(name, []).append({
+                    "labels": dict(labels),
+                    **histogram.summary()
+                })
+            for (name, labels), value in sorted(self._gauges.items()):
+                metrics.setdefault(name, []).append({
+                    "labels": dict(labels),
+                    "value": value
+                })
+        return {
+            "since": self._started_at,
+            "metrics": metrics
+        }
+    
+    def render_prometheus(self) -> str:
+        """Render all metrics in the Prometheus text exposition format."""
+        lines: List[str] = []
+        with self._lock:
+            items = sorted(self._histograms.items())
+            described = set()
+            for (name, labels), histogram in items:
+                if name not in described:
+                    help_text = _METRIC_DEFINITIONS.get(name, ("",))[0]
+                    lines.append(f"# HELP {name} {help_text}")
+                    lines.append(f"# TYPE {name} histogram")
+                    described.add(name)
+                label_text = ",".join(f'{key}="{value}"' for key, value in labels)
+                prefix = f"{label_text}," if label_text else ""
+                for bound, cumulative in zip(histogram.buckets, histogram.cumulative_counts()):
+                    lines.append(f'{name}_bucket{{{prefix}le="{bound}"}} {cumulative}')
+                lines.append(f'{name}_bucket{{{prefix}le="+Inf"}} {histogram.count}')
+                suffix = f"{{{label_text}}}" if label_text else ""
+                lines.append(f"{name}_sum{suffix} {histogram.sum}")
+                lines.append(f"{name}_count{suffix} {histogram.count}")
+            for (name, labels), gauge_value in sorted(self._gauges.items()):
+                if name not in described:
+                    lines.append(f"# HELP {name} {_GAUGE_DEFINITIONS.get(name, '')}")
+                    lines.append(f"# TYPE {name} gauge")
+                    described.add(name)
+                label_text = ",".join(f'{key}="{value}"' for key, value in labels)
+                suffix = f"{{{label_text}}}" if label_text else ""
+                lines.append(f"{name}{suffix} {gauge_value}")
+        return "\n".join(lines) + "\n"
+
+
+# Global instance
+_metrics: Optional[MetricsRegistry] = None
+
+
+def get_metrics() -> MetricsRegistry:
+    """Get the global metrics registry."""
+    global _metrics
+    if _metrics is None:
+        _metrics = MetricsRegistry()
+    return _metrics
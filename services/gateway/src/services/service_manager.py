@@ -40,6 +40,8 @@ class ServiceManager:
         # Load settings from file stores into LLM manager
         if self.llm_manager:
             await self.llm_manager.load_settings_from_file_stores(self.memory_store)
+            # Catalogue of downloaded models for /api/models, kept current in the background
+            self.llm_manager.model_catalog.start()
         
         # LLM Service Manager no longer needed - using direct manager
         self.llm_service_manager = None
@@ -147,15 +149,29 @@ class ServiceManager:
     async def shutdown(self) -> None:
         """Gracefully shut down background tasks/services."""
         try:
+            # Cancel background summaries before their LLM server goes away
+            if self.chat_manager:
+                await self.chat_manager.summarizer.shutdown()
+            
+            if self.llm_manager:
+                await self.llm_manager.model_catalog.stop()
+            
             # Stop LLM server process first
             if self.llm_manager and hasattr(self.llm_manager, 'server_manager'):
                 try:
-                    logger.info("Stopping LLM server process...")
-                    await self.llm_manager.server_manager.stop_server()
-                    logger.info("✓ LLM server stopped")
+                    logger.info("Stopping LLM server processes...")
+                    await self.llm_manager.stop_all_servers()
+                    logger.info("✓ LLM servers stopped")
                 except Exception as e:
                     logger.error(f"Error stopping LLM server: {e}", exc_info=True)
             
+            # Flush queued vector memory writes
+            if self.memory_store:
+                try:
+                    await self.memory_store.shutdown()
+                except Exception as e:
+                    logger.error(f"Error shutting down memory store: {e}", exc_info=True)
+            
             # Stop status manager
             if self.status_manager:
                 try:
@@ -264,22 +280,25 @@ class ServiceManager:
     # Interface for ChatManager to call LLM
     async def generate_response(self, messages, settings=None, **kwargs):
         """Call LLM Service."""
-        async with httpx.AsyncClient() as client:
-            payload = {
-                "messages": messages,
-                **kwargs
-            }
-            if settings:
-                payload.update(settings)
-                
-            response = await client.post(f"{self.llm_service_url}/v1/chat/completions", json=payload, timeout=120.0)
-            if response.status_code != 200:
-                raise RuntimeError(f"LLM Service Error: {response.text}")
-                
-            data = response.json()
-            return {
-                "response": data["choices"][0]["message"]["content"],
-                "tool_calls": data["choices"][0]["message"].get("tool_calls")
-            }
+        from .llm.scheduler import Priority
+        server_manager = self.llm_manager.server_manager
+        client = server_manager.get_client()
+        payload = {
+            "messages": messages,
+            **kwargs
+        }
+        if settings:
+            payload.update(settings)
+            
+        async with server_manager.scheduler.slot(Priority.NORMAL, client_id="service_manager"):
+            response = await client.post(f"{server_manager.get_server_url()}/v1/chat/completions", json=payload, timeout=120.0)
+        if response.status_code != 200:
+            raise RuntimeError(f"LLM Service Error: {response.text}")
+            
+        data = response.json()
+        return {
+            "response": data["choices"][0]["message"]["content"],
+            "tool_calls": data["choices"][0]["message"].get("tool_calls")
+        }
 
 service_manager = ServiceManager()
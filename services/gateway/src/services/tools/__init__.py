@@ -3,10 +3,13 @@ from .manager import ToolManager
 from .registry import ToolRegistry
 from .executor import ToolExecutor
 from .base_tool import BaseTool
+from .router import ToolRoute, ToolRouter
 
 __all__ = [
     "ToolManager",
     "ToolRegistry",
     "ToolExecutor",
     "BaseTool",
+    "ToolRoute",
+    "ToolRouter",
 ]
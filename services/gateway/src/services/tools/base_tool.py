@@ -1,6 +1,6 @@
 """Simple base tool interface for OpenAI function calling."""
 from abc import ABC, abstractmethod
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
 
 
 class BaseTool(ABC):
@@ -11,8 +11,35 @@ class BaseTool(ABC):
     2. Implement name, description, schema properties
     3. Implement execute method
     4. Register in ToolRegistry
+    
+    Tool calls from one turn run concurrently. Tools that read-modify-write
+    shared state (e.g. a calendar file) set parallel_safe = False so their
+    calls are serialised in call order.
     """
     
+    # Whether calls to this tool may run at the same time as other calls to it
+    parallel_safe: bool = True
+    
+    # Execution timeout in seconds (None = settings.tool_timeout)
+    timeout: Optional[float] = None
+    
+    # Seconds a successful result is reused for identical arguments (0 = never cached)
+    cache_ttl: float = 0.0
+    
+    # Typical user requests for this tool; the tool router matches messages against them
+    examples: List[str] = []
+    
+    def is_cacheable(self, arguments: Dict[str, Any]) -> bool:
+        """Whether the result of this call may be served from the result cache.
+        
+        Tools with both read and write actions override this to cache reads only.
+        """
+        return self.cache_ttl > 0
+    
+    def invalidates(self, arguments: Dict[str, Any]) -> List[str]:
+        """Names of tools whose cached results become stale once this call runs."""
+        return []
+    
     @property
     @abstractmethod
     def name(self) -> str:
@@ -10,6 +10,15 @@ class BenchmarkTool(BaseTool):
     function calling is working correctly with the model.
     """
     
+    # Pure function of its arguments
+    cache_ttl = 3600.0
+    
+    examples = [
+        "What is 1234 plus 5678?",
+        "Add 17 and 25",
+        "Calculate the sum of 3.5 and 4.25"
+    ]
+    
     @property
     def name(self) -> str:
         return "add_numbers"
@@ -0,0 +1,227 @@
+"""SQLite-backed event store for the calendar tool."""
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Union
+import json
+import logging
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def to_timestamp(value: Union[str, datetime, None]) -> Optional[float]:
+    """Convert an ISO string or datetime to seconds for ordering.
+    
+    Timezones are dropped, matching how the calendar tool has always compared
+    event times (wall-clock).
+    
+    Returns:
+        Seconds since 1970-01-01, or None if the value can't be parsed
+    """
+    if value is None or value == "":
+        return None
+    try:
+        dt = value if isinstance(value, datetime) else datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except (ValueError, TypeError):
+        return None
+    if dt.tzinfo:
+        dt = dt.replace(tzinfo=None)
+    return (dt - _EPOCH).total_seconds()
+
+
+class CalendarStore:
+    """Calendar events indexed by start time.
+    
+    Range listings are index range scans on start time. Overlap queries use
+    the same index, bounded below by the longest event duration (itself read
+    from an expression index), so both cost O(log n + k). Every write is a
+    single SQLite transaction.
+    """
+    
+    def __init__(self, db_path: Path):
+        """Open (and create if needed) the event database.
+        
+        Args:
+            db_path: SQLite database file
+        """
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS events (
+                id TEXT PRIMARY KEY,
+                start_time TEXT,
+                start_ts REAL,
+                end_ts REAL,
+                data TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_events_start ON events (start_ts);
+            CREATE INDEX IF NOT EXISTS idx_events_duration ON events (end_ts - start_ts);
+            CREATE TABLE IF NOT EXISTS meta (
+                key TEXT PRIMARY KEY,
+                value TEXT
+            );
+        """)
+    
+    def close(self):
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
+    
+    @staticmethod
+    def _event_params(event: Dict[str, Any]):
+        start_ts = to_timestamp(event.get("start_time"))
+        end_ts = to_timestamp(event.get("end_time"))
+        return (
+            event["id"],
+            event.get("start_time") or "",
+            start_ts,
+            end_ts if start_ts is not None else None,
+            json.dumps(event, default=str)
+        )
+    
+    def _write(self, statements: Iterable[tuple]):
+        """Run (sql, params) statements in one transaction and bump last_modified."""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                for sql, params in statements:
+                    self._conn.execute(sql, params)
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO meta (key, value) VALUES ('last_modified', ?)",
+                    (str(time.time()),)
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+    
+    def _query(self, sql: str, params: tuple = ()) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [json.loads(row[0]) for row in rows]
+    
+    def import_events(self, events: List[Dict[str, Any]]) -> int:
+        """Insert events in one transaction (used to migrate events.json).
+        
+        Returns:
+            Number of events imported
+        """
+        valid = [event for event in events if isinstance(event, dict) and event.get("id")]
+        self._write(
+            ("INSERT OR REPLACE INTO events (id, start_time, start_ts, end_ts, data) VALUES (?, ?, ?, ?, ?)",
+             self._event_params(event))
+            for event in valid
+        )
+        return len(valid)
+    
+    def upsert(self, event: Dict[str, Any]):
+        """Insert or replace an event (must have an 'id')."""
+        self._write([(
+            "INSERT OR REPLACE INTO events (id, start_time, start_ts, end_ts, data) VALUES (?, ?, ?, ?, ?)",
+            self._event_params(event)
+        )])
+    
+    def get(self, event_id: str) -> Optional[Dict[str, Any]]:
+        """Get an event by ID, or None if it doesn't exist."""
+        events = self._query("SELECT data FROM events WHERE id = ?", (event_id,))
+        return events[0] if events else None
+    
+    def delete(self, event_id: str) -> Optional[Dict[str, Any]]:
+        """Delete an event.
+        
+        Returns:
+            The deleted event, or None if it didn't exist
+        """
+        event = self.get(event_id)
+        if event is not None:
+            self._write([("DELETE FROM events WHERE id = ?", (event_id,))])
+        return event
+    
+    def count(self) -> int:
+        """Get the number of stored events."""
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM events").fetchone()[0]
+    
+    def list_events(self, start: Optional[datetime] = None, end: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        """List events ordered by start time, optionally limited to a start-time window.
+        
+        Args:
+            start: Only events starting at or after this time
+            end: Only events starting at or before this time
+        
+        Returns:
+            List of events (events with an unparseable start are only included when unfiltered)
+        """
+        if start is None and end is None:
+            return self._query("SELECT data FROM events ORDER BY start_time, id")
+        return self._query(
+            "SELECT data FROM events WHERE start_ts >= ? AND start_ts <= ? ORDER BY start_time, id",
+            (
+                to_timestamp(start) if start is not None else float("-inf"),
+                to_timestamp(end) if end is not None else float("inf")
+            )
+        )
+    
+    def find_overlapping(self, start: datetime, end: datetime, exclude_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Find events overlapping [start, end).
+        
+        Args:
+            start: Start of the time range
+            end: End of the time range
+            exclude_id: Event ID to leave out (for updates)
+        
+        Returns:
+            Overlapping events ordered by start time
+        """
+        start_ts = to_timestamp(start)
+        end_ts = to_timestamp(end)
+        with self._lock:
+            longest = self._conn.execute("SELECT MAX(end_ts - start_ts) FROM events").fetchone()[0] or 0.0
+            rows = self._conn.execute(
+                """
+                SELECT data FROM events
+                WHERE start_ts >= ? AND start_ts < ? AND end_ts > ? AND id != ?
+                ORDER BY start_ts, id
+                """,
+                (start_ts - max(longest, 0.0), end_ts, start_ts, exclude_id or "")
+            ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+    
+    def delete_range(self, start: datetime, end: datetime) -> List[Dict[str, Any]]:
+        """Delete all events starting within [start, end].
+        
+        Returns:
+            The deleted events
+        """
+        params = (to_timestamp(start), to_timestamp(end))
+        deleted = self._query(
+            "SELECT data FROM events WHERE start_ts >= ? AND start_ts <= ? ORDER BY start_time, id", params
+        )
+        if deleted:
+            self._write([("DELETE FROM events WHERE start_ts >= ? AND start_ts <= ?", params)])
+        return deleted
+    
+    def clear(self) -> int:
+        """Delete every event.
+        
+        Returns:
+            Number of events deleted
+        """
+        count = self.count()
+        self._write([("DELETE FROM events", ())])
+        return count
+    
+    @property
+    def last_modified(self) -> float:
+        """Time of the last write (0 if the store has never been written)."""
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = 'last_modified'").fetchone()
+        return float(row[0]) if row else 0.0
@@ -4,7 +4,9 @@ from datetime import datetime, timedelta
 from pathlib import Path
 import json
 import logging
+import os
 from ..base_tool import BaseTool
+from .calendar_store import CalendarStore
 
 logger = logging.getLogger(__name__)
 
@@ -12,6 +14,22 @@ logger = logging.getLogger(__name__)
 class CalendarTool(BaseTool):
     """Tool for managing calendar events with iCal file storage."""
     
+    # Updates check for conflicts before writing, so calls must not overlap
+    parallel_safe = False
+    
+    # Reads are cached until the next write
+    cache_ttl = 60.0
+    _READ_ACTIONS = {"list", "get", "export", "check_conflicts"}
+    
+    examples = [
+        "Schedule a meeting with Sam tomorrow at 3pm",
+        "What's on my calendar this week?",
+        "Do I have anything booked on Friday afternoon?",
+        "Move my dentist appointment to next Tuesday",
+        "Cancel the team lunch event",
+        "Add a weekly standup every Monday at 9"
+    ]
+    
     def __init__(self, calendar_dir: Optional[Path] = None):
         """Initialize calendar tool.
         
@@ -25,6 +43,8 @@ class CalendarTool(BaseTool):
         self.calendar_dir = Path(calendar_dir)
         self.calendar_dir.mkdir(parents=True, exist_ok=True)
         self.calendar_file = self.calendar_dir / "calendar.ics"
+        self.store = CalendarStore(self.calendar_dir / "calendar.db")
+        self._migrate_events_json()
     
     @property
     def name(self) -> str:
@@ -131,6 +151,12 @@ Extract:
             }
         }
     
+    def is_cacheable(self, arguments: Dict[str, Any]) -> bool:
+        return arguments.get("action") in self._READ_ACTIONS
+    
+    def invalidates(self, arguments: Dict[str, Any]) -> List[str]:
+        return [] if self.is_cacheable(arguments) else [self.name]
+    
     async def execute(self, arguments: Dict[str, Any]) -> Dict[str, Any]:
         """Execute calendar tool."""
         action = arguments.get("action")
@@ -159,32 +185,30 @@ Extract:
                 "result": None
             }
     
-    def _load_events(self) -> List[Dict[str, Any]]:
-        """Load events from JSON storage (simpler than parsing iCal)."""
+    def _migrate_events_json(self):
+        """Import events from the legacy events.json into the store (once)."""
         events_file = self.calendar_dir / "events.json"
         if not events_file.exists():
-            return []
+            return
         
         try:
             with open(events_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
+                events = json.load(f)
+            if self.store.count() == 0:
+                imported = self.store.import_events(events if isinstance(events, list) else [])
+                logger.info(f"[CALENDAR TOOL] Migrated {imported} event(s) from events.json")
+            events_file.replace(events_file.with_name("events.json.migrated"))
         except Exception as e:
-            logger.error(f"Error loading events: {e}")
-            return []
+            logger.error(f"Error migrating events.json: {e}")
     
-    def _save_events(self, events: List[Dict[str, Any]]) -> bool:
-        """Save events to JSON storage."""
-        events_file = self.calendar_dir / "events.json"
+    def _ensure_ical_file(self):
+        """Regenerate the iCal file if the store changed since it was last written."""
         try:
-            with open(events_file, 'w', encoding='utf-8') as f:
-                json.dump(events, f, indent=2, default=str)
-            
-            # Also update iCal file
-            self._update_ical_file(events)
-            return True
+            if self.calendar_file.exists() and self.calendar_file.stat().st_mtime >= self.store.last_modified:
+                return
+            self._update_ical_file(self.store.list_events())
         except Exception as e:
-            logger.error(f"Error saving events: {e}")
-            return False
+            logger.error(f"Error updating iCal file: {e}")
     
     def _update_ical_file(self, events: List[Dict[str, Any]]):
         """Update iCal file from events."""
@@ -197,6 +221,7 @@ Extract:
                 "METHOD:PUBLISH"
             ]
             
+            dtstamp = self._format_ical_datetime(datetime.utcnow())
             for event in events:
                 ical_lines.extend([
                     "BEGIN:VEVENT",
@@ -206,14 +231,17 @@ Extract:
                     f"SUMMARY:{event.get('title', '')}",
                     f"DESCRIPTION:{event.get('description', '')}",
                     f"LOCATION:{event.get('location', '')}",
-                    f"DTSTAMP:{self._format_ical_datetime(datetime.utcnow())}",
+                    f"DTSTAMP:{dtstamp}",
                     "END:VEVENT"
                 ])
             
             ical_lines.append("END:VCALENDAR")
             
-            with open(self.calendar_file, 'w', encoding='utf-8') as f:
+            # Write to a temp file and swap it in so readers never see a partial calendar
+            tmp_file = self.calendar_file.with_suffix(".ics.tmp")
+            with open(tmp_file, 'w', encoding='utf-8') as f:
                 f.write("\n".join(ical_lines))
+            os.replace(tmp_file, self.calendar_file)
         except Exception as e:
             logger.error(f"Error updating iCal file: {e}")
     
@@ -377,10 +405,8 @@ Extract:
         start_time = start_time_dt.isoformat()
         end_time = end_time_dt.isoformat()
         
-        events = self._load_events()
-        
         # Check for overlapping events BEFORE creating
-        conflicts = self._find_overlapping_events(events, start_time_dt, end_time_dt, exclude_id=None)
+        conflicts = self._find_overlapping_events(start_time_dt, end_time_dt, exclude_id=None)
         
         event = {
             "id": str(uuid.uuid4()),
@@ -394,8 +420,7 @@ Extract:
             "updated_at": datetime.utcnow().isoformat()
         }
         
-        events.append(event)
-        self._save_events(events)
+        self.store.upsert(event)
         
         # Broadcast WebSocket event
         try:
@@ -421,9 +446,7 @@ Extract:
         }
     
     async def _list_events(self, arguments: Dict[str, Any]) -> Dict[str, Any]:
-        """List all calendar events."""
-        events = self._load_events()
-        
+        """List calendar events, optionally filtered by start date."""
         # Filter by date range if provided
         start_date = arguments.get("start_date")
         end_date = arguments.get("end_date")
@@ -432,89 +455,50 @@ Extract:
         filter_today = arguments.get("filter_today", False)
         filter_date = arguments.get("filter_date")  # Specific date to filter
         
-        if filter_today or filter_date:
-            now = datetime.now()
-            if filter_today:
-                # Filter for events today
-                today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
-                today_end = now.replace(hour=23, minute=59, second=59, microsecond=999999)
-                filtered = []
-                for event in events:
-                    try:
-                        event_start = datetime.fromisoformat(event.get("start_time", "").replace("Z", "+00:00"))
-                        # Remove timezone for comparison
-                        if event_start.tzinfo:
-                            event_start = event_start.replace(tzinfo=None)
-                        if today_start <= event_start <= today_end:
-                            filtered.append(event)
-                    except (ValueError, AttributeError):
-                        # Skip events with invalid dates
-                        continue
-                events = filtered
-            elif filter_date:
-                # Filter for events on a specific date
-                try:
-                    filter_dt = self._parse_natural_language_date(filter_date)
-                    if filter_dt:
-                        filter_start = filter_dt.replace(hour=0, minute=0, second=0, microsecond=0)
-                        filter_end = filter_dt.replace(hour=23, minute=59, second=59, microsecond=999999)
-                        filtered = []
-                        for event in events:
-                            try:
-                                event_start = datetime.fromisoformat(event.get("start_time", "").replace("Z", "+00:00"))
-                                if event_start.tzinfo:
-                                    event_start = event_start.replace(tzinfo=None)
-                                if filter_start <= event_start <= filter_end:
-                                    filtered.append(event)
-                            except (ValueError, AttributeError):
-                                continue
-                        events = filtered
-                except Exception:
-                    pass  # If parsing fails, return all events
-        
-        if start_date or end_date:
-            filtered = []
-            for event in events:
-                event_start_str = event.get("start_time", "")
-                try:
-                    # Parse event start time for proper date comparison
-                    event_start = datetime.fromisoformat(event_start_str.replace("Z", "+00:00"))
-                    if event_start.tzinfo:
-                        event_start = event_start.replace(tzinfo=None)
-                    
-                    # Parse filter dates if provided
-                    if start_date:
-                        try:
-                            filter_start = datetime.fromisoformat(start_date.replace("Z", "+00:00"))
-                            if filter_start.tzinfo:
-                                filter_start = filter_start.replace(tzinfo=None)
-                            if event_start < filter_start:
-                                continue
-                        except (ValueError, AttributeError):
-                            # Fallback to string comparison
-                            if event_start_str < start_date:
-                                continue
-                    
-                    if end_date:
-                        try:
-                            filter_end = datetime.fromisoformat(end_date.replace("Z", "+00:00"))
-                            if filter_end.tzinfo:
-                                filter_end = filter_end.replace(tzinfo=None)
-                            if event_start > filter_end:
-                                continue
-                        except (ValueError, AttributeError):
-                            # Fallback to string comparison
-                            if event_start_str > end_date:
-                                continue
-                    
-                    filtered.append(event)
-                except (ValueError, AttributeError):
-                    # If parsing fails, skip this event
-                    continue
-            events = filtered
-        
-        # Sort by start_time
-        events.sort(key=lambda x: x.get("start_time", ""))
+        # Every filter bounds the event start time; the bounds are intersected
+        lower: Optional[datetime] = None
+        upper: Optional[datetime] = None
+        
+        def narrow(start: Optional[datetime], end: Optional[datetime]):
+            nonlocal lower, upper
+            if start is not None:
+                lower = start if lower is None else max(lower, start)
+            if end is not None:
+                upper = end if upper is None else min(upper, end)
+        
+        day_filter = datetime.now() if filter_today else None
+        if not day_filter and filter_date:
+            try:
+                day_filter = self._parse_natural_language_date(filter_date)
+            except Exception:
+                day_filter = None  # If parsing fails, don't filter by date
+        if day_filter:
+            narrow(
+                day_filter.replace(hour=0, minute=0, second=0, microsecond=0),
+                day_filter.replace(hour=23, minute=59, second=59, microsecond=999999)
+            )
+        
+        text_filters = []  # Bounds that aren't ISO dates fall back to string comparison
+        for value, is_start in ((start_date, True), (end_date, False)):
+            if not value:
+                continue
+            try:
+                bound = datetime.fromisoformat(value.replace("Z", "+00:00"))
+                if bound.tzinfo:
+                    bound = bound.replace(tzinfo=None)
+                narrow(bound, None) if is_start else narrow(None, bound)
+            except (ValueError, AttributeError):
+                text_filters.append((value, is_start))
+        
+        # Index range scan on start time, already sorted by start_time
+        events = self.store.list_events(lower, upper)
+        
+        for value, is_start in text_filters:
+            events = [
+                event for event in events
+                if self._has_valid_start(event)
+                and ((event.get("start_time", "") >= value) if is_start else (event.get("start_time", "") <= value))
+            ]
         
         return {
             "result": {
@@ -524,6 +508,14 @@ Extract:
             "error": None
         }
     
+    @staticmethod
+    def _has_valid_start(event: Dict[str, Any]) -> bool:
+        try:
+            datetime.fromisoformat(event.get("start_time", "").replace("Z", "+00:00"))
+            return True
+        except (ValueError, AttributeError):
+            return False
+    
     async def _get_event(self, arguments: Dict[str, Any]) -> Dict[str, Any]:
         """Get a specific event by ID."""
         event_id = arguments.get("event_id")
@@ -533,13 +525,12 @@ Extract:
                 "result": None
             }
         
-        events = self._load_events()
-        for event in events:
-            if event.get("id") == event_id:
-                return {
-                    "result": event,
-                    "error": None
-                }
+        event = self.store.get(event_id)
+        if event is not None:
+            return {
+                "result": event,
+                "error": None
+            }
         
         return {
             "error": "Event not found",
@@ -555,95 +546,93 @@ Extract:
                 "result": None
             }
         
-        events = self._load_events()
-        for i, event in enumerate(events):
-            if event.get("id") == event_id:
-                # Check for conflicts if times are being updated
-                original_start = event.get("start_time")
-                original_end = event.get("end_time")
-                
-                # Parse new times if provided
-                new_start_time_dt = None
-                new_end_time_dt = None
-                
-                if "start_time" in arguments:
-                    new_start_time_str = arguments.get("start_time")
-                    new_start_time_dt = self._parse_natural_language_date(new_start_time_str)
-                    if not new_start_time_dt:
-                        return {
-                            "error": f"Could not parse start_time: {new_start_time_str}",
-                            "result": None
-                        }
-                
-                if "end_time" in arguments:
-                    new_end_time_str = arguments.get("end_time")
-                    new_end_time_dt = self._parse_natural_language_date(new_end_time_str)
-                    if not new_end_time_dt:
-                        return {
-                            "error": f"Could not parse end_time: {new_end_time_str}",
-                            "result": None
-                        }
-                
-                # Use new times or keep original
-                if new_start_time_dt:
-                    final_start_dt = new_start_time_dt
-                else:
-                    final_start_dt = datetime.fromisoformat(original_start.replace("Z", "+00:00"))
-                
-                if new_end_time_dt:
-                    final_end_dt = new_end_time_dt
-                else:
-                    final_end_dt = datetime.fromisoformat(original_end.replace("Z", "+00:00"))
-                
-                if final_start_dt.tzinfo:
-                    final_start_dt = final_start_dt.replace(tzinfo=None)
-                if final_end_dt.tzinfo:
-                    final_end_dt = final_end_dt.replace(tzinfo=None)
-                
-                # Check for conflicts (excluding the event being updated)
-                conflicts = self._find_overlapping_events(events, final_start_dt, final_end_dt, exclude_id=event_id)
-                
-                # Update event fields
-                if "title" in arguments:
-                    event["title"] = arguments["title"]
-                if "description" in arguments:
-                    event["description"] = arguments["description"]
-                if "location" in arguments:
-                    event["location"] = arguments["location"]
-                if "all_day" in arguments:
-                    event["all_day"] = arguments["all_day"]
-                
-                if new_start_time_dt:
-                    if event.get("all_day"):
-                        new_start_time_dt = new_start_time_dt.replace(hour=0, minute=0, second=0, microsecond=0)
-                    event["start_time"] = new_start_time_dt.isoformat()
-                
-                if new_end_time_dt:
-                    if event.get("all_day"):
-                        new_end_time_dt = new_end_time_dt.replace(hour=23, minute=59, second=59, microsecond=999999)
-                    event["end_time"] = new_end_time_dt.isoformat()
-                
-                event["updated_at"] = datetime.utcnow().isoformat()
-                events[i] = event
-                self._save_events(events)
-                
-                result = {
-                    "event": event,
-                    "conflicts": conflicts if conflicts else [],
-                    "has_conflicts": len(conflicts) > 0
+        event = self.store.get(event_id)
+        if event is None:
+            return {
+                "error": "Event not found",
+                "result": None
+            }
+        
+        # Check for conflicts if times are being updated
+        original_start = event.get("start_time")
+        original_end = event.get("end_time")
+        
+        # Parse new times if provided
+        new_start_time_dt = None
+        new_end_time_dt = None
+        
+        if "start_time" in arguments:
+            new_start_time_str = arguments.get("start_time")
+            new_start_time_dt = self._parse_natural_language_date(new_start_time_str)
+            if not new_start_time_dt:
+                return {
+                    "error": f"Could not parse start_time: {new_start_time_str}",
+                    "result": None
                 }
-                
-                if conflicts:
-                    logger.warning(f"[CALENDAR TOOL] Updated event with {len(conflicts)} overlapping event(s)")
-                
+        
+        if "end_time" in arguments:
+            new_end_time_str = arguments.get("end_time")
+            new_end_time_dt = self._parse_natural_language_date(new_end_time_str)
+            if not new_end_time_dt:
                 return {
-                    "result": result,
-                    "error": None
+                    "error": f"Could not parse end_time: {new_end_time_str}",
+                    "result": None
                 }
         
+        # Use new times or keep original
+        if new_start_time_dt:
+            final_start_dt = new_start_time_dt
+        else:
+            final_start_dt = datetime.fromisoformat(original_start.replace("Z", "+00:00"))
+        
+        if new_end_time_dt:
+            final_end_dt = new_end_time_dt
+        else:
+            final_end_dt = datetime.fromisoformat(original_end.replace("Z", "+00:00"))
+        
+        if final_start_dt.tzinfo:
+            final_start_dt = final_start_dt.replace(tzinfo=None)
+        if final_end_dt.tzinfo:
+            final_end_dt = final_end_dt.replace(tzinfo=None)
+        
+        # Check for conflicts (excluding the event being updated)
+        conflicts = self._find_overlapping_events(final_start_dt, final_end_dt, exclude_id=event_id)
+        
+        # Update event fields
+        if "title" in arguments:
+            event["title"] = arguments["title"]
+        if "description" in arguments:
+            event["description"] = arguments["description"]
+        if "location" in arguments:
+            event["location"] = arguments["location"]
+        if "all_day" in arguments:
+            event["all_day"] = arguments["all_day"]
+        
+        if new_start_time_dt:
+            if event.get("all_day"):
+                new_start_time_dt = new_start_time_dt.replace(hour=0, minute=0, second=0, microsecond=0)
+            event["start_time"] = new_start_time_dt.isoformat()
+        
+        if new_end_time_dt:
+            if event.get("all_day"):
+                new_end_time_dt = new_end_time_dt.replace(hour=23, minute=59, second=59, microsecond=999999)
+            event["end_time"] = new_end_time_dt.isoformat()
+        
+        event["updated_at"] = datetime.utcnow().isoformat()
+        self.store.upsert(event)
+        
+        result = {
+            "event": event,
+            "conflicts": conflicts if conflicts else [],
+            "has_conflicts": len(conflicts) > 0
+        }
+        
+        if conflicts:
+            logger.warning(f"[CALENDAR TOOL] Updated event with {len(conflicts)} overlapping event(s)")
+        
         return {
-            "error": "Event not found",
-            "result": None
+            "result": result,
+            "error": None
         }
     
     async def _delete_event(self, arguments: Dict[str, Any]) -> Dict[str, Any]:
@@ -655,40 +644,35 @@ Extract:
                 "result": None
             }
         
-        events = self._load_events()
-        for i, event in enumerate(events):
-            if event.get("id") == event_id:
-                deleted = events.pop(i)
-                self._save_events(events)
-                
-                # Broadcast WebSocket event
-                try:
-                    from ...websocket_manager import get_websocket_manager
-                    ws_manager = get_websocket_manager()
-                    await ws_manager.broadcast_calendar_event_deleted(event_id)
-                    await ws_manager.broadcast_calendar_events_changed()
-                except Exception as e:
-                    logger.debug(f"Failed to broadcast calendar event deleted: {e}")
-                
-                return {
-                    "result": {"deleted": deleted},
-                    "error": None
-                }
+        deleted = self.store.delete(event_id)
+        if deleted is None:
+            return {
+                "error": "Event not found",
+                "result": None
+            }
+        
+        # Broadcast WebSocket event
+        try:
+            from ...websocket_manager import get_websocket_manager
+            ws_manager = get_websocket_manager()
+            await ws_manager.broadcast_calendar_event_deleted(event_id)
+            await ws_manager.broadcast_calendar_events_changed()
+        except Exception as e:
+            logger.debug(f"Failed to broadcast calendar event deleted: {e}")
         
         return {
-            "error": "Event not found",
-            "result": None
+            "result": {"deleted": deleted},
+            "error": None
         }
     
     async def _export_calendar(self) -> Dict[str, Any]:
-        """Export calendar as iCal file path."""
-        events = self._load_events()
-        self._update_ical_file(events)
+        """Export calendar as iCal file path (regenerated only if events changed)."""
+        self._ensure_ical_file()
         
         return {
             "result": {
                 "ical_file": str(self.calendar_file),
-                "event_count": len(events)
+                "event_count": self.store.count()
             },
             "error": None
         }
@@ -696,21 +680,11 @@ Extract:
     async def _clear_all_events(self) -> Dict[str, Any]:
         """Clear all events from the calendar."""
         try:
-            # Clear events.json
-            events_file = self.calendar_dir / "events.json"
-            if events_file.exists():
-                with open(events_file, 'w', encoding='utf-8') as f:
-                    json.dump([], f, indent=2)
+            self.store.clear()
             
             # Clear calendar.ics
             if self.calendar_file.exists():
-                with open(self.calendar_file, 'w', encoding='utf-8') as f:
-                    f.write("BEGIN:VCALENDAR\n")
-                    f.write("VERSION:2.0\n")
-                    f.write("PRODID:-//Personal Assistant//Calendar//EN\n")
-                    f.write("CALSCALE:GREGORIAN\n")
-                    f.write("METHOD:PUBLISH\n")
-                    f.write("END:VCALENDAR\n")
+                self._update_ical_file([])
             
             logger.info("Cleared all calendar events")
             return {
@@ -727,11 +701,10 @@ Extract:
                 "result": None
             }
     
-    def _find_overlapping_events(self, events: List[Dict[str, Any]], start_time: datetime, end_time: datetime, exclude_id: Optional[str] = None) -> List[Dict[str, Any]]:
+    def _find_overlapping_events(self, start_time: datetime, end_time: datetime, exclude_id: Optional[str] = None) -> List[Dict[str, Any]]:
         """Find events that overlap with the given time range.
         
         Args:
-            events: List of all events
             start_time: Start time of the event to check
             end_time: End time of the event to check
             exclude_id: Event ID to exclude from check (for updates)
@@ -739,39 +712,23 @@ Extract:
         Returns:
             List of overlapping events
         """
-        conflicts = []
+        if start_time.tzinfo:
+            start_time = start_time.replace(tzinfo=None)
+        if end_time.tzinfo:
+            end_time = end_time.replace(tzinfo=None)
         
-        for event in events:
-            if exclude_id and event.get("id") == exclude_id:
-                continue
-            
+        conflicts = []
+        for event in self.store.find_overlapping(start_time, end_time, exclude_id=exclude_id):
             try:
-                event_start_str = event.get("start_time", "")
-                event_end_str = event.get("end_time", "")
-                
-                if not event_start_str or not event_end_str:
-                    continue
-                
-                # Parse event times
-                event_start = datetime.fromisoformat(event_start_str.replace("Z", "+00:00"))
-                event_end = datetime.fromisoformat(event_end_str.replace("Z", "+00:00"))
-                
-                # Remove timezone for comparison
-                if event_start.tzinfo:
-                    event_start = event_start.replace(tzinfo=None)
-                if event_end.tzinfo:
-                    event_end = event_end.replace(tzinfo=None)
-                
-                # Check for overlap: two events overlap if one starts before the other ends
-                # and ends after the other starts
-                if (start_time < event_end and end_time > event_start):
-                    conflicts.append({
-                        "id": event.get("id"),
-                        "title": event.get("title"),
-                        "start_time": event_start_str,
-                        "end_time": event_end_str,
-                        "overlap_type": self._get_overlap_type(start_time, end_time, event_start, event_end)
-                    })
+                event_start = datetime.fromisoformat(event["start_time"].replace("Z", "+00:00")).replace(tzinfo=None)
+                event_end = datetime.fromisoformat(event["end_time"].replace("Z", "+00:00")).replace(tzinfo=None)
+                conflicts.append({
+                    "id": event.get("id"),
+                    "title": event.get("title"),
+                    "start_time": event["start_time"],
+                    "end_time": event["end_time"],
+                    "overlap_type": self._get_overlap_type(start_time, end_time, event_start, event_end)
+                })
             except Exception as e:
                 logger.warning(f"Error checking overlap for event {event.get('id')}: {e}")
                 continue
@@ -816,31 +773,7 @@ Extract:
         day_start = target_date.replace(hour=0, minute=0, second=0, microsecond=0)
         day_end = target_date.replace(hour=23, minute=59, second=59, microsecond=999999)
         
-        events = self._load_events()
-        deleted_events = []
-        remaining_events = []
-        
-        for event in events:
-            try:
-                event_start_str = event.get("start_time", "")
-                if not event_start_str:
-                    remaining_events.append(event)
-                    continue
-                
-                event_start = datetime.fromisoformat(event_start_str.replace("Z", "+00:00"))
-                if event_start.tzinfo:
-                    event_start = event_start.replace(tzinfo=None)
-                
-                # Check if event is on this date
-                if day_start <= event_start <= day_end:
-                    deleted_events.append(event)
-                else:
-                    remaining_events.append(event)
-            except Exception as e:
-                logger.warning(f"Error processing event for delete_day: {e}")
-                remaining_events.append(event)
-        
-        self._save_events(remaining_events)
+        deleted_events = self.store.delete_range(day_start, day_end)
         
         return {
             "result": {
@@ -883,8 +816,7 @@ Extract:
                     "result": None
                 }
         
-        events = self._load_events()
-        conflicts = self._find_overlapping_events(events, start_time_dt, end_time_dt)
+        conflicts = self._find_overlapping_events(start_time_dt, end_time_dt)
         
         return {
             "result": {
@@ -10,6 +10,17 @@ logger = logging.getLogger(__name__)
 class GoogleSearchTool(BaseTool):
     """Tool for performing web searches and aggregating results."""
     
+    # Identical queries within this window reuse the previous results
+    cache_ttl = 300.0
+    
+    examples = [
+        "Search the web for the latest news about the Mars mission",
+        "Who won the game last night?",
+        "Look up the current price of bitcoin",
+        "What's the weather forecast for Berlin this weekend?",
+        "Find reviews of the new Pixel phone"
+    ]
+    
     @property
     def name(self) -> str:
         return "google_search"
@@ -7,6 +7,16 @@ from ..base_tool import BaseTool
 class TimeTool(BaseTool):
     """Tool for getting current time."""
     
+    # Repeated lookups within a turn return the same time
+    cache_ttl = 1.0
+    
+    examples = [
+        "What time is it?",
+        "What's today's date?",
+        "What day of the week is it today?",
+        "How late is it right now?"
+    ]
+    
     @property
     def name(self) -> str:
         return "get_current_time"
@@ -13,6 +13,22 @@ logger = logging.getLogger(__name__)
 class TodoTool(BaseTool):
     """Tool for managing todo items and tasks."""
     
+    # Actions read-modify-write the todo file, so calls must not overlap
+    parallel_safe = False
+    
+    # Reads are cached until the next write
+    cache_ttl = 60.0
+    _READ_ACTIONS = {"list", "get"}
+    
+    examples = [
+        "Add buy milk to my todo list",
+        "Remind me to call the dentist, put it on my tasks",
+        "What's on my todo list?",
+        "Mark the laundry task as done",
+        "Show my high priority tasks due this week",
+        "Delete the groceries todo"
+    ]
+    
     def __init__(self, todos_dir: Optional[Path] = None):
         """Initialize todo tool.
         
@@ -220,6 +236,12 @@ NEVER call this tool with action="create" without including the title parameter!
         # Return ISO format string
         return result_date.isoformat()
     
+    def is_cacheable(self, arguments: Dict[str, Any]) -> bool:
+        return arguments.get("action") in self._READ_ACTIONS
+    
+    def invalidates(self, arguments: Dict[str, Any]) -> List[str]:
+        return [] if self.is_cacheable(arguments) else [self.name]
+    
     async def execute(self, arguments: Dict[str, Any]) -> Dict[str, Any]:
         """Execute todo tool."""
         action = arguments.get("action")
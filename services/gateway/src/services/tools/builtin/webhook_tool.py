@@ -7,6 +7,12 @@ from ..base_tool import BaseTool
 class WebhookTool(BaseTool):
     """Tool for calling webhooks."""
     
+    examples = [
+        "Call the webhook at https://example.com/hook",
+        "Send a POST request to my home automation webhook",
+        "Trigger the deploy webhook"
+    ]
+    
     @property
     def name(self) -> str:
         return "call_webhook"
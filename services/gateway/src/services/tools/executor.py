@@ -1,7 +1,12 @@
 """Simple tool executor for direct execution."""
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Tuple
+import asyncio
+import copy
 import logging
+from .base_tool import BaseTool
 from .registry import ToolRegistry
+from .result_cache import ToolResultCache, make_cache_key
+from ...config.settings import settings
 
 logger = logging.getLogger(__name__)
 
@@ -9,13 +14,18 @@ logger = logging.getLogger(__name__)
 class ToolExecutor:
     """Simple tool executor - direct execution, no protocol layers."""
 
-    def __init__(self, tool_registry: ToolRegistry):
+    def __init__(self, tool_registry: ToolRegistry, result_cache: Optional[ToolResultCache] = None):
         """Initialize executor with tool registry.
         
         Args:
             tool_registry: Tool registry instance
+            result_cache: Cache for results of cacheable tools (None = no caching)
         """
         self.tool_registry = tool_registry
+        self.result_cache = result_cache
+        self._pending: Dict[Tuple[str, str], asyncio.Future] = {}
+        # One lock per tool that isn't parallel-safe; asyncio.Lock is FIFO so calls keep their order
+        self._serial_locks: Dict[str, asyncio.Lock] = {}
 
     async def execute_tool(
         self,
@@ -45,9 +55,63 @@ class ToolExecutor:
                 "result": None
             }
 
+        if self.result_cache is None or not tool.is_cacheable(parameters):
+            try:
+                return await self._execute(tool, parameters)
+            finally:
+                # Writes invalidate dependent reads even if they failed part-way
+                if self.result_cache is not None:
+                    for stale_tool in tool.invalidates(parameters):
+                        self.result_cache.invalidate_tool(stale_tool)
+
+        cache_key = make_cache_key(tool_name, parameters)
+        cached = self.result_cache.get(cache_key)
+        if cached is not None:
+            logger.info(f"Tool '{tool_name}' result served from cache")
+            return cached
+
+        # Identical calls already running (e.g. in the same turn) share one execution
+        pending = self._pending.get(cache_key)
+        if pending is not None:
+            logger.info(f"Tool '{tool_name}' joined an identical call in flight")
+            return copy.deepcopy(await asyncio.shield(pending))
+
+        generation = self.result_cache.generation(tool_name)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[cache_key] = future
+        try:
+            result = await self._execute(tool, parameters)
+            if result.get("error") is None:
+                self.result_cache.put(cache_key, result, tool.cache_ttl, generation)
+            future.set_result(result)
+            return result
+        finally:
+            self._pending.pop(cache_key, None)
+            if not future.done():
+                # Cancelled (_execute turns other errors into results); don't cancel joined callers too
+                future.set_result({"error": f"Tool '{tool_name}' call was cancelled", "result": None})
+
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Get tool result cache statistics."""
+        if self.result_cache is None:
+            return {"enabled": False}
+        return {"enabled": True, **self.result_cache.get_stats()}
+
+    def clear_cache(self):
+        """Drop all cached tool results."""
+        if self.result_cache is not None:
+            self.result_cache.clear()
+
+    async def _execute(self, tool: BaseTool, parameters: Dict[str, Any]) -> Dict[str, Any]:
+        """Run a tool with its timeout and serialisation, normalising the result."""
+        tool_name = tool.name
         try:
-            # Execute tool directly
-            result = await tool.execute(parameters)
+            if tool.parallel_safe:
+                result = await self._run_with_timeout(tool, parameters)
+            else:
+                lock = self._serial_locks.setdefault(tool_name, asyncio.Lock())
+                async with lock:
+                    result = await self._run_with_timeout(tool, parameters)
             
             # Ensure result has expected format
             if not isinstance(result, dict):
@@ -58,9 +122,29 @@ class ToolExecutor:
             logger.info(f"Tool '{tool_name}' executed successfully")
             return result
             
+        except asyncio.TimeoutError:
+            timeout = self._get_timeout(tool)
+            logger.warning(f"Tool '{tool_name}' timed out after {timeout}s")
+            return {
+                "error": f"Tool '{tool_name}' timed out after {timeout:g} seconds",
+                "result": None
+            }
         except Exception as e:
             logger.error(f"Error executing tool '{tool_name}': {e}", exc_info=True)
             return {
                 "error": str(e),
                 "result": None
             }
+
+    @staticmethod
+    def _get_timeout(tool: BaseTool) -> float:
+        return tool.timeout if tool.timeout is not None else settings.tool_timeout
+
+    async def _run_with_timeout(self, tool: BaseTool, parameters: Dict[str, Any]) -> Any:
+        """Run a tool, cancelling it if it exceeds its timeout.
+        
+        Raises:
+            asyncio.TimeoutError: If the tool didn't finish in time
+        """
+        timeout = self._get_timeout(tool)
+        return await asyncio.wait_for(tool.execute(parameters), timeout=timeout if timeout > 0 else None)
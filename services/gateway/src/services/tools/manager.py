@@ -1,9 +1,14 @@
 """Simple tool manager for OpenAI function calling."""
 from typing import List, Dict, Any, Optional
+import asyncio
+import json
 import logging
 
 from .registry import ToolRegistry
 from .executor import ToolExecutor
+from .result_cache import ToolResultCache
+from .router import ToolRoute, ToolRouter
+from ...config.settings import settings
 
 logger = logging.getLogger(__name__)
 
@@ -18,8 +23,12 @@ class ToolManager:
             memory_store: Optional memory store for tools that need it
         """
         self.registry = ToolRegistry()
-        self.executor = ToolExecutor(self.registry)
+        result_cache = ToolResultCache(settings.tool_cache_max_entries) if settings.tool_cache_enabled else None
+        self.executor = ToolExecutor(self.registry, result_cache)
         self.memory_store = memory_store
+        # Share the memory store's embedding model when there is one
+        vector_store = getattr(memory_store, "vector_store", None)
+        self.router = ToolRouter(self.registry, vector_store.get_embedder if vector_store else None)
         self._initialized = False
     
     async def initialize(self):
@@ -51,6 +60,20 @@ class ToolManager:
         
         return self.registry.list_tools()
     
+    async def route_message(self, message: str) -> ToolRoute:
+        """Decide which tools a user message needs (see ToolRouter).
+        
+        Args:
+            message: User message
+            
+        Returns:
+            ToolRoute with the relevant tools, most relevant first
+        """
+        if not self._initialized:
+            await self.initialize()
+        
+        return await self.router.route(message)
+    
     async def get_tool_schema(self, tool_name: str) -> Optional[Dict[str, Any]]:
         """Get schema for a specific tool in OpenAI format.
         
@@ -101,62 +124,76 @@ class ToolManager:
         if not self._initialized:
             await self.initialize()
         
-        results = []
+        # Independent calls run concurrently; gather keeps results in call order.
+        # Tools that aren't parallel-safe are serialised by the executor.
+        return list(await asyncio.gather(*(
+            self._execute_tool_call(tool_call, conversation_id)
+            for tool_call in tool_calls
+        )))
+    
+    async def _execute_tool_call(
+        self,
+        tool_call: Dict[str, Any],
+        conversation_id: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Execute a single OpenAI-format tool call.
+        
+        Args:
+            tool_call: Tool call dictionary (see execute_tools)
+            conversation_id: Optional conversation ID for context
+            
+        Returns:
+            Tool execution result in the execute_tools format (never raises)
+        """
+        # Parse OpenAI format tool call
+        tool_call_id = tool_call.get("id")
+        function_data = tool_call.get("function", {})
+        tool_name = function_data.get("name")
+        arguments_str = function_data.get("arguments", "{}")
+        
+        # Parse arguments (OpenAI sends as JSON string)
+        arguments = {}
+        try:
+            if isinstance(arguments_str, str):
+                arguments = json.loads(arguments_str)
+            else:
+                arguments = arguments_str
+        except json.JSONDecodeError as e:
+            logger.error(f"Failed to parse arguments for tool '{tool_name}': {e}")
+            return {
+                "id": tool_call_id,
+                "name": tool_name,
+                "success": False,
+                "result": None,
+                "error": f"Invalid JSON arguments: {str(e)}",
+                "arguments": {}  # Empty dict if parsing failed
+            }
         
-        for tool_call in tool_calls:
-            # Parse OpenAI format tool call
-            tool_call_id = tool_call.get("id")
-            function_data = tool_call.get("function", {})
-            tool_name = function_data.get("name")
-            arguments_str = function_data.get("arguments", "{}")
+        # Execute tool
+        try:
+            execution_result = await self.executor.execute_tool(
+                tool_name=tool_name,
+                parameters=arguments,
+                conversation_id=conversation_id
+            )
             
-            # Parse arguments (OpenAI sends as JSON string)
-            import json
-            arguments = {}
-            try:
-                if isinstance(arguments_str, str):
-                    arguments = json.loads(arguments_str)
-                else:
-                    arguments = arguments_str
-            except json.JSONDecodeError as e:
-                logger.error(f"Failed to parse arguments for tool '{tool_name}': {e}")
-                results.append({
-                    "id": tool_call_id,
-                    "name": tool_name,
-                    "success": False,
-                    "result": None,
-                    "error": f"Invalid JSON arguments: {str(e)}",
-                    "arguments": {}  # Empty dict if parsing failed
-                })
-                continue
+            # Format result with arguments included
+            return {
+                "id": tool_call_id,
+                "name": tool_name,
+                "success": execution_result.get("error") is None,
+                "result": execution_result.get("result"),
+                "error": execution_result.get("error"),
+                "arguments": arguments  # Include original arguments for tool result messages
+            }
             
-            # Execute tool
-            try:
-                execution_result = await self.executor.execute_tool(
-                    tool_name=tool_name,
-                    parameters=arguments,
-                    conversation_id=conversation_id
-                )
-                
-                # Format result with arguments included
-                results.append({
-                    "id": tool_call_id,
-                    "name": tool_name,
-                    "success": execution_result.get("error") is None,
-                    "result": execution_result.get("result"),
-                    "error": execution_result.get("error"),
-                    "arguments": arguments  # Include original arguments for tool result messages
-                })
-                
-            except Exception as e:
-                logger.error(f"Error executing tool '{tool_name}': {e}", exc_info=True)
-                results.append({
-                    "id": tool_call_id,
-                    "name": tool_name,
-                    "success": False,
-                    "result": None,
-                    "error": str(e),
-                    "arguments": arguments  # Include arguments (always available here)
-                })
-        
-        return results
+        except Exception as e:
+            logger.error(f"Error executing tool '{tool_name}': {e}", exc_info=True)
+            return {
+                "id": tool_call_id,
+                "name": tool_name,
+                "success": False,
+                "result": None,
+                "error": str(e),
+                "arguments": arguments  # Include arguments (always available here)
+            }
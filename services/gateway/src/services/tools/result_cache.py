@@ -0,0 +1,124 @@
+"""TTL cache for results of idempotent tool calls."""
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+import copy
+import json
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+def make_cache_key(tool_name: str, arguments: Dict[str, Any]) -> Tuple[str, str]:
+    """Build a cache key from a tool name and canonicalised arguments.
+    
+    Arguments are serialised with sorted keys so that calls differing only in
+    key order share an entry.
+    """
+    return tool_name, json.dumps(arguments, sort_keys=True, separators=(",", ":"), default=str)
+
+
+class ToolResultCache:
+    """LRU cache of tool results with a per-entry expiry.
+    
+    Each tool has a generation counter that invalidate_tool() bumps. Callers
+    read the generation before executing a tool and pass it to put(), so a
+    result computed before a write finished is never stored afterwards.
+    """
+    
+    def __init__(self, max_entries: int = 256):
+        """Initialize the cache.
+        
+        Args:
+            max_entries: Maximum number of cached results
+        """
+        self.max_entries = max(1, max_entries)
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._generations: Dict[str, int] = {}
+        self._epoch = 0  # Bumped by clear(); part of every tool's generation
+        self._stats: Dict[str, Dict[str, int]] = {}
+    
+    def get(self, key: Tuple[str, str]) -> Optional[Dict[str, Any]]:
+        """Get a cached result if present and not expired.
+        
+        Args:
+            key: Key from make_cache_key
+        
+        Returns:
+            Copy of the cached result, or None on a miss
+        """
+        stats = self._tool_stats(key[0])
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] <= time.monotonic():
+            del self._entries[key]
+            entry = None
+        if entry is None:
+            stats["misses"] += 1
+            return None
+        stats["hits"] += 1
+        self._entries.move_to_end(key)
+        return copy.deepcopy(entry[1])
+    
+    def put(self, key: Tuple[str, str], result: Dict[str, Any], ttl: float, generation: int):
+        """Cache a result.
+        
+        Args:
+            key: Key from make_cache_key
+            result: Tool result to cache
+            ttl: Seconds the result stays valid
+            generation: Value of generation(tool) read before the tool was executed
+        """
+        if ttl <= 0 or generation != self.generation(key[0]):
+            return
+        self._entries[key] = (time.monotonic() + ttl, copy.deepcopy(result))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+    
+    def generation(self, tool_name: str) -> int:
+        """Get the current invalidation generation of a tool."""
+        return self._epoch + self._generations.get(tool_name, 0)
+    
+    def invalidate_tool(self, tool_name: str) -> int:
+        """Drop all cached results of a tool.
+        
+        Returns:
+            Number of entries removed
+        """
+        self._generations[tool_name] = self._generations.get(tool_name, 0) + 1
+        stale = [key for key in self._entries if key[0] == tool_name]
+        for key in stale:
+            del self._entries[key]
+        self._tool_stats(tool_name)["invalidations"] += 1
+        if stale:
+            logger.debug(f"[TOOL CACHE] Invalidated {len(stale)} cached result(s) of '{tool_name}'")
+        return len(stale)
+    
+    def clear(self):
+        """Drop every cached result."""
+        self._epoch += 1
+        self._entries.clear()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache statistics.
+        
+        Returns:
+            Dictionary with entry count, overall hit rate and per-tool counters
+        """
+        hits = sum(stats["hits"] for stats in self._stats.values())
+        misses = sum(stats["misses"] for stats in self._stats.values())
+        lookups = hits + misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / lookups, 3) if lookups else None,
+            "tools": {name: dict(stats) for name, stats in self._stats.items()}
+        }
+    
+    def _tool_stats(self, tool_name: str) -> Dict[str, int]:
+        stats = self._stats.get(tool_name)
+        if stats is None:
+            stats = self._stats[tool_name] = {"hits": 0, "misses": 0, "invalidations": 0}
+        return stats
@@ -0,0 +1,202 @@
+"""Embedding-based routing of user messages to tools."""
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import asyncio
+import logging
+import time
+
+import numpy as np
+
+from .base_tool import BaseTool
+from .registry import ToolRegistry
+from ...config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# How far below tool_router_threshold a tool with loosely related examples may be calibrated
+_CALIBRATION_SLACK = 0.1
+
+
+@dataclass
+class ToolRoute:
+    """Routing decision for one user message."""
+    needs_tools: bool
+    tools: List[str]  # Tools to offer, most relevant first
+    scores: Dict[str, float] = field(default_factory=dict)  # Best similarity per tool
+    elapsed_ms: float = 0.0
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to dictionary for JSON serialization."""
+        return {
+            "needs_tools": self.needs_tools,
+            "tools": self.tools,
+            "scores": self.scores,
+            "elapsed_ms": self.elapsed_ms
+        }
+
+
+class ToolRouter:
+    """Decides which tools a user message needs by embedding similarity.
+    
+    Each tool is represented by its name and the first line of its description
+    plus its example requests (BaseTool.examples). These are embedded once and
+    re-embedded only when the registered tools or the embedding model change.
+    A message scores its best cosine similarity against each tool's texts; a
+    tool is relevant when that clears the tool's threshold.
+    
+    Thresholds start at settings.tool_router_threshold and are calibrated per
+    tool: a tool whose own examples are only loosely similar to each other
+    (a broad tool such as web search) gets its threshold lowered to that
+    similarity, by at most _CALIBRATION_SLACK.
+    """
+    
+    def __init__(
+        self,
+        registry: ToolRegistry,
+        embedder_provider: Optional[Callable[[], Any]] = None,
+        threshold: Optional[float] = None,
+        max_tools: Optional[int] = None
+    ):
+        """Initialize the router.
+        
+        Args:
+            registry: Registry whose tools are routed to
+            embedder_provider: Returns the EmbeddingModel to use (None = the process-wide shared one)
+            threshold: Base similarity threshold (default: settings.tool_router_threshold)
+            max_tools: Most tools offered per message, 0 = all relevant
+                (default: settings.tool_router_max_tools)
+        """
+        self.registry = registry
+        self.threshold = threshold if threshold is not None else settings.tool_router_threshold
+        self.max_tools = max_tools if max_tools is not None else settings.tool_router_max_tools
+        self._embedder_provider = embedder_provider
+        self._index: Optional[np.ndarray] = None  # Normalised embeddings, one row per tool text
+        self._owners: List[str] = []  # Tool name of each index row
+        self._thresholds: Dict[str, float] = {}
+        self._signature: Optional[Tuple[Any, ...]] = None  # Embedding model and tools the index was built for
+        self._build_lock = asyncio.Lock()
+        self._stats = {"routed": 0, "with_tools": 0, "errors": 0, "index_builds": 0}
+    
+    def _get_embedder(self):
+        if self._embedder_provider is not None:
+            return self._embedder_provider()
+        from ..memory.embeddings import get_embedder
+        return get_embedder()
+    
+    @staticmethod
+    def _tool_texts(tool: BaseTool) -> List[str]:
+        """Texts that represent a tool in the index."""
+        summary = tool.description.strip().splitlines()[0] if tool.description.strip() else ""
+        return [f"{tool.name.replace('_', ' ')}: {summary}", *tool.examples]
+    
+    @staticmethod
+    def _normalise(vectors: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+    
+    async def _ensure_index(self, embedder):
+        """Embed the tool texts if the tools or the embedding model changed."""
+        signature = (embedder.model_name, tuple(sorted(self.registry.tools)))
+        if signature == self._signature:
+            return
+        async with self._build_lock:
+            if signature == self._signature:
+                return
+            texts: List[str] = []
+            owners: List[str] = []
+            for tool in self.registry.tools.values():
+                for text in self._tool_texts(tool):
+                    texts.append(text)
+                    owners.append(tool.name)
+            
+            started = time.perf_counter()
+            vectors = self._normalise(np.asarray(await embedder.encode(texts), dtype=np.float32)) if texts else None
+            self._index = vectors
+            self._owners = owners
+            self._thresholds = self._calibrate(vectors, owners) if vectors is not None else {}
+            self._signature = signature
+            self._stats["index_builds"] += 1
+            logger.info(f"[TOOL ROUTER] Indexed {len(texts)} texts for {len(self._thresholds)} tools "
+                        f"in {(time.perf_counter() - started) * 1000:.0f}ms")
+    
+    def _calibrate(self, vectors: np.ndarray, owners: List[str]) -> Dict[str, float]:
+        """Per-tool thresholds from how similar each tool's own texts are to each other."""
+        owner_array = np.array(owners)
+        similarities = vectors @ vectors.T
+        thresholds = {}
+        for name in dict.fromkeys(owners):
+            rows = np.flatnonzero(owner_array == name)
+            threshold = self.threshold
+            if len(rows) >= 2:
+                own = similarities[np.ix_(rows, rows)]
+                np.fill_diagonal(own, -1.0)
+                # Each text's best match among the tool's other texts; the weakest one bounds the threshold
+                weakest = float(own.max(axis=1).min())
+                threshold = max(self.threshold - _CALIBRATION_SLACK, min(self.threshold, weakest))
+            thresholds[name] = round(threshold, 3)
+        return thresholds
+    
+    async def route(self, message: str) -> ToolRoute:
+        """Score a message against the tools.
+        
+        Args:
+            message: User message
+        
+        Returns:
+            ToolRoute with the relevant tools (most relevant first, at most
+            max_tools). If embedding fails every tool is offered, as the LLM
+            pre-check did when it failed.
+        """
+        started = time.perf_counter()
+        self._stats["routed"] += 1
+        try:
+            embedder = self._get_embedder()
+            await self._ensure_index(embedder)
+            if self._index is None:
+                return ToolRoute(needs_tools=False, tools=[], elapsed_ms=round((time.perf_counter() - started) * 1000, 2))
+            query = self._normalise(np.asarray(await embedder.encode(message), dtype=np.float32).reshape(-1))
+            similarities = self._index @ query
+        except Exception as e:
+            self._stats["errors"] += 1
+            logger.warning(f"[TOOL ROUTER] Routing failed: {e}, offering all tools")
+            return ToolRoute(
+                needs_tools=True,
+                tools=list(self.registry.tools),
+                elapsed_ms=round((time.perf_counter() - started) * 1000, 2)
+            )
+        
+        scores: Dict[str, float] = {}
+        for owner, similarity in zip(self._owners, similarities):
+            scores[owner] = max(scores.get(owner, -1.0), float(similarity))
+        relevant = sorted(
+            (name for name, score in scores.items() if score >= self._thresholds.get(name, self.threshold)),
+            key=lambda name: scores[name],
+            reverse=True
+        )
+        if self.max_tools > 0:
+            relevant = relevant[:self.max_tools]
+        
+        if relevant:
+            self._stats["with_tools"] += 1
+        route = ToolRoute(
+            needs_tools=bool(relevant),
+            tools=relevant,
+            scores={name: round(score, 3) for name, score in sorted(scores.items(), key=lambda item: -item[1])},
+            elapsed_ms=round((time.perf_counter() - started) * 1000, 2)
+        )
+        logger.debug(f"[TOOL ROUTER] {route.tools or 'no tools'} for message (scores: {route.scores})")
+        return route
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get router statistics.
+        
+        Returns:
+            Dictionary with counters, the base threshold and calibrated per-tool thresholds
+        """
+        return {
+            **self._stats,
+            "threshold": self.threshold,
+            "max_tools": self.max_tools,
+            "indexed_texts": len(self._owners),
+            "thresholds": dict(self._thresholds)
+        }
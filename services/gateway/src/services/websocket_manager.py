@@ -41,7 +41,7 @@ class WebSocketManager:
             "payload": status,
             "timestamp": datetime.utcnow().isoformat()
         }
-        await self._get_connection_manager().broadcast(message)
+        await self._get_connection_manager().broadcast(message, coalesce_key="service_status_changed")
         logger.debug("Broadcasted service_status_changed event")
     
     async def broadcast_download_progress(self, download_id: str, progress: Dict[str, Any]):
@@ -55,7 +55,8 @@ class WebSocketManager:
             },
             "timestamp": datetime.utcnow().isoformat()
         }
-        await self._get_connection_manager().broadcast(message)
+        # Only the latest progress matters to a client that has fallen behind
+        await self._get_connection_manager().broadcast(message, coalesce_key=f"download_progress:{download_id}")
         logger.debug(f"Broadcasted download_progress event for {download_id}")
     
     async def broadcast_download_completed(self, download_id: str, result: Dict[str, Any]):
@@ -110,7 +111,7 @@ class WebSocketManager:
             },
             "timestamp": datetime.utcnow().isoformat()
         }
-        await self._get_connection_manager().broadcast(message)
+        await self._get_connection_manager().broadcast(message, coalesce_key=f"model_status_changed:{model_id}")
         logger.debug(f"Broadcasted model_status_changed event for {model_id}")
     
     async def broadcast_conversation_created(self, conversation: Dict[str, Any]):
@@ -265,7 +266,7 @@ class WebSocketManager:
             "payload": debug_info,
             "timestamp": datetime.utcnow().isoformat()
         }
-        await self._get_connection_manager().broadcast(message)
+        await self._get_connection_manager().broadcast(message, coalesce_key="debug_info_updated")
         logger.debug("Broadcasted debug_info_updated event")
 
 